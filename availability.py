@@ -0,0 +1,101 @@
+"""
+Wyszukiwanie wolnego czasu na podstawie map bitowych minut
+
+Każdy dzień to liczba całkowita o 1440 bitach - bit i oznacza, że minuta i
+od północy jest zajęta. Zajęte przedziały są sumowane operacją OR na
+maskach całych przedziałów (jedna operacja na wydarzenie zamiast pętli po
+minutach), a wolne okna odczytuje się z przejść 0/1 w masce.
+"""
+
+from datetime import date, timedelta
+
+from interval_index import MINUTES_PER_DAY, time_to_minutes
+
+FULL_DAY = (1 << MINUTES_PER_DAY) - 1
+
+
+def interval_mask(start_minute, end_minute):
+    """Maska bitowa minut [start_minute, end_minute) w obrębie dnia"""
+    start_minute = max(start_minute, 0)
+    end_minute = min(end_minute, MINUTES_PER_DAY)
+    if end_minute <= start_minute:
+        return 0
+    return ((1 << (end_minute - start_minute)) - 1) << start_minute
+
+
+def working_hours_mask(work_start="00:00", work_end="24:00"):
+    """Maska minut dostępnych do planowania (np. godziny pracy 09:00-17:00)"""
+    return interval_mask(time_to_minutes(work_start), time_to_minutes(work_end))
+
+
+def _runs(mask):
+    """Zwraca ciągłe przedziały [start, end) ustawionych bitów maski"""
+    runs = []
+    offset = 0
+    while mask:
+        # Pomiń zera, potem zmierz długość ciągu jedynek
+        zeros = (mask & -mask).bit_length() - 1
+        mask >>= zeros
+        offset += zeros
+        ones = (~mask & (mask + 1)).bit_length() - 1
+        runs.append((offset, offset + ones))
+        mask >>= ones
+        offset += ones
+    return runs
+
+
+def minutes_to_time(minutes):
+    """Zamienia liczbę minut od północy na 'HH:MM' (1440 -> '24:00')"""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+class AvailabilityMap:
+    """Mapy zajętości dni z zakresu dat [start_date, end_date]"""
+    
+    def __init__(self, start_date, end_date):
+        self.start_date = start_date
+        self.end_date = end_date
+        self._busy = {}
+    
+    def add_busy(self, event_date, start_minute, end_minute):
+        """Oznacza przedział jako zajęty; minuty poza dniem przechodzą na kolejne dni"""
+        day = event_date
+        while end_minute > 0 and day <= self.end_date:
+            if day >= self.start_date:
+                mask = interval_mask(start_minute, end_minute)
+                if mask:
+                    self._busy[day] = self._busy.get(day, 0) | mask
+            start_minute -= MINUTES_PER_DAY
+            end_minute -= MINUTES_PER_DAY
+            day += timedelta(days=1)
+    
+    def busy_mask(self, day):
+        return self._busy.get(day, 0)
+    
+    def free_slots(self, min_duration, allowed_mask=FULL_DAY, weekdays=None):
+        """Wolne okna o długości co najmniej min_duration minut
+        
+        allowed_mask ogranicza dostępne minuty (np. godziny pracy), a weekdays
+        - zbiór numerów dni tygodnia (0 = poniedziałek). Zwraca listę
+        (data, start_minute, end_minute) w kolejności chronologicznej.
+        """
+        slots = []
+        day = self.start_date
+        while day <= self.end_date:
+            if weekdays is None or day.weekday() in weekdays:
+                free = allowed_mask & ~self._busy.get(day, 0)
+                for start, end in _runs(free):
+                    if end - start >= min_duration:
+                        slots.append((day, start, end))
+            day += timedelta(days=1)
+        return slots
+
+
+def build_availability(events, start_date, end_date):
+    """Buduje mapę zajętości z wydarzeń (EventRecord, także wielodniowych i całodniowych)"""
+    availability = AvailabilityMap(start_date, end_date)
+    for event in events:
+        start, end = event.interval()
+        day_start = event.day * MINUTES_PER_DAY
+        availability.add_busy(date.fromordinal(event.day), start - day_start, end - day_start)
+    return availability
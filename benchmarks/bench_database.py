@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Mikro-benchmark DatabaseManager: nowe połączenie na każde wywołanie
+(zachowanie sprzed puli) vs długożyjące połączenia z ConnectionPool.
+
+Uruchomienie:
+    python benchmarks/bench_database.py [liczba_wydarzeń]
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DatabaseManager
+
+
+class PerCallConnections:
+    """Odtwarza stare zachowanie: sqlite3.connect() przy każdym wywołaniu"""
+    
+    def __init__(self, db_path):
+        self.db_path = db_path
+    
+    def get_connection(self):
+        return sqlite3.connect(self.db_path)
+    
+    @contextmanager
+    def transaction(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+    
+    def close_all(self):
+        pass
+
+
+def populate(db, count):
+    """Wypełnia bazę przykładowymi wydarzeniami"""
+    with db.pool.transaction() as conn:
+        conn.executemany('''
+            INSERT INTO events (date, start_time, end_time, title, description)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (
+            (f"2025-{(i % 12) + 1:02d}-{(i % 28) + 1:02d}", f"{i % 24:02d}:00",
+             f"{i % 24:02d}:30", f"Spotkanie {i}", "Opis wydarzenia")
+            for i in range(count)
+        ))
+
+
+def measure(func, seconds=1.0):
+    """Wywołuje func w pętli przez zadany czas i zwraca liczbę operacji/s"""
+    calls = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while time.perf_counter() < deadline:
+        func(calls)
+        calls += 1
+    return calls / (time.perf_counter() - start)
+
+
+def run_suite(db):
+    """Zwraca słownik {operacja: ops/s} dla głównych metod"""
+    return {
+        "get_events_for_date": measure(lambda i: db.get_events_for_date(
+            f"2025-07-{(i % 28) + 1:02d}")),
+        "get_events_for_month": measure(lambda i: db.get_events_for_month(
+            2025, (i % 12) + 1)),
+        "get_event_by_id": measure(lambda i: db.get_event_by_id(i + 1)),
+        "search_events": measure(lambda i: db.search_events("Spotkanie 1")),
+        # Zapisy na końcu, żeby nie zmieniały rozmiaru danych dla odczytów
+        "add_event": measure(lambda i: db.add_event(
+            "2025-07-15", "10:00", "11:00", f"Nowe {i}", "")),
+    }
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {}
+        for label, pooled in (("przed (connect per call)", False), ("po (ConnectionPool)", True)):
+            path = os.path.join(tmp, f"{'pooled' if pooled else 'plain'}.db")
+            if pooled:
+                db = DatabaseManager(path)
+            else:
+                # Stara baza działała w domyślnym trybie journal=DELETE
+                db = DatabaseManager(path, pool=PerCallConnections(path))
+            populate(db, count)
+            results[label] = run_suite(db)
+            db.close()
+    
+    before, after = results.values()
+    print(f"Liczba wydarzeń w bazie: {count}")
+    print(f"{'operacja':<24}{'przed ops/s':>14}{'po ops/s':>14}{'zysk':>9}")
+    for op in before:
+        print(f"{op:<24}{before[op]:>14.0f}{after[op]:>14.0f}{after[op] / before[op]:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
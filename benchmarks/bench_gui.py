@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Benchmark przerysowania interfejsu Tkinter (calendar_gui.CalendarGUI).
+
+Bieżący miesiąc z N wydarzeniami dziennie (domyślnie 200); mierzy czas od
+kliknięcia do narysowania (komenda przycisku, zapytania w tle i pętla
+zdarzeń Tk aż do dostarczenia wyników) oraz najdłuższą klatkę - najdłuższy
+czas, przez który wątek Tk nie obsługiwał zdarzeń (cel: poniżej 16 ms):
+- wybór innego dnia - przyrostowo, z modelu miesiąca,
+- wybór dnia z pełnym przerysowaniem (model i widżety wyczyszczone, jak
+  przed wprowadzeniem modelu - zapytanie, 42 komórki, wszystkie wiersze),
+- przejście do następnego/poprzedniego miesiąca,
+- odświeżenie po edycji jednego wydarzenia,
+- wyszukiwanie w tle,
+oraz liczbę zapytań do bazy w każdym scenariuszu.
+
+Wymaga ekranu - bez serwera X pod Xvfb:
+    xvfb-run -a python benchmarks/bench_gui.py [wydarzeń_dziennie] [powtórzeń]
+"""
+
+import calendar
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tkinter as tk
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calendar_gui import CalendarGUI
+from event_manager import EventManager
+
+
+class CountingManager:
+    """EventManager liczący wywołania metod odczytu (get_*)"""
+    
+    def __init__(self, event_manager):
+        self._event_manager = event_manager
+        self.queries = 0
+    
+    def __getattr__(self, name):
+        attribute = getattr(self._event_manager, name)
+        if not name.startswith("get_"):
+            return attribute
+        
+        def counted(*args, **kwargs):
+            self.queries += 1
+            return attribute(*args, **kwargs)
+        return counted
+
+
+def populate(event_manager, year, month, per_day):
+    """Wydarzenia co 5 minut od 6:00 w każdym dniu miesiąca"""
+    rows = []
+    for day in range(1, calendar.monthrange(year, month)[1] + 1):
+        event_date = date(year, month, day).isoformat()
+        for i in range(per_day):
+            start = 360 + i * 5
+            end = start + 4
+            rows.append((event_date, f"{start // 60:02d}:{start % 60:02d}", f"{end // 60:02d}:{end % 60:02d}",
+                         f"Spotkanie {day}/{i}", "Opis" if i % 3 else ""))
+    event_manager.db.add_events_bulk(rows)
+    return len(rows)
+
+
+def reset_view(gui):
+    """Zapomina model i stan widżetów - następne rysowanie jest pełne, jak bez modelu"""
+    gui.loaded_month = None
+    gui.requested_month = None
+    gui.cells.clear()
+    if gui.tree_order:
+        gui.events_tree.delete(*gui.tree_order)
+    gui.tree_rows.clear()
+    gui.tree_order = []
+    gui.date_label_text = None
+
+
+def measure(gui, manager, repeats, prepare, action):
+    """Czasy (ms) akcji zakończonej narysowaniem, najdłuższa klatka (ms) i średnia liczba zapytań na akcję"""
+    gui.root.update()
+    times = []
+    longest_frame = 0
+    queries = manager.queries
+    for i in range(repeats):
+        prepare(i)
+        start = frame_start = time.perf_counter()
+        action(i)
+        while True:
+            gui.root.update()
+            now = time.perf_counter()
+            longest_frame = max(longest_frame, now - frame_start)
+            if not gui.tasks.busy:
+                break
+            time.sleep(0.001)
+            frame_start = time.perf_counter()
+        times.append((now - start) * 1000)
+    return times, longest_frame * 1000, (manager.queries - queries) / repeats
+
+
+def main():
+    per_day = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"Brak ekranu ({e}) - uruchom pod Xvfb: xvfb-run -a python benchmarks/bench_gui.py")
+        sys.exit(1)
+    
+    rng = random.Random(21)
+    with tempfile.TemporaryDirectory() as directory:
+        event_manager = EventManager(os.path.join(directory, "calendar.db"))
+        today = date.today()
+        count = populate(event_manager, today.year, today.month, per_day)
+        manager = CountingManager(event_manager)
+        gui = CalendarGUI(root, event_manager=manager)
+        days_in_month = calendar.monthrange(today.year, today.month)[1]
+        days = [date(today.year, today.month, rng.randrange(1, days_in_month + 1)) for _ in range(repeats)]
+        
+        def cell_of(day_date):
+            for week_num, week in enumerate(calendar.monthcalendar(day_date.year, day_date.month)):
+                if day_date.day in week:
+                    return week_num, week.index(day_date.day)
+        
+        def click(i):
+            gui.day_buttons[cell_of(days[i])].invoke()
+        
+        def edit(i):
+            event = gui.month_events[gui.selected_date.isoformat()][i % per_day]
+            gui.tasks.submit_write(
+                lambda: event_manager.update_event(event.id, event.start_time, event.end_time, f"Zmienione {i}", ""),
+                lambda result: gui.refresh())
+        
+        def navigate(i):
+            (gui.next_month if i % 2 == 0 else gui.prev_month)()
+        
+        def search(i):
+            gui.tasks.submit("search", lambda: event_manager.search_events(f"Spotkanie {i % 28 + 1}"),
+                             lambda results: None)
+        
+        results = [
+            ("wybór dnia (przyrostowo)", measure(gui, manager, repeats, lambda i: None, click)),
+            ("wybór dnia (pełne przerysowanie)", measure(gui, manager, repeats, lambda i: reset_view(gui), click)),
+            ("następny/poprzedni miesiąc", measure(gui, manager, repeats, lambda i: None, navigate)),
+            ("odświeżenie po edycji", measure(gui, manager, repeats, lambda i: None, edit)),
+            ("wyszukiwanie w tle", measure(gui, manager, repeats, lambda i: None, search)),
+        ]
+        
+        print(f"{count} wydarzeń ({per_day} dziennie), powtórzeń: {repeats}")
+        print(f"{'':>34}{'mediana (ms)':>14}{'p95 (ms)':>10}{'najdł. klatka (ms)':>20}{'zapytań':>9}")
+        for name, (times, longest_frame, queries) in results:
+            p95 = sorted(times)[max(0, int(len(times) * 0.95) - 1)]
+            print(f"{name:>34}{statistics.median(times):>14.2f}{p95:>10.2f}{longest_frame:>20.2f}{queries:>9.1f}")
+        gui.close()
+        event_manager.db.close()
+
+
+if __name__ == "__main__":
+    main()
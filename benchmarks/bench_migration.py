@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Benchmark migracji do całkowitych znaczników czasu (start_ts/end_ts).
+
+Buduje bazę w schemacie sprzed migracji (wersja 0, tekstowe daty i godziny,
+indeks idx_events_date_start, bez dat końca), otwiera ją przez
+DatabaseManager i mierzy:
+- czas migracji w tle i najdłuższy zapis aplikacji w jej trakcie,
+- czy wypełnianie kolumn (także dat końca wydarzeń trwających po północy)
+  nie zapisało zmian w dzienniku,
+- zapytania miesiąca, dnia i podsumowania: tekstowe kolumny kontra start_ts,
+- walidację godzin: strptime kontra parse_time.
+
+Uruchomienie:
+    python benchmarks/bench_migration.py [liczba_wydarzeń]    # domyślnie 200000
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import change_log
+import daily_totals
+import span_index
+from database import DatabaseManager
+from event_record import parse_time
+from migrations import set_schema_version
+
+FIRST_DAY = date(2024, 1, 1)
+REPEAT = 5
+# Co który wiersz trwa po północy (godzina końcowa wcześniejsza niż początkowa)
+OVERNIGHT_EVERY = 50
+
+
+def build_old_database(path, count):
+    """Baza z wydarzeniami w schemacie wersji 0 (przed kolumnami start_ts/end_ts, chwilami UTC, datami końca
+    i sumami dziennymi)"""
+    DatabaseManager(path, background_migrations=False).close()
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("BEGIN")
+    span_index.drop_span_index(conn)
+    daily_totals.drop_daily_totals(conn)
+    # Triggery dziennika bez dat końca, a UPDATE dla wszystkich kolumn - jak przed migracją 2
+    for table, kind in (("events", change_log.KIND_EVENT), ("recurring_events", change_log.KIND_SERIES)):
+        change_log.replace_triggers(conn, table, kind)
+    for index in ("idx_events_start_ts", "idx_events_date_ts", "idx_events_utc", "idx_events_multi_day"):
+        conn.execute(f"DROP INDEX {index}")
+    for column in ("start_ts", "end_ts", "tz", "start_utc", "end_utc", "end_date", "all_day"):
+        conn.execute(f"ALTER TABLE events DROP COLUMN {column}")
+    for column in ("end_date", "old_end_date"):
+        conn.execute(f"ALTER TABLE {change_log.CHANGES_TABLE} DROP COLUMN {column}")
+    conn.execute("CREATE INDEX idx_events_date_start ON events(date, start_time, end_time)")
+    set_schema_version(conn, 0)
+    conn.executemany(
+        "INSERT INTO events (date, start_time, end_time, title, description) VALUES (?, ?, ?, ?, ?)",
+        [((FIRST_DAY + timedelta(days=i % 730)).isoformat(), f"{7 + i % 12:02d}:{i % 4 * 15:02d}",
+          "01:00" if i % OVERNIGHT_EVERY == 0 else f"{8 + i % 12:02d}:00", f"Spotkanie {i % 500}", "")
+         for i in range(count)])
+    conn.execute("COMMIT")
+    conn.close()
+
+
+def change_count(db):
+    return db.pool.get_connection().execute(f"SELECT COUNT(*) FROM {change_log.CHANGES_TABLE}").fetchone()[0]
+
+
+def migrate_online(path, count):
+    """Otwiera starą bazę i zapisuje wydarzenia, dopóki migracja trwa w tle"""
+    start = time.perf_counter()
+    db = DatabaseManager(path)
+    opened = time.perf_counter() - start
+    changes_before = change_count(db)
+    
+    latencies = []
+    thread = db.migrator._thread
+    while thread is not None and thread.is_alive():
+        write_start = time.perf_counter()
+        db.add_event("2025-06-15", "12:00", "12:30", "Zapis w trakcie migracji", "")
+        latencies.append(time.perf_counter() - write_start)
+        time.sleep(0.001)
+    total = time.perf_counter() - start
+    
+    assert db.integer_times and db.utc_times and db.spans
+    assert change_count(db) - changes_before == len(latencies), "backfill zapisał zmiany w dzienniku"
+    conn = db.pool.get_connection()
+    missing = conn.execute("SELECT COUNT(*) FROM events WHERE start_ts IS NULL OR start_utc IS NULL").fetchone()[0]
+    assert missing == 0
+    overnight = conn.execute("SELECT COUNT(*) FROM events WHERE end_date IS NOT NULL").fetchone()[0]
+    assert overnight == (count + OVERNIGHT_EVERY - 1) // OVERNIGHT_EVERY, overnight
+    # Sumy dzienne: wypełnione porcjami i poprawione przez zapisy w trakcie migracji
+    assert db.daily_totals
+    single_day = conn.execute(f"SELECT SUM(event_count) FROM {daily_totals.TOTALS_TABLE}").fetchone()[0]
+    assert single_day == count - overnight + len(latencies), single_day
+    return db, opened, total, latencies
+
+
+def timed(operation):
+    """Średni czas jednego wywołania w ms"""
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        operation()
+    return (time.perf_counter() - start) * 1000 / REPEAT
+
+
+def compare_queries(db):
+    """Te same zapytania po kolumnach tekstowych (z ich indeksem) i po start_ts (podsumowania z sum dziennych)"""
+    conn = db.pool.get_connection()
+    conn.execute("CREATE INDEX idx_events_date_start ON events(date, start_time, end_time)")
+    queries = {
+        "miesiąc (liczniki)": lambda: db.get_events_for_month(2024, 6),
+        "dzień": lambda: db.get_events_for_date("2024-06-14"),
+        "podsumowanie roku": lambda: db.get_daily_summary("2024-01-01", "2025-01-01"),
+        "zakres 3 miesięcy": lambda: list(db.get_events_between("2024-03-01", "2024-06-01")),
+    }
+    results = []
+    for name, query in queries.items():
+        db.integer_times = db.daily_totals = False
+        text_result = query()
+        text_time = timed(query)
+        db.integer_times = db.daily_totals = True
+        assert query() == text_result, name
+        results.append((name, text_time, timed(query)))
+    conn.execute("DROP INDEX idx_events_date_start")
+    return results
+
+
+def compare_validation(count=100000):
+    times = [f"{i % 24:02d}:{i % 60:02d}" for i in range(count)]
+    start = time.perf_counter()
+    for text in times:
+        datetime.strptime(text, "%H:%M")
+    strptime_time = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    for text in times:
+        parse_time(text)
+    return count, strptime_time, (time.perf_counter() - start) * 1000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "calendar.db")
+        build_old_database(path, count)
+        db, opened, total, latencies = migrate_online(path, count)
+        
+        print(f"{count} wydarzeń")
+        print(f"otwarcie bazy (migracje schematu + 1. porcja): {opened * 1000:.1f} ms")
+        print(f"migracja w tle razem: {total * 1000:.0f} ms, zapisów w trakcie: {len(latencies)}, "
+              f"najdłuższy zapis: {max(latencies, default=0) * 1000:.1f} ms")
+        
+        print(f"\n{'':>22}{'tekst (ms)':>14}{'start_ts (ms)':>16}")
+        for name, text_time, integer_time in compare_queries(db):
+            print(f"{name:>22}{text_time:>14.2f}{integer_time:>16.2f}")
+        db.close()
+    
+    validated, strptime_time, parse_time_ms = compare_validation()
+    print(f"\nwalidacja {validated} godzin: strptime {strptime_time:.0f} ms, parse_time {parse_time_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark widoku miesiąca: stare zapytanie `date LIKE 'RRRR-MM-%'`
+vs zapytania zakresowe na indeksie pokrywającym (date, start_time, end_time).
+
+Uruchomienie:
+    python benchmarks/bench_month.py [rozmiar ...]    # domyślnie 10000 100000 1000000
+"""
+
+import os
+import sys
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DatabaseManager
+
+# Wydarzenia rozłożone na 5 lat
+FIRST_DAY = date(2021, 1, 1)
+DAYS = 5 * 365
+
+
+def populate(db, count):
+    """Wypełnia bazę losowymi wydarzeniami (stałe ziarno)"""
+    rng = random.Random(42)
+    
+    def rows():
+        for i in range(count):
+            day = FIRST_DAY + timedelta(days=rng.randrange(DAYS))
+            hour = rng.randrange(7, 20)
+            yield (day.isoformat(), f"{hour:02d}:00", f"{hour + 1:02d}:30", f"Wydarzenie {i}", "")
+    
+    with db.pool.transaction() as conn:
+        conn.executemany('''
+            INSERT INTO events (date, start_time, end_time, title, description)
+            VALUES (?, ?, ?, ?, ?)
+        ''', rows())
+        conn.execute("ANALYZE")
+
+
+def like_month(db, year, month):
+    """Zapytanie sprzed zmiany - LIKE nie korzysta z indeksu"""
+    conn = db.pool.get_connection()
+    return dict(conn.execute('''
+        SELECT date, COUNT(*) as event_count
+        FROM events
+        WHERE date LIKE ?
+        GROUP BY date
+    ''', (f"{year:04d}-{month:02d}-%",)).fetchall())
+
+
+def latency_ms(func, repeats=20):
+    """Mediana czasu wywołania func(rok, miesiąc) w ms dla kolejnych miesięcy"""
+    timings = []
+    for i in range(repeats):
+        year, month = 2021 + (i // 12) % 5, (i % 12) + 1
+        start = time.perf_counter()
+        func(year, month)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    
+    print(f"{'wydarzeń':>10}{'LIKE ms':>12}{'zakres ms':>12}{'podsumowanie ms':>18}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            db = DatabaseManager(os.path.join(tmp, f"month_{size}.db"))
+            populate(db, size)
+            
+            like = latency_ms(lambda y, m: like_month(db, y, m))
+            ranged = latency_ms(db.get_events_for_month)
+            summary = latency_ms(db.get_month_summary)
+            print(f"{size:>10}{like:>12.2f}{ranged:>12.2f}{summary:>18.2f}")
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
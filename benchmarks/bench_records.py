@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark reprezentacji wydarzeń: krotki z tekstowymi datami + słownik na
+wiersz + json.dumps (poprzednio) kontra EventRecord + records_json.
+
+Mierzy pamięć na wydarzenie (tracemalloc) i czas serializacji zbioru
+wyników do JSON.
+
+Uruchomienie:
+    python benchmarks/bench_records.py [liczba_wydarzeń]    # domyślnie 100000
+"""
+
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from event_record import EventRecord, records_json
+
+FIRST_DAY = date(2025, 1, 1)
+REPEAT = 5
+
+
+def generate_rows(count):
+    """Wiersze (id, date, start_time, end_time, title, description) jak z kursora SQLite"""
+    for i in range(count):
+        hour = 7 + i % 12
+        yield (i + 1, (FIRST_DAY + timedelta(days=i % 365)).isoformat(), f"{hour:02d}:00", f"{hour:02d}:45",
+               f"Spotkanie {i % 500}", "Opis wydarzenia")
+
+
+def row_to_dict(row):
+    event_id, event_date, start_time, end_time, title, description = row
+    return {'id': event_id, 'date': event_date, 'start_time': start_time, 'end_time': end_time,
+            'title': title, 'description': description}
+
+
+def measure_memory(build, count):
+    """Bajty zaalokowane na jedno wydarzenie przez build()"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del result
+    return used / count
+
+
+def timed(operation):
+    """Średni czas jednego wywołania w ms"""
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        operation()
+    return (time.perf_counter() - start) * 1000 / REPEAT
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    
+    # Wiersze budowane od nowa (teksty z kursora to osobne obiekty, jak w bazie)
+    tuple_memory = measure_memory(lambda: [tuple(json.loads(json.dumps(row))) for row in generate_rows(count)],
+                                  count)
+    record_memory = measure_memory(lambda: [EventRecord.from_row(*json.loads(json.dumps(row)))
+                                            for row in generate_rows(count)], count)
+    
+    rows = list(generate_rows(count))
+    records = [EventRecord.from_row(*row) for row in rows]
+    assert json.loads(records_json(records)) == json.loads(
+        json.dumps([row_to_dict(row) for row in rows], sort_keys=True))
+    
+    dict_json = timed(lambda: json.dumps([row_to_dict(row) for row in rows], sort_keys=True, separators=(",", ":")))
+    record_json = timed(lambda: records_json(records))
+    convert = timed(lambda: [EventRecord.from_row(*row) for row in rows])
+    
+    print(f"{count} wydarzeń")
+    print(f"{'':>24}{'krotki + dict':>16}{'EventRecord':>16}")
+    print(f"{'pamięć (B/wydarzenie)':>24}{tuple_memory:>16.0f}{record_memory:>16.0f}")
+    print(f"{'wiersz -> rekord (ms)':>24}{'-':>16}{convert:>16.1f}")
+    print(f"{'JSON (ms)':>24}{dict_json:>16.1f}{record_json:>16.1f}")
+    print(f"{'razem (ms)':>24}{dict_json:>16.1f}{convert + record_json:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark wyszukiwania wydarzeń wielodniowych ("co trwa w tym dniu").
+
+Baza z wydarzeniami jednodniowymi i wielodniowymi (od nocy do kilku
+tygodni) z kilku lat; dla losowych dni mierzy:
+- przeszukanie R*Tree (tabela events_span, span_index),
+- zakres indeksu częściowego (start_ts, id, end_ts) WHERE end_date IS NOT NULL
+  - fallback bez R*Tree,
+- skan całej tabeli (NOT INDEXED),
+oraz pełne get_events_for_date z R*Tree i z indeksem częściowym.
+
+Uruchomienie:
+    python benchmarks/bench_spans.py [liczba_wydarzeń]    # domyślnie 200000
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DatabaseManager
+from event_record import date_to_timestamp
+
+FIRST_DAY = date(2020, 1, 1)
+DAYS = 6 * 365
+# Co które wydarzenie jest wielodniowe
+MULTI_DAY_EVERY = 10
+QUERIES = 500
+
+
+def generate_rows(count):
+    for i in range(count):
+        event_date = FIRST_DAY + timedelta(days=i % DAYS)
+        if i % MULTI_DAY_EVERY == 0:
+            # Od nocy (1 dzień) do kilku tygodni
+            length = (1, 1, 2, 3, 7, 14, 30)[i // MULTI_DAY_EVERY % 7]
+            yield (event_date.isoformat(), "20:00", "08:00", f"Wyjazd {i % 500}", "", None,
+                   (event_date + timedelta(days=length)).isoformat(), False)
+        else:
+            hour = 7 + i % 12
+            yield (event_date.isoformat(), f"{hour:02d}:00", f"{hour + 1:02d}:00", f"Spotkanie {i % 500}", "",
+                   None, None, False)
+
+
+def timed(operation, days):
+    """Średni czas zapytania dla jednego dnia w µs"""
+    start = time.perf_counter()
+    for day in days:
+        operation(day)
+    return (time.perf_counter() - start) * 1e6 / len(days)
+
+
+def scan_query(conn, columns):
+    """Wielodniowe trwające w dniu - skan całej tabeli"""
+    def query(day):
+        start = date_to_timestamp(day)
+        return conn.execute(f'''
+            SELECT {columns} FROM events NOT INDEXED
+            WHERE end_date IS NOT NULL AND start_ts < ? AND end_ts > ?
+            ORDER BY start_ts, id
+        ''', (start + 1440, start)).fetchall()
+    return query
+
+
+def compare(db, days):
+    """Te same dni trzema sposobami; wyniki muszą być identyczne"""
+    conn = db.pool.get_connection()
+    next_day = {day: (date.fromisoformat(day) + timedelta(days=1)).isoformat() for day in days}
+    scan = scan_query(conn, db._columns)
+    
+    def touching(day):
+        return db._multi_day_events(day, next_day[day])
+    
+    results = {}
+    for name, enabled in (("R*Tree", True), ("indeks częściowy", False)):
+        db.span_index = enabled
+        for day in days[:50]:
+            assert [event.id for event in touching(day)] == [row[0] for row in scan(day)], (name, day)
+        results[name] = (timed(touching, days), timed(db.get_events_for_date, days))
+    db.span_index = True
+    results["skan tabeli"] = (timed(scan, days), None)
+    return results
+
+
+def query_plans(db, day):
+    conn = db.pool.get_connection()
+    start = date_to_timestamp(day)
+    for name, sql in (
+        ("R*Tree", "SELECT id FROM events_span WHERE start_ts < ?2 AND end_ts > ?1"),
+        ("indeks częściowy", "SELECT id FROM events WHERE end_date IS NOT NULL AND start_ts < ?2 AND end_ts > ?1"),
+    ):
+        plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}", (start, start + 1440)).fetchall()
+        print(f"{name}: {'; '.join(row[3] for row in plan)}")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    random.seed(20)
+    with tempfile.TemporaryDirectory() as directory:
+        db = DatabaseManager(os.path.join(directory, "calendar.db"), background_migrations=False)
+        db.add_events_bulk(list(generate_rows(count)))
+        if not db.span_index:
+            print("SQLite bez R*Tree - porównanie niemożliwe")
+            return
+        
+        days = [(FIRST_DAY + timedelta(days=random.randrange(DAYS))).isoformat() for _ in range(QUERIES)]
+        multi_day = db.pool.get_connection().execute(
+            "SELECT COUNT(*) FROM events WHERE end_date IS NOT NULL").fetchone()[0]
+        print(f"{count} wydarzeń, wielodniowych: {multi_day}, zapytań o dzień: {len(days)}")
+        query_plans(db, days[0])
+        
+        print(f"\n{'':>18}{'trwające w dniu (µs)':>24}{'get_events_for_date (µs)':>28}")
+        for name, (touching_time, day_time) in compare(db, days).items():
+            day_column = f"{day_time:>28.1f}" if day_time is not None else f"{'-':>28}"
+            print(f"{name:>18}{touching_time:>24.1f}{day_column}")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark backendów Storage na tym samym zestawie operacji: masowy import,
+widok miesiąca (wydarzenia + podsumowanie), widok dnia, stronicowane
+wyszukiwanie, pojedyncze zapisy i odczyt dziennika zmian.
+
+Uruchomienie:
+    python benchmarks/bench_storage.py [liczba_wydarzeń] [adres ...]
+    # domyślnie 100000 wydarzeń; sqlite, memory i sqlalchemy:sqlite
+"""
+
+import os
+import sys
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import open_storage, month_range
+from recurrence import RecurrenceRule
+
+FIRST_DAY = date(2025, 1, 1)
+DAYS = 365
+REPEAT = 200
+
+
+def generate_events(count):
+    """Losowe wydarzenia w ciągu roku (stałe ziarno)"""
+    rng = random.Random(42)
+    for i in range(count):
+        day = FIRST_DAY + timedelta(days=rng.randrange(DAYS))
+        hour = rng.randrange(7, 20)
+        yield (day.isoformat(), f"{hour:02d}:00", f"{hour:02d}:45", f"Spotkanie {i % 500}", "Opis wydarzenia")
+
+
+def timed(operation, repeat=REPEAT):
+    """Średni czas jednego wywołania w ms"""
+    start = time.perf_counter()
+    for i in range(repeat):
+        operation(i)
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def run(storage, count):
+    results = {}
+    rows = list(generate_events(count))
+    start = time.perf_counter()
+    for first in range(0, count, 1000):
+        storage.add_events_bulk(rows[first:first + 1000])
+    results["import (s)"] = time.perf_counter() - start
+    storage.add_recurring_event("2025-01-06", "09:00", "09:15", "Stand-up", "",
+                                RecurrenceRule.parse("FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR"))
+    
+    def month(i):
+        start_date, end_date = month_range(2025, i % 12 + 1)
+        list(storage.get_events_between(start_date, end_date))
+        storage.get_daily_summary(start_date, end_date)
+    
+    def day(i):
+        storage.get_events_for_date((FIRST_DAY + timedelta(days=i % DAYS)).isoformat())
+    
+    def search(i):
+        storage.search_events_page(f"Spotkanie {i % 500}", limit=50)
+    
+    def write(i):
+        event_id = storage.add_event("2025-06-15", "10:00", "11:00", f"Zapis {i}", "")
+        storage.update_event(event_id, "11:00", "12:00", f"Zapis {i}", "")
+        storage.delete_event(event_id)
+    
+    version = storage.get_current_version()
+    
+    def changes(i):
+        storage.get_changes_since(version - 100)
+    
+    results["miesiąc (ms)"] = timed(month, 24)
+    results["dzień (ms)"] = timed(day)
+    results["szukaj (ms)"] = timed(search, 50)
+    results["zapis (ms)"] = timed(write)
+    results["zmiany (ms)"] = timed(changes)
+    return results
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with tempfile.TemporaryDirectory() as directory:
+        urls = sys.argv[2:] or [
+            os.path.join(directory, "sqlite.db"),
+            "memory://",
+            "sqlalchemy:sqlite:///" + os.path.join(directory, "sqlalchemy.db"),
+        ]
+        print(f"{count} wydarzeń")
+        header = None
+        for url in urls:
+            storage = open_storage(url)
+            try:
+                results = run(storage, count)
+            finally:
+                storage.close()
+            if header is None:
+                header = list(results)
+                print(f"{'backend':>18}" + "".join(f"{name:>14}" for name in header))
+            print(f"{type(storage).__name__:>18}" + "".join(f"{results[name]:>14.3f}" for name in header))
+
+
+if __name__ == "__main__":
+    main()
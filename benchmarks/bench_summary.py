@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark podsumowania wielu lat (widok roku / mapa aktywności, /api/summary).
+
+Baza z wydarzeniami z 10 lat (co setne wielodniowe); porównuje
+get_daily_summary dla zakresów 1, 3 i 10 lat:
+- z tabeli sum dziennych (daily_totals) - odczyt zakresu klucza głównego,
+- z grupowania wydarzeń po dniu (jak przed migracją 10),
+sprawdza zgodność wyników i pokazuje plany obu zapytań. Mierzy też koszt
+zapisu z triggerami sum dziennych i bez nich.
+
+Uruchomienie:
+    python benchmarks/bench_summary.py [liczba_wydarzeń]    # domyślnie 200000
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import daily_totals
+from database import DatabaseManager
+
+FIRST_DAY = date(2016, 1, 1)
+DAYS = 3653
+# Co które wydarzenie jest wielodniowe
+MULTI_DAY_EVERY = 100
+REPEATS = 20
+WRITES = 2000
+
+
+def generate_rows(count):
+    for i in range(count):
+        event_date = FIRST_DAY + timedelta(days=i % DAYS)
+        if i % MULTI_DAY_EVERY == 0:
+            yield (event_date.isoformat(), "20:00", "08:00", f"Wyjazd {i % 500}", "", None,
+                   (event_date + timedelta(days=1 + i // MULTI_DAY_EVERY % 5)).isoformat(), False)
+        else:
+            hour = 7 + i % 12
+            yield (event_date.isoformat(), f"{hour:02d}:00", f"{hour + 1:02d}:30", f"Spotkanie {i % 500}", "",
+                   None, None, False)
+
+
+def timed(operation, repeats=REPEATS):
+    """Średni czas wywołania w ms"""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        operation()
+    return (time.perf_counter() - start) * 1000 / repeats
+
+
+def compare(db):
+    """Te same zakresy z tabeli sum i z grupowania; wyniki muszą być identyczne"""
+    results = []
+    for years in (1, 3, 10):
+        start = FIRST_DAY.isoformat()
+        end = FIRST_DAY.replace(year=FIRST_DAY.year + years).isoformat()
+        
+        def summary():
+            return db.get_daily_summary(start, end)
+        db.daily_totals = False
+        aggregated = summary()
+        aggregated_time = timed(summary)
+        db.daily_totals = True
+        assert summary() == aggregated, years
+        results.append((years, len(aggregated), aggregated_time, timed(summary)))
+    return results
+
+
+def query_plans(db):
+    conn = db.pool.get_connection()
+    start, end = FIRST_DAY.isoformat(), (FIRST_DAY + timedelta(days=DAYS)).isoformat()
+    for name, cursor_sql in (
+        ("sumy dzienne", daily_totals.TOTALS_RANGE_SQL),
+        ("grupowanie", f"SELECT date, COUNT(*), SUM(end_ts - start_ts) FROM events "
+                       f"WHERE date >= ? AND date < ?{db._indexed_only()}{db._single_day_only()} GROUP BY date"),
+    ):
+        plan = conn.execute(f"EXPLAIN QUERY PLAN {cursor_sql}", (start, end)).fetchall()
+        print(f"{name}: {'; '.join(row[3] for row in plan)}")
+
+
+def write_cost(db):
+    """Średni czas dodania i usunięcia wydarzenia (µs) z triggerami sum dziennych i bez nich"""
+    conn = db.pool.get_connection()
+    
+    def writes():
+        start = time.perf_counter()
+        for i in range(WRITES):
+            event_date = (FIRST_DAY + timedelta(days=i % DAYS)).isoformat()
+            event_id = db.add_event(event_date, "21:00", "21:30", f"Zapis {i}", "")
+            db.delete_event(event_id)
+        return (time.perf_counter() - start) * 1e6 / WRITES
+    
+    with_triggers = writes()
+    for suffix in ("ai", "ad", "au"):
+        conn.execute(f"DROP TRIGGER {daily_totals.TOTALS_TABLE}_{suffix}")
+    conn.commit()
+    without_triggers = writes()
+    return with_triggers, without_triggers
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    with tempfile.TemporaryDirectory() as directory:
+        db = DatabaseManager(os.path.join(directory, "calendar.db"), background_migrations=False)
+        db.add_events_bulk(list(generate_rows(count)))
+        if not db.daily_totals:
+            print("Baza bez tabeli sum dziennych - porównanie niemożliwe")
+            return
+        
+        rows = db.pool.get_connection().execute(f"SELECT COUNT(*) FROM {daily_totals.TOTALS_TABLE}").fetchone()[0]
+        print(f"{count} wydarzeń z {DAYS} dni, wierszy sum dziennych: {rows}")
+        query_plans(db)
+        
+        print(f"\n{'zakres':>8}{'dni':>8}{'grupowanie (ms)':>18}{'sumy dzienne (ms)':>20}")
+        for years, days, aggregated_time, totals_time in compare(db):
+            print(f"{years:>6} l{days:>8}{aggregated_time:>18.2f}{totals_time:>20.2f}")
+        
+        with_triggers, without_triggers = write_cost(db)
+        print(f"\nDodanie i usunięcie wydarzenia: {with_triggers:.1f} µs z triggerami, "
+              f"{without_triggers:.1f} µs bez nich")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
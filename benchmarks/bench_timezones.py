@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark wydarzeń w strefach czasowych.
+
+Baza z wydarzeniami w kilku strefach; mierzy:
+- zapytanie o okno UTC: skan indeksu start_utc kontra przeliczanie każdego
+  wiersza z dat lokalnych (Storage._single_events_in_window),
+- przeliczenie chwil UTC na czas strefy widoku: utc_to_local (tablica
+  przesunięć) kontra datetime.astimezone dla każdej chwili.
+
+Uruchomienie:
+    python benchmarks/bench_timezones.py [liczba_wydarzeń]    # domyślnie 200000
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import timezones
+from database import DatabaseManager
+from storage import Storage
+from timezones import parse_utc
+
+FIRST_DAY = date(2024, 1, 1)
+ZONES = ("Europe/Warsaw", "America/New_York", "Asia/Tokyo", "UTC")
+REPEAT = 5
+
+
+def generate_rows(count):
+    for i in range(count):
+        hour = i % 24
+        yield ((FIRST_DAY + timedelta(days=i % 730)).isoformat(), f"{hour:02d}:{i % 4 * 15:02d}",
+               f"{(hour + 2) % 24:02d}:00", f"Spotkanie {i % 500}", "", ZONES[i % len(ZONES)])
+
+
+def timed(operation):
+    """Średni czas jednego wywołania w ms"""
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        operation()
+    return (time.perf_counter() - start) * 1000 / REPEAT
+
+
+def compare_windows(db):
+    """Okna UTC różnej długości: indeks chwil UTC kontra przeliczanie wierszy"""
+    windows = {
+        "doba": ("2024-10-27T00:00", "2024-10-28T00:00"),
+        "tydzień": ("2024-03-25T00:00", "2024-04-01T00:00"),
+        "miesiąc": ("2025-03-01T00:00", "2025-04-01T00:00"),
+    }
+    results = []
+    for name, (start, end) in windows.items():
+        window = parse_utc(start), parse_utc(end)
+        indexed = db._single_events_in_window(*window)
+        assert indexed == Storage._single_events_in_window(db, *window), name
+        results.append((name, len(indexed), timed(lambda: Storage._single_events_in_window(db, *window)),
+                        timed(lambda: db._single_events_in_window(*window))))
+    return results
+
+
+def per_row_to_local(moments, zone_name):
+    zone = timezones.get_zone(zone_name)
+    epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
+    result = []
+    for moment in moments:
+        local = (epoch + timedelta(minutes=moment)).astimezone(zone)
+        result.append(moment + int(local.utcoffset().total_seconds()) // 60)
+    return result
+
+
+def compare_conversion(db, zone_name="America/New_York"):
+    found = db._single_events_in_window(parse_utc("2024-01-01T00:00"), parse_utc("2025-01-01T00:00"))
+    moments = [start for start, _, _ in found]
+    assert timezones.utc_to_local(moments, zone_name) == per_row_to_local(moments, zone_name)
+    return (len(moments), timed(lambda: per_row_to_local(moments, zone_name)),
+            timed(lambda: timezones.utc_to_local(moments, zone_name)))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    with tempfile.TemporaryDirectory() as directory:
+        db = DatabaseManager(os.path.join(directory, "calendar.db"), background_migrations=False)
+        db.add_events_bulk(list(generate_rows(count)))
+        
+        print(f"{count} wydarzeń w strefach: {', '.join(ZONES)}")
+        print(f"\n{'okno UTC':>10}{'wyników':>10}{'przeliczanie (ms)':>20}{'indeks UTC (ms)':>18}")
+        for name, found, per_row_time, indexed_time in compare_windows(db):
+            print(f"{name:>10}{found:>10}{per_row_time:>20.2f}{indexed_time:>18.2f}")
+        
+        converted, per_row_time, table_time = compare_conversion(db)
+        print(f"\nprzeliczenie {converted} chwil UTC na America/New_York: "
+              f"astimezone {per_row_time:.1f} ms, utc_to_local {table_time:.1f} ms")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
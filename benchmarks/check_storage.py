@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+Testy zgodności backendów Storage: te same operacje na każdym backendzie
+muszą dawać te same wyniki (wiersze, kolejność, dziennik zmian, transakcje).
+
+Uruchomienie:
+    python benchmarks/check_storage.py [adres ...]    # domyślnie sqlite, memory i sqlalchemy:sqlite
+"""
+
+import json
+import os
+import sys
+import tempfile
+import traceback
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import timezones
+from storage import day_totals, open_storage
+from recurrence import RecurrenceRule
+from event_record import EventRecord, date_to_day, day_to_date, records_json
+from timezones import DEFAULT_TIMEZONE, parse_utc
+
+
+def check_events(storage):
+    first = storage.add_event("2025-03-10", "09:00", "10:00", "Spotkanie zespołu", "Plan sprintu")
+    second = storage.add_event("2025-03-10", "08:00", "08:30", "Kawa", "")
+    third = storage.add_event("2025-03-11", "23:00", None, "Nocny dyżur", "Serwerownia")
+    assert storage.get_event_by_id(first) == EventRecord.from_row(first, "2025-03-10", "09:00", "10:00",
+                                                                  "Spotkanie zespołu", "Plan sprintu",
+                                                                  DEFAULT_TIMEZONE)
+    assert storage.get_event_by_id(10 ** 6) is None
+    assert sorted(storage.get_events_by_ids([first, third, 10 ** 6]), key=lambda event: event.id) == [
+        storage.get_event_by_id(first), storage.get_event_by_id(third)]
+    
+    assert [event.id for event in storage.get_events_for_date("2025-03-10")] == [second, first]
+    assert [event.id for event in storage.get_events_between("2025-03-01", "2025-04-01")] == [second, first, third]
+    assert storage.get_daily_summary("2025-03-01", "2025-04-01") == {"2025-03-10": (2, 90), "2025-03-11": (1, 0)}
+    assert storage.get_events_for_month(2025, 3) == {"2025-03-10": 2, "2025-03-11": 1}
+    assert [(event.id, event.date, event.start_time, event.end_time, event.title)
+            for event in storage.get_event_intervals("2025-03-11", "2025-03-12")] == [
+        (third, "2025-03-11", "23:00", None, "Nocny dyżur")]
+    
+    assert storage.update_event(first, "11:00", "12:00", "Spotkanie zespołu", "Retro", event_date="2025-03-12")
+    event = storage.get_event_by_id(first)
+    assert (event.date, event.start_time) == ("2025-03-12", "11:00")
+    assert storage.update_event(second, "08:15", "08:45", "Kawa", "")
+    assert storage.get_event_by_id(second).date == "2025-03-10"
+    assert not storage.update_event(10 ** 6, "08:00", None, "x", "")
+    assert storage.delete_event(third)
+    assert not storage.delete_event(third)
+    assert storage.get_event_by_id(third) is None
+
+
+def check_bulk_and_paging(storage):
+    rows = [(f"2025-05-{day:02d}", f"{hour:02d}:00", f"{hour:02d}:30", f"Import {day}-{hour}", "")
+            for day in range(1, 29) for hour in range(8, 18)]
+    assert storage.add_events_bulk(rows) == len(rows)
+    assert storage.add_events_bulk([]) == 0
+    streamed = list(storage.iter_events_between("2025-05-01", "2025-06-01", batch_size=7))
+    assert streamed == list(storage.get_events_between("2025-05-01", "2025-06-01"))
+    assert len(streamed) == len(rows)
+    assert [event.sort_key() for event in streamed] == sorted(event.sort_key() for event in streamed)
+
+
+def check_search(storage):
+    storage.add_event("2025-06-02", "10:00", "11:00", "Przegląd kodu", "Moduł Storage")
+    storage.add_event("2025-06-01", "10:00", "11:00", "Przegląd budżetu", "")
+    storage.add_event("2025-06-03", "10:00", "11:00", "Lunch", "przegląd menu")
+    found = storage.search_events_page("przegląd")
+    assert [event.date for event in found] == ["2025-06-01", "2025-06-02", "2025-06-03"]
+    
+    page = storage.search_events_page("przegląd", limit=2)
+    assert page == found[:2]
+    last = page[-1]
+    assert storage.search_events_page("przegląd", after=(last.date, last.start_time, last.id), limit=2) == found[2:]
+    assert storage.search_events_page("przegląd", limit=1, offset=1) == found[1:2]
+    assert storage.search_events_page("przegląd", after=(found[0].date, found[0].start_time, found[0].id),
+                                      offset=1) == found[2:]
+    assert storage.count_search_results("przegląd") == 3
+    assert storage.count_search_results("nie ma takiego") == 0
+    assert {event.id for event in storage.search_events("przegląd")} == {event.id for event in found}
+    assert storage.search_events_page("nie ma takiego") == []
+
+
+def check_recurring(storage):
+    rule = RecurrenceRule.parse("FREQ=WEEKLY;COUNT=4")
+    series = storage.add_recurring_event("2025-07-07", "12:00", "12:30", "Stand-up", "Cotygodniowy", rule)
+    assert storage.get_recurring_event(series) == (series, "2025-07-07", "12:00", "12:30", "Stand-up",
+                                                   "Cotygodniowy", "FREQ=WEEKLY;COUNT=4", "")
+    single = storage.add_event("2025-07-14", "09:00", "09:30", "Przed stand-upem", "")
+    
+    dates = [event.date for event in storage.get_occurrences_between("2025-07-01", "2025-09-01")]
+    assert dates == ["2025-07-07", "2025-07-14", "2025-07-21", "2025-07-28"]
+    assert [event.start_time for event in storage.get_events_for_date("2025-07-14")] == ["09:00", "12:00"]
+    occurrence = storage.get_events_for_date("2025-07-14")[1]
+    assert occurrence.id == f"r{series}:2025-07-14" and occurrence.recurrence_id == series
+    assert storage.get_month_summary(2025, 7)["2025-07-14"] == (2, 60)
+    
+    assert storage.add_recurrence_exception(series, "2025-07-14")
+    assert not storage.add_recurrence_exception(10 ** 6, "2025-07-14")
+    assert [event.id for event in storage.get_events_for_date("2025-07-14")] == [single]
+    assert [event.id for event in storage.search_recurring_events("stand")] == [f"r{series}"]
+    
+    assert storage.update_recurring_event(series, "2025-07-08", "13:00", "13:30", "Stand-up", "",
+                                          RecurrenceRule.parse("FREQ=DAILY;COUNT=2"))
+    assert [event.date for event in storage.get_occurrences_between("2025-07-01", "2025-09-01")] == [
+        "2025-07-08", "2025-07-09"]
+    assert storage.get_recurring_between("2025-08-01", "2025-09-01") == []
+    assert storage.delete_recurring_event(series)
+    assert not storage.delete_recurring_event(series)
+    assert storage.get_recurring_event(series) is None
+
+
+def check_change_log(storage):
+    start = storage.get_current_version()
+    first = storage.add_event("2025-08-01", "09:00", "10:00", "Nowe", "")
+    storage.update_event(first, "09:30", "10:00", "Nowe", "", event_date="2025-08-02")
+    second = storage.add_event("2025-08-03", "09:00", "10:00", "Usuwane", "")
+    storage.delete_event(second)
+    series = storage.add_recurring_event("2025-08-04", "09:00", None, "Seria", "",
+                                         RecurrenceRule.parse("FREQ=DAILY;COUNT=3"))
+    
+    page = storage.get_changes_since(start)
+    assert not page["reset"] and not page["has_more"]
+    assert page["latest"] == page["version"] == storage.get_current_version() == start + 5
+    changes = [(change["kind"], change["event_id"], change["op"], change["date"], change["old_date"])
+               for change in page["changes"]]
+    assert changes == [
+        # Połączone zmiany podają wszystkie wcześniejsze daty - także dzień wstawienia
+        ("event", first, "insert", "2025-08-02", "2025-08-01"),
+        ("event", second, "delete", None, "2025-08-03"),
+        ("series", series, "insert", "2025-08-04", None),
+    ], changes
+    
+    paged = storage.get_changes_since(start, limit=2)
+    assert paged["has_more"] and paged["version"] == start + 2
+    assert storage.get_changes_since(storage.get_current_version())["changes"] == []
+    assert storage.get_changes_since(storage.get_current_version() + 10)["reset"]
+    
+    assert storage.prune_changes(2) > 0
+    assert storage.get_changes_since(start)["reset"]
+    assert not storage.get_changes_since(storage.get_current_version() - 1)["reset"]
+
+
+def check_transactions(storage):
+    version = storage.get_current_version()
+    try:
+        with storage.transaction():
+            event_id = storage.add_event("2025-09-01", "09:00", "10:00", "Wycofane", "")
+            with storage.transaction():
+                storage.update_event(event_id, "10:00", "11:00", "Wycofane", "")
+            raise RuntimeError("przerwanie")
+    except RuntimeError:
+        pass
+    assert storage.get_event_by_id(event_id) is None
+    assert list(storage.get_events_between("2025-09-01", "2025-09-02")) == []
+    assert storage.get_current_version() == version
+    
+    with storage.transaction():
+        event_id = storage.add_event("2025-09-01", "09:00", "10:00", "Zatwierdzone", "")
+        assert storage.get_event_by_id(event_id).title == "Zatwierdzone"
+    assert storage.get_event_by_id(event_id).title == "Zatwierdzone"
+
+
+def check_records_json(storage):
+    """Bezpośrednia serializacja zbioru rekordów = json.dumps słowników (jak jsonify)"""
+    storage.add_event("2025-10-01", "09:00", None, 'Cytat "x" i ąę', None)
+    storage.add_event("2025-10-01", "08:00", "24:00", "Cały dzień", "Opis\nw dwóch liniach")
+    storage.add_recurring_event("2025-10-01", "10:00", "10:30", "Seria", "", RecurrenceRule.parse("FREQ=DAILY;COUNT=2"))
+    events = list(storage.get_events_between("2025-10-01", "2025-11-01"))
+    assert len(events) == 4
+    expected = json.dumps([event.to_dict() for event in events], sort_keys=True, separators=(",", ":"))
+    assert records_json(events) == expected, records_json(events)
+
+
+def check_timezones(storage):
+    """Chwile UTC przy zapisie (także w dni zmiany czasu) i zapytania o okno UTC"""
+    # 02:30 nie istnieje w Warszawie 2025-03-30 (przerwa), a 2025-10-26 występuje dwa razy
+    gap = storage.add_event("2025-03-30", "02:30", "04:00", "Przerwa", "", "Europe/Warsaw")
+    overlap = storage.add_event("2025-10-26", "02:30", None, "Powtórzona godzina", "", "Europe/Warsaw")
+    new_york = storage.add_event("2025-03-10", "09:00", "10:00", "Nowy Jork", "", "America/New_York")
+    overnight = storage.add_event("2025-03-09", "23:00", "01:00", "Przez północ", "", "Europe/Warsaw")
+    series = storage.add_recurring_event("2025-03-10", "12:00", "12:30", "Seria", "",
+                                         RecurrenceRule.parse("FREQ=DAILY;COUNT=2"))
+    
+    assert storage.get_event_by_id(new_york).tz == "America/New_York"
+    found = storage.get_events_in_window(parse_utc("2025-03-30T00:00"), parse_utc("2025-03-31T00:00"))
+    assert [(start, end, record.id) for start, end, record in found] == [
+        (parse_utc("2025-03-30T01:30"), parse_utc("2025-03-30T02:00"), gap)]
+    found = storage.get_events_in_window(parse_utc("2025-10-26T00:00"), parse_utc("2025-10-26T01:00"))
+    assert [(start, end, record.id) for start, end, record in found] == [(parse_utc("2025-10-26T00:30"), None, overlap)]
+    
+    # Wydarzenie z poprzedniego dnia trwające w oknie; koniec równy początkowi okna - poza nim
+    found = storage.get_events_in_window(parse_utc("2025-03-09T23:00"), parse_utc("2025-03-10T14:00"))
+    assert [(start, record.id) for start, _, record in found] == [
+        (parse_utc("2025-03-09T22:00"), overnight),
+        (parse_utc("2025-03-10T11:00"), f"r{series}:2025-03-10"),
+        (parse_utc("2025-03-10T13:00"), new_york),
+    ], found
+    assert storage.get_events_in_window(parse_utc("2025-03-10T00:00"), parse_utc("2025-03-10T11:00")) == []
+    
+    start = parse_utc("2025-03-10T13:00")
+    assert timezones.utc_to_local([start], "Europe/Warsaw") == [start + 60]
+    assert timezones.utc_to_local([start], "America/New_York") == [start - 240]
+    
+    # Bez tz wydarzenie zostaje w swojej strefie, z tz - przechodzi do nowej
+    assert storage.update_event(new_york, "10:00", "11:00", "Nowy Jork", "")
+    found = storage.get_events_in_window(parse_utc("2025-03-10T13:00"), parse_utc("2025-03-10T16:00"))
+    assert [(start, record.id, record.tz) for start, _, record in found] == [
+        (parse_utc("2025-03-10T14:00"), new_york, "America/New_York")]
+    assert storage.update_event(new_york, "10:00", "11:00", "Tokio", "", tz="Asia/Tokyo")
+    assert storage.get_event_by_id(new_york).tz == "Asia/Tokyo"
+    found = storage.get_events_in_window(parse_utc("2025-03-10T01:00"), parse_utc("2025-03-10T02:00"))
+    assert [record.id for _, _, record in found] == [new_york]
+    
+    for call in (lambda: storage.add_event("2025-03-10", "09:00", None, "x", "", "Mars/Olympus"),
+                 lambda: storage.update_event(new_york, "09:00", None, "x", "", tz="Mars/Olympus")):
+        try:
+            call()
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("nieznana strefa nie zgłosiła ValueError")
+    assert storage.get_event_by_id(new_york).title == "Tokio"
+
+
+
+def check_multi_day(storage):
+    """Wydarzenia wielodniowe i całodniowe: dni, które zajmują, podsumowania, okna UTC i dziennik zmian"""
+    start = storage.get_current_version()
+    trip = storage.add_event("2025-05-30", "18:00", "10:00", "Wyjazd", "", "UTC", end_date="2025-06-02")
+    holiday = storage.add_event("2025-06-01", "00:00", None, "Święto", "", "UTC", all_day=True)
+    midnight = storage.add_event("2025-06-01", "22:00", "00:00", "Do północy", "", "UTC")
+    meeting = storage.add_event("2025-06-01", "09:00", "10:00", "Spotkanie", "", "UTC")
+    
+    # Kończące się o północy po dniu rozpoczęcia nie ma daty końca
+    assert storage.get_event_by_id(trip).end_date == "2025-06-02"
+    assert storage.get_event_by_id(midnight).end_date is None
+    assert storage.get_event_by_id(holiday).to_dict()["all_day"] is True
+    
+    # Wydarzenie trwające od wcześniejszego dnia jest w każdym dniu, który zajmuje
+    assert [event.id for event in storage.get_events_for_date("2025-06-01")] == [trip, holiday, meeting, midnight]
+    assert [event.id for event in storage.get_events_for_date("2025-06-02")] == [trip]
+    assert storage.get_events_for_date("2025-06-03") == []
+    by_day = {day: [event.id for event in events]
+              for day, events in storage.get_events_by_day("2025-05-01", "2025-07-01")}
+    assert by_day == {
+        date_to_day("2025-05-30"): [trip], date_to_day("2025-05-31"): [trip],
+        date_to_day("2025-06-01"): [trip, holiday, meeting, midnight], date_to_day("2025-06-02"): [trip],
+    }, by_day
+    assert [event.id for event in storage.iter_events_between("2025-06-02", "2025-06-03")] == [trip]
+    
+    # Minuty zajęte w każdym dniu - całodniowe to pełna doba
+    summary = storage.get_daily_summary("2025-05-01", "2025-07-01")
+    assert summary == {"2025-05-30": (1, 360), "2025-05-31": (1, 1440), "2025-06-01": (4, 3060),
+                       "2025-06-02": (1, 600)}, summary
+    assert storage.get_events_for_month(2025, 6) == {"2025-06-01": 4, "2025-06-02": 1}
+    
+    found = storage.get_events_in_window(parse_utc("2025-06-02T09:00"), parse_utc("2025-06-02T12:00"))
+    assert [(start_utc, end_utc, record.id) for start_utc, end_utc, record in found] == [
+        (parse_utc("2025-05-30T18:00"), parse_utc("2025-06-02T10:00"), trip)], found
+    
+    # Przeniesienie i skrócenie - dziennik zmian podaje stare i nowe daty końca
+    assert storage.update_event(trip, "18:00", "10:00", "Wyjazd", "", event_date="2025-07-30", end_date="2025-08-02")
+    assert [event.id for event in storage.get_events_for_date("2025-06-01")] == [holiday, meeting, midnight]
+    assert [event.id for event in storage.get_events_for_date("2025-08-01")] == [trip]
+    version = storage.get_current_version()
+    assert storage.update_event(trip, "09:00", "10:00", "Wyjazd", "")
+    assert storage.get_event_by_id(trip).end_date is None
+    assert storage.get_events_for_date("2025-07-31") == []
+    assert storage.delete_event(holiday)
+    
+    changes = [(change["event_id"], change["op"], change["end_date"], change["old_end_date"])
+               for change in storage.get_changes_since(start)["changes"]]
+    # Wcześniejsze położenia wyjazdu (30.05-2.06 i 30.07-2.08) jednym przedziałem
+    assert changes == [(midnight, "insert", None, None), (meeting, "insert", None, None),
+                       (trip, "insert", None, "2025-08-02"), (holiday, "delete", None, None)], changes
+    changes = [(change["event_id"], change["op"], change["date"], change["old_date"], change["end_date"],
+                change["old_end_date"]) for change in storage.get_changes_since(version - 1)["changes"]]
+    assert changes == [
+        # Stare daty obejmują też pośrednie położenie 30.07-2.08
+        (trip, "update", "2025-07-30", "2025-05-30", None, "2025-08-02"),
+        (holiday, "delete", None, "2025-06-01", None, None),
+    ], changes
+    
+    for call in (lambda: storage.add_event("2025-06-05", "10:00", "11:00", "x", "", end_date="2025-06-04"),
+                 lambda: storage.add_event("2025-06-05", "10:00", None, "x", "", end_date="2025-06-07")):
+        try:
+            call()
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("nieprawidłowa data końca nie zgłosiła ValueError")
+
+
+def summary_from_events(storage, start_date, end_date):
+    """Podsumowanie dni policzone wprost z wydarzeń zakresu - wzorzec dla sum dziennych backendu"""
+    summary = {}
+    first_day, end_day = date_to_day(start_date), date_to_day(end_date)
+    for event in storage.get_events_between(start_date, end_date):
+        for day, busy in day_totals(event, first_day, end_day):
+            count, minutes = summary.get(day_to_date(day), (0, 0))
+            summary[day_to_date(day)] = (count + 1, minutes + busy)
+    return summary
+
+
+def check_daily_totals(storage):
+    """Sumy dzienne poprawiane przy zapisach = podsumowanie policzone z wydarzeń"""
+    def assert_totals():
+        expected = summary_from_events(storage, "2025-01-01", "2026-01-01")
+        assert storage.get_daily_summary("2025-01-01", "2026-01-01") == expected, expected
+    
+    short = storage.add_event("2025-04-01", "09:00", "09:45", "Krótkie", "")
+    storage.add_event("2025-04-01", "10:00", None, "Bez końca", "")
+    storage.add_events_bulk([("2025-04-02", f"{8 + i}:00", f"{9 + i}:30", f"Porcja {i}", "") for i in range(3)]
+                            + [("2025-04-03", "00:00", None, "Święto", "", None, None, True)])
+    storage.add_recurring_event("2025-04-01", "12:00", "13:00", "Seria", "", RecurrenceRule.parse("FREQ=DAILY;COUNT=3"))
+    assert_totals()
+    assert storage.get_daily_summary("2025-04-01", "2025-04-02") == {"2025-04-01": (3, 105)}
+    
+    # Zmiana godzin, przeniesienie, wydłużenie do wielodniowego i z powrotem
+    assert storage.update_event(short, "09:00", "11:00", "Krótkie", "")
+    assert_totals()
+    assert storage.update_event(short, "09:00", "11:00", "Krótkie", "", event_date="2025-04-05")
+    assert_totals()
+    assert storage.update_event(short, "22:00", "02:00", "Krótkie", "", end_date="2025-04-07")
+    assert_totals()
+    assert storage.update_event(short, "08:00", "08:30", "Krótkie", "", event_date="2025-04-02")
+    assert_totals()
+    
+    # Usunięcie ostatniego wydarzenia dnia - dzień znika z podsumowania
+    storage.delete_recurring_event(1)
+    only = storage.add_event("2025-04-20", "15:00", "16:00", "Jedyne", "")
+    assert storage.get_daily_summary("2025-04-20", "2025-04-21") == {"2025-04-20": (1, 60)}
+    assert storage.delete_event(only)
+    assert storage.get_daily_summary("2025-04-20", "2025-04-21") == {}
+    assert_totals()
+    
+    # Wycofana transakcja nie zostawia zmian w sumach
+    try:
+        with storage.transaction():
+            storage.add_event("2025-04-02", "18:00", "19:00", "Wycofane", "")
+            storage.delete_event(short)
+            raise RuntimeError("przerwanie")
+    except RuntimeError:
+        pass
+    assert_totals()
+    assert storage.get_daily_summary("2025-04-02", "2025-04-03")["2025-04-02"] == (4, 300)
+
+
+CHECKS = [check_events, check_bulk_and_paging, check_search, check_recurring, check_change_log, check_transactions,
+          check_records_json, check_timezones, check_multi_day, check_daily_totals]
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        urls = sys.argv[1:] or [
+            os.path.join(directory, "sqlite.db"),
+            "memory://",
+            "sqlalchemy:sqlite:///" + os.path.join(directory, "sqlalchemy.db"),
+        ]
+        failed = 0
+        for url in urls:
+            for check in CHECKS:
+                # Każdy test na świeżej bazie (adresy plikowe z sufiksem nazwy testu)
+                storage = open_storage(url.replace(".db", f"-{check.__name__}.db"))
+                try:
+                    check(storage)
+                    status = "OK"
+                except Exception:
+                    failed += 1
+                    status = "BŁĄD\n" + traceback.format_exc()
+                finally:
+                    storage.close()
+                print(f"{type(storage).__name__:>18} {check.__name__:<24} {status}")
+        sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Test obciążeniowy API kalendarza: równoległe połączenia keep-alive,
+mieszanka odczytów (miesiąc, dzień, wyszukiwanie, wolny czas) i zapisów.
+Raportuje p50/p99 opóźnień i liczbę żądań na sekundę.
+
+Uruchomienie (serwer musi działać, np. gunicorn -c gunicorn.conf.py wsgi:application):
+    python benchmarks/load_test.py [--url http://127.0.0.1:5001] [--concurrency 32]
+                                   [--duration 30] [--writes 0.05] [--seed 5000]
+"""
+
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from urllib.parse import urlsplit
+
+FIRST_DAY = date(2025, 1, 1)
+DAYS = 365
+
+
+def percentile(values, fraction):
+    """Percentyl z posortowanej listy (najbliższy rang)"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def read_request(rng):
+    """(nazwa, metoda, ścieżka, treść) losowego odczytu"""
+    day = FIRST_DAY + timedelta(days=rng.randrange(DAYS))
+    kind = rng.random()
+    if kind < 0.5:
+        return "month", "GET", f"/api/calendar/{day.year}/{day.month}", None
+    if kind < 0.75:
+        return "day", "GET", f"/api/events/{day.isoformat()}", None
+    if kind < 0.9:
+        return "search", "GET", f"/api/search?q=Spotkanie+{rng.randrange(100)}&limit=20", None
+    end = day + timedelta(days=6)
+    return "availability", "GET", f"/api/availability?from={day}&to={end}&duration=60", None
+
+
+def write_request(rng):
+    day = FIRST_DAY + timedelta(days=rng.randrange(DAYS))
+    hour = rng.randrange(7, 20)
+    body = {"date": day.isoformat(), "start_time": f"{hour:02d}:00", "end_time": f"{hour:02d}:45",
+            "title": f"Obciążenie {rng.randrange(10_000)}", "description": ""}
+    return "add", "POST", "/api/events", json.dumps(body)
+
+
+def seed(url, count):
+    """Wypełnia bazę count wydarzeniami jednym żądaniem /api/import"""
+    rng = random.Random(42)
+    lines = []
+    for i in range(count):
+        day = FIRST_DAY + timedelta(days=rng.randrange(DAYS))
+        hour = rng.randrange(7, 20)
+        lines.append(json.dumps({"date": day.isoformat(), "start_time": f"{hour:02d}:00",
+                                 "end_time": f"{hour:02d}:30", "title": f"Spotkanie {i % 100}"}))
+    conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=120)
+    conn.request("POST", "/api/import?format=ndjson", body="\n".join(lines).encode("utf-8"),
+                 headers={"Content-Type": "application/x-ndjson"})
+    response = conn.getresponse()
+    print(f"Import {count} wydarzeń: HTTP {response.status} {response.read()[:200].decode('utf-8', 'replace')}")
+    conn.close()
+
+
+def worker(url, deadline, write_ratio, worker_id, results, errors):
+    """Wysyła żądania jednym połączeniem keep-alive aż do deadline"""
+    rng = random.Random(worker_id)
+    conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+    timings = defaultdict(list)
+    failed = 0
+    while time.perf_counter() < deadline:
+        name, method, path, body = write_request(rng) if rng.random() < write_ratio else read_request(rng)
+        headers = {"Content-Type": "application/json"} if body else {}
+        start = time.perf_counter()
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 400:
+                failed += 1
+                continue
+        except (OSError, http.client.HTTPException):
+            failed += 1
+            conn.close()
+            conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+            continue
+        timings[name].append((time.perf_counter() - start) * 1000)
+    conn.close()
+    results.append(timings)
+    errors.append(failed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test obciążeniowy API kalendarza")
+    parser.add_argument("--url", default="http://127.0.0.1:5001")
+    parser.add_argument("--concurrency", type=int, default=32, help="liczba równoległych połączeń")
+    parser.add_argument("--duration", type=float, default=30, help="czas trwania w sekundach")
+    parser.add_argument("--writes", type=float, default=0.05, help="odsetek żądań zapisu")
+    parser.add_argument("--seed", type=int, default=0, help="liczba wydarzeń importowanych przed testem")
+    args = parser.parse_args()
+    
+    url = urlsplit(args.url)
+    if args.seed:
+        seed(url, args.seed)
+    
+    results, errors = [], []
+    start = time.perf_counter()
+    deadline = start + args.duration
+    threads = [threading.Thread(target=worker, args=(url, deadline, args.writes, i, results, errors))
+               for i in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    
+    merged = defaultdict(list)
+    for timings in results:
+        for name, values in timings.items():
+            merged[name].extend(values)
+    merged["wszystkie"] = [value for values in merged.values() for value in values]
+    
+    total = len(merged["wszystkie"])
+    print(f"{args.concurrency} połączeń, {elapsed:.1f} s, {total} żądań, błędów: {sum(errors)}")
+    print(f"Przepustowość: {total / elapsed:.1f} żądań/s")
+    print(f"{'endpoint':>14} {'żądań':>8} {'p50 ms':>9} {'p99 ms':>9}")
+    for name, values in sorted(merged.items(), key=lambda item: -len(item[1])):
+        values.sort()
+        print(f"{name:>14} {len(values):>8} {percentile(values, 0.5):>9.2f} {percentile(values, 0.99):>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
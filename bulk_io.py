@@ -0,0 +1,305 @@
+"""
+Masowy import i eksport wydarzeń (CSV, JSON Lines, iCalendar)
+
+Parsery czytają dane strumieniowo, wiersz po wierszu, a import zapisuje
+poprawne wiersze porcjami (jedna transakcja i jedno executemany na porcję).
+Błędne wiersze są zgłaszane z numerem i nie przerywają importu.
+Eksport to generatory fragmentów tekstu - pamięć nie rośnie z liczbą wydarzeń.
+"""
+
+import csv
+import io
+import json
+from datetime import date, datetime, timedelta, timezone
+
+import timezones
+from event_manager import EventManager
+from interval_index import MINUTES_PER_DAY
+
+FORMATS = ("csv", "ndjson", "ics")
+FIELDS = ("date", "start_time", "end_time", "title", "description", "tz", "end_date", "all_day")
+
+# Tekstowe wartości pola all_day (CSV) oznaczające wydarzenie całodniowe
+_TRUE_VALUES = ("1", "true", "yes", "tak")
+
+# Maksymalna liczba szczegółowych błędów w raporcie (reszta jest tylko liczona)
+MAX_REPORTED_ERRORS = 1000
+
+
+def detect_format(filename):
+    """Rozpoznaje format po rozszerzeniu pliku"""
+    extension = filename.rsplit(".", 1)[-1].lower()
+    if extension in ("jsonl", "ndjson"):
+        return "ndjson"
+    if extension in ("ics", "ical"):
+        return "ics"
+    if extension == "csv":
+        return "csv"
+    raise ValueError(f"Nieobsługiwany format pliku: {filename}")
+
+
+def parse_csv(lines):
+    """Zwraca (numer_wiersza, pola) dla każdego wiersza CSV z nagłówkiem"""
+    reader = csv.DictReader(lines)
+    for record in reader:
+        yield reader.line_num, record
+
+
+def parse_ndjson(lines):
+    """Zwraca (numer_linii, pola) dla każdej linii JSON"""
+    for line_no, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("Oczekiwano obiektu JSON")
+        except ValueError as e:
+            yield line_no, e
+            continue
+        yield line_no, record
+
+
+def _unfold_ics(lines):
+    """Łączy zawinięte linie iCalendar (kontynuacja zaczyna się spacją/tabem)"""
+    current = None
+    current_no = 0
+    for line_no, line in enumerate(lines, start=1):
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current_no, current
+        current, current_no = line, line_no
+    if current is not None:
+        yield current_no, current
+
+
+def _ics_unescape(value):
+    return (value.replace("\\n", "\n").replace("\\N", "\n")
+            .replace("\\,", ",").replace("\\;", ";").replace("\\\\", "\\"))
+
+
+def _ics_datetime(value):
+    """DTSTART/DTEND -> (data 'YYYY-MM-DD', godzina 'HH:MM' lub None dla całego dnia)"""
+    value = value.rstrip("Z")
+    if "T" in value:
+        parsed = datetime.strptime(value[:15], "%Y%m%dT%H%M%S")
+        return parsed.strftime("%Y-%m-%d"), parsed.strftime("%H:%M")
+    return datetime.strptime(value[:8], "%Y%m%d").strftime("%Y-%m-%d"), None
+
+
+def parse_ics(lines):
+    """Zwraca (numer_linii BEGIN:VEVENT, pola) dla każdego VEVENT
+    
+    Strefą wydarzenia jest TZID z DTSTART, a dla czasu z sufiksem Z - UTC;
+    bez nich strefa domyślna kalendarza. DTSTART z samą datą oznacza
+    wydarzenie całodniowe, a DTEND z samą datą jest wyłączny (dzień po
+    ostatnim dniu wydarzenia).
+    """
+    event = None
+    event_line = 0
+    for line_no, line in _unfold_ics(lines):
+        name, _, value = line.partition(":")
+        name, _, params = name.partition(";")
+        name = name.upper()
+        
+        if name == "BEGIN" and value.upper() == "VEVENT":
+            event, event_line = {}, line_no
+        elif name == "END" and value.upper() == "VEVENT" and event is not None:
+            yield event_line, event
+            event = None
+        elif event is not None:
+            try:
+                if name == "DTSTART":
+                    event["date"], start_time = _ics_datetime(value)
+                    event["start_time"] = start_time or "00:00"
+                    event["all_day"] = start_time is None
+                    for param in params.split(";"):
+                        key, _, param_value = param.partition("=")
+                        if key.upper() == "TZID":
+                            event["tz"] = param_value.strip('"')
+                    if value.endswith("Z"):
+                        event["tz"] = "UTC"
+                elif name == "DTEND":
+                    end_date, event["end_time"] = _ics_datetime(value)
+                    if event["end_time"] is None:
+                        end_date = (date.fromisoformat(end_date) - timedelta(days=1)).isoformat()
+                    event["end_date"] = end_date
+                elif name == "SUMMARY":
+                    event["title"] = _ics_unescape(value)
+                elif name == "DESCRIPTION":
+                    event["description"] = _ics_unescape(value)
+            except ValueError as e:
+                yield event_line, e
+                event = None
+
+
+PARSERS = {"csv": parse_csv, "ndjson": parse_ndjson, "ics": parse_ics}
+
+
+def _text(record, field):
+    """Pole tekstowe bez białych znaków na brzegach; brak lub null to pusty tekst
+    
+    Liczby, listy i obiekty z JSON-a są błędem - nie są zamieniane na tekst.
+    """
+    value = record.get(field)
+    if value is None:
+        return ""
+    if not isinstance(value, str):
+        raise ValueError(f"Pole {field} musi być tekstem")
+    return value.strip()
+
+
+def _flag(record, field):
+    value = record.get(field)
+    if isinstance(value, bool):
+        return value
+    return ("" if value is None else str(value)).strip().lower() in _TRUE_VALUES
+
+
+def validate_record(record):
+    """Sprawdza pola wydarzenia i zwraca krotkę (date, start, end, title, description, tz, end_date, all_day)
+    
+    Stosuje te same reguły co EventManager.add_event; bez tz - strefa domyślna.
+    """
+    title = _text(record, "title")
+    event_date = _text(record, "date")
+    end_date = _text(record, "end_date") or None
+    all_day = _flag(record, "all_day")
+    if all_day:
+        start_time, end_time = "00:00", None
+    else:
+        start_time = _text(record, "start_time")
+        end_time = _text(record, "end_time") or None
+    EventManager._validate_event(title, start_time, end_time, event_date, end_date, all_day)
+    tz = timezones.resolve_zone_name(_text(record, "tz") or None)
+    
+    return event_date, start_time, end_time, title, _text(record, "description"), tz, end_date, all_day
+
+
+def import_records(records, insert_batch, batch_size=1000):
+    """Waliduje rekordy z parsera i zapisuje je porcjami przez insert_batch(rows)
+    
+    Zwraca raport {'imported', 'failed', 'errors': [{'row', 'error'}]}.
+    """
+    report = {"imported": 0, "failed": 0, "errors": []}
+    batch = []
+    
+    def fail(row_no, error):
+        report["failed"] += 1
+        if len(report["errors"]) < MAX_REPORTED_ERRORS:
+            report["errors"].append({"row": row_no, "error": str(error)})
+    
+    for row_no, record in records:
+        if isinstance(record, Exception):
+            fail(row_no, record)
+            continue
+        try:
+            batch.append(validate_record(record))
+        except ValueError as e:
+            fail(row_no, e)
+            continue
+        if len(batch) >= batch_size:
+            insert_batch(batch)
+            report["imported"] += len(batch)
+            batch = []
+    
+    if batch:
+        insert_batch(batch)
+        report["imported"] += len(batch)
+    return report
+
+
+def import_stream(lines, fmt, insert_batch, batch_size=1000):
+    """Importuje wydarzenia z iterowalnych linii tekstu w danym formacie"""
+    if fmt not in PARSERS:
+        raise ValueError(f"Nieobsługiwany format: {fmt}")
+    return import_records(PARSERS[fmt](lines), insert_batch, batch_size)
+
+
+def _event_fields(event):
+    """Pola rekordu wydarzenia (id, date, start_time, end_time, title, description, tz, end_date, all_day)"""
+    return (event.id, event.date, event.start_time, event.end_time, event.title, event.description, event.tz,
+            event.end_date, event.all_day)
+
+
+def export_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(("id",) + FIELDS)
+    for event in rows:
+        event_id, event_date, start_time, end_time, title, description, tz, end_date, all_day = _event_fields(event)
+        writer.writerow((event_id, event_date, start_time, end_time or "", title, description or "", tz or "",
+                         end_date or "", "1" if all_day else ""))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def export_ndjson(rows):
+    for event in rows:
+        event_id, event_date, start_time, end_time, title, description, tz, end_date, all_day = _event_fields(event)
+        yield json.dumps({
+            "id": event_id,
+            "date": event_date,
+            "start_time": start_time,
+            "end_time": end_time,
+            "title": title,
+            "description": description,
+            "tz": tz,
+            "end_date": end_date,
+            "all_day": all_day
+        }, ensure_ascii=False) + "\n"
+
+
+def _ics_escape(value):
+    return (value.replace("\\", "\\\\").replace(";", "\\;")
+            .replace(",", "\\,").replace("\n", "\\n"))
+
+
+def _ics_date(day):
+    """Numer dnia -> data iCalendar 'YYYYMMDD'"""
+    return date.fromordinal(day).strftime("%Y%m%d")
+
+
+def export_ics(rows):
+    yield "BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//Kalendarz-App//PL\r\n"
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    for event in rows:
+        event_id, _, start_time, end_time, title, description, tz, _, all_day = _event_fields(event)
+        zone = f";TZID={tz}" if tz else ""
+        lines = [
+            "BEGIN:VEVENT",
+            f"UID:event-{event_id}@kalendarz-app",
+            f"DTSTAMP:{stamp}",
+        ]
+        # Koniec z przedziału wydarzenia - dzień zakończenia także dla wielodniowych i kończących się o północy
+        end_day, end_minute = divmod(event.interval()[1], MINUTES_PER_DAY)
+        if all_day:
+            lines.append(f"DTSTART;VALUE=DATE:{_ics_date(event.day)}")
+            lines.append(f"DTEND;VALUE=DATE:{_ics_date(end_day)}")
+        else:
+            lines.append(f"DTSTART{zone}:{_ics_date(event.day)}T{start_time.replace(':', '')}00")
+            if end_time:
+                lines.append(f"DTEND{zone}:{_ics_date(end_day)}T{end_minute // 60:02d}{end_minute % 60:02d}00")
+        lines.append(f"SUMMARY:{_ics_escape(title)}")
+        if description:
+            lines.append(f"DESCRIPTION:{_ics_escape(description)}")
+        lines.append("END:VEVENT")
+        yield "\r\n".join(lines) + "\r\n"
+    yield "END:VCALENDAR\r\n"
+
+
+EXPORTERS = {"csv": export_csv, "ndjson": export_ndjson, "ics": export_ics}
+MIMETYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson", "ics": "text/calendar"}
+
+
+def export_stream(rows, fmt):
+    """Generator fragmentów tekstu dla rekordów wydarzeń (EventRecord) w danym formacie"""
+    if fmt not in EXPORTERS:
+        raise ValueError(f"Nieobsługiwany format: {fmt}")
+    return EXPORTERS[fmt](rows)
@@ -3,23 +3,76 @@ from tkinter import ttk, messagebox, simpledialog
 import calendar
 from datetime import date, datetime, timedelta
 from event_manager import EventManager
+from event_record import EventRecord, day_to_date
+from gui_tasks import BackgroundTasks
+from recurrence import parse_occurrence_id
+
+# Co ile milisekund sprawdzać dziennik zmian (edycje z innych okien i procesów)
+SYNC_INTERVAL_MS = 5000
+# Po ilu milisekundach oczekiwania na bazę pokazać wskaźnik wczytywania (szybkie zapytania bez migania)
+LOADING_DELAY_MS = 150
+
+# Nazwy miesięcy i dni do etykiet - niezależne od locale systemu
+MONTHS_PL = ["", "Styczeń", "Luty", "Marzec", "Kwiecień", "Maj", "Czerwiec",
+             "Lipiec", "Sierpień", "Wrzesień", "Październik", "Listopad", "Grudzień"]
+MONTHS_GENITIVE_PL = ["", "stycznia", "lutego", "marca", "kwietnia", "maja", "czerwca",
+                      "lipca", "sierpnia", "września", "października", "listopada", "grudnia"]
+DAYS_PL = ["Poniedziałek", "Wtorek", "Środa", "Czwartek", "Piątek", "Sobota", "Niedziela"]
+# Pusta komórka siatki (dzień spoza miesiąca)
+EMPTY_CELL = ("", "disabled", None, "black", None)
+
+# Wirtualna lista wyników wyszukiwania: wierszy w oknie, wyników na stronę i stron w pamięci
+SEARCH_VISIBLE_ROWS = 20
+SEARCH_PAGE_SIZE = 100
+SEARCH_CACHED_PAGES = 8
+
+
+def date_label(day_date):
+    """Etykieta dnia, np. 'Poniedziałek, 03 marca 2025'"""
+    return f"{DAYS_PL[day_date.weekday()]}, {day_date.day:02d} {MONTHS_GENITIVE_PL[day_date.month]} {day_date.year}"
+
 
 class CalendarGUI:
     """Główny interfejs graficzny kalendarza"""
     
-    def __init__(self, root):
+    def __init__(self, root, event_manager=None):
         self.root = root
         self.root.title("Kalendarz - Planer Dnia")
         self.root.geometry("1000x700")
         self.root.configure(bg='#f0f0f0')
         
-        self.event_manager = EventManager()
+        self.event_manager = event_manager or EventManager()
+        # Wywołania bazy w wątkach roboczych - okno nie czeka na zapytania
+        self.tasks = BackgroundTasks(root, on_busy=self.show_loading)
+        self.loading_timer = None
         self.current_date = date.today()
         self.selected_date = date.today()
+        # Model widocznego miesiąca: wydarzenia pogrupowane po dniach (jedno zapytanie)
+        # i siatka tygodni - zmiana zaznaczenia korzysta tylko z niego, bez bazy
+        self.month_events = {}
+        self.month_grid = []
+        self.loaded_month = None
+        # Miesiąc, którego siatka jest wyświetlana (dane mogą być jeszcze wczytywane)
+        self.requested_month = None
+        # Wydarzenia wybranego dnia spoza wczytanego miesiąca
+        self.day_events = None
+        
+        # Stan narysowanych widżetów - konfigurowane są tylko komórki i wiersze, które się zmieniły
+        self.cells = {}
+        self.tree_rows = {}
+        self.tree_order = []
+        self.date_label_text = None
         
         self.setup_ui()
         self.update_calendar()
         self.update_daily_view()
+        self.root.after(SYNC_INTERVAL_MS, self.poll_changes)
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+    
+    def close(self):
+        """Zamyka okno bez czekania na trwające zapytania"""
+        self.tasks.close()
+        self.root.destroy()
     
     def setup_ui(self):
         """Tworzy interfejs użytkownika"""
@@ -72,6 +125,8 @@ class CalendarGUI:
                               font=("Arial", 9), relief="flat", bd=1)
                 btn.grid(row=week+2, column=day, padx=1, pady=1)
                 self.day_buttons[(week, day)] = btn
+        # Domyślny kolor przycisku na danej platformie ('SystemButtonFace' jest tylko w Windows)
+        self.default_bg = btn.cget("bg")
     
     def setup_daily_view(self, parent):
         """Tworzy widok dzienny z godzinami"""
@@ -89,8 +144,13 @@ class CalendarGUI:
         self.selected_date_label = ttk.Label(date_frame, text="", font=("Arial", 14, "bold"))
         self.selected_date_label.grid(row=0, column=0, sticky=tk.W)
         
+        # Wskaźnik wczytywania - widoczny tylko w czasie dłuższego oczekiwania na bazę
+        self.loading_bar = ttk.Progressbar(date_frame, mode="indeterminate", length=80)
+        self.loading_bar.grid(row=0, column=1, padx=(0, 10))
+        self.loading_bar.grid_remove()
+        
         ttk.Button(date_frame, text="+ Dodaj wydarzenie", 
-                  command=self.add_event_dialog).grid(row=0, column=1)
+                  command=self.add_event_dialog).grid(row=0, column=2)
         
         # Lista wydarzeń z przewijaniem
         list_frame = ttk.Frame(daily_frame)
@@ -134,93 +194,201 @@ class CalendarGUI:
                   command=self.search_events_dialog).grid(row=0, column=2, padx=5)
     
     def update_calendar(self):
-        """Aktualizuje widok kalendarza"""
+        """Aktualizuje widok kalendarza - przerysowuje tylko komórki, które się zmieniły"""
         year = self.current_date.year
         month = self.current_date.month
-        
-        # Aktualizuj etykietę miesiąca
-        months_pl = ["", "Styczeń", "Luty", "Marzec", "Kwiecień", "Maj", "Czerwiec",
-                     "Lipiec", "Sierpień", "Wrzesień", "Październik", "Listopad", "Grudzień"]
-        self.month_label.config(text=f"{months_pl[month]} {year}")
-        
-        # Pobierz dni miesiąca
-        cal = calendar.monthcalendar(year, month)
-        
-        # Pobierz wydarzania dla tego miesiąca
-        month_events = self.event_manager.get_events_for_month(year, month)
-        
-        # Wyczyść poprzednie przyciski
-        for (week, day), btn in self.day_buttons.items():
-            btn.config(text="", command=None, bg="SystemButtonFace", fg="black")
-        
-        # Wypełnij kalendarz
-        for week_num, week in enumerate(cal):
-            for day_num, day in enumerate(week):
-                btn = self.day_buttons[(week_num, day_num)]
+        if self.requested_month != (year, month):
+            self.load_month_events(year, month)
+        
+        self.month_label.config(text=f"{MONTHS_PL[month]} {year}")
+        
+        for key, btn in self.day_buttons.items():
+            week_num, day_num = key
+            day = self.month_grid[week_num][day_num] if week_num < len(self.month_grid) else 0
+            cell = self._cell(date(year, month, day)) if day else EMPTY_CELL
+            if self.cells.get(key) == cell:
+                continue
+            text, state, bg_color, fg_color, day_date = cell
+            btn.config(text=text, state=state, bg=bg_color or self.default_bg, fg=fg_color,
+                       command=(lambda d=day_date: self.select_date(d)) if day_date else "")
+            self.cells[key] = cell
+        
+    def _cell(self, day_date):
+        """Stan komórki dnia (tekst, stan, tło, kolor tekstu, data) z modelu miesiąca"""
+        event_count = len(self.month_events.get(day_date.strftime("%Y-%m-%d"), ()))
+        
+        # Tekst przycisku
+        text = str(day_date.day)
+        if event_count > 0:
+            text += f" ({event_count})"
+        
+        # Kolory (None - domyślne tło przycisku)
+        bg_color = None
+        fg_color = "black"
                 
-                if day == 0:
-                    btn.config(text="", state="disabled")
-                else:
-                    day_date = date(year, month, day)
-                    event_count = month_events.get(day_date.strftime("%Y-%m-%d"), 0)
-                    
-                    # Tekst przycisku
-                    text = str(day)
-                    if event_count > 0:
-                        text += f" ({event_count})"
-                    
-                    # Kolory
-                    bg_color = "SystemButtonFace"
-                    fg_color = "black"
+        if day_date == date.today():
+            bg_color = "#4CAF50"  # Zielony dla dzisiaj
+            fg_color = "white"
+        elif day_date == self.selected_date:
+            bg_color = "#2196F3"  # Niebieski dla wybranego dnia
+            fg_color = "white"
+        elif event_count > 0:
+            bg_color = "#FFC107"  # Żółty dla dni z wydarzeniami
                     
-                    if day_date == date.today():
-                        bg_color = "#4CAF50"  # Zielony dla dzisiaj
-                        fg_color = "white"
-                    elif day_date == self.selected_date:
-                        bg_color = "#2196F3"  # Niebieski dla wybranego dnia
-                        fg_color = "white"
-                    elif event_count > 0:
-                        bg_color = "#FFC107"  # Żółty dla dni z wydarzeniami
-                    
-                    btn.config(text=text, state="normal", bg=bg_color, fg=fg_color,
-                             command=lambda d=day_date: self.select_date(d))
+        return text, "normal", bg_color, fg_color, day_date
+    
+    def load_month_events(self, year, month):
+        """Zleca wczytanie wydarzeń miesiąca w tle - siatka miesiąca jest od razu, liczby po nadejściu danych
+        
+        Zlecenie kolejnego miesiąca (szybka nawigacja) unieważnia poprzednie.
+        """
+        first_day = date(year, month, 1)
+        last_day = date(year, month, calendar.monthrange(year, month)[1])
+        self.month_grid = calendar.monthcalendar(year, month)
+        self.requested_month = (year, month)
+        self.tasks.submit("month", lambda: self.event_manager.get_events_by_day(first_day, last_day),
+                          lambda days: self._month_loaded(year, month, days))
+        
+    def _month_loaded(self, year, month, days):
+        """Wynik load_month_events (wątek Tk) - model miesiąca i przerysowanie zmian"""
+        # Wydarzenie wielodniowe jest w każdym dniu, który zajmuje
+        self.month_events = {day_to_date(day): events for day, events in days}
+        self.loaded_month = (year, month)
+        self.update_calendar()
+        if (self.selected_date.year, self.selected_date.month) == (year, month):
+            self.update_daily_view()
+    
+    def load_day_events(self, day_date):
+        """Zleca wczytanie wydarzeń dnia spoza widocznego miesiąca"""
+        self.tasks.submit("day", lambda: self.event_manager.get_events_for_date(day_date),
+                          lambda events: self._day_loaded(day_date, events))
+    
+    def _day_loaded(self, day_date, events):
+        self.day_events = (day_date, events)
+        self.update_daily_view()
+    
+    def refresh(self):
+        """Wczytuje dane ponownie (po zmianie wydarzeń); po nadejściu przerysowuje to, co się zmieniło"""
+        self.day_events = None
+        self.load_month_events(self.current_date.year, self.current_date.month)
+        if (self.selected_date.year, self.selected_date.month) != self.requested_month:
+            self.update_daily_view()
+    
+    def show_loading(self, busy):
+        """Pokazuje wskaźnik wczytywania, jeśli zadania w tle trwają dłużej niż LOADING_DELAY_MS"""
+        if busy:
+            self.loading_timer = self.root.after(LOADING_DELAY_MS, self._start_loading)
+            return
+        if self.loading_timer is not None:
+            self.root.after_cancel(self.loading_timer)
+            self.loading_timer = None
+        self.loading_bar.stop()
+        self.loading_bar.grid_remove()
+    
+    def _start_loading(self):
+        self.loading_timer = None
+        self.loading_bar.grid()
+        self.loading_bar.start(15)
+    
+    def poll_changes(self):
+        """Sprawdza dziennik zmian w tle; widoki są odświeżane tylko, gdy zmiany dotyczą widocznych dni"""
+        self.tasks.submit_write(self.event_manager.sync_changes, self._changes_synced, self._sync_failed)
+    
+    def _changes_synced(self, result):
+        self.root.after(SYNC_INTERVAL_MS, self.poll_changes)
+        if result['reset'] or any(self._change_visible(change) for change in result['changes']):
+            self.refresh()
+    
+    def _sync_failed(self, error):
+        self.root.after(SYNC_INTERVAL_MS, self.poll_changes)
+        raise error
+    
+    def _change_visible(self, change):
+        """Czy zmiana może dotyczyć wyświetlanego miesiąca lub wybranego dnia"""
+        if change['kind'] != 'event':
+            # Wystąpienia serii mogą wypaść w dowolnym miesiącu
+            return True
+        visible = {f"{self.current_date.year:04d}-{self.current_date.month:02d}",
+                   self.selected_date.strftime("%Y-%m")}
+        # Wydarzenie wielodniowe - każdy miesiąc od daty rozpoczęcia do daty końca
+        spans = ((change['date'], change['end_date']), (change['old_date'], change['old_end_date']))
+        return any(first[:7] <= month <= (last or first)[:7] for first, last in spans if first for month in visible)
     
     def update_daily_view(self):
-        """Aktualizuje widok dzienny"""
-        # Aktualizuj etykietę daty
-        date_str = self.selected_date.strftime("%A, %d %B %Y")
-        # Tłumaczenie dni tygodnia
-        days_pl = {"Monday": "Poniedziałek", "Tuesday": "Wtorek", "Wednesday": "Środa",
-                   "Thursday": "Czwartek", "Friday": "Piątek", "Saturday": "Sobota", "Sunday": "Niedziela"}
-        for eng, pl in days_pl.items():
-            date_str = date_str.replace(eng, pl)
-        
-        months_pl = {"January": "stycznia", "February": "lutego", "March": "marca",
-                     "April": "kwietnia", "May": "maja", "June": "czerwca",
-                     "July": "lipca", "August": "sierpnia", "September": "września",
-                     "October": "października", "November": "listopada", "December": "grudnia"}
-        for eng, pl in months_pl.items():
-            date_str = date_str.replace(eng, pl)
-        
-        self.selected_date_label.config(text=date_str)
-        
-        # Wyczyść listę wydarzeń
-        for item in self.events_tree.get_children():
-            self.events_tree.delete(item)
-        
-        # Pobierz i wyświetl wydarzenia
-        events = self.event_manager.get_events_for_date(self.selected_date)
-        for event in events:
-            event_id, start_time, end_time, title, description = event
-            time_str = start_time
-            if end_time and end_time != start_time:
-                time_str += f" - {end_time}"
+        """Aktualizuje widok dzienny - zmienia tylko wiersze, które się różnią"""
+        label = date_label(self.selected_date)
+        if label != self.date_label_text:
+            self.selected_date_label.config(text=label)
+            self.date_label_text = label
+        
+        # Wydarzenia z modelu miesiąca, jeśli jest wczytany (bez zapytania do bazy)
+        selected_month = (self.selected_date.year, self.selected_date.month)
+        if self.loaded_month == selected_month:
+            self.tasks.cancel("day")
+            events = self.month_events.get(self.selected_date.strftime("%Y-%m-%d"), [])
+        elif self.day_events is not None and self.day_events[0] == self.selected_date:
+            events = self.day_events[1]
+        elif self.requested_month == selected_month:
+            # Miesiąc jest wczytywany - lista wypełni się po nadejściu danych
+            events = []
+        else:
+            # Dzień spoza widocznego miesiąca - dotychczasowe wiersze zostają do nadejścia wyniku
+            self.load_day_events(self.selected_date)
+            return
+        self._render_rows([self._event_row(event) for event in events])
             
-            self.events_tree.insert("", "end", values=(time_str, title, description or ""),
-                                   tags=(event_id,))
+    @staticmethod
+    def _event_row(event):
+        """Wiersz listy wydarzeń: (iid, wartości kolumn, identyfikator wydarzenia)"""
+        time_str = event.start_time
+        if event.multi_day:
+            # Wydarzenie wielodniowe - z dniami rozpoczęcia i zakończenia
+            start_day, end_day = date.fromordinal(event.day), date.fromordinal(event.end_day)
+            if event.all_day:
+                time_str = f"{start_day:%d.%m} - {end_day:%d.%m}"
+            else:
+                time_str = f"{start_day:%d.%m} {event.start_time} - {end_day:%d.%m} {event.end_time}"
+        elif event.all_day:
+            time_str = "Cały dzień"
+        elif event.end is not None and event.end != event.start:
+            time_str += f" - {event.end_time}"
+            
+        # Wystąpienia serii cyklicznych mają identyfikator 'r<id>:YYYY-MM-DD'
+        title = f"↻ {event.title}" if isinstance(event.id, str) else event.title
+        
+        return str(event.id), (time_str, title, event.description or ""), event.id
+    
+    def _render_rows(self, rows):
+        """Uzgadnia events_tree z listą wierszy - usuwa, wstawia, zmienia i przesuwa tylko różniące się
+        
+        Wiersze mają iid równe identyfikatorowi wydarzenia, więc zaznaczenie
+        zostaje na tym samym wydarzeniu mimo zmian kolejności.
+        """
+        tree = self.events_tree
+        wanted = {iid for iid, _, _ in rows}
+        removed = [iid for iid in self.tree_order if iid not in wanted]
+        if removed:
+            tree.delete(*removed)
+            for iid in removed:
+                del self.tree_rows[iid]
+        order = [iid for iid in self.tree_order if iid in wanted]
+        
+        for index, (iid, values, event_id) in enumerate(rows):
+            if iid not in self.tree_rows:
+                tree.insert("", index, iid=iid, values=values, tags=(event_id,))
+                order.insert(index, iid)
+            else:
+                if self.tree_rows[iid] != values:
+                    tree.item(iid, values=values)
+                if order[index] != iid:
+                    tree.move(iid, "", index)
+                    order.remove(iid)
+                    order.insert(index, iid)
+            self.tree_rows[iid] = values
+        self.tree_order = order
     
     def select_date(self, selected_date):
-        """Wybiera datę i aktualizuje widoki"""
+        """Wybiera datę i aktualizuje widoki (z modelu miesiąca, bez zapytań do bazy)"""
         self.selected_date = selected_date
         self.update_calendar()
         self.update_daily_view()
@@ -251,64 +419,120 @@ class CalendarGUI:
     
     def add_event_dialog(self):
         """Otwiera dialog dodawania wydarzenia"""
-        dialog = EventDialog(self.root, "Dodaj wydarzenie")
+        dialog = EventDialog(self.root, "Dodaj wydarzenie", show_repeat=True)
         if dialog.result:
-            try:
-                self.event_manager.add_event(
-                    self.selected_date,
-                    dialog.result["start_time"],
-                    dialog.result["end_time"],
-                    dialog.result["title"],
-                    dialog.result["description"]
+            result = dialog.result
+            event_date = self.selected_date
+            
+            def add():
+                if result["rule"]:
+                    return self.event_manager.add_recurring_event(
+                        event_date,
+                        result["start_time"],
+                        result["end_time"],
+                        result["title"],
+                        result["description"],
+                        result["rule"]
+                    )
+                return self.event_manager.add_event(
+                    event_date,
+                    result["start_time"],
+                    result["end_time"],
+                    result["title"],
+                    result["description"]
                 )
-                self.update_calendar()
-                self.update_daily_view()
-                messagebox.showinfo("Sukces", "Wydarzenie zostało dodane!")
-            except ValueError as e:
-                messagebox.showerror("Błąd", str(e))
+            
+            self._write(add, "Wydarzenie zostało dodane!")
+    
+    def _write(self, function, success_message, failure_message=None):
+        """Zapis w wątku zapisów; po nim odświeżenie widoków i komunikat
+        
+        Wynik False oznacza niepowodzenie (failure_message), błąd walidacji
+        (ValueError) jest pokazywany w oknie błędu.
+        """
+        def done(result):
+            if result is False:
+                messagebox.showerror("Błąd", failure_message)
+                return
+            self.refresh()
+            messagebox.showinfo("Sukces", success_message)
+        
+        self.tasks.submit_write(function, done, self._show_error)
+    
+    def _show_error(self, error):
+        """Okno błędu dla wyjątku z wątku roboczego; nieoczekiwane są dodatkowo zgłaszane dalej"""
+        messagebox.showerror("Błąd", str(error))
+        if not isinstance(error, ValueError):
+            raise error
     
     def edit_event_dialog(self, event=None):
         """Otwiera dialog edycji wydarzenia"""
         self.edit_selected_event()
     
     def edit_selected_event(self):
-        """Edytuje wybrane wydarzenie"""
+        """Edytuje wybrane wydarzenie (szczegóły są pobierane w tle)"""
         selection = self.events_tree.selection()
         if not selection:
             messagebox.showwarning("Uwaga", "Wybierz wydarzenie do edycji")
             return
         
         item = self.events_tree.item(selection[0])
-        event_id = int(item["tags"][0])
+        occurrence = parse_occurrence_id(str(item["tags"][0]))
+        
+        # Pobierz szczegóły wydarzenia (dla wystąpienia - całej serii)
+        if occurrence:
+            event_id = occurrence[0]
+            
+            def fetch():
+                series = self.event_manager.get_recurring_event(event_id)
+                return EventRecord.from_row(*series[:6]) if series else None
+        else:
+            event_id = int(item["tags"][0])
+            
+            def fetch():
+                return self.event_manager.get_event_by_id(event_id)
         
-        # Pobierz szczegóły wydarzenia
-        event_data = self.event_manager.get_event_by_id(event_id)
+        self.tasks.submit("edit", fetch, lambda event_data: self._edit_event(event_id, occurrence, event_data),
+                          self._show_error)
+    
+    def _edit_event(self, event_id, occurrence, event_data):
+        """Dialog edycji dla pobranego wydarzenia i zapis zmian w tle"""
         if not event_data:
             messagebox.showerror("Błąd", "Nie znaleziono wydarzenia")
             return
         
         # Otwórz dialog z wypełnionymi danymi
-        dialog = EventDialog(self.root, "Edytuj wydarzenie", {
-            "start_time": event_data[2],
-            "end_time": event_data[3],
-            "title": event_data[4],
-            "description": event_data[5] or ""
+        dialog = EventDialog(self.root, "Edytuj serię wydarzeń" if occurrence else "Edytuj wydarzenie", {
+            "start_time": event_data.start_time,
+            "end_time": event_data.end_time,
+            "title": event_data.title,
+            "description": event_data.description or ""
         })
         
         if dialog.result:
-            try:
-                self.event_manager.update_event(
+            result = dialog.result
+            
+            def update():
+                if occurrence:
+                    return self.event_manager.update_recurring_event(
+                        event_id,
+                        result["start_time"],
+                        result["end_time"],
+                        result["title"],
+                        result["description"]
+                    )
+                # Dialog nie zmienia dni - wydarzenie wielodniowe i całodniowe zostaje takie jak było
+                return self.event_manager.update_event(
                     event_id,
-                    dialog.result["start_time"],
-                    dialog.result["end_time"],
-                    dialog.result["title"],
-                    dialog.result["description"]
+                    result["start_time"],
+                    result["end_time"],
+                    result["title"],
+                    result["description"],
+                    end_date=event_data.end_date,
+                    all_day=event_data.all_day
                 )
-                self.update_calendar()
-                self.update_daily_view()
-                messagebox.showinfo("Sukces", "Wydarzenie zostało zaktualizowane!")
-            except ValueError as e:
-                messagebox.showerror("Błąd", str(e))
+            
+            self._write(update, "Wydarzenie zostało zaktualizowane!", "Nie znaleziono wydarzenia")
     
     def delete_selected_event(self):
         """Usuwa wybrane wydarzenie"""
@@ -318,29 +542,43 @@ class CalendarGUI:
             return
         
         item = self.events_tree.item(selection[0])
-        event_id = int(item["tags"][0])
         title = item["values"][1]
+        occurrence = parse_occurrence_id(str(item["tags"][0]))
+        
+        if occurrence:
+            # Tak - tylko ten dzień, Nie - cała seria, Anuluj - nic
+            answer = messagebox.askyesnocancel(
+                "Potwierdzenie",
+                f"Wydarzenie '{title}' jest cykliczne.\n\nUsunąć tylko ten dzień?\n(Nie - usuń całą serię)"
+            )
+            if answer is None:
+                return
+            if answer:
+                delete, target = self.event_manager.skip_occurrence, str(item["tags"][0])
+            else:
+                delete, target = self.event_manager.delete_recurring_event, occurrence[0]
+            self._write(lambda: bool(delete(target)), "Wydarzenie zostało usunięte!", "Nie udało się usunąć wydarzenia")
+            return
         
+        event_id = int(item["tags"][0])
         if messagebox.askyesno("Potwierdzenie", f"Czy na pewno chcesz usunąć wydarzenie '{title}'?"):
-            if self.event_manager.delete_event(event_id):
-                self.update_calendar()
-                self.update_daily_view()
-                messagebox.showinfo("Sukces", "Wydarzenie zostało usunięte!")
-            else:
-                messagebox.showerror("Błąd", "Nie udało się usunąć wydarzenia")
+            self._write(lambda: bool(self.event_manager.delete_event(event_id)),
+                        "Wydarzenie zostało usunięte!", "Nie udało się usunąć wydarzenia")
     
     def search_events_dialog(self):
         """Otwiera dialog wyszukiwania wydarzeń"""
         search_term = simpledialog.askstring("Wyszukiwanie", "Wpisz szukaną frazę:")
         if search_term:
-            results = self.event_manager.search_events(search_term)
-            if results:
-                result_text = f"Znaleziono {len(results)} wydarzeń:\n\n"
-                for event in results:
-                    result_text += f" {event[1]} o {event[2]} - {event[4]}\n"
-                messagebox.showinfo("Wyniki wyszukiwania", result_text)
-            else:
-                messagebox.showinfo("Wyniki wyszukiwania", "Nie znaleziono żadnych wydarzeń")
+            SearchResultsDialog(self.root, self.tasks, self.event_manager, search_term, self.go_to_event,
+                                self._show_error)
+    
+    def go_to_event(self, event):
+        """Przechodzi do dnia wydarzenia (wynik wyszukiwania)"""
+        event_date = date.fromordinal(event.day)
+        self.current_date = event_date
+        self.selected_date = event_date
+        self.update_calendar()
+        self.update_daily_view()
     
     def show_context_menu(self, event):
         """Pokazuje menu kontekstowe"""
@@ -352,16 +590,268 @@ class CalendarGUI:
             context_menu.tk_popup(event.x_root, event.y_root)
 
 
+class SearchResultsDialog:
+    """Okno wyników wyszukiwania - lista wirtualna
+    
+    Treeview ma stałą pulę SEARCH_VISIBLE_ROWS wierszy, których wartości są
+    podmieniane przy przewijaniu, a pasek przewijania odpowiada całej liście.
+    Wyniki (najpierw serie cykliczne, potem wydarzenia po dacie) są pobierane
+    w tle stronami - kursorem z poprzedniej strony albo offsetem przy skoku
+    paskiem - i trzymane w najwyżej SEARCH_CACHED_PAGES stronach, więc okno
+    otwiera się od razu, a pamięć nie zależy od liczby trafień. Pobieranie
+    stron, które zniknęły z widoku, jest anulowane.
+    """
+    
+    _instances = 0
+    
+    def __init__(self, parent, tasks, event_manager, search_term, on_select, on_error):
+        self.tasks = tasks
+        self.event_manager = event_manager
+        self.search_term = search_term
+        self.on_select = on_select
+        self.on_error = on_error
+        SearchResultsDialog._instances += 1
+        self.instance = SearchResultsDialog._instances
+        
+        # Serie, liczba wszystkich wierszy (None przed pierwszą odpowiedzią), strony i kursory ich początków
+        self.series = []
+        self.total = None
+        self.pages = {}
+        self.cursors = {}
+        self.requested = set()
+        # Pierwszy widoczny i zaznaczony wiersz listy oraz wartości w wierszach Treeview
+        self.first = 0
+        self.selected_index = None
+        self.rendered = [None] * SEARCH_VISIBLE_ROWS
+        self.closed = False
+        
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title(f"Wyniki wyszukiwania: {search_term}")
+        self.dialog.geometry("750x500")
+        self.dialog.transient(parent)
+        self.dialog.protocol("WM_DELETE_WINDOW", self.close)
+        self.setup_dialog()
+        
+        self.tasks.submit(self._key(0), self._fetch_first_page, self._first_page_loaded, self._failed(0))
+    
+    def setup_dialog(self):
+        """Tworzy interfejs okna"""
+        main_frame = ttk.Frame(self.dialog, padding="10")
+        main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.dialog.columnconfigure(0, weight=1)
+        self.dialog.rowconfigure(0, weight=1)
+        main_frame.columnconfigure(0, weight=1)
+        main_frame.rowconfigure(1, weight=1)
+        
+        self.status_label = ttk.Label(main_frame, text="Wyszukiwanie...")
+        self.status_label.grid(row=0, column=0, columnspan=2, sticky=tk.W, pady=(0, 10))
+        
+        columns = ("date", "time", "title", "description")
+        self.tree = ttk.Treeview(main_frame, columns=columns, show="headings", height=SEARCH_VISIBLE_ROWS,
+                                 selectmode="browse")
+        self.tree.heading("date", text="Data")
+        self.tree.heading("time", text="Godzina")
+        self.tree.heading("title", text="Tytuł")
+        self.tree.heading("description", text="Opis")
+        self.tree.column("date", width=100, minwidth=90)
+        self.tree.column("time", width=70, minwidth=60)
+        self.tree.column("title", width=250, minwidth=150)
+        self.tree.column("description", width=280, minwidth=150)
+        for row in range(SEARCH_VISIBLE_ROWS):
+            self.tree.insert("", "end", iid=str(row), values=("", "", "", ""))
+        
+        # Pasek przewijania steruje pozycją w całej liście, nie w wierszach Treeview
+        self.scrollbar = ttk.Scrollbar(main_frame, orient=tk.VERTICAL, command=self.yview)
+        self.tree.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.scrollbar.grid(row=1, column=1, sticky=(tk.N, tk.S))
+        
+        self.tree.bind("<<TreeviewSelect>>", self.on_tree_select)
+        self.tree.bind("<Double-1>", self.open_selected)
+        self.tree.bind("<Return>", self.open_selected)
+        self.tree.bind("<MouseWheel>", lambda event: self.scroll(-3 if event.delta > 0 else 3))
+        self.tree.bind("<Button-4>", lambda event: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda event: self.scroll(3))
+        self.tree.bind("<Up>", lambda event: self.move_selection(-1))
+        self.tree.bind("<Down>", lambda event: self.move_selection(1))
+        self.tree.bind("<Prior>", lambda event: self.move_selection(-SEARCH_VISIBLE_ROWS))
+        self.tree.bind("<Next>", lambda event: self.move_selection(SEARCH_VISIBLE_ROWS))
+        self.tree.focus_set()
+    
+    def close(self):
+        """Zamyka okno i anuluje pobieranie stron"""
+        self.closed = True
+        for page in self.requested:
+            self.tasks.cancel(self._key(page))
+        self.dialog.destroy()
+    
+    def _key(self, page):
+        return ("search", self.instance, page)
+    
+    def _fetch_first_page(self):
+        """Wątek roboczy: serie, liczba wydarzeń i pierwsza strona"""
+        return (self.event_manager.search_recurring_events(self.search_term),
+                self.event_manager.count_search_results(self.search_term),
+                self.event_manager.search_events_page(self.search_term, limit=SEARCH_PAGE_SIZE))
+    
+    def _first_page_loaded(self, result):
+        if self.closed:
+            return
+        series, count, events = result
+        self.series = series
+        self.total = len(series) + count
+        if self.total:
+            self.status_label.config(text=f"Znaleziono {self.total} wydarzeń")
+        else:
+            self.status_label.config(text="Nie znaleziono żadnych wydarzeń")
+        self._page_loaded(0, events)
+    
+    def _request_page(self, page):
+        """Zleca pobranie strony wydarzeń (numer od 0) w tle"""
+        if page in self.pages or page in self.requested:
+            return
+        cursor = self.cursors.get(page)
+        if cursor:
+            def fetch():
+                return self.event_manager.search_events_page(self.search_term, after=cursor, limit=SEARCH_PAGE_SIZE)
+        else:
+            def fetch():
+                return self.event_manager.search_events_page(self.search_term, limit=SEARCH_PAGE_SIZE,
+                                                             offset=page * SEARCH_PAGE_SIZE)
+        self.requested.add(page)
+        self.tasks.submit(self._key(page), fetch, lambda events: self._page_loaded(page, events),
+                          self._failed(page))
+    
+    def _page_loaded(self, page, events):
+        if self.closed:
+            return
+        self.requested.discard(page)
+        self.pages[page] = events
+        if len(events) == SEARCH_PAGE_SIZE:
+            last = events[-1]
+            self.cursors[page + 1] = (last.date, last.start_time, last.id)
+        
+        # Zostają strony najbliższe widocznej
+        current = max(self.first - len(self.series), 0) // SEARCH_PAGE_SIZE
+        for stale in sorted(self.pages, key=lambda number: abs(number - current))[SEARCH_CACHED_PAGES:]:
+            del self.pages[stale]
+        self.render()
+    
+    def _failed(self, page):
+        def failed(error):
+            self.requested.discard(page)
+            if not self.closed:
+                self.status_label.config(text="Błąd wyszukiwania")
+                self.on_error(error)
+        return failed
+    
+    def _row_at(self, index, missing):
+        """Wynik o numerze index albo None, jeśli jego strona nie jest wczytana (numer trafia do missing)"""
+        if index < len(self.series):
+            return self.series[index]
+        position = index - len(self.series)
+        page = self.pages.get(position // SEARCH_PAGE_SIZE)
+        if page is None:
+            missing.add(position // SEARCH_PAGE_SIZE)
+            return None
+        offset = position % SEARCH_PAGE_SIZE
+        return page[offset] if offset < len(page) else None
+    
+    def render(self):
+        """Wypełnia wiersze Treeview wynikami od self.first - zmieniane są tylko wiersze, które się różnią"""
+        if self.total is None or self.closed:
+            return
+        self.first = max(0, min(self.first, self.total - SEARCH_VISIBLE_ROWS))
+        missing = set()
+        for row in range(SEARCH_VISIBLE_ROWS):
+            index = self.first + row
+            values = ("", "", "", "")
+            if index < self.total:
+                event = self._row_at(index, missing)
+                if event is None:
+                    values = ("", "", "Wczytywanie...", "")
+                else:
+                    title = f"↻ {event.title}" if isinstance(event.id, str) else event.title
+                    values = (event.date, event.start_time, title, event.description or "")
+            if self.rendered[row] != values:
+                self.tree.item(str(row), values=values)
+                self.rendered[row] = values
+        
+        # Pobieranie stron, które przestały być widoczne, jest anulowane
+        for page in self.requested - missing:
+            self.tasks.cancel(self._key(page))
+            self.requested.discard(page)
+        for page in missing:
+            self._request_page(page)
+        
+        if self.selected_index is not None and 0 <= self.selected_index - self.first < SEARCH_VISIBLE_ROWS:
+            self.tree.selection_set(str(self.selected_index - self.first))
+        elif self.tree.selection():
+            self.tree.selection_remove(*self.tree.selection())
+        if self.total:
+            self.scrollbar.set(self.first / self.total, min((self.first + SEARCH_VISIBLE_ROWS) / self.total, 1))
+        else:
+            self.scrollbar.set(0, 1)
+    
+    def yview(self, *args):
+        """Polecenie paska przewijania ('moveto', ułamek) albo ('scroll', liczba, 'units'/'pages')"""
+        if self.total is None:
+            return
+        if args[0] == "moveto":
+            self.first = int(float(args[1]) * self.total)
+        elif args[0] == "scroll":
+            self.first += int(args[1]) * (SEARCH_VISIBLE_ROWS if args[2] == "pages" else 1)
+        self.render()
+    
+    def scroll(self, rows):
+        self.yview("scroll", rows, "units")
+        return "break"
+    
+    def move_selection(self, step):
+        """Przesuwa zaznaczenie o step wierszy listy, przewijając ją w razie potrzeby"""
+        if not self.total:
+            return "break"
+        index = self.first if self.selected_index is None else self.selected_index + step
+        self.selected_index = max(0, min(index, self.total - 1))
+        if self.selected_index < self.first:
+            self.first = self.selected_index
+        elif self.selected_index >= self.first + SEARCH_VISIBLE_ROWS:
+            self.first = self.selected_index - SEARCH_VISIBLE_ROWS + 1
+        self.render()
+        return "break"
+    
+    def on_tree_select(self, event=None):
+        selection = self.tree.selection()
+        if selection:
+            self.selected_index = self.first + int(selection[0])
+    
+    def open_selected(self, event=None):
+        """Przechodzi do dnia zaznaczonego wyniku"""
+        if self.selected_index is None or self.total is None:
+            return
+        found = self._row_at(self.selected_index, set())
+        if found is not None:
+            self.on_select(found)
+
+
 class EventDialog:
     """Dialog do dodawania/edycji wydarzeń"""
     
-    def __init__(self, parent, title, initial_data=None):
+    # Opcje powtarzania -> reguła RRULE
+    REPEAT_OPTIONS = {
+        "Nie powtarzaj": None,
+        "Codziennie": "FREQ=DAILY",
+        "Co tydzień": "FREQ=WEEKLY",
+        "Co miesiąc": "FREQ=MONTHLY",
+    }
+    
+    def __init__(self, parent, title, initial_data=None, show_repeat=False):
         self.result = None
+        self.show_repeat = show_repeat
         
         # Tworzenie okna dialogowego
         self.dialog = tk.Toplevel(parent)
         self.dialog.title(title)
-        self.dialog.geometry("400x300")
+        self.dialog.geometry("400x340" if show_repeat else "400x300")
         self.dialog.transient(parent)
         self.dialog.grab_set()
         
@@ -400,9 +890,16 @@ class EventDialog:
         if initial_data and initial_data.get("description"):
             self.description_text.insert("1.0", initial_data["description"])
         
+        # Powtarzanie (tylko przy dodawaniu)
+        self.repeat_var = tk.StringVar(value="Nie powtarzaj")
+        if self.show_repeat:
+            ttk.Label(main_frame, text="Powtarzaj:").grid(row=4, column=0, sticky=tk.W, pady=5)
+            ttk.Combobox(main_frame, textvariable=self.repeat_var, values=list(self.REPEAT_OPTIONS),
+                         state="readonly", width=28).grid(row=4, column=1, pady=5, sticky=(tk.W, tk.E))
+        
         # Przyciski
         button_frame = ttk.Frame(main_frame)
-        button_frame.grid(row=4, column=0, columnspan=2, pady=20)
+        button_frame.grid(row=5, column=0, columnspan=2, pady=20)
         
         ttk.Button(button_frame, text="Zapisz", command=self.save_event).grid(row=0, column=0, padx=5)
         ttk.Button(button_frame, text="Anuluj", command=self.dialog.destroy).grid(row=0, column=1, padx=5)
@@ -429,7 +926,8 @@ class EventDialog:
             "start_time": start_time,
             "end_time": end_time if end_time else None,
             "title": title,
-            "description": description
+            "description": description,
+            "rule": self.REPEAT_OPTIONS.get(self.repeat_var.get())
         }
         
         self.dialog.destroy()
@@ -0,0 +1,95 @@
+"""
+Publikacja zmian wydarzeń w obrębie procesu (dla /api/stream)
+
+Zmiany trafiają do wspólnego bufora cyklicznego, a subskrybenci czekają
+na jednym obiekcie Condition i pamiętają tylko numer ostatniej odczytanej
+wersji - bezczynny subskrybent nie ma własnej kolejki i nie kosztuje nic
+poza czekającym wątkiem. Subskrybent, który został w tyle dalej niż sięga
+bufor, dostaje None i musi doczytać zmiany z dziennika (change_log).
+"""
+
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+
+class ChangeFeed:
+    """Bufor cykliczny ostatnich zmian z powiadamianiem czekających subskrybentów"""
+    
+    def __init__(self, buffer_size=1024):
+        self._buffer = deque(maxlen=buffer_size)
+        self._condition = threading.Condition()
+        # Najwyższa wersja usunięta z bufora - starszych zmian już nie ma
+        self._evicted = 0
+        self.version = None
+        self.subscribers = 0
+        self.published = 0
+    
+    def start(self, version):
+        """Ustawia wersję początkową (bez odtwarzania wcześniejszej historii)"""
+        with self._condition:
+            if self.version is None:
+                self.version = self._evicted = version
+            return self.version
+    
+    def publish(self, changes):
+        """Dodaje zmiany (słowniki z kluczem 'version') i budzi subskrybentów"""
+        if not changes:
+            return
+        with self._condition:
+            for change in changes:
+                if len(self._buffer) == self._buffer.maxlen:
+                    self._evicted = self._buffer[0]['version']
+                self._buffer.append(change)
+            self.version = changes[-1]['version']
+            self.published += len(changes)
+            self._condition.notify_all()
+    
+    def since(self, version):
+        """Zmiany nowsze niż version lub None, jeśli bufor nie sięga tak daleko"""
+        with self._condition:
+            return self._since(version)
+    
+    def _since(self, version):
+        if version < self._evicted or (self.version is not None and version > self.version):
+            # Za stara wersja albo z innej bazy - rozstrzyga dziennik zmian
+            return None
+        if self.version is None or version == self.version:
+            return []
+        # Nowe zmiany są na końcu bufora - zwykle wystarczy przejrzeć kilka ostatnich
+        found = []
+        for change in reversed(self._buffer):
+            if change['version'] <= version:
+                break
+            found.append(change)
+        found.reverse()
+        return found
+    
+    def wait(self, version, timeout):
+        """Czeka najwyżej timeout sekund na zmiany nowsze niż version
+        
+        Zwraca listę zmian (pustą po upływie czasu) albo None jak since().
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self.version is not None and self.version > version, timeout)
+            return self._since(version)
+    
+    @contextmanager
+    def subscribe(self):
+        """Liczy aktywnych subskrybentów na czas trwania połączenia"""
+        with self._condition:
+            self.subscribers += 1
+        try:
+            yield self
+        finally:
+            with self._condition:
+                self.subscribers -= 1
+    
+    def stats(self):
+        with self._condition:
+            return {
+                'version': self.version,
+                'subscribers': self.subscribers,
+                'buffered': len(self._buffer),
+                'published': self.published
+            }
@@ -0,0 +1,290 @@
+"""
+Dziennik zmian wydarzeń do synchronizacji przyrostowej
+
+Każde wstawienie, zmiana i usunięcie wiersza w tabelach wydarzeń dopisuje
+przez trigger wiersz do tabeli event_changes z rosnącym numerem wersji.
+Usunięcia zostają w dzienniku jako nagrobki (op 'delete'), więc klient
+znający wersję N pobiera tylko zmiany > N zamiast całego miesiąca.
+Dla wydarzeń wielodniowych dziennik zapisuje też datę końca przed i po
+zmianie - zmiana dotyczy wszystkich miesięcy, przez które trwa wydarzenie.
+"""
+
+CHANGES_TABLE = "event_changes"
+
+# Domyślna i maksymalna liczba zmian w jednej odpowiedzi
+CHANGES_PAGE_SIZE = 500
+CHANGES_MAX_PAGE_SIZE = 5000
+
+# Rodzaje wierszy w dzienniku: pojedyncze wydarzenia i serie cykliczne
+KIND_EVENT = "event"
+KIND_SERIES = "series"
+
+
+def has_change_log(conn, table):
+    """Czy triggery dziennika zmian dla tabeli wydarzeń już istnieją"""
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = ?",
+                        (f"{table}_changes_ai",)).fetchone() is not None
+
+
+def install_change_log(conn, table, kind=KIND_EVENT, columns=None, end_column=None, seed=True):
+    """Tworzy tabelę dziennika zmian i triggery dla tabeli wydarzeń
+    
+    Przy pierwszej instalacji dla danej tabeli istniejące wiersze są
+    zapisywane jako wstawienia, żeby synchronizacja od wersji 0 dawała
+    pełny stan (z seed=False - później, porcjami seed_changes). Z columns
+    zmianą jest tylko UPDATE tych kolumn - kolumny pomocnicze (np.
+    wypełniane przez migrację) nie trafiają do dziennika.
+    end_column to kolumna daty końca zapisywana w end_date/old_end_date
+    (dziennik musi już mieć te kolumny, zob. add_end_date_columns).
+    """
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS {CHANGES_TABLE} (
+            version INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            event_id INTEGER NOT NULL,
+            op TEXT NOT NULL,
+            date TEXT,
+            old_date TEXT,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    exists = has_change_log(conn, table)
+    _create_triggers(conn, table, kind, columns, end_column)
+    
+    if not exists and seed:
+        cursor.execute(f'''
+            INSERT INTO {CHANGES_TABLE} (kind, event_id, op, date)
+            SELECT '{kind}', id, 'insert', date FROM {table} ORDER BY id
+        ''')
+
+
+def seed_changes(conn, table, kind, first_id, last_id, end_column=None):
+    """Zapisuje wiersze z zakresu id [first_id, last_id] jako wstawienia (dziennik zainstalowany z seed=False)
+    
+    Wiersze usunięte przed zapisaniem mają już nagrobek, zmienione - wpis
+    zmiany, więc wstawienie z bieżącym stanem tylko uzupełnia pełny stan.
+    """
+    end = (", end_date", f", {end_column}") if end_column else ("", "")
+    conn.execute(f'''
+        INSERT INTO {CHANGES_TABLE} (kind, event_id, op, date{end[0]})
+        SELECT '{kind}', id, 'insert', date{end[1]} FROM {table} WHERE id BETWEEN ? AND ? ORDER BY id
+    ''', (first_id, last_id))
+
+
+def _create_triggers(conn, table, kind, columns, end_column):
+    trigger = f"{table}_changes"
+    # Z kolumną daty końca: (lista kolumn, wartości nowego wiersza, wartości starego)
+    end = (", end_date", f", new.{end_column}", f", old.{end_column}") if end_column else ("", "", "")
+    old_end = (", old_end_date", f", old.{end_column}") if end_column else ("", "")
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {trigger}_ai AFTER INSERT ON {table} BEGIN
+            INSERT INTO {CHANGES_TABLE} (kind, event_id, op, date{end[0]})
+            VALUES ('{kind}', new.id, 'insert', new.date{end[1]});
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {trigger}_au
+        AFTER UPDATE{" OF " + ", ".join(columns) if columns else ""} ON {table} BEGIN
+            INSERT INTO {CHANGES_TABLE} (kind, event_id, op, date, old_date{end[0]}{old_end[0]})
+            VALUES ('{kind}', new.id, 'update', new.date, old.date{end[1]}{old_end[1]});
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {trigger}_ad AFTER DELETE ON {table} BEGIN
+            INSERT INTO {CHANGES_TABLE} (kind, event_id, op, old_date{old_end[0]})
+            VALUES ('{kind}', old.id, 'delete', old.date{old_end[1]});
+        END
+    ''')
+
+
+def drop_update_trigger(conn, table):
+    """Usuwa trigger zmian UPDATE (przed ponowną instalacją z inną listą kolumn)"""
+    conn.execute(f"DROP TRIGGER IF EXISTS {table}_changes_au")
+
+
+def replace_triggers(conn, table, kind=KIND_EVENT, columns=None, end_column=None):
+    """Tworzy triggery dziennika na nowo (np. z datą końca) - bez ponownego zapisu istniejących wierszy"""
+    for suffix in ("ai", "au", "ad"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {table}_changes_{suffix}")
+    _create_triggers(conn, table, kind, columns, end_column)
+
+
+def add_end_date_columns(conn):
+    """Kolumny dat końca (przed i po zmianie) w istniejącym dzienniku zmian"""
+    conn.execute(f"ALTER TABLE {CHANGES_TABLE} ADD COLUMN end_date TEXT")
+    conn.execute(f"ALTER TABLE {CHANGES_TABLE} ADD COLUMN old_end_date TEXT")
+
+
+def install_date_indexes(conn):
+    """Indeksy dziennika po datach zmian - do wersji miesiąca (month_version)
+    
+    Indeksy dat sprzed zmiany i dat końca są częściowe (puste dla wstawień
+    i wydarzeń jednodniowych), zmiany serii mają osobny indeks częściowy.
+    Wersja jest identyfikatorem wiersza, więc każdy indeks ją zawiera.
+    """
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_event_changes_date ON {CHANGES_TABLE}(date)")
+    for column in ("old_date", "end_date", "old_end_date"):
+        conn.execute(f'''
+            CREATE INDEX IF NOT EXISTS idx_event_changes_{column} ON {CHANGES_TABLE}({column})
+            WHERE {column} IS NOT NULL
+        ''')
+    conn.execute(f'''
+        CREATE INDEX IF NOT EXISTS idx_event_changes_series ON {CHANGES_TABLE}(kind)
+        WHERE kind = '{KIND_SERIES}'
+    ''')
+
+
+def current_version(conn):
+    """Numer ostatniej zapisanej zmiany (0 dla pustego dziennika)"""
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (CHANGES_TABLE,)).fetchone()
+    return row[0] if row else 0
+
+
+def read_changes(conn, since, limit=CHANGES_PAGE_SIZE, end_dates=True):
+    """Zmiany o wersji większej niż since, najwyżej limit wierszy dziennika
+    
+    Zwraca słownik {'version', 'latest', 'has_more', 'reset', 'changes'}.
+    Kolejne zmiany tego samego wydarzenia w obrębie strony są łączone
+    w jedną (najnowsza wersja, old_date-old_end_date obejmuje wszystkie
+    wcześniejsze położenia wydarzenia). 'version' to wersja, od której
+    klient pyta następnym razem; 'reset' oznacza, że potrzebnych zmian już
+    nie ma w dzienniku (przycięty albo inna baza) i klient musi wczytać
+    pełny stan. end_dates=False dla dziennika bez
+    kolumn dat końca (daty końca są wtedy None).
+    """
+    latest = current_version(conn)
+    oldest = conn.execute(f"SELECT MIN(version) FROM {CHANGES_TABLE}").fetchone()[0]
+    if needs_reset(since, latest, oldest):
+        return reset_page(latest)
+    
+    rows = conn.execute(f'''
+        SELECT version, kind, event_id, op, date, old_date, {"end_date, old_end_date" if end_dates else "NULL, NULL"}
+        FROM {CHANGES_TABLE}
+        WHERE version > ?
+        ORDER BY version
+        LIMIT ?
+    ''', (since, limit + 1)).fetchall()
+    return build_page(rows, since, latest, limit)
+
+
+def month_version(conn, start_date, end_date, upto, end_dates=True):
+    """Wersja ostatniej zmiany (najwyżej upto) dotyczącej dni [start_date, end_date)
+    
+    Zmiana wydarzenia dotyczy dni, przez które trwało przed nią i po niej,
+    zmiana serii - każdego miesiąca. end_dates=False dla dziennika bez
+    kolumn dat końca. Zob. combine_month_version.
+    """
+    # Osobne zapytanie dla każdego indeksu dat; zmiany serii i tak liczą się w każdym miesiącu
+    branches = ["date >= ?1 AND date < ?2", "old_date >= ?1 AND old_date < ?2"]
+    if end_dates:
+        branches += ["end_date >= ?1 AND date < ?1", "old_end_date >= ?1 AND old_date < ?1"]
+    touching = conn.execute(f'''
+        SELECT MAX(version) FROM (
+            {" UNION ALL ".join(f"SELECT version FROM {CHANGES_TABLE} WHERE {branch}" for branch in branches)}
+        ) WHERE version <= ?3
+    ''', (start_date, end_date, upto)).fetchone()[0]
+    series = conn.execute(f'''
+        SELECT MAX(version) FROM {CHANGES_TABLE} WHERE kind = '{KIND_SERIES}' AND version <= ?
+    ''', (upto,)).fetchone()[0]
+    oldest = conn.execute(f"SELECT MIN(version) FROM {CHANGES_TABLE}").fetchone()[0]
+    return combine_month_version(touching, series, oldest, current_version(conn), upto)
+
+
+def change_touches(change, start_date, end_date):
+    """Czy wiersz dziennika (version, kind, event_id, op, date, old_date, end_date, old_end_date)
+    dotyczy dni [start_date, end_date) - warunek month_version dla backendów bez SQL"""
+    _, _, _, _, event_date, old_date, last_date, old_last_date = change
+    return any(first is not None and first < end_date and (last or first) >= start_date
+               for first, last in ((event_date, last_date), (old_date, old_last_date)))
+
+
+def combine_month_version(touching, series, oldest, latest, upto):
+    """Wersja miesiąca z ostatniej zmiany wydarzenia w miesiącu i ostatniej zmiany serii
+    
+    Zmiany usunięte przy przycinaniu dziennika liczą się jako wersja tuż
+    przed najstarszą zachowaną, więc miesiąc nie wraca do wersji, którą
+    miał wcześniejszy stan. Wspólne dla wszystkich backendów.
+    """
+    horizon = latest if oldest is None else oldest - 1
+    return min(upto, max(touching or 0, series or 0, horizon))
+
+
+def needs_reset(since, latest, oldest):
+    """Czy zmian od wersji since nie da się odtworzyć z dziennika
+    
+    oldest to najmniejsza wersja w dzienniku (None dla pustego).
+    """
+    return since > latest or (since < latest and (oldest is None or since < oldest - 1))
+
+
+def reset_page(latest):
+    """Odpowiedź read_changes nakazująca klientowi wczytanie pełnego stanu"""
+    return {'version': latest, 'latest': latest, 'has_more': False, 'reset': True, 'changes': []}
+
+
+def build_page(rows, since, latest, limit):
+    """Strona zmian z wierszy dziennika (version, kind, event_id, op, date, old_date, end_date, old_end_date)
+    
+    rows to najwyżej limit + 1 kolejnych wierszy po wersji since - nadmiarowy
+    wiersz oznacza, że jest następna strona. Wspólne dla wszystkich backendów.
+    """
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    
+    merged = {}
+    for version, kind, event_id, op, event_date, old_date, end_date, old_end_date in rows:
+        previous = merged.pop((kind, event_id), None)
+        if previous is not None:
+            # Wstawienie zmienione później to nadal nowe wydarzenie dla klienta
+            if previous['op'] == 'insert' and op == 'update':
+                op = 'insert'
+            # Wszystkie wcześniejsze położenia wydarzenia (także pośrednie i dzień
+            # wstawienia przed usunięciem) - klient unieważnia każdy z tych dni
+            old_date, old_end_date = _covering_span((previous['old_date'], previous['old_end_date']),
+                                                    (previous['date'], previous['end_date']),
+                                                    (old_date, old_end_date))
+        merged[(kind, event_id)] = {
+            'version': version,
+            'kind': kind,
+            'event_id': event_id,
+            'op': op,
+            'date': event_date,
+            'old_date': old_date,
+            'end_date': end_date,
+            'old_end_date': old_end_date
+        }
+    
+    return {
+        'version': rows[-1][0] if rows else since,
+        'latest': latest,
+        'has_more': has_more,
+        'reset': False,
+        # Słownik zachowuje kolejność wstawiania, a pop() przenosi zmienione na koniec
+        'changes': list(merged.values())
+    }
+
+
+def _covering_span(*spans):
+    """Najmniejszy przedział (pierwszy dzień, ostatni dzień lub None) obejmujący przedziały dat
+    
+    Ostatni dzień None oznacza wydarzenie jednodniowe; (None, None) bez żadnej daty.
+    """
+    spans = [(first, last or first) for first, last in spans if first]
+    if not spans:
+        return None, None
+    first = min(first for first, _ in spans)
+    last = max(last for _, last in spans)
+    return first, last if last != first else None
+
+
+def prune_changes(conn, keep):
+    """Usuwa z dziennika zmiany starsze niż ostatnie keep wersji
+    
+    Klienci z wersją sprzed przycięcia dostaną 'reset' i wczytają pełny stan.
+    Zwraca liczbę usuniętych wierszy.
+    """
+    cursor = conn.execute(f"DELETE FROM {CHANGES_TABLE} WHERE version <= ?",
+                          (current_version(conn) - keep,))
+    return cursor.rowcount
@@ -0,0 +1,65 @@
+"""
+Konfiguracja aplikacji webowej ze zmiennych środowiskowych
+
+Te same ustawienia czyta serwer deweloperski (python main.py), punkt
+wejścia WSGI (wsgi.py) i konfiguracja gunicorna (gunicorn.conf.py).
+"""
+
+import os
+import secrets
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def _env_bool(name, default):
+    value = os.environ.get(name)
+    if not value:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _database_url():
+    """KALENDARZ_DATABASE_URL albo ścieżka pliku SQLite z KALENDARZ_DB_PATH
+    
+    Adres wybiera backend magazynu - zob. storage.open_storage.
+    """
+    if os.environ.get("KALENDARZ_DATABASE_URL"):
+        return os.environ["KALENDARZ_DATABASE_URL"]
+    # Ścieżka względna jest liczona od katalogu instance/
+    return "sqlite:///" + os.environ.get("KALENDARZ_DB_PATH", "calendar.db")
+
+
+class Config:
+    """Ustawienia Flask i serwera produkcyjnego"""
+    
+    # Bez KALENDARZ_SECRET_KEY klucz jest losowany przy starcie procesu -
+    # przy wielu workerach trzeba go ustawić, jeśli aplikacja zacznie używać sesji
+    SECRET_KEY = os.environ.get("KALENDARZ_SECRET_KEY") or secrets.token_hex(32)
+    DATABASE_URL = _database_url()
+    # Debugger Werkzeug pokazuje ślady stosu - tylko na żądanie
+    DEBUG = _env_bool("KALENDARZ_DEBUG", False)
+    
+    HOST = os.environ.get("KALENDARZ_HOST", "0.0.0.0")
+    PORT = _env_int("KALENDARZ_PORT", 5001)
+    
+    # Procesy i wątki na proces - każde żądanie (także otwarty strumień SSE)
+    # zajmuje wątek, więc wolne zapytanie nie blokuje pozostałych
+    WORKERS = _env_int("KALENDARZ_WORKERS", min(2 * (os.cpu_count() or 1) + 1, 8))
+    THREADS = _env_int("KALENDARZ_THREADS", 16)
+    WORKER_CLASS = os.environ.get("KALENDARZ_WORKER_CLASS", "gthread")
+    
+    # Co ile sekund strumień SSE sprawdza zmiany z innych workerów
+    STREAM_HEARTBEAT_SECONDS = _env_int("KALENDARZ_STREAM_HEARTBEAT", 15)
+
+    # Strefa czasowa wydarzeń zapisanych bez strefy (nazwa IANA)
+    TIMEZONE = os.environ.get("KALENDARZ_TIMEZONE", "Europe/Warsaw")
+
+    # Metryki Prometheusa pod /metrics (czasy tras i operacji bazy, połączenia, cache)
+    METRICS = _env_bool("KALENDARZ_METRICS", False)
+    # Profilowanie cProfile żądań z nagłówkiem X-Kalendarz-Profile; pliki .prof w katalogu
+    # (ścieżka względna od instance/)
+    PROFILING = _env_bool("KALENDARZ_PROFILING", False)
+    PROFILE_DIR = os.environ.get("KALENDARZ_PROFILE_DIR", "profiles")
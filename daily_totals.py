@@ -0,0 +1,106 @@
+"""
+Zmaterializowane sumy dzienne wydarzeń (SQLite)
+Używane przez DatabaseManager (tabela events)
+
+Tabela daily_totals trzyma dla każdego dnia liczbę wydarzeń jednodniowych
+i ich zajęte minuty; triggery poprawiają ją przy każdym wstawieniu, zmianie
+i usunięciu wydarzenia, w tej samej transakcji. Podsumowanie wielu lat to
+odczyt kilku tysięcy wierszy po kluczu głównym zamiast grupowania
+wszystkich wydarzeń.
+
+Wydarzenia wielodniowe (z end_date) i wystąpienia serii cyklicznych nie są
+w tabeli - dzielą się na dni dopiero przy odczycie (indeks przedziałów,
+rozwijanie reguł), tak samo jak w podsumowaniu liczonym z wydarzeń.
+"""
+
+TOTALS_TABLE = "daily_totals"
+# Sumy dni z zakresu [?, ?) - (data, liczba, minuty) z zakresu klucza głównego
+TOTALS_RANGE_SQL = f"SELECT date, event_count, busy_minutes FROM {TOTALS_TABLE} WHERE date >= ? AND date < ?"
+
+# Wiersz wydarzenia jednodniowego (prefiks new./old.) i jego zajęte minuty - jak w podsumowaniu dni
+_SINGLE_DAY_SQL = "{row}.end_date IS NULL AND {row}.start_ts IS NOT NULL"
+_MINUTES_SQL = "COALESCE({row}.end_ts - {row}.start_ts, 0)"
+
+
+def _add_sql(row):
+    """Dopisanie wiersza wydarzenia do sumy jego dnia (upsert)"""
+    return f'''
+        INSERT INTO {TOTALS_TABLE} (date, event_count, busy_minutes)
+        SELECT {row}.date, 1, {_MINUTES_SQL.format(row=row)} WHERE {_SINGLE_DAY_SQL.format(row=row)}
+        ON CONFLICT(date) DO UPDATE SET event_count = event_count + 1,
+                                        busy_minutes = busy_minutes + excluded.busy_minutes;
+    '''
+
+
+def _subtract_sql(row):
+    """Odjęcie wiersza wydarzenia od sumy jego dnia; dzień bez wydarzeń znika z tabeli"""
+    return f'''
+        UPDATE {TOTALS_TABLE} SET event_count = event_count - 1,
+                                  busy_minutes = busy_minutes - {_MINUTES_SQL.format(row=row)}
+        WHERE date = {row}.date AND {_SINGLE_DAY_SQL.format(row=row)};
+        DELETE FROM {TOTALS_TABLE} WHERE date = {row}.date AND event_count <= 0;
+    '''
+
+
+def has_daily_totals(conn):
+    """Czy baza ma tabelę sum dziennych"""
+    cursor = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (TOTALS_TABLE,))
+    return cursor.fetchone() is not None
+
+
+def install_daily_totals(conn, table="events"):
+    """Tworzy pustą tabelę sum dziennych i triggery utrzymujące ją przy zapisach
+    
+    Istniejące wydarzenia wpisuje recompute_daily_totals (porcjami) - do tego
+    czasu tabela ma tylko zmiany zapisane po jej utworzeniu.
+    """
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS {TOTALS_TABLE} (
+            date TEXT PRIMARY KEY,
+            event_count INTEGER NOT NULL,
+            busy_minutes INTEGER NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {TOTALS_TABLE}_ai AFTER INSERT ON {table} BEGIN
+            {_add_sql("new")}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {TOTALS_TABLE}_ad AFTER DELETE ON {table} BEGIN
+            {_subtract_sql("old")}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {TOTALS_TABLE}_au
+        AFTER UPDATE OF date, start_ts, end_ts, end_date ON {table} BEGIN
+            {_subtract_sql("old")}
+            {_add_sql("new")}
+        END
+    ''')
+
+
+def recompute_daily_totals(conn, start_date, end_date=None, table="events"):
+    """Przelicza od nowa sumy dni z zakresu [start_date, end_date) z wierszy wydarzeń (None - bez końca)
+    
+    Wynik jest dokładny niezależnie od tego, co triggery zdążyły wpisać
+    wcześniej, więc wypełnianie porcjami można przerwać i powtórzyć.
+    """
+    condition, params = ("date >= ?", (start_date,)) if end_date is None \
+        else ("date >= ? AND date < ?", (start_date, end_date))
+    conn.execute(f"DELETE FROM {TOTALS_TABLE} WHERE {condition}", params)
+    conn.execute(f'''
+        INSERT INTO {TOTALS_TABLE} (date, event_count, busy_minutes)
+        SELECT date, COUNT(*), COALESCE(SUM(end_ts - start_ts), 0)
+        FROM {table}
+        WHERE {condition} AND start_ts IS NOT NULL AND end_date IS NULL
+        GROUP BY date
+    ''', params)
+
+
+def drop_daily_totals(conn):
+    """Usuwa tabelę sum dziennych i jej triggery"""
+    for suffix in ("ai", "ad", "au"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {TOTALS_TABLE}_{suffix}")
+    conn.execute(f"DROP TABLE IF EXISTS {TOTALS_TABLE}")
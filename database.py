@@ -1,115 +1,1061 @@
 import sqlite3
 import os
-from datetime import datetime, date
+import threading
+import heapq
+from contextlib import contextmanager
+from datetime import datetime, date, timedelta
+from itertools import chain, starmap
+from operator import itemgetter
 
-class DatabaseManager:
-    """Klasa do zarządzania bazą danych SQLite dla kalendarza"""
+import search_index
+import span_index
+import daily_totals
+import recurrence
+import change_log
+import timezones
+from event_record import EPOCH_DAY, EventRecord, date_to_day, date_to_timestamp, day_to_date
+from interval_index import MINUTES_PER_DAY, time_to_minutes
+from migrations import Migration, Migrator, schema_version, set_schema_version
+from storage import Storage, month_range, event_values, day_totals
+
+_EVENT_COLUMN_NAMES = ("id", "date", "start_time", "end_time", "title", "description", "tz")
+# Kolumny wydarzeń wielodniowych i całodniowych (od migracji 7)
+_EVENT_SPAN_COLUMNS = ("end_date", "all_day")
+# Kolumny kolejnych pól storage.event_values
+_EVENT_VALUE_COLUMNS = ("date", "start_time", "end_time", "title", "description", "tz", "end_date", "all_day",
+                        "start_utc", "end_utc", "start_ts", "end_ts")
+
+# Kolumny danych - tylko ich zmiana trafia do dziennika zmian
+_EVENT_DATA_COLUMNS = ("date", "start_time", "end_time", "title", "description")
+_SERIES_DATA_COLUMNS = _EVENT_DATA_COLUMNS + ("rrule", "exdates")
+
+# Wersja schematu, od której wydarzenia mają wypełnione start_ts/end_ts z indeksem
+INTEGER_TIMES_VERSION = 4
+# Wersja z kolumnami start_utc/end_utc (zapisy wypełniają je od razu)
+UTC_COLUMNS_VERSION = 5
+# Wersja, od której wydarzenia mają strefę i chwile start_utc/end_utc z indeksem
+UTC_TIMES_VERSION = 6
+# Wersja z kolumnami end_date/all_day (zapisy wydarzeń wielodniowych i całodniowych)
+SPAN_COLUMNS_VERSION = 7
+# Wersja, od której każde wydarzenie trwające po północy ma end_date i jest w indeksie przedziałów
+MULTI_DAY_VERSION = 8
+# Wersja z tabelą sum dziennych utrzymywaną triggerami (daily_totals)
+DAILY_TOTALS_VERSION = 9
+# Wersja, od której tabela sum dziennych obejmuje wszystkie wydarzenia (podsumowania z niej)
+DAILY_TOTALS_FILLED_VERSION = 10
+# Wersja z indeksami dziennika zmian po datach (ETagi miesięcy)
+CHANGE_DATE_INDEXES_VERSION = 11
+# Wersja, od której indeks pełnotekstowy i dziennik zmian obejmują wydarzenia sprzed ich utworzenia
+EXISTING_ROWS_VERSION = 12
+
+# Zaległe wypełnienia dla migracji 12: nazwa ('fts:tabela' lub 'changes:tabela')
+# i największe id, do którego zostały wiersze (wypełniane od góry)
+_PENDING_BACKFILLS_TABLE = "pending_backfills"
+
+# Wydarzenie kończy się po północy dnia rozpoczęcia (wiersze z end_date)
+_CROSSES_MIDNIGHT_SQL = "end_ts - start_ts > 1440 - (start_ts + 1440000000) % 1440"
+
+
+def time_to_minutes_sql(column):
+    """Wyrażenie SQL zamieniające 'HH:MM' na liczbę minut od północy"""
+    return f"(CAST(substr({column}, 1, 2) AS INTEGER) * 60 + CAST(substr({column}, 4, 2) AS INTEGER))"
+
+
+def start_ts_sql(date_expr, time_expr):
+    """Wyrażenie SQL: minuty od epoki Unix (1970-01-01 00:00) dla daty i godziny 'HH:MM'"""
+    return f"(CAST(julianday({date_expr}) - 2440587.5 AS INTEGER) * 1440 + {time_to_minutes_sql(time_expr)})"
+
+
+def end_ts_sql(date_expr, start_expr, end_expr):
+    """Koniec wydarzenia w minutach od epoki - NULL bez godziny, następny dzień gdy end < start"""
+    return (f"(CASE WHEN NULLIF({end_expr}, '') IS NULL THEN NULL "
+            f"ELSE {start_ts_sql(date_expr, end_expr)} + (CASE WHEN {end_expr} < {start_expr} THEN 1440 ELSE 0 END) END)")
+
+
+def _limit_change_log_triggers(conn):
+    """Migracja 2: dziennik zmian tylko dla kolumn danych (nie dla kolumn pomocniczych)"""
+    for table, kind, columns in (("events", change_log.KIND_EVENT, _EVENT_DATA_COLUMNS),
+                                 ("recurring_events", change_log.KIND_SERIES, _SERIES_DATA_COLUMNS)):
+        change_log.drop_update_trigger(conn, table)
+        change_log.install_change_log(conn, table, kind, columns)
+
+
+def _add_integer_time_columns(conn):
+    """Migracja 3: kolumny start_ts/end_ts (minuty od epoki) i tz (NULL - czas lokalny kalendarza)
+    
+    Indeksy są częściowe (tylko wiersze z start_ts), więc powstają od razu
+    i puste - wypełnianie porcjami dopisuje do nich wiersze, bez długiego
+    budowania indeksu blokującego zapisy. Kolejność (start_ts, id) obsługuje
+    zapytania zakresowe i stronicowanie; (date, start_ts, end_ts) pokrywa
+    podsumowania dni (liczba wydarzeń, zajęte minuty) bez sięgania do tabeli.
+    """
+    conn.execute("ALTER TABLE events ADD COLUMN start_ts INTEGER")
+    conn.execute("ALTER TABLE events ADD COLUMN end_ts INTEGER")
+    conn.execute("ALTER TABLE events ADD COLUMN tz TEXT")
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_events_start_ts ON events(start_ts, id, end_ts)
+        WHERE start_ts IS NOT NULL
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_events_date_ts ON events(date, start_ts, end_ts)
+        WHERE start_ts IS NOT NULL
+    ''')
+
+
+def _backfill_integer_times(conn, after, limit):
+    """Migracja 4: jedna porcja wierszy (po id) bez start_ts - obliczenie z date/start_time/end_time"""
+    ids = conn.execute("SELECT id FROM events WHERE id > ? ORDER BY id LIMIT ?", (after or 0, limit)).fetchall()
+    if not ids:
+        return None
+    conn.execute(f'''
+        UPDATE events
+        SET start_ts = {start_ts_sql("date", "start_time")},
+            end_ts = {end_ts_sql("date", "start_time", "end_time")}
+        WHERE id BETWEEN ? AND ? AND start_ts IS NULL
+    ''', (ids[0][0], ids[-1][0]))
+    return ids[-1][0] if len(ids) == limit else None
+
+
+def _drop_text_time_index(conn):
+    """Migracja 4 (koniec): indeksy po tekstowej dacie i godzinach zastąpione indeksami start_ts"""
+    conn.execute("DROP INDEX IF EXISTS idx_events_date_start")
+    conn.execute("DROP INDEX IF EXISTS idx_date")
+
+
+def _add_utc_columns(conn):
+    """Migracja 5: chwile start_utc/end_utc (minuty UTC) z częściowym indeksem okien UTC"""
+    conn.execute("ALTER TABLE events ADD COLUMN start_utc INTEGER")
+    conn.execute("ALTER TABLE events ADD COLUMN end_utc INTEGER")
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_events_utc ON events(start_utc, id, end_utc)
+        WHERE start_utc IS NOT NULL
+    ''')
+
+
+def _backfill_utc_times(conn, after, limit):
+    """Migracja 6: jedna porcja wierszy (po id) - strefa domyślna dla wierszy bez strefy i chwile UTC
+    
+    Strefy nie da się przeliczyć w SQL, więc porcja jest liczona w Pythonie.
+    Wiersze z nieczytelną godziną zostają bez start_utc (poza oknami UTC).
+    """
+    rows = conn.execute('''
+        SELECT id, date, start_time, end_time, tz, start_utc FROM events WHERE id > ? ORDER BY id LIMIT ?
+    ''', (after or 0, limit)).fetchall()
+    if not rows:
+        return None
+    updates = []
+    for event_id, event_date, start_time, end_time, tz, start_utc in rows:
+        if start_utc is not None:
+            continue
+        tz = tz or timezones.DEFAULT_TIMEZONE
+        try:
+            updates.append((tz, *timezones.event_utc_range(event_date, start_time, end_time, tz), event_id))
+        except ValueError:
+            continue
+    conn.executemany("UPDATE events SET tz = ?, start_utc = ?, end_utc = ? WHERE id = ?", updates)
+    return rows[-1][0] if len(rows) == limit else None
+
+
+def _add_span_columns(conn):
+    """Migracja 7: kolumny end_date/all_day, daty końca w dzienniku zmian i indeksy przedziałów
+    
+    Indeks częściowy obejmuje tylko wydarzenia wielodniowe (z end_date),
+    więc powstaje od razu; bez R*Tree (span_index) to on obsługuje
+    zapytania o wydarzenia trwające w danym dniu.
+    """
+    conn.execute("ALTER TABLE events ADD COLUMN end_date TEXT")
+    conn.execute("ALTER TABLE events ADD COLUMN all_day INTEGER NOT NULL DEFAULT 0")
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_events_multi_day ON events(start_ts, id, end_ts)
+        WHERE end_date IS NOT NULL
+    ''')
+    change_log.add_end_date_columns(conn)
+    change_log.replace_triggers(conn, "events", change_log.KIND_EVENT, _EVENT_DATA_COLUMNS, "end_date")
+    span_index.install_span_index(conn)
+
+
+def _backfill_multi_day(conn, after, limit):
+    """Migracja 8: jedna porcja wierszy (po id) - end_date dla wydarzeń trwających po północy
+    
+    Godzina końcowa wcześniejsza niż początkowa oznaczała następny dzień bez
+    daty końca; takie wiersze dostają end_date, a trigger dopisuje je do
+    R*Tree. Dziennik zmian nie obejmuje jeszcze kolumny end_date.
+    """
+    ids = conn.execute("SELECT id FROM events WHERE id > ? ORDER BY id LIMIT ?", (after or 0, limit)).fetchall()
+    if not ids:
+        return None
+    conn.execute(f'''
+        UPDATE events
+        SET end_date = date(date, '+1 day')
+        WHERE id BETWEEN ? AND ? AND end_date IS NULL AND {_CROSSES_MIDNIGHT_SQL}
+    ''', (ids[0][0], ids[-1][0]))
+    return ids[-1][0] if len(ids) == limit else None
+
+
+def _log_span_changes(conn):
+    """Migracja 8 (koniec): zmiana end_date/all_day trafia do dziennika zmian"""
+    change_log.drop_update_trigger(conn, "events")
+    change_log.install_change_log(conn, "events", change_log.KIND_EVENT,
+                                  _EVENT_DATA_COLUMNS + _EVENT_SPAN_COLUMNS, "end_date")
+
+
+def _add_daily_totals(conn):
+    """Migracja 9: tabela sum dziennych z triggerami - od tej chwili zapisy ją poprawiają"""
+    daily_totals.install_daily_totals(conn)
+
+
+def _backfill_daily_totals(conn, start_date, limit):
+    """Migracja 10: jedna porcja dni (około limit wydarzeń od start_date) - sumy przeliczone od nowa
+    
+    Porcja obejmuje całe dni, więc przeliczenie zastępuje także to, co
+    triggery wpisały dla tych dni od migracji 9.
+    """
+    start_date = start_date or ""
+    row = conn.execute('''
+        SELECT date FROM events WHERE date >= ? AND start_ts IS NOT NULL ORDER BY date LIMIT 1 OFFSET ?
+    ''', (start_date, limit - 1)).fetchone()
+    if row is None:
+        daily_totals.recompute_daily_totals(conn, start_date)
+        return None
+    end_date = day_to_date(date_to_day(row[0]) + 1)
+    daily_totals.recompute_daily_totals(conn, start_date, end_date)
+    return end_date
+
+
+def _add_change_date_indexes(conn):
+    """Migracja 11: indeksy dziennika zmian po datach - wersja miesiąca bez przeglądania dziennika"""
+    change_log.install_date_indexes(conn)
+
+
+def _record_pending_backfill(conn, name, table):
+    """Zapisuje, że wiersze tabeli istniejące przed instalacją indeksu lub dziennika wypełni migracja 12"""
+    last_id = conn.execute(f"SELECT MAX(id) FROM {table}").fetchone()[0]
+    if last_id is None:
+        return
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {_PENDING_BACKFILLS_TABLE} (name TEXT PRIMARY KEY, last_id INTEGER)")
+    conn.execute(f"INSERT OR REPLACE INTO {_PENDING_BACKFILLS_TABLE} (name, last_id) VALUES (?, ?)", (name, last_id))
+
+
+def _backfill_existing_rows(conn, position, limit):
+    """Migracja 12: jedna porcja zaległego wypełnienia indeksu FTS lub dziennika zmian
     
-    def __init__(self, db_path="calendar.db"):
+    Porcja to limit wierszy o największych id nie większych niż zapisane
+    last_id; nowe last_id jest zapisywane w tej samej transakcji, więc
+    przerwana migracja wznawia od miejsca, w którym skończyła. Wiersze
+    dodane po instalacji mają większe id i są już w indeksie i dzienniku.
+    """
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                        (_PENDING_BACKFILLS_TABLE,)).fetchone():
+        return None
+    pending = conn.execute(f"SELECT name, last_id FROM {_PENDING_BACKFILLS_TABLE} ORDER BY name LIMIT 1").fetchone()
+    if pending is None:
+        return None
+    name, last_id = pending
+    target, table = name.split(":")
+    ids = conn.execute(f"SELECT id FROM {table} WHERE id <= ? ORDER BY id DESC LIMIT ?", (last_id, limit)).fetchall()
+    if ids:
+        first_id = ids[-1][0]
+        if target == "fts":
+            search_index.fill_fts(conn, table, first_id, last_id)
+        elif table == "events":
+            change_log.seed_changes(conn, table, change_log.KIND_EVENT, first_id, last_id, "end_date")
+        else:
+            change_log.seed_changes(conn, table, change_log.KIND_SERIES, first_id, last_id)
+    if len(ids) < limit:
+        conn.execute(f"DELETE FROM {_PENDING_BACKFILLS_TABLE} WHERE name = ?", (name,))
+    else:
+        conn.execute(f"UPDATE {_PENDING_BACKFILLS_TABLE} SET last_id = ? WHERE name = ?", (ids[-1][0] - 1, name))
+    return name
+
+
+def _drop_pending_backfills(conn):
+    """Migracja 12 (koniec): wszystkie zaległe wypełnienia wykonane"""
+    conn.execute(f"DROP TABLE IF EXISTS {_PENDING_BACKFILLS_TABLE}")
+
+
+SCHEMA_MIGRATIONS = [
+    Migration(2, "Dziennik zmian tylko dla kolumn danych", apply=_limit_change_log_triggers),
+    Migration(3, "Kolumny start_ts/end_ts/tz w events", apply=_add_integer_time_columns),
+    Migration(INTEGER_TIMES_VERSION, "Wypełnienie start_ts/end_ts i indeks zakresowy",
+              backfill=_backfill_integer_times, finish=_drop_text_time_index),
+    Migration(UTC_COLUMNS_VERSION, "Kolumny start_utc/end_utc w events", apply=_add_utc_columns),
+    Migration(UTC_TIMES_VERSION, "Strefa i chwile UTC dla istniejących wydarzeń", backfill=_backfill_utc_times),
+    Migration(SPAN_COLUMNS_VERSION, "Kolumny end_date/all_day i indeks przedziałów", apply=_add_span_columns),
+    Migration(MULTI_DAY_VERSION, "Data końca dla wydarzeń trwających po północy",
+              backfill=_backfill_multi_day, finish=_log_span_changes),
+    Migration(DAILY_TOTALS_VERSION, "Tabela sum dziennych wydarzeń", apply=_add_daily_totals),
+    Migration(DAILY_TOTALS_FILLED_VERSION, "Sumy dzienne istniejących wydarzeń", backfill=_backfill_daily_totals),
+    Migration(CHANGE_DATE_INDEXES_VERSION, "Indeksy dziennika zmian po datach", apply=_add_change_date_indexes),
+    Migration(EXISTING_ROWS_VERSION, "Indeks pełnotekstowy i dziennik zmian istniejących wydarzeń",
+              backfill=_backfill_existing_rows, finish=_drop_pending_backfills),
+]
+
+
+class ConnectionPool:
+    """Pula długożyjących połączeń SQLite - jedno połączenie na wątek
+    
+    Połączenie jest otwierane raz przy pierwszym użyciu w danym wątku,
+    dzięki czemu kolejne zapytania nie płacą za otwarcie pliku, parsowanie
+    schematu i rozgrzewanie cache stron. Przygotowane zapytania są
+    ponownie używane przez cache instrukcji modułu sqlite3
+    (`cached_statements`), który działa w obrębie jednego połączenia.
+    """
+    
+    # Domyślne ustawienia PRAGMA dla każdego nowego połączenia
+    DEFAULT_PRAGMAS = {
+        "journal_mode": "WAL",        # czytelnicy nie blokują piszącego
+        "synchronous": "NORMAL",      # w trybie WAL bezpieczne i dużo szybsze niż FULL
+        "cache_size": -16000,         # ~16 MB cache stron na połączenie
+        "mmap_size": 134217728,       # 128 MB mapowania pamięci
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,         # ms oczekiwania na zablokowaną bazę
+    }
+    
+    def __init__(self, db_path, pragmas=None, cached_statements=256):
         self.db_path = db_path
+        self.pragmas = dict(self.DEFAULT_PRAGMAS)
+        if pragmas:
+            self.pragmas.update(pragmas)
+        self.cached_statements = cached_statements
+        
+        # Baza w pamięci musi być współdzielona między wątkami tej puli
+        if db_path == ":memory:":
+            self._uri = f"file:kalendarz-{id(self)}?mode=memory&cache=shared"
+        else:
+            self._uri = None
+        
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+        self.connections_opened = 0
+        # Callback instrukcji SQL (metryki) ustawiany każdemu połączeniu
+        self.trace = None
+    
+    def _open(self):
+        """Otwiera i konfiguruje nowe połączenie"""
+        if self._uri:
+            conn = sqlite3.connect(self._uri, uri=True, check_same_thread=False,
+                                   cached_statements=self.cached_statements)
+        else:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False,
+                                   cached_statements=self.cached_statements)
+        # Transakcje są zarządzane jawnie w transaction()
+        conn.isolation_level = None
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        if self.trace is not None:
+            conn.set_trace_callback(self.trace)
+        
+        with self._lock:
+            # Serwer WWW tworzy wątek na żądanie - połączenia zakończonych
+            # wątków są zamykane, zamiast czekać na close_all()
+            finished = [other for thread, other in self._connections if not thread.is_alive()]
+            self._connections = [(thread, other) for thread, other in self._connections if thread.is_alive()]
+            self._connections.append((threading.current_thread(), conn))
+            self.connections_opened += 1
+        for other in finished:
+            other.close()
+        return conn
+    
+    def get_connection(self):
+        """Zwraca połączenie przypisane do bieżącego wątku"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+            self._local.depth = 0
+        return conn
+    
+    @contextmanager
+    def transaction(self):
+        """Kontekst transakcji zapisu
+        
+        Transakcje mogą być zagnieżdżone - tylko najbardziej zewnętrzna
+        wykonuje COMMIT (lub ROLLBACK w przypadku wyjątku).
+        """
+        conn = self.get_connection()
+        depth = self._local.depth
+        if depth == 0:
+            conn.execute("BEGIN IMMEDIATE")
+        self._local.depth = depth + 1
+        try:
+            yield conn
+        except BaseException:
+            self._local.depth = depth
+            if depth == 0:
+                conn.execute("ROLLBACK")
+            raise
+        self._local.depth = depth
+        if depth == 0:
+            conn.execute("COMMIT")
+    
+    def set_trace(self, callback):
+        """Ustawia callback instrukcji SQL otwartym i przyszłym połączeniom (None - wyłącza)"""
+        self.trace = callback
+        with self._lock:
+            connections = [conn for _, conn in self._connections]
+        for conn in connections:
+            conn.set_trace_callback(callback)
+    
+    def stats(self):
+        """Otwarte połączenia i liczba otwartych od utworzenia puli"""
+        with self._lock:
+            return {"open": len(self._connections), "opened": self.connections_opened}
+    
+    def close_all(self):
+        """Zamyka wszystkie połączenia otwarte przez pulę"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for _, conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+
+class DatabaseManager(Storage):
+    """Klasa do zarządzania bazą danych SQLite dla kalendarza
+    
+    Backend Storage dla SQLite - zapytania zakresowe, podsumowania
+    i wyszukiwanie (FTS5) są napisane ręcznie pod indeksy tej bazy.
+    """
+    
+    def __init__(self, db_path="calendar.db", pool=None, background_migrations=True):
+        self.db_path = db_path
+        self.pool = pool or ConnectionPool(db_path)
+        self.fts_available = False
+        self.migrator = Migrator(self.pool, SCHEMA_MIGRATIONS)
+        # Tryb zapytań i zapisów zależny od wersji schematu (_apply_version)
+        self.span_index = False
+        self._apply_version(0)
         self.init_database()
+        self.run_migrations(background=background_migrations)
+    
+    def close(self):
+        """Zamyka wszystkie połączenia z bazą danych"""
+        self.migrator.stop()
+        self.pool.close_all()
+    
+    def connection_stats(self):
+        """Połączenia puli (jedno na wątek)"""
+        return self.pool.stats()
+    
+    def trace_statements(self, callback):
+        """Callback instrukcji SQL wszystkich połączeń puli (instrukcje triggerów zaczynają się od '--')"""
+        self.pool.set_trace(callback)
+    
+    def _apply_version(self, version):
+        """Ustawia tryb zapytań i zapisów dla wersji schematu (migracje w tle podnoszą ją po kolei)
+        
+        Zapytania zakresowe po start_ts i okna UTC skanem indeksu działają
+        dopiero po wypełnieniu kolumn (wcześniej po dacie tekstowej
+        i przeliczaniu wierszy); zapisy pomijają kolumny, których jeszcze nie ma.
+        """
+        self.integer_times = version >= INTEGER_TIMES_VERSION
+        self.utc_columns = version >= UTC_COLUMNS_VERSION
+        self.utc_times = version >= UTC_TIMES_VERSION
+        self.span_columns = version >= SPAN_COLUMNS_VERSION
+        # Wydarzenia wielodniowe osobnym zapytaniem o przedziały dopiero, gdy wszystkie mają end_date
+        self.spans = version >= MULTI_DAY_VERSION
+        # Podsumowania dni z tabeli sum dziennych dopiero, gdy obejmuje wszystkie wydarzenia
+        self.daily_totals = version >= DAILY_TOTALS_FILLED_VERSION
+        # Wyszukiwanie przez FTS dopiero, gdy indeks obejmuje istniejące wydarzenia
+        self.fts_enabled = self.fts_available and version >= EXISTING_ROWS_VERSION
+        if self.span_columns:
+            self.span_index = span_index.has_span_index(self.pool.get_connection())
+        self._columns = ", ".join(_EVENT_COLUMN_NAMES + (_EVENT_SPAN_COLUMNS if self.span_columns else ()))
+    
+    def _on_migration(self, migration):
+        self._apply_version(migration.version)
+    
+    def _indexed_only(self):
+        """Dodatkowy warunek pozwalający użyć częściowych indeksów start_ts"""
+        return " AND start_ts IS NOT NULL" if self.integer_times else ""
+    
+    def _single_day_only(self):
+        """Warunek pomijający wydarzenia wielodniowe (pobierane osobno - _multi_day_events)
+        
+        Z kolumn indeksu (date, start_ts, end_ts), żeby podsumowania dni nie sięgały do tabeli.
+        """
+        if not self.spans:
+            return ""
+        return f" AND (end_ts IS NULL OR NOT ({_CROSSES_MIDNIGHT_SQL}))"
+    
+    def _date_range(self, start_date, end_date):
+        """Warunek WHERE, parametry i kolejność wyników dla zakresu dat [start_date, end_date)"""
+        if self.integer_times:
+            return ("start_ts >= ? AND start_ts < ?", (date_to_timestamp(start_date), date_to_timestamp(end_date)),
+                    "start_ts, id")
+        return "date >= ? AND date < ?", (start_date, end_date), "date, start_time, id"
+    
+    def run_migrations(self, background=False, on_step=None):
+        """Wykonuje oczekujące migracje schematu
+        
+        Zmiany schematu są wykonywane od razu, a wypełnianie danych porcjami -
+        z background=True tylko pierwsza porcja, reszta w wątku w tle
+        (aplikacja w tym czasie działa na dotychczasowych indeksach).
+        """
+        def step(migration):
+            self._on_migration(migration)
+            if on_step is not None:
+                on_step(migration)
+        
+        if not self.migrator.run(chunks=1 if background else None, on_step=step) and background:
+            self.migrator.run_in_background(on_step=step)
+        self._apply_version(self.migrator.version())
+    
+    def transaction(self):
+        """Kontekst transakcji zapisu (zob. ConnectionPool.transaction)"""
+        return self.pool.transaction()
+    
+    def _value_columns(self):
+        """Kolumny zapisywane z event_values i funkcja wybierająca ich wartości
+        
+        Bez kolumn UTC przed migracją 5 (uzupełni je migracja 6) i bez
+        end_date/all_day przed migracją 7.
+        """
+        positions = list(range(6))
+        if self.span_columns:
+            positions += [6, 7]
+        if self.utc_columns:
+            positions += [8, 9]
+        positions += [10, 11]
+        return [_EVENT_VALUE_COLUMNS[position] for position in positions], itemgetter(*positions)
+    
+    def _insert_event_sql(self):
+        """SQL wstawienia i funkcja wybierająca wartości wiersza z event_values"""
+        columns, values = self._value_columns()
+        return (f"INSERT INTO events ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                values)
+    
+    def _event_values(self, *event):
+        """event_values z kontrolą, czy schemat pozwala zapisać wydarzenie
+        
+        Przed migracją 7 wydarzenie trwające po północy, ale krócej niż dobę,
+        jest zapisywane jak dawniej (godzina końcowa wcześniejsza niż
+        początkowa); dłuższe i całodniowe zgłaszają ValueError.
+        """
+        values = event_values(*event)
+        if self.span_columns or values[6] is None and not values[7]:
+            return values
+        if values[7] or values[11] - values[10] >= MINUTES_PER_DAY:
+            raise ValueError("Wydarzenia wielodniowe i całodniowe wymagają migracji bazy danych")
+        return values[:6] + (None,) + values[7:]
     
     def init_database(self):
-        """Inicjalizuje bazę danych i tworzy tabele"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        """Inicjalizuje bazę danych i tworzy tabele
+        
+        Schemat bazowy (wersja 1) jest tworzony w bazie bez numeru wersji;
+        późniejsze zmiany wprowadzają migracje (SCHEMA_MIGRATIONS).
+        """
+        with self.pool.transaction() as conn:
+            if schema_version(conn) < 1:
+                self._create_base_schema(conn)
+                set_schema_version(conn, 1)
+            # Przed migracją 12 istniejące wiersze wypełniają indeks i dziennik
+            # porcjami w migracji, a nie w tej transakcji (blokowałoby to start)
+            deferred = schema_version(conn) < EXISTING_ROWS_VERSION
             
-            # Tabela wydarzeń
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS events (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    date TEXT NOT NULL,
-                    start_time TEXT NOT NULL,
-                    end_time TEXT,
-                    title TEXT NOT NULL,
-                    description TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
+            # Indeks pełnotekstowy (FTS5) - bez niego wyszukiwanie używa LIKE
+            for table in ("events", "recurring_events"):
+                new = not search_index.has_fts(conn, table)
+                available = search_index.install_fts(conn, table, fill=not deferred)
+                if table == "events":
+                    self.fts_available = available
+                if available and new and deferred:
+                    _record_pending_backfill(conn, f"fts:{table}", table)
+            
+            # Dziennik zmian do synchronizacji przyrostowej (wersje i nagrobki)
+            for table, kind, columns in (("events", change_log.KIND_EVENT, _EVENT_DATA_COLUMNS),
+                                         ("recurring_events", change_log.KIND_SERIES, _SERIES_DATA_COLUMNS)):
+                new = not change_log.has_change_log(conn, table)
+                change_log.install_change_log(conn, table, kind, columns, seed=not deferred)
+                if new and deferred:
+                    _record_pending_backfill(conn, f"changes:{table}", table)
+            self._apply_version(schema_version(conn))
             
-            # Indeks dla szybszego wyszukiwania po dacie
+            # Indeks przedziałów (R*Tree) wydarzeń wielodniowych - bez niego indeks częściowy
+            if schema_version(conn) >= SPAN_COLUMNS_VERSION:
+                span_index.install_span_index(conn)
+    
+    def _create_base_schema(self, conn):
+        """Tabele i indeksy schematu w wersji 1 (także dla baz sprzed numerowania wersji)"""
+        cursor = conn.cursor()
+        legacy = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'events'").fetchone()
+        
+        # Tabela wydarzeń
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                date TEXT NOT NULL,
+                start_time TEXT NOT NULL,
+                end_time TEXT,
+                title TEXT NOT NULL,
+                description TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # Indeks po dacie dla zapytań zakresowych do czasu migracji 4 (indeksy
+        # start_ts); w bazach sprzed numerowania wersji już istnieje
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_date ON events(date)')
+        # Zapytania o wydarzenia zmienione od danej chwili - w istniejącej
+        # bazie budowa indeksu blokowałaby start, więc tylko w nowej
+        if not legacy:
             cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_date ON events(date)
+                CREATE INDEX IF NOT EXISTS idx_events_updated_at
+                ON events(updated_at)
             ''')
-            
-            conn.commit()
+        
+        # Wydarzenia cykliczne - jeden wiersz na regułę, wystąpienia są
+        # rozwijane przy odczycie (last_date NULL = seria bez końca)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS recurring_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                date TEXT NOT NULL,
+                start_time TEXT NOT NULL,
+                end_time TEXT,
+                title TEXT NOT NULL,
+                description TEXT,
+                rrule TEXT NOT NULL,
+                exdates TEXT NOT NULL DEFAULT '',
+                last_date TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_recurring_events_range
+            ON recurring_events(date, last_date)
+        ''')
+        
+        self._migrate_legacy_tables(conn)
     
-    def add_event(self, event_date, start_time, end_time, title, description=""):
+    def _migrate_legacy_tables(self, conn):
+        """Przenosi dane z tabel event i recurring_event dawnej wersji webowej
+        
+        Aplikacja Flask trzymała wydarzenia w osobnych tabelach modeli
+        Flask-SQLAlchemy. Wiersze są kopiowane z zachowaniem id (pusta baza
+        docelowa), a stare tabele razem z ich triggerami i FTS są usuwane.
+        """
+        legacy = {row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('event', 'recurring_event')"
+        )}
+        if not legacy:
+            return
+        if conn.execute("SELECT EXISTS (SELECT 1 FROM events) OR EXISTS (SELECT 1 FROM recurring_events)").fetchone()[0]:
+            return
+        
+        columns = "id, date, start_time, end_time, title, description, created_at, updated_at"
+        if "event" in legacy:
+            conn.execute(f"INSERT INTO events ({columns}) SELECT {columns} FROM event ORDER BY id")
+        if "recurring_event" in legacy:
+            series_columns = columns + ", rrule, exdates, last_date"
+            conn.execute(f'''
+                INSERT INTO recurring_events ({series_columns})
+                SELECT {series_columns} FROM recurring_event ORDER BY id
+            ''')
+        for table in legacy:
+            conn.execute(f"DROP TABLE {table}")
+            conn.execute(f"DROP TABLE IF EXISTS {search_index.fts_table_name(table)}")
+    
+    def add_event(self, event_date, start_time, end_time, title, description="", tz=None, end_date=None,
+                  all_day=False):
         """Dodaje nowe wydarzenie do bazy danych"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO events (date, start_time, end_time, title, description)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (event_date, start_time, end_time, title, description))
-            conn.commit()
+        values = self._event_values(event_date, start_time, end_time, title, description, tz, end_date, all_day)
+        sql, row = self._insert_event_sql()
+        with self.pool.transaction() as conn:
+            cursor = conn.execute(sql, row(values))
             return cursor.lastrowid
     
+    def add_events_bulk(self, events):
+        """Dodaje wiele wydarzeń (date, start_time, end_time, title, description[, tz, end_date, all_day])
+        w jednej transakcji"""
+        values = [self._event_values(*event) for event in events]
+        sql, row = self._insert_event_sql()
+        with self.pool.transaction() as conn:
+            conn.executemany(sql, map(row, values))
+        return len(events)
+    
+    def _multi_day_events(self, start_date, end_date):
+        """Wydarzenia wielodniowe nakładające się na zakres - przeszukanie R*Tree (bez niego indeks częściowy)"""
+        if not self.spans:
+            return []
+        if self.span_index:
+            condition = span_index.span_filter_sql("events", "?1", "?2")
+        else:
+            condition = "end_date IS NOT NULL AND start_ts < ?2 AND end_ts > ?1"
+        conn = self.pool.get_connection()
+        cursor = conn.execute(f'''
+            SELECT {self._columns}
+            FROM events
+            WHERE {condition}
+            ORDER BY start_ts, id
+        ''', (date_to_timestamp(start_date), date_to_timestamp(end_date)))
+        return list(starmap(EventRecord.from_row, cursor))
+    
     def get_events_for_date(self, event_date):
-        """Pobiera wszystkie wydarzenia dla konkretnej daty"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT id, start_time, end_time, title, description
-                FROM events
-                WHERE date = ?
-                ORDER BY start_time
-            ''', (event_date,))
-            return cursor.fetchall()
+        """Pobiera wszystkie wydarzenia dla konkretnej daty (także wielodniowe zaczęte wcześniej)"""
+        conn = self.pool.get_connection()
+        cursor = conn.execute(f'''
+            SELECT {self._columns}
+            FROM events
+            WHERE date = ?{self._indexed_only()}
+            ORDER BY {"start_ts" if self.integer_times else "start_time"}
+        ''', (event_date,))
+        events = list(starmap(EventRecord.from_row, cursor))
+        
+        next_day = (datetime.strptime(event_date, "%Y-%m-%d").date() + timedelta(days=1)).strftime("%Y-%m-%d")
+        continuing = self._continuing_events(event_date, next_day)
+        occurrences = list(self.get_occurrences_between(event_date, next_day))
+        if occurrences:
+            events = sorted(events + occurrences, key=lambda event: event.start)
+        return continuing + events
+    
+    def _add_multi_day_totals(self, summary, start_date, end_date):
+        """Dolicza wydarzenia wielodniowe do {data: (liczba, minuty)} w każdym dniu zakresu, który zajmują"""
+        first_day, end_day = date_to_day(start_date), date_to_day(end_date)
+        for event in self._multi_day_events(start_date, end_date):
+            for day, busy in day_totals(event, first_day, end_day):
+                event_date = day_to_date(day)
+                count, minutes = summary.get(event_date, (0, 0))
+                summary[event_date] = (count + 1, minutes + busy)
     
     def get_events_for_month(self, year, month):
         """Pobiera wszystkie wydarzenia dla konkretnego miesiąca"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT date, COUNT(*) as event_count
+        if self.daily_totals:
+            return super().get_events_for_month(year, month)
+        conn = self.pool.get_connection()
+        cursor = conn.execute(f'''
+            SELECT date, COUNT(*) as event_count
+            FROM events
+            WHERE date >= ? AND date < ?{self._indexed_only()}{self._single_day_only()}
+            GROUP BY date
+        ''', month_range(year, month))
+        counts = dict(cursor.fetchall())
+        for occurrence in self.get_occurrences_between(*month_range(year, month)):
+            counts[occurrence.date] = counts.get(occurrence.date, 0) + 1
+        if self.spans:
+            summary = {}
+            self._add_multi_day_totals(summary, *month_range(year, month))
+            for event_date, (count, _) in summary.items():
+                counts[event_date] = counts.get(event_date, 0) + count
+        return counts
+    
+    def get_daily_summary(self, start_date, end_date):
+        """Pobiera liczbę wydarzeń i zajęte minuty dla każdego dnia z zakresu
+        
+        Zakres jest półotwarty [start_date, end_date). Zwraca słownik
+        {data: (liczba_wydarzeń, zajęte_minuty)} - tylko dni z wydarzeniami.
+        """
+        conn = self.pool.get_connection()
+        if self.daily_totals:
+            # Wydarzenia jednodniowe z tabeli sum dziennych - zakres klucza głównego
+            cursor = conn.execute(daily_totals.TOTALS_RANGE_SQL, (start_date, end_date))
+        else:
+            cursor = self._aggregate_days(conn, start_date, end_date)
+        summary = {row[0]: (row[1], row[2]) for row in cursor}
+        
+        for occurrence in self.get_occurrences_between(start_date, end_date):
+            count, minutes = summary.get(occurrence.date, (0, 0))
+            summary[occurrence.date] = (count + 1, minutes + occurrence.busy_minutes)
+        self._add_multi_day_totals(summary, start_date, end_date)
+        return summary
+    
+    def _aggregate_days(self, conn, start_date, end_date):
+        """Liczba i minuty wydarzeń jednodniowych grupowane po dniu - z indeksu pokrywającego, przed migracją 10"""
+        if self.spans:
+            # Wielodniowe są liczone osobno, więc przedział mieści się w dniu
+            minutes = "end_ts - start_ts"
+        elif self.integer_times:
+            # Minuty końca minus minuty początku w ramach dnia, jak dla kolumn tekstowych
+            minutes = "(end_ts + 1440000000) % 1440 - (start_ts + 1440000000) % 1440"
+        else:
+            minutes = f"{time_to_minutes_sql('end_time')} - {time_to_minutes_sql('start_time')}"
+        return conn.execute(f'''
+            SELECT date, COUNT(*), COALESCE(SUM({minutes}), 0)
+            FROM events
+            WHERE date >= ? AND date < ?{self._indexed_only()}{self._single_day_only()}
+            GROUP BY date
+        ''', (start_date, end_date))
+    
+    def get_month_summary(self, year, month):
+        """Pobiera liczbę wydarzeń i zajęte minuty dla dni miesiąca"""
+        return self.get_daily_summary(*month_range(year, month))
+    
+    def get_events_between(self, start_date, end_date):
+        """Zwraca leniwie wydarzenia z zakresu dat [start_date, end_date)
+        
+        Jedno zapytanie po indeksie czasu rozpoczęcia (i wielodniowe zaczęte
+        wcześniej z indeksu przedziałów); rekordy są tworzone z kursora
+        w trakcie iteracji.
+        """
+        condition, params, order = self._date_range(start_date, end_date)
+        continuing = self._continuing_events(start_date, end_date)
+        conn = self.pool.get_connection()
+        cursor = conn.execute(f'''
+            SELECT {self._columns}
+            FROM events
+            WHERE {condition}
+            ORDER BY {order}
+        ''', params)
+        yield from heapq.merge(chain(continuing, starmap(EventRecord.from_row, cursor)),
+                               self.get_occurrences_between(start_date, end_date),
+                               key=EventRecord.sort_key)
+    
+    def _iter_single_events(self, start_date, end_date, batch_size):
+        """Porcje zwykłych (niecyklicznych) wydarzeń dla iter_events_between"""
+        condition, params, order = self._date_range(start_date, end_date)
+        conn = self.pool.get_connection()
+        rows = conn.execute(f'''
+            SELECT {self._columns}
+            FROM events
+            WHERE {condition}
+            ORDER BY {order}
+            LIMIT ?
+        ''', params + (batch_size,)).fetchall()
+        while rows:
+            records = list(starmap(EventRecord.from_row, rows))
+            yield from records
+            if len(rows) < batch_size:
+                return
+            last = records[-1]
+            if self.integer_times:
+                after = "(start_ts, id) > (?, ?) AND start_ts < ?"
+                params = ((last.day - EPOCH_DAY) * MINUTES_PER_DAY + last.start, last.id, date_to_timestamp(end_date))
+            else:
+                after = "(date, start_time, id) > (?, ?, ?) AND date < ?"
+                params = rows[-1][1:3] + (last.id, end_date)
+            rows = conn.execute(f'''
+                SELECT {self._columns}
                 FROM events
-                WHERE date LIKE ?
-                GROUP BY date
-            ''', (f"{year:04d}-{month:02d}-%",))
-            return dict(cursor.fetchall())
-    
-    def update_event(self, event_id, start_time, end_time, title, description):
-        """Aktualizuje istniejące wydarzenie"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
+                WHERE {after}
+                ORDER BY {order}
+                LIMIT ?
+            ''', params + (batch_size,)).fetchall()
+    
+    def get_event_intervals(self, start_date, end_date):
+        """Wydarzenia z zakresu [start_date, end_date) do indeksu kolizji - bez opisu i sortowania"""
+        condition, params, _ = self._date_range(start_date, end_date)
+        spans = ", NULL, NULL, end_date, all_day" if self.span_columns else ""
+        conn = self.pool.get_connection()
+        cursor = conn.execute(f'''
+            SELECT id, date, start_time, end_time, title{spans}
+            FROM events
+            WHERE {condition}
+        ''', params)
+        intervals = self._continuing_events(start_date, end_date)
+        intervals.extend(starmap(EventRecord.from_row, cursor))
+        intervals.extend(self.get_occurrences_between(start_date, end_date))
+        return intervals
+    
+    def _single_events_in_window(self, window_start, window_end):
+        """Wydarzenia nakładające się na okno UTC - jeden skan indeksu (start_utc, id, end_utc)"""
+        if not self.utc_times:
+            return super()._single_events_in_window(window_start, window_end)
+        conn = self.pool.get_connection()
+        cursor = conn.execute(f'''
+            SELECT start_utc, end_utc, {self._columns}
+            FROM events
+            WHERE start_utc >= ?1 AND start_utc < ?2 AND (start_utc >= ?3 OR end_utc > ?3)
+            ORDER BY start_utc, id
+        ''', (window_start - timezones.MAX_EVENT_MINUTES, window_end, window_start))
+        return [(row[0], row[1], EventRecord.from_row(*row[2:])) for row in cursor]
+    
+    def update_event(self, event_id, start_time, end_time, title, description, event_date=None, tz=None,
+                     end_date=None, all_day=False):
+        """Aktualizuje istniejące wydarzenie (z event_date także przenosi je na inny dzień)
+        
+        Bez tz wydarzenie zostaje w swojej strefie; chwile UTC są liczone na nowo.
+        """
+        columns, row = self._value_columns()
+        with self.pool.transaction() as conn:
+            old = conn.execute('SELECT date, tz FROM events WHERE id = ?', (event_id,)).fetchone()
+            if old is None:
+                return False
+            values = self._event_values(event_date or old[0], start_time, end_time, title, description,
+                                        tz or old[1], end_date, all_day)
+            conn.execute(f'''
                 UPDATE events
-                SET start_time = ?, end_time = ?, title = ?, description = ?,
-                    updated_at = CURRENT_TIMESTAMP
+                SET {", ".join(f"{column} = ?" for column in columns)}, updated_at = CURRENT_TIMESTAMP
                 WHERE id = ?
-            ''', (start_time, end_time, title, description, event_id))
-            conn.commit()
-            return cursor.rowcount > 0
+            ''', row(values) + (event_id,))
+            return True
     
     def delete_event(self, event_id):
         """Usuwa wydarzenie z bazy danych"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('DELETE FROM events WHERE id = ?', (event_id,))
-            conn.commit()
+        with self.pool.transaction() as conn:
+            cursor = conn.execute('DELETE FROM events WHERE id = ?', (event_id,))
             return cursor.rowcount > 0
     
     def get_event_by_id(self, event_id):
         """Pobiera wydarzenie po ID"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT id, date, start_time, end_time, title, description
-                FROM events
+        conn = self.pool.get_connection()
+        cursor = conn.execute(f'''
+            SELECT {self._columns}
+            FROM events
+            WHERE id = ?
+        ''', (event_id,))
+        row = cursor.fetchone()
+        return EventRecord.from_row(*row) if row else None
+    
+    def get_events_by_ids(self, event_ids):
+        """Pobiera wydarzenia o podanych ID jednym zapytaniem"""
+        event_ids = list(event_ids)
+        if not event_ids:
+            return []
+        conn = self.pool.get_connection()
+        cursor = conn.execute(f'''
+            SELECT {self._columns}
+            FROM events
+            WHERE id IN ({", ".join("?" * len(event_ids))})
+        ''', event_ids)
+        return list(starmap(EventRecord.from_row, cursor))
+    
+    def search_single_events(self, search_term):
+        """Wyszukuje wydarzenia po tytule lub opisie
+        
+        Z FTS5 wyniki są posortowane wg trafności (bm25), a każde słowo
+        frazy jest dopasowywane jako prefiks, bez względu na polskie znaki.
+        """
+        conn = self.pool.get_connection()
+        match_query = search_index.build_match_query(search_term)
+        if self.fts_enabled and match_query:
+            columns = _EVENT_COLUMN_NAMES + (_EVENT_SPAN_COLUMNS if self.span_columns else ())
+            cursor = conn.execute(search_index.ranked_search_sql("events", columns), (match_query,))
+            return list(starmap(EventRecord.from_row, cursor))
+        return self.search_events_page(search_term)
+    
+    def _search_condition(self, table, search_term):
+        """Warunek WHERE i parametry dopasowania do frazy (FTS5 lub LIKE)"""
+        match_query = search_index.build_match_query(search_term)
+        if self.fts_enabled and match_query:
+            return search_index.fts_filter_sql(table), (match_query,)
+        return "(title LIKE ? OR description LIKE ?)", (f"%{search_term}%", f"%{search_term}%")
+    
+    def search_events_page(self, search_term, after=None, limit=None, offset=0):
+        """Wyniki wyszukiwania w kolejności (date, start_time, id) od pozycji after"""
+        condition, params = self._search_condition("events", search_term)
+        condition += self._indexed_only()
+        order = "start_ts, id" if self.integer_times else "date, start_time, id"
+        if after is not None:
+            after_date, after_time, after_id = after
+            if self.integer_times:
+                condition += " AND (start_ts, id) > (?, ?)"
+                params += (date_to_timestamp(after_date) + time_to_minutes(after_time), after_id)
+            else:
+                condition += " AND (date, start_time, id) > (?, ?, ?)"
+                params += (after_date, after_time, after_id)
+        conn = self.pool.get_connection()
+        cursor = conn.execute(f'''
+            SELECT {self._columns}
+            FROM events
+            WHERE {condition}
+            ORDER BY {order}
+            LIMIT ? OFFSET ?
+        ''', params + (-1 if limit is None else limit, offset))
+        return list(starmap(EventRecord.from_row, cursor))
+    
+    def count_search_results(self, search_term):
+        """Liczba pasujących wydarzeń - z FTS5 samo przejście po indeksie, bez czytania wierszy"""
+        condition, params = self._search_condition("events", search_term)
+        conn = self.pool.get_connection()
+        return conn.execute(f"SELECT COUNT(*) FROM events WHERE {condition}{self._indexed_only()}",
+                            params).fetchone()[0]
+    
+    def search_recurring(self, search_term):
+        """Serie pasujące do frazy, z FTS5 najtrafniejsze najpierw"""
+        conn = self.pool.get_connection()
+        match_query = search_index.build_match_query(search_term)
+        columns = ("id", "date", "start_time", "end_time", "title", "description", "rrule", "exdates", "last_date")
+        if self.fts_enabled and match_query:
+            return conn.execute(search_index.ranked_search_sql("recurring_events", columns),
+                                (match_query,)).fetchall()
+        return conn.execute(f'''
+            SELECT {", ".join(columns)}
+            FROM recurring_events
+            WHERE title LIKE ? OR description LIKE ?
+            ORDER BY date, start_time
+        ''', (f"%{search_term}%", f"%{search_term}%")).fetchall()
+    
+    def add_recurring_event(self, event_date, start_time, end_time, title, description, rule, exdates=""):
+        """Dodaje serię wydarzeń cyklicznych - jeden wiersz niezależnie od liczby wystąpień"""
+        last_date = recurrence.last_occurrence(event_date, rule)
+        with self.pool.transaction() as conn:
+            cursor = conn.execute('''
+                INSERT INTO recurring_events
+                    (date, start_time, end_time, title, description, rrule, exdates, last_date)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (event_date, start_time, end_time, title, description, str(rule), exdates,
+                  last_date.strftime("%Y-%m-%d") if last_date else None))
+            return cursor.lastrowid
+    
+    def update_recurring_event(self, recurrence_id, event_date, start_time, end_time, title,
+                               description, rule, exdates=""):
+        """Zastępuje regułę i pola serii cyklicznej"""
+        last_date = recurrence.last_occurrence(event_date, rule)
+        with self.pool.transaction() as conn:
+            cursor = conn.execute('''
+                UPDATE recurring_events
+                SET date = ?, start_time = ?, end_time = ?, title = ?, description = ?,
+                    rrule = ?, exdates = ?, last_date = ?, updated_at = CURRENT_TIMESTAMP
                 WHERE id = ?
-            ''', (event_id,))
-            return cursor.fetchone()
+            ''', (event_date, start_time, end_time, title, description, str(rule), exdates,
+                  last_date.strftime("%Y-%m-%d") if last_date else None, recurrence_id))
+            return cursor.rowcount > 0
     
-    def search_events(self, search_term):
-        """Wyszukuje wydarzenia po tytule lub opisie"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT id, date, start_time, end_time, title, description
-                FROM events
-                WHERE title LIKE ? OR description LIKE ?
-                ORDER BY date, start_time
-            ''', (f"%{search_term}%", f"%{search_term}%"))
-            return cursor.fetchall()
+    def delete_recurring_event(self, recurrence_id):
+        """Usuwa całą serię cykliczną"""
+        with self.pool.transaction() as conn:
+            cursor = conn.execute('DELETE FROM recurring_events WHERE id = ?', (recurrence_id,))
+            return cursor.rowcount > 0
+    
+    def get_recurring_event(self, recurrence_id):
+        """Pobiera serię (id, date, start_time, end_time, title, description, rrule, exdates)"""
+        conn = self.pool.get_connection()
+        cursor = conn.execute('''
+            SELECT id, date, start_time, end_time, title, description, rrule, exdates
+            FROM recurring_events
+            WHERE id = ?
+        ''', (recurrence_id,))
+        return cursor.fetchone()
+    
+    def add_recurrence_exception(self, recurrence_id, occurrence_date):
+        """Pomija jedno wystąpienie serii (dopisuje datę do wyjątków)"""
+        with self.pool.transaction() as conn:
+            row = conn.execute('SELECT exdates FROM recurring_events WHERE id = ?',
+                               (recurrence_id,)).fetchone()
+            if row is None:
+                return False
+            exdates = recurrence.format_exdates(recurrence.parse_exdates(row[0]) | {occurrence_date})
+            conn.execute('''
+                UPDATE recurring_events SET exdates = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?
+            ''', (exdates, recurrence_id))
+            return True
+    
+    def get_changes_since(self, version, limit=change_log.CHANGES_PAGE_SIZE):
+        """Zmiany wydarzeń i serii zapisane po podanej wersji dziennika"""
+        return change_log.read_changes(self.pool.get_connection(), version, limit, end_dates=self.span_columns)
+    
+    def get_current_version(self):
+        """Numer ostatniej zmiany w dzienniku"""
+        return change_log.current_version(self.pool.get_connection())
+    
+    def get_month_version(self, start_date, end_date, upto):
+        """Wersja ostatniej zmiany dotyczącej zakresu (change_log.month_version)"""
+        return change_log.month_version(self.pool.get_connection(), start_date, end_date, upto,
+                                        end_dates=self.span_columns)
+    
+    def prune_changes(self, keep):
+        """Przycina dziennik zmian do ostatnich keep wersji"""
+        with self.pool.transaction() as conn:
+            return change_log.prune_changes(conn, keep)
+    
+    def get_recurring_between(self, start_date, end_date):
+        """Serie, które mogą mieć wystąpienia w zakresie [start_date, end_date)"""
+        conn = self.pool.get_connection()
+        cursor = conn.execute('''
+            SELECT id, date, start_time, end_time, title, description, rrule, exdates
+            FROM recurring_events
+            WHERE date < ? AND (last_date IS NULL OR last_date >= ?)
+        ''', (end_date, start_date))
+        return cursor.fetchall()
@@ -1,34 +1,116 @@
 from datetime import datetime, date, timedelta
-from database import DatabaseManager
+from storage import open_storage, month_range
+from event_record import EventRecord, parse_time
+from interval_index import IntervalIndex, batch_overlaps, event_interval, minutes_to_date
+from availability import build_availability, working_hours_mask, minutes_to_time
+from recurrence import RecurrenceRule, parse_occurrence_id
+from change_log import CHANGES_PAGE_SIZE, KIND_EVENT
+import timezones
 
 class EventManager:
     """Klasa do zarządzania wydarzeniami w kalendarzu"""
     
-    def __init__(self):
-        self.db = DatabaseManager()
+    def __init__(self, db_path="calendar.db", storage=None):
+        # db_path może być też adresem innego backendu (zob. storage.open_storage)
+        self.db = storage or open_storage(db_path)
     
-    def add_event(self, event_date, start_time, end_time, title, description=""):
-        """Dodaje nowe wydarzenie"""
-        # Walidacja danych
-        if not title.strip():
-            raise ValueError("Tytuł wydarzenia nie może być pusty")
+        # Indeks konfliktów - miesiące są ładowane leniwie przy pierwszym
+        # sprawdzeniu i aktualizowane przy każdym dodaniu/edycji/usunięciu
+        self._conflict_index = IntervalIndex()
+        self._indexed_months = set()
         
+        # Wersja dziennika zmian, do której stan indeksu jest aktualny
+        self._synced_version = self.db.get_current_version()
+    
+    def add_event(self, event_date, start_time, end_time, title, description="", reject_conflicts=False, tz=None,
+                  end_date=None, all_day=False):
+        """Dodaje nowe wydarzenie (tz - strefa czasowa, domyślnie strefa kalendarza)
+        
+        end_date - ostatni dzień wydarzenia wielodniowego; all_day - wydarzenie
+        całodniowe (godziny są pomijane). Z reject_conflicts=True wydarzenie
+        nakładające się na istniejące jest odrzucane wyjątkiem ValueError.
+        """
         # Konwersja daty do formatu string jeśli potrzeba
         if isinstance(event_date, date):
             event_date = event_date.strftime("%Y-%m-%d")
+        if isinstance(end_date, date):
+            end_date = end_date.strftime("%Y-%m-%d")
+        if all_day:
+            start_time, end_time = "00:00", None
         
-        # Walidacja godzin
-        if self._validate_time_format(start_time):
-            if end_time and not self._validate_time_format(end_time):
-                raise ValueError("Nieprawidłowy format godziny końcowej (HH:MM)")
-            
-            # Sprawdza czy godzina końcowa jest późniejsza niż początkowa
-            if end_time and start_time >= end_time:
-                raise ValueError("Godzina końcowa musi być późniejsza niż początkowa")
-        else:
-            raise ValueError("Nieprawidłowy format godziny początkowej (HH:MM)")
+        # Walidacja danych
+        self._validate_event(title, start_time, end_time, event_date, end_date, all_day)
+        
+        if reject_conflicts:
+            conflict, message = self.has_conflicts(event_date, start_time, end_time, end_date=end_date,
+                                                   all_day=all_day)
+            if conflict:
+                raise ValueError(message)
         
-        return self.db.add_event(event_date, start_time, end_time, title, description)
+        event_id = self.db.add_event(event_date, start_time, end_time, title, description, tz, end_date, all_day)
+        self._index_event(EventRecord.from_row(event_id, event_date, start_time, end_time, title, description,
+                                               tz, end_date, all_day))
+        return event_id
+    
+    def add_events_bulk(self, events):
+        """Dodaje porcję zwalidowanych wydarzeń (date, start_time, end_time, title, description, tz,
+        end_date, all_day)
+        
+        Używane przez masowy import (bulk_io) - jedna transakcja na porcję.
+        """
+        count = self.db.add_events_bulk(events)
+        self._reset_conflict_index()
+        return count
+    
+    def add_recurring_event(self, event_date, start_time, end_time, title, description="", rule="FREQ=WEEKLY"):
+        """Dodaje serię wydarzeń cyklicznych (reguła w stylu RRULE, np. 'FREQ=DAILY;COUNT=10')
+        
+        Zapisywany jest jeden wiersz; wystąpienia są rozwijane przy odczycie.
+        """
+        if isinstance(event_date, date):
+            event_date = event_date.strftime("%Y-%m-%d")
+        
+        self._validate_event(title, start_time, end_time, event_date)
+        rule = RecurrenceRule.parse(rule)
+        
+        recurrence_id = self.db.add_recurring_event(event_date, start_time, end_time, title, description, rule)
+        self._reset_conflict_index()
+        return recurrence_id
+    
+    def update_recurring_event(self, recurrence_id, start_time, end_time, title, description="", rule=None):
+        """Aktualizuje całą serię; bez rule reguła pozostaje bez zmian"""
+        self._validate_event(title, start_time, end_time)
+        series = self.db.get_recurring_event(recurrence_id)
+        if series is None:
+            return False
+        
+        rule = RecurrenceRule.parse(rule or series[6])
+        updated = self.db.update_recurring_event(recurrence_id, series[1], start_time, end_time, title,
+                                                 description, rule, series[7])
+        self._reset_conflict_index()
+        return updated
+    
+    def delete_recurring_event(self, recurrence_id):
+        """Usuwa całą serię cykliczną"""
+        deleted = self.db.delete_recurring_event(recurrence_id)
+        if deleted:
+            self._reset_conflict_index()
+        return deleted
+    
+    def skip_occurrence(self, occurrence_id):
+        """Usuwa jedno wystąpienie serii ('r<id>:YYYY-MM-DD') - dopisuje je do wyjątków"""
+        parsed = parse_occurrence_id(occurrence_id)
+        if parsed is None or parsed[1] is None:
+            raise ValueError("Nieprawidłowy identyfikator wystąpienia")
+        
+        skipped = self.db.add_recurrence_exception(*parsed)
+        if skipped:
+            self._conflict_index.remove(occurrence_id)
+        return skipped
+    
+    def get_recurring_event(self, recurrence_id):
+        """Pobiera serię (id, date, start_time, end_time, title, description, rrule, exdates)"""
+        return self.db.get_recurring_event(recurrence_id)
     
     def get_events_for_date(self, event_date):
         """Pobiera wydarzenia dla konkretnej daty"""
@@ -41,25 +123,206 @@ class EventManager:
         """Pobiera liczbę wydarzeń dla każdego dnia w miesiącu"""
         return self.db.get_events_for_month(year, month)
     
-    def update_event(self, event_id, start_time, end_time, title, description=""):
-        """Aktualizuje wydarzenie"""
-        if not title.strip():
-            raise ValueError("Tytuł wydarzenia nie może być pusty")
-        
-        if not self._validate_time_format(start_time):
-            raise ValueError("Nieprawidłowy format godziny początkowej (HH:MM)")
-        
-        if end_time and not self._validate_time_format(end_time):
-            raise ValueError("Nieprawidłowy format godziny końcowej (HH:MM)")
+    def get_month_summary(self, year, month):
+        """Pobiera liczbę wydarzeń i zajęte minuty dla każdego dnia w miesiącu"""
+        return self.db.get_month_summary(year, month)
+    
+    def get_daily_summary(self, start_date, end_date):
+        """Pobiera liczbę wydarzeń i zajęte minuty dla każdego dnia z zakresu [start_date, end_date)"""
+        return self.db.get_daily_summary(start_date, end_date)
+    
+    def update_event(self, event_id, start_time, end_time, title, description="", reject_conflicts=False, tz=None,
+                     end_date=None, all_day=False):
+        """Aktualizuje wydarzenie (bez tz zostaje w swojej strefie, bez end_date staje się jednodniowe)"""
+        if isinstance(end_date, date):
+            end_date = end_date.strftime("%Y-%m-%d")
+        if all_day:
+            start_time, end_time = "00:00", None
         
-        if end_time and start_time >= end_time:
-            raise ValueError("Godzina końcowa musi być późniejsza niż początkowa")
+        # Data jest potrzebna tylko do walidacji daty końca, sprawdzenia konfliktów i aktualizacji indeksu
+        event_date = None
+        if end_date or reject_conflicts or event_id in self._conflict_index:
+            event_date = self._event_date(event_id)
+        self._validate_event(title, start_time, end_time, event_date, end_date, all_day)
+        if reject_conflicts and event_date:
+            conflict, message = self.has_conflicts(event_date, start_time, end_time, exclude_event_id=event_id,
+                                                   end_date=end_date, all_day=all_day)
+            if conflict:
+                raise ValueError(message)
         
-        return self.db.update_event(event_id, start_time, end_time, title, description)
+        updated = self.db.update_event(event_id, start_time, end_time, title, description, tz=tz,
+                                       end_date=end_date, all_day=all_day)
+        if updated and event_date:
+            self._index_event(EventRecord.from_row(event_id, event_date, start_time, end_time, title, description,
+                                                   tz, end_date, all_day))
+        return updated
     
     def delete_event(self, event_id):
         """Usuwa wydarzenie"""
-        return self.db.delete_event(event_id)
+        deleted = self.db.delete_event(event_id)
+        if deleted:
+            self._conflict_index.remove(event_id)
+        return deleted
+    
+    def apply_batch(self, operations, reject_conflicts=True):
+        """Wykonuje partię operacji create/update/delete atomowo
+        
+        Operacja to słownik z kluczem 'op' i polami wydarzenia (date,
+        start_time, end_time, title, description, tz, end_date, all_day);
+        update i delete wymagają 'id', a update zmienia tylko podane pola -
+        także datę (wydarzenie wielodniowe przesuwa się w całości). Kolizje są
+        sprawdzane dla stanu po całej partii, więc przesunięcie kilku
+        wydarzeń naraz nie zgłasza konfliktów z ich starymi terminami.
+        Wszystko wykonuje się w jednej transakcji; jeśli którakolwiek
+        operacja jest błędna, nic nie jest zapisywane.
+        
+        Zwraca {'applied': bool, 'results': [...]} - wynik dla każdej
+        operacji w kolejności partii ('ok', 'id' oraz 'error'/'conflicts').
+        """
+        results = [{"index": position, "op": operation.get("op"), "ok": True}
+                   for position, operation in enumerate(operations)]
+        planned = []
+        
+        with self.db.transaction():
+            seen_ids = set()
+            for result, operation in zip(results, operations):
+                try:
+                    plan = self._plan_operation(operation)
+                    if plan[1] is not None:
+                        if plan[1] in seen_ids:
+                            raise ValueError("Wydarzenie występuje w partii więcej niż raz")
+                        seen_ids.add(plan[1])
+                    planned.append(plan)
+                    result["id"] = plan[1]
+                except ValueError as e:
+                    result["ok"] = False
+                    result["error"] = str(e)
+            
+            if all(result["ok"] for result in results) and reject_conflicts:
+                for position, found in self._batch_conflicts(planned).items():
+                    results[position]["ok"] = False
+                    results[position]["error"] = f"Konflikt z wydarzeniem: {found[0].title}"
+                    results[position]["conflicts"] = found
+            
+            if not all(result["ok"] for result in results):
+                return {"applied": False, "results": results}
+            
+            for result, (op, event_id, record) in zip(results, planned):
+                if op == "create":
+                    result["id"] = self.db.add_event(*record)
+                elif op == "update":
+                    self.db.update_event(event_id, *record[1:5], event_date=record[0], tz=record[5],
+                                         end_date=record[6], all_day=record[7])
+                else:
+                    self.db.delete_event(event_id)
+        
+        # Indeks konfliktów dopiero po zatwierdzeniu transakcji
+        for result, (op, _, record) in zip(results, planned):
+            if op == "delete":
+                self._conflict_index.remove(result["id"])
+            else:
+                self._index_event(EventRecord.from_row(result["id"], *record))
+        return {"applied": True, "results": results}
+    
+    def _plan_operation(self, operation):
+        """Waliduje operację partii i zwraca (op, id, pola po zmianie lub None)"""
+        op = operation.get("op")
+        event_id = None
+        event = None
+        if op == "create":
+            fields = operation
+        elif op in ("update", "delete"):
+            event = self.db.get_event_by_id(operation.get("id"))
+            if event is None:
+                raise ValueError("Wydarzenie nie istnieje")
+            event_id = event.id
+            if op == "delete":
+                return op, event_id, None
+            fields = event.to_dict()
+            fields.update(operation)
+        else:
+            raise ValueError(f"Nieznana operacja: {op}")
+        
+        event_date = fields.get("date")
+        if isinstance(event_date, date):
+            event_date = event_date.strftime("%Y-%m-%d")
+        title = fields.get("title") or ""
+        start_time = fields.get("start_time") or ""
+        end_time = fields.get("end_time") or None
+        end_date = fields.get("end_date") or None
+        all_day = bool(fields.get("all_day"))
+        if all_day:
+            start_time, end_time = "00:00", None
+        if event is not None and "end_date" not in operation and event_date and event_date != event.date:
+            end_date = event.moved_end_date(event_date)
+        self._validate_event(title, start_time, end_time, event_date or "", end_date, all_day)
+        tz = timezones.resolve_zone_name(fields.get("tz") or None)
+        return op, event_id, (event_date, start_time, end_time, title, fields.get("description") or "", tz,
+                              end_date, all_day)
+    
+    def _batch_conflicts(self, planned):
+        """Kolizje zaplanowanych operacji - {pozycja w partii: [wydarzenia]}"""
+        records = [record for _, _, record in planned if record is not None]
+        if not records:
+            return {}
+        
+        # Dzień przed i po - wydarzenia mogą trwać po północy (wielodniowe - do end_date)
+        first_day = datetime.strptime(min(record[0] for record in records), "%Y-%m-%d").date() - timedelta(days=1)
+        last_day = datetime.strptime(max(record[6] or record[0] for record in records),
+                                     "%Y-%m-%d").date() + timedelta(days=2)
+        index = IntervalIndex()
+        for event in self.db.get_event_intervals(first_day.strftime("%Y-%m-%d"), last_day.strftime("%Y-%m-%d")):
+            index.add(event.id, *event.interval(), event)
+        
+        removed = [event_id for op, event_id, _ in planned if op != "create"]
+        added = []
+        keys = {}
+        for position, (op, event_id, record) in enumerate(planned):
+            if record is None:
+                continue
+            key = event_id if op == "update" else ("new", position)
+            keys[key] = position
+            planned_event = EventRecord.from_row(event_id, *record)
+            added.append((key, *planned_event.interval(), planned_event))
+        return {keys[key]: found for key, found in batch_overlaps(index, removed, added).items()}
+    
+    def get_changes_since(self, version, limit=CHANGES_PAGE_SIZE):
+        """Zmiany zapisane po podanej wersji dziennika (nagrobki dla usuniętych)"""
+        return self.db.get_changes_since(version, limit)
+    
+    def sync_changes(self):
+        """Wczytuje zmiany zapisane od ostatniej synchronizacji, także przez inne procesy
+        
+        Aktualizuje indeks konfliktów tylko dla zmienionych wydarzeń i zwraca
+        {'version', 'reset', 'changes'}. Przy 'reset' (dziennik przycięty)
+        albo zmianie serii indeks jest czyszczony w całości.
+        """
+        result = {'version': self._synced_version, 'reset': False, 'changes': []}
+        while True:
+            page = self.db.get_changes_since(self._synced_version)
+            self._synced_version = page['version']
+            result['version'] = page['version']
+            result['changes'].extend(page['changes'])
+            if page['reset']:
+                result['reset'] = True
+                self._reset_conflict_index()
+                return result
+            if not page['has_more']:
+                break
+        
+        for change in result['changes']:
+            if change['kind'] != KIND_EVENT:
+                self._reset_conflict_index()
+                break
+            if change['op'] == 'delete':
+                self._conflict_index.remove(change['event_id'])
+                continue
+            event = self.db.get_event_by_id(change['event_id'])
+            if event is None:
+                self._conflict_index.remove(change['event_id'])
+            else:
+                self._index_event(event)
+        return result
     
     def get_event_by_id(self, event_id):
         """Pobiera szczegóły wydarzenia"""
@@ -69,6 +332,18 @@ class EventManager:
         """Wyszukuje wydarzenia"""
         return self.db.search_events(search_term)
     
+    def search_events_page(self, search_term, after=None, limit=None, offset=0):
+        """Strona wyników wyszukiwania w kolejności (date, start_time, id) - zob. Storage.search_events_page"""
+        return self.db.search_events_page(search_term, after, limit, offset)
+    
+    def count_search_results(self, search_term):
+        """Liczba wydarzeń (bez serii) pasujących do frazy"""
+        return self.db.count_search_results(search_term)
+    
+    def search_recurring_events(self, search_term):
+        """Serie cykliczne pasujące do frazy - jeden wynik na serię"""
+        return self.db.search_recurring_events(search_term)
+    
     def get_today_events(self):
         """Pobiera wydarzenia na dzisiaj"""
         today = date.today()
@@ -76,52 +351,196 @@ class EventManager:
     
     def get_upcoming_events(self, days=7):
         """Pobiera nadchodzące wydarzenia w określonym zakresie dni"""
-        events = []
         today = date.today()
+        return list(self.get_events_between(today, today + timedelta(days=days - 1)))
+        
+    def get_events_between(self, start_date, end_date, stream=False):
+        """Zwraca leniwie wydarzenia od start_date do end_date (włącznie)
+        
+        Wyniki to EventRecord posortowane po dniu i godzinie.
+        stream=True pobiera bardzo duże zakresy porcjami zamiast jednym kursorem.
+        """
+        if isinstance(start_date, str):
+            start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
+        if isinstance(end_date, str):
+            end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
         
-        for i in range(days):
-            current_date = today + timedelta(days=i)
-            daily_events = self.get_events_for_date(current_date)
-            for event in daily_events:
-                events.append((current_date.strftime("%Y-%m-%d"), *event))
+        start = start_date.strftime("%Y-%m-%d")
+        end = (end_date + timedelta(days=1)).strftime("%Y-%m-%d")
+        if stream:
+            return self.db.iter_events_between(start, end)
+        return self.db.get_events_between(start, end)
+    
+    def get_events_by_day(self, start_date, end_date):
+        """Wydarzenia od start_date do end_date (włącznie) pogrupowane po dniach - lista (dzień, [EventRecord])
         
-        return events
+        Wydarzenie wielodniowe jest w każdym dniu, który zajmuje.
+        """
+        if isinstance(start_date, str):
+            start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
+        if isinstance(end_date, str):
+            end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
+        return self.db.get_events_by_day(start_date.strftime("%Y-%m-%d"),
+                                         (end_date + timedelta(days=1)).strftime("%Y-%m-%d"))
     
-    def _validate_time_format(self, time_str):
+    @staticmethod
+    def _validate_time_format(time_str):
         """Waliduje format godziny (HH:MM)"""
         try:
-            datetime.strptime(time_str, "%H:%M")
+            parse_time(time_str)
             return True
         except ValueError:
             return False
     
+    @staticmethod
+    def _validate_event(title, start_time, end_time, event_date=None, end_date=None, all_day=False):
+        """Waliduje pola wydarzenia; błędy zgłasza wyjątkiem ValueError
+        
+        Dla wydarzenia wielodniowego (end_date późniejsza niż event_date)
+        godzina końcowa może być wcześniejsza niż początkowa, ale jest wymagana;
+        całodniowe nie mają godzin.
+        """
+        if not title.strip():
+            raise ValueError("Tytuł wydarzenia nie może być pusty")
+        
+        if event_date is not None:
+            try:
+                datetime.strptime(event_date, "%Y-%m-%d")
+            except ValueError:
+                raise ValueError("Nieprawidłowy format daty (RRRR-MM-DD)")
+        
+        if end_date:
+            try:
+                datetime.strptime(end_date, "%Y-%m-%d")
+            except ValueError:
+                raise ValueError("Nieprawidłowy format daty końcowej (RRRR-MM-DD)")
+            if event_date and end_date < event_date:
+                raise ValueError("Data końcowa nie może być wcześniejsza niż data rozpoczęcia")
+        
+        if all_day:
+            return
+        multi_day = bool(end_date and event_date and end_date > event_date)
+        if multi_day and not end_time:
+            raise ValueError("Wydarzenie wielodniowe wymaga godziny zakończenia")
+        
+        try:
+            start = parse_time(start_time)
+        except ValueError:
+            raise ValueError("Nieprawidłowy format godziny początkowej (HH:MM)")
+        
+        if end_time:
+            try:
+                end = parse_time(end_time)
+            except ValueError:
+                raise ValueError("Nieprawidłowy format godziny końcowej (HH:MM)")
+        
+            # Sprawdza czy godzina końcowa jest późniejsza niż początkowa (w minutach, także dla 'H:MM')
+            if start >= end and not multi_day:
+                raise ValueError("Godzina końcowa musi być późniejsza niż początkowa")
+    
     def get_time_slots_for_date(self, event_date, slot_duration=60):
         """Pobiera dostępne sloty czasowe dla daty (w minutach)"""
-        events = self.get_events_for_date(event_date)
+        if isinstance(event_date, str):
+            event_date = datetime.strptime(event_date, "%Y-%m-%d").date()
+        
+        return [(start_time, end_time) for _, start_time, end_time
+                in self.find_free_slots(event_date, event_date, slot_duration)]
+        
+    def find_free_slots(self, start_date, end_date, duration=60, work_start="00:00",
+                        work_end="24:00", weekdays=None):
+        """Wyszukuje wolne okna o długości co najmniej duration minut
         
-        # lista zajętych godzin
-        busy_slots = []
-        for event in events:
-            start_time = event[1]  # start_time
-            end_time = event[2] if event[2] else start_time  # end_time lub start_time
-            busy_slots.append((start_time, end_time))
+        Zakres dat obejmuje end_date. Wolny czas jest ograniczony do godzin
+        work_start-work_end oraz opcjonalnie do dni tygodnia (0 = poniedziałek).
+        Zwraca listę (data, 'HH:MM', 'HH:MM'); cały zakres to jedno zapytanie.
+        """
+        if isinstance(start_date, str):
+            start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
+        if isinstance(end_date, str):
+            end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
         
-        return busy_slots
+        # Dzień wcześniej - wydarzenie może trwać po północy
+        events = self.db.get_event_intervals((start_date - timedelta(days=1)).strftime("%Y-%m-%d"),
+                                             (end_date + timedelta(days=1)).strftime("%Y-%m-%d"))
+        availability = build_availability(events, start_date, end_date)
+        
+        slots = availability.free_slots(duration, working_hours_mask(work_start, work_end), weekdays)
+        return [(day.strftime("%Y-%m-%d"), minutes_to_time(start), minutes_to_time(end))
+                for day, start, end in slots]
     
-    def has_conflicts(self, event_date, start_time, end_time, exclude_event_id=None):
+    def has_conflicts(self, event_date, start_time, end_time, exclude_event_id=None, end_date=None, all_day=False):
         """Sprawdza czy nowe wydarzenie koliduje z istniejącymi"""
-        events = self.get_events_for_date(event_date)
-        
-        for event in events:
-            event_id = event[0]
-            if exclude_event_id and event_id == exclude_event_id:
-                continue
-                
-            event_start = event[1]
-            event_end = event[2] if event[2] else event[1]
-            
-            # Sprawdza kolizję czasową
-            if (start_time < event_end and end_time > event_start):
-                return True, f"Konflikt z wydarzeniem: {event[3]}"
+        overlap = self._overlaps(event_date, start_time, end_time, exclude_event_id, end_date, all_day,
+                                 first_only=True)
+        if overlap:
+            return True, f"Konflikt z wydarzeniem: {overlap[0].title}"
         
         return False, None
+
+    def find_overlaps(self, event_date, start_time, end_time, exclude_event_id=None, end_date=None, all_day=False):
+        """Zwraca wydarzenia (EventRecord) nakładające się na podany czas"""
+        return self._overlaps(event_date, start_time, end_time, exclude_event_id, end_date, all_day)
+    
+    def find_conflicts(self, start_date, end_date):
+        """Zwraca pary kolidujących wydarzeń w zakresie dat (włącznie z end_date)
+        
+        Każdy element pary to EventRecord.
+        """
+        if isinstance(start_date, str):
+            start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
+        if isinstance(end_date, str):
+            end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
+        
+        start, _ = event_interval(start_date, "00:00")
+        end, _ = event_interval(end_date + timedelta(days=1), "00:00")
+        self._ensure_indexed(start, end)
+        return [(first[3], second[3]) for first, second in self._conflict_index.conflicting_pairs(start, end)]
+    
+    def _overlaps(self, event_date, start_time, end_time, exclude_event_id=None, end_date=None, all_day=False,
+                  first_only=False):
+        """Wyszukuje w indeksie przedziały nakładające się na wydarzenie"""
+        if isinstance(event_date, date):
+            event_date = event_date.strftime("%Y-%m-%d")
+        
+        start, end = event_interval(event_date, start_time, end_time, end_date, all_day)
+        self._ensure_indexed(start, end)
+        if first_only:
+            found = self._conflict_index.first_overlap(start, end, exclude=exclude_event_id)
+            return [found[3]] if found else []
+        return [item[3] for item in self._conflict_index.overlaps(start, end, exclude=exclude_event_id)]
+    
+    def _ensure_indexed(self, start, end):
+        """Ładuje do indeksu konfliktów miesiące pokrywające przedział [start, end)"""
+        # Dzień wcześniej - wydarzenie z poprzedniego dnia może trwać po północy
+        first_day = minutes_to_date(start) - timedelta(days=1)
+        last_day = minutes_to_date(max(start, end - 1))
+        
+        year, month = first_day.year, first_day.month
+        while (year, month) <= (last_day.year, last_day.month):
+            if (year, month) not in self._indexed_months:
+                for event in self.db.get_event_intervals(*month_range(year, month)):
+                    self._conflict_index.add(event.id, *event.interval(), event)
+                self._indexed_months.add((year, month))
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    
+    def _reset_conflict_index(self):
+        """Czyści indeks konfliktów - zostanie wczytany ponownie przy następnym sprawdzeniu"""
+        self._conflict_index.clear()
+        self._indexed_months.clear()
+    
+    def _index_event(self, event):
+        """Aktualizuje wpis w indeksie konfliktów, jeśli któryś z miesięcy wydarzenia jest już załadowany"""
+        first_day, last_day = date.fromordinal(event.day), date.fromordinal(event.last_day)
+        months = range(first_day.year * 12 + first_day.month - 1, last_day.year * 12 + last_day.month)
+        if any((month // 12, month % 12 + 1) in self._indexed_months for month in months):
+            self._conflict_index.add(event.id, *event.interval(), event)
+        else:
+            self._conflict_index.remove(event.id)
+    
+    def _event_date(self, event_id):
+        """Data wydarzenia - z indeksu konfliktów lub z bazy danych"""
+        indexed = self._conflict_index.get(event_id)
+        if indexed:
+            return indexed[3].date
+        event = self.db.get_event_by_id(event_id)
+        return event.date if event else None
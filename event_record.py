@@ -0,0 +1,303 @@
+"""
+Zwarty rekord wydarzenia zwracany przez wszystkie backendy Storage
+
+Zamiast krotek indeksowanych pozycją i słowników budowanych dla każdego
+wiersza: data jest liczbą dni (date.toordinal()), godziny liczbą minut od
+północy, a __slots__ usuwa słownik atrybutów z każdego obiektu. Tekstowe
+postaci 'YYYY-MM-DD' i 'HH:MM' są liczone na żądanie z tablic/cache, bo
+w wynikach powtarza się niewiele różnych dat i godzin.
+
+Całe zbiory wyników są zamieniane na JSON bezpośrednio (records_json),
+bez pośredniego słownika na wiersz.
+
+Wydarzenie wielodniowe ma datę końca (end_day), a całodniowe (all_day)
+trwa od północy pierwszego do północy po ostatnim dniu. Data końca jest
+zapisywana tylko dla wydarzeń trwających po północy dnia rozpoczęcia
+(event_span) - pozostałe mieszczą się w swoim dniu.
+"""
+
+import json
+from datetime import date
+from functools import lru_cache
+
+from availability import minutes_to_time as _format_minutes
+from interval_index import MINUTES_PER_DAY, time_to_minutes
+from recurrence import parse_occurrence_id
+
+# Gotowe teksty 'HH:MM' dla każdej godziny dwucyfrowej ('24:00' to koniec dnia)
+_TIMES = [_format_minutes(minutes) for minutes in range(100 * 60)]
+_TIMES_JSON = [f'"{text}"' for text in _TIMES]
+
+# Numer dnia 1970-01-01 - początek skali minut od epoki (kolumny start_ts/end_ts)
+EPOCH_DAY = date(1970, 1, 1).toordinal()
+
+_encode_ascii = json.encoder.encode_basestring_ascii
+_encode_unicode = json.encoder.encode_basestring
+
+
+@lru_cache(maxsize=65536)
+def date_to_day(text):
+    """'YYYY-MM-DD' -> numer dnia (date.toordinal())"""
+    return date.fromisoformat(text).toordinal()
+
+
+@lru_cache(maxsize=65536)
+def day_to_date(day):
+    """Numer dnia -> 'YYYY-MM-DD'"""
+    return date.fromordinal(day).isoformat()
+
+
+def date_to_timestamp(text):
+    """'YYYY-MM-DD' -> minuty od epoki Unix (1970-01-01 00:00) do początku dnia"""
+    return (date_to_day(text) - EPOCH_DAY) * MINUTES_PER_DAY
+
+
+# Godzin w wynikach jest niewiele - parsowanie z cache
+_time_to_minutes = lru_cache(maxsize=4096)(time_to_minutes)
+
+
+def event_span(event_date, start_time, end_time, end_date=None, all_day=False):
+    """Początek i koniec wydarzenia w minutach od epoki oraz data końca do zapisu
+    
+    Zwraca (start_ts, end_ts, end_date); end_ts None bez godziny końcowej.
+    Wydarzenie całodniowe trwa od północy event_date do północy po end_date
+    (włącznie). W zwykłym end_date to dzień godziny końcowej, a bez niego
+    godzina końcowa wcześniejsza niż początkowa oznacza następny dzień.
+    Zwracane end_date jest None, jeśli wydarzenie kończy się najpóźniej
+    o północy po dniu rozpoczęcia - tylko wielodniowe mają datę końca.
+    """
+    day_start = date_to_timestamp(event_date)
+    if end_date and end_date < event_date:
+        raise ValueError("Data końcowa nie może być wcześniejsza niż data rozpoczęcia")
+    if all_day:
+        end_ts = (date_to_timestamp(end_date) if end_date else day_start) + MINUTES_PER_DAY
+        return day_start, end_ts, end_date if end_ts > day_start + MINUTES_PER_DAY else None
+    
+    start_ts = day_start + _time_to_minutes(start_time)
+    if not end_time:
+        if end_date and end_date > event_date:
+            raise ValueError("Wydarzenie wielodniowe wymaga godziny zakończenia")
+        return start_ts, None, None
+    end_ts = (date_to_timestamp(end_date) if end_date else day_start) + _time_to_minutes(end_time)
+    if end_ts < start_ts:
+        end_ts += MINUTES_PER_DAY
+    if end_ts <= day_start + MINUTES_PER_DAY:
+        return start_ts, end_ts, None
+    return start_ts, end_ts, day_to_date(end_ts // MINUTES_PER_DAY + EPOCH_DAY)
+
+
+def parse_time(text):
+    """'HH:MM' (także 'H:MM', jak strptime('%H:%M')) -> minuty od północy
+    
+    Nieprawidłowa godzina zgłasza ValueError - bez strptime, które przy
+    walidacji każdego zapisu jest wielokrotnie wolniejsze.
+    """
+    hours, separator, minutes = text.partition(":")
+    if (not separator or not 1 <= len(hours) <= 2 or not 1 <= len(minutes) <= 2
+            or not hours.isdigit() or not minutes.isdigit() or not hours.isascii() or not minutes.isascii()):
+        raise ValueError(f"Nieprawidłowa godzina: {text!r}")
+    hours, minutes = int(hours), int(minutes)
+    if hours > 23 or minutes > 59:
+        raise ValueError(f"Nieprawidłowa godzina: {text!r}")
+    return hours * 60 + minutes
+
+
+def minutes_to_time(minutes):
+    """Minuty od północy -> 'HH:MM' (None dla braku godziny)"""
+    if minutes is None:
+        return None
+    return _TIMES[minutes]
+
+
+class EventRecord:
+    """Wydarzenie lub wystąpienie serii ('r<id>:YYYY-MM-DD') z liczbowymi polami czasu
+    
+    Data i godziny są w strefie tz (nazwa IANA); None - strefa domyślna
+    kalendarza (wystąpienia serii, wiersze sprzed migracji). end_day to
+    dzień zakończenia wydarzenia wielodniowego (None - jednodniowe).
+    """
+    
+    __slots__ = ("id", "day", "start", "end", "title", "description", "tz", "end_day", "all_day")
+    
+    def __init__(self, event_id, day, start, end, title, description, tz=None, end_day=None, all_day=False):
+        self.id = event_id
+        self.day = day
+        self.start = start
+        self.end = end
+        self.title = title
+        self.description = description
+        self.tz = tz
+        self.end_day = end_day
+        self.all_day = all_day
+    
+    @classmethod
+    def from_row(cls, event_id, event_date, start_time, end_time, title, description=None, tz=None,
+                 end_date=None, all_day=False):
+        """Rekord z wiersza (id, 'YYYY-MM-DD' lub date, 'HH:MM', 'HH:MM' lub None, title, description,
+        tz, end_date, all_day)"""
+        if isinstance(event_date, date):
+            day = event_date.toordinal()
+        else:
+            day = date_to_day(event_date)
+        return cls(event_id, day, _time_to_minutes(start_time),
+                   _time_to_minutes(end_time) if end_time else None, title, description, tz,
+                   date_to_day(end_date) if end_date else None, bool(all_day))
+    
+    @property
+    def date(self):
+        return day_to_date(self.day)
+    
+    @property
+    def end_date(self):
+        return None if self.end_day is None else day_to_date(self.end_day)
+    
+    @property
+    def start_time(self):
+        return minutes_to_time(self.start)
+    
+    @property
+    def end_time(self):
+        return minutes_to_time(self.end)
+    
+    @property
+    def recurrence_id(self):
+        """Id serii dla wystąpienia lub wyniku-serii, None dla zwykłego wydarzenia"""
+        occurrence = parse_occurrence_id(self.id)
+        return occurrence[0] if occurrence else None
+    
+    @property
+    def busy_minutes(self):
+        """Czas trwania w minutach (0 bez godziny końcowej), jak w podsumowaniu miesiąca"""
+        start, end = self.interval()
+        return end - start
+    
+    @property
+    def multi_day(self):
+        """Czy wydarzenie trwa po północy dnia rozpoczęcia (ma datę końca)"""
+        return self.end_day is not None
+    
+    @property
+    def last_day(self):
+        """Ostatni dzień, w którym wydarzenie trwa (koniec o północy nie zajmuje następnego dnia)"""
+        if self.end_day is None:
+            return self.day
+        start, end = self.interval()
+        return max(self.day, (end - 1) // MINUTES_PER_DAY)
+    
+    def moved_end_date(self, event_date):
+        """Data końca po przeniesieniu wydarzenia na event_date (ta sama liczba dni)"""
+        if self.end_day is None:
+            return None
+        return day_to_date(self.end_day + date_to_day(event_date) - self.day)
+    
+    def day_minutes(self, day):
+        """Zajęte minuty w danym dniu - część przedziału wydarzenia przypadająca na ten dzień"""
+        start, end = self.interval()
+        day_start = day * MINUTES_PER_DAY
+        return max(0, min(end, day_start + MINUTES_PER_DAY) - max(start, day_start))
+    
+    def interval(self):
+        """Przedział (start, end) w minutach bezwzględnych - jak interval_index.event_interval"""
+        start = self.day * MINUTES_PER_DAY + self.start
+        if self.all_day:
+            return start, ((self.end_day or self.day) + 1) * MINUTES_PER_DAY
+        if self.end is None:
+            return start, start
+        end = (self.end_day or self.day) * MINUTES_PER_DAY + self.end
+        if end < start:
+            end += MINUTES_PER_DAY
+        return start, end
+    
+    def sort_key(self):
+        """Kolejność wyników: (dzień, godzina rozpoczęcia)"""
+        return self.day, self.start
+    
+    def to_dict(self):
+        """Słownik API (dla pojedynczych wydarzeń; zbiory - records_json)"""
+        event = {
+            'id': self.id,
+            'date': self.date,
+            'start_time': self.start_time,
+            'end_time': self.end_time,
+            'title': self.title,
+            'description': self.description
+        }
+        recurrence_id = self.recurrence_id
+        if recurrence_id is not None:
+            event['recurrence_id'] = recurrence_id
+        if self.tz is not None:
+            event['tz'] = self.tz
+        if self.end_day is not None:
+            event['end_date'] = self.end_date
+        if self.all_day:
+            event['all_day'] = True
+        return event
+    
+    def _fields(self):
+        return (self.id, self.day, self.start, self.end, self.title, self.description, self.tz,
+                self.end_day, self.all_day)
+    
+    def __eq__(self, other):
+        if not isinstance(other, EventRecord):
+            return NotImplemented
+        return self._fields() == other._fields()
+    
+    __hash__ = None
+    
+    def __repr__(self):
+        end = f" do {self.end_date}" if self.end_day is not None else ""
+        return (f"EventRecord({self.id!r}, {self.date}, {self.start_time}-{self.end_time}{end}, "
+                f"{self.title!r})")
+
+
+@lru_cache(maxsize=65536)
+def _date_json(day):
+    return f'"{day_to_date(day)}"'
+
+
+def _identity_json(event_id, encode):
+    """Pola id (i recurrence_id dla wystąpień serii) jako fragment JSON"""
+    if isinstance(event_id, int):
+        return f'"id":{event_id}'
+    occurrence = parse_occurrence_id(event_id)
+    if occurrence:
+        return f'"id":{encode(event_id)},"recurrence_id":{occurrence[0]}'
+    return f'"id":{encode(event_id)}'
+
+
+@lru_cache(maxsize=1024)
+def _zone_json(tz):
+    return "" if tz is None else f',"tz":{json.dumps(tz)}'
+
+
+def _iter_json(records, encode):
+    """Obiekty JSON rekordów (klucze posortowane jak w jsonify, bez odstępów)"""
+    times = _TIMES_JSON
+    date_json = _date_json
+    zone_json = _zone_json
+    for record in records:
+        event_id, end, title, description = record.id, record.end, record.title, record.description
+        identity = f'"id":{event_id}' if type(event_id) is int else _identity_json(event_id, encode)
+        end_day = record.end_day
+        all_day = '"all_day":true,' if record.all_day else ""
+        end_date = "" if end_day is None else f'"end_date":{date_json(end_day)},'
+        yield (f'{{{all_day}"date":{date_json(record.day)},'
+               f'"description":{"null" if description is None else encode(description)},{end_date}'
+               f'"end_time":{"null" if end is None else times[end]},{identity},'
+               f'"start_time":{times[record.start]},'
+               f'"title":{"null" if title is None else encode(title)}{zone_json(record.tz)}}}')
+
+
+def record_json(record, ensure_ascii=True):
+    """Obiekt JSON jednego rekordu"""
+    return next(_iter_json((record,), _encode_ascii if ensure_ascii else _encode_unicode))
+
+
+def records_json(records, ensure_ascii=True):
+    """Tablica JSON z rekordów - jeden napis bez słowników pośrednich"""
+    return "[" + ",".join(_iter_json(records, _encode_ascii if ensure_ascii else _encode_unicode)) + "]"
+
+
+def records_by_date_json(groups):
+    """Obiekt JSON {'YYYY-MM-DD': [rekordy]} z listy par (dzień, rekordy)"""
+    return "{" + ",".join([f"{_date_json(day)}:{records_json(records)}" for day, records in groups]) + "}"
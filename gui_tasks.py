@@ -0,0 +1,134 @@
+"""
+Wywołania bazy danych interfejsu Tkinter w wątkach roboczych
+Używane przez CalendarGUI (calendar_gui.py)
+
+Zapytanie wykonane w wątku Tk (wolne wyszukiwanie, zablokowany plik
+SQLite) zamraża całe okno. BackgroundTasks wykonuje je w puli wątków,
+a wyniki przekazuje do wątku Tk przez root.after - Tk nie jest bezpieczne
+wątkowo, więc wątki robocze tylko odkładają wyniki do kolejki, którą wątek
+Tk odbiera, dopóki są zadania w toku.
+
+Zadanie może mieć klucz (np. 'month', 'search'): nowe zadanie o tym samym
+kluczu unieważnia poprzednie - niezaczęte jest anulowane, a wynik już
+trwającego odrzucany, więc przy szybkiej nawigacji rysowany jest tylko
+ostatni wybrany miesiąc. Zapisy i synchronizacja dziennika zmian idą
+jednym wątkiem, po kolei, bo zmieniają stan EventManager (indeks konfliktów);
+odczyty z bazy mają w wątkach własne połączenia.
+"""
+
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+# Co ile milisekund wątek Tk odbiera wyniki, gdy są zadania w toku
+DELIVERY_INTERVAL_MS = 10
+# Liczba wątków odczytu (zapisy zawsze w jednym)
+READ_WORKERS = 2
+
+
+class BackgroundTasks:
+    """Pula wątków dla wywołań bazy z wynikami dostarczanymi do wątku Tk
+    
+    Metody wywołuje się tylko z wątku Tk; tam też wykonywane są on_done
+    i on_error. on_busy(True/False) jest wywoływane, gdy zaczyna się
+    pierwsze i kończy ostatnie zadanie w toku (wskaźnik wczytywania).
+    """
+    
+    def __init__(self, root, on_busy=None, read_workers=READ_WORKERS):
+        self.root = root
+        self.on_busy = on_busy
+        self._readers = ThreadPoolExecutor(max_workers=read_workers, thread_name_prefix="gui-read")
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="gui-write")
+        self._results = queue.SimpleQueue()
+        # Klucz -> (numer, future) ostatniego zadania; tylko jego wynik jest dostarczany
+        self._latest = {}
+        self._counter = 0
+        self._pending = 0
+        self._delivery = None
+        self.closed = False
+    
+    def submit(self, key, function, on_done, on_error=None):
+        """Odczyt w puli wątków - on_done(wynik) w wątku Tk, o ile nie zlecono nowszego zadania o tym kluczu"""
+        self._submit(self._readers, key, function, on_done, on_error)
+    
+    def submit_write(self, function, on_done, on_error=None, key=None):
+        """Zapis (albo inna zmiana stanu EventManager) w wątku zapisów - zadania wykonują się po kolei"""
+        self._submit(self._writer, key, function, on_done, on_error)
+    
+    def cancel(self, key):
+        """Unieważnia zadanie o kluczu - niezaczęte nie zostanie wykonane, wynik trwającego przepadnie"""
+        latest = self._latest.pop(key, None)
+        if latest and latest[1].cancel():
+            self._finished()
+    
+    @property
+    def busy(self):
+        """Czy jakiekolwiek zadanie jest w toku (albo jego wynik czeka na dostarczenie)"""
+        return self._pending > 0
+    
+    def close(self):
+        """Zatrzymuje pule wątków (niezaczęte zadania są anulowane, bez czekania na trwające)"""
+        self.closed = True
+        if self._delivery is not None:
+            self.root.after_cancel(self._delivery)
+            self._delivery = None
+        self._readers.shutdown(wait=False, cancel_futures=True)
+        self._writer.shutdown(wait=False, cancel_futures=True)
+    
+    def _submit(self, executor, key, function, on_done, on_error):
+        if self.closed:
+            return
+        self._counter += 1
+        number = self._counter
+        if key is not None:
+            self.cancel(key)
+        
+        self._pending += 1
+        if self._pending == 1 and self.on_busy:
+            self.on_busy(True)
+        future = executor.submit(self._run, function, key, number, on_done, on_error)
+        if key is not None:
+            self._latest[key] = (number, future)
+        self._schedule()
+    
+    def _run(self, function, key, number, on_done, on_error):
+        """Wątek roboczy: wykonuje funkcję i odkłada wynik albo wyjątek do kolejki"""
+        try:
+            self._results.put((key, number, on_done, on_error, function(), None))
+        except Exception as e:
+            self._results.put((key, number, on_done, on_error, None, e))
+    
+    def _finished(self):
+        self._pending -= 1
+        if self._pending == 0 and self.on_busy:
+            self.on_busy(False)
+    
+    def _schedule(self):
+        if self._delivery is None and not self.closed:
+            self._delivery = self.root.after(DELIVERY_INTERVAL_MS, self._deliver)
+    
+    def _deliver(self):
+        """Wątek Tk: przekazuje gotowe wyniki do on_done/on_error (bez nieaktualnych)"""
+        self._delivery = None
+        try:
+            while not self.closed:
+                try:
+                    key, number, on_done, on_error, result, error = self._results.get_nowait()
+                except queue.Empty:
+                    break
+                self._finished()
+                if key is not None:
+                    latest = self._latest.get(key)
+                    if latest is None or latest[0] != number:
+                        # Nowsze zadanie o tym kluczu albo anulowane - wynik nieaktualny
+                        continue
+                    del self._latest[key]
+                
+                if error is None:
+                    on_done(result)
+                elif on_error:
+                    on_error(error)
+                else:
+                    raise error
+        finally:
+            if self._pending:
+                self._schedule()
@@ -0,0 +1,24 @@
+"""
+Konfiguracja gunicorna: gunicorn -c gunicorn.conf.py wsgi:application
+
+Domyślnie workery gthread - każde żądanie ma własny wątek, więc wolne
+zapytanie do bazy ani otwarty strumień /api/stream nie blokują innych
+żądań. Liczba procesów i wątków: KALENDARZ_WORKERS, KALENDARZ_THREADS.
+"""
+
+from config import Config
+
+bind = f"{Config.HOST}:{Config.PORT}"
+workers = Config.WORKERS
+threads = Config.THREADS
+worker_class = Config.WORKER_CLASS
+
+# wsgi.py tworzy schemat raz w procesie nadrzędnym
+preload_app = True
+
+timeout = 30
+# Otwarte strumienie SSE nie kończą się same - nie czekaj na nie przy restarcie
+graceful_timeout = 10
+
+accesslog = "-"
+errorlog = "-"
@@ -0,0 +1,244 @@
+"""
+Indeks przedziałów czasowych do wykrywania konfliktów wydarzeń
+
+Przedziały są półotwarte [start, end) i wyrażone w minutach od początku
+ery (date.toordinal() * 1440 + minuty dnia), więc wydarzenia przechodzące
+przez północ lub trwające wiele dni porównuje się zwykłą arytmetyką.
+Indeks to drzewo przedziałów zbudowane na drzewcu (treap) z maksymalnym
+końcem w każdym poddrzewie - wstawianie i usuwanie w O(log n), zapytania
+o nakładanie w O(log n + k).
+"""
+
+import heapq
+import random
+from datetime import date, datetime
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def time_to_minutes(time_str):
+    """Zamienia 'HH:MM' na liczbę minut od północy"""
+    hours, minutes = time_str.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def event_interval(event_date, start_time, end_time=None, end_date=None, all_day=False):
+    """Zwraca przedział (start, end) wydarzenia w minutach bezwzględnych
+    
+    Wydarzenie bez godziny końcowej jest punktem (start == end). Godzina
+    końcowa wcześniejsza niż początkowa oznacza zakończenie następnego dnia
+    (bez end_date). Całodniowe trwa do północy po end_date (lub po event_date).
+    """
+    if isinstance(event_date, str):
+        event_date = datetime.strptime(event_date, "%Y-%m-%d").date()
+    if isinstance(end_date, str):
+        end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
+    day_start = event_date.toordinal() * MINUTES_PER_DAY
+    end_day_start = end_date.toordinal() * MINUTES_PER_DAY if end_date else day_start
+    if all_day:
+        return day_start, end_day_start + MINUTES_PER_DAY
+    start = day_start + time_to_minutes(start_time)
+    if not end_time:
+        return start, start
+    end = end_day_start + time_to_minutes(end_time)
+    if end < start:
+        end += MINUTES_PER_DAY
+    return start, end
+
+
+def minutes_to_date(minutes):
+    """Data dnia, w którym wypada dana minuta bezwzględna"""
+    return date.fromordinal(minutes // MINUTES_PER_DAY)
+
+
+def batch_overlaps(index, removed, added):
+    """Kolizje partii zmian zastosowanych łącznie
+    
+    index zawiera istniejące wydarzenia i jest modyfikowany: najpierw
+    usuwane są klucze z removed (wydarzenia usuwane i przenoszone), potem
+    dodawane nowe położenia z added jako (key, start, end, data). Nowe
+    położenia są sprawdzane także między sobą. Zwraca {key: [data, ...]}
+    tylko dla kluczy, które z czymś kolidują.
+    """
+    for key in removed:
+        index.remove(key)
+    for key, start, end, data in added:
+        index.add(key, start, end, data)
+    
+    conflicts = {}
+    for key, start, end, _ in added:
+        found = [item[3] for item in index.overlaps(start, end, exclude=key)]
+        if found:
+            conflicts[key] = found
+    return conflicts
+
+
+class _Node:
+    __slots__ = ("key", "start", "end", "data", "priority", "left", "right", "max_end")
+    
+    def __init__(self, key, start, end, data):
+        self.key = key
+        self.start = start
+        self.end = end
+        self.data = data
+        self.priority = random.random()
+        self.left = None
+        self.right = None
+        self.max_end = end
+    
+    def update(self):
+        max_end = self.end
+        if self.left is not None and self.left.max_end > max_end:
+            max_end = self.left.max_end
+        if self.right is not None and self.right.max_end > max_end:
+            max_end = self.right.max_end
+        self.max_end = max_end
+    
+    @property
+    def order(self):
+        return (self.start, self.end, self.key)
+
+
+class IntervalIndex:
+    """Dynamiczne drzewo przedziałów [start, end) z kluczami wydarzeń"""
+    
+    def __init__(self):
+        self._root = None
+        self._nodes = {}
+    
+    def __len__(self):
+        return len(self._nodes)
+    
+    def __contains__(self, key):
+        return key in self._nodes
+    
+    def get(self, key):
+        """Zwraca (key, start, end, data) dla klucza lub None"""
+        node = self._nodes.get(key)
+        return None if node is None else (node.key, node.start, node.end, node.data)
+    
+    def add(self, key, start, end, data=None):
+        """Dodaje (lub zastępuje) przedział o danym kluczu"""
+        if key in self._nodes:
+            self.remove(key)
+        node = _Node(key, start, end, data)
+        self._nodes[key] = node
+        self._root = self._insert(self._root, node)
+    
+    def remove(self, key):
+        """Usuwa przedział o danym kluczu; zwraca False, jeśli go nie było"""
+        node = self._nodes.pop(key, None)
+        if node is None:
+            return False
+        self._root = self._delete(self._root, node.order)
+        return True
+    
+    def clear(self):
+        self._root = None
+        self._nodes = {}
+    
+    def _insert(self, root, node):
+        if root is None:
+            return node
+        if node.order < root.order:
+            root.left = self._insert(root.left, node)
+            if root.left.priority > root.priority:
+                root = self._rotate_right(root)
+        else:
+            root.right = self._insert(root.right, node)
+            if root.right.priority > root.priority:
+                root = self._rotate_left(root)
+        root.update()
+        return root
+    
+    def _delete(self, root, order):
+        if root is None:
+            return None
+        if order < root.order:
+            root.left = self._delete(root.left, order)
+        elif order > root.order:
+            root.right = self._delete(root.right, order)
+        else:
+            if root.left is None:
+                return root.right
+            if root.right is None:
+                return root.left
+            if root.left.priority > root.right.priority:
+                root = self._rotate_right(root)
+                root.right = self._delete(root.right, order)
+            else:
+                root = self._rotate_left(root)
+                root.left = self._delete(root.left, order)
+        root.update()
+        return root
+    
+    @staticmethod
+    def _rotate_right(node):
+        pivot = node.left
+        node.left = pivot.right
+        pivot.right = node
+        node.update()
+        pivot.update()
+        return pivot
+    
+    @staticmethod
+    def _rotate_left(node):
+        pivot = node.right
+        node.right = pivot.left
+        pivot.left = node
+        node.update()
+        pivot.update()
+        return pivot
+    
+    def _collect(self, start, end, exclude, limit):
+        """Przedziały nakładające się na [start, end), posortowane po początku"""
+        found = []
+        stack = []
+        node = self._root
+        # Przejście in-order z odcinaniem poddrzew, które nie mogą się nałożyć:
+        # max_end <= start wyklucza całe poddrzewo, node.start >= end jego prawą część
+        while stack or node is not None:
+            while node is not None and node.max_end > start:
+                stack.append(node)
+                node = node.left
+            if not stack:
+                break
+            node = stack.pop()
+            if node.start >= end:
+                break
+            if node.end > start and node.key != exclude:
+                found.append((node.key, node.start, node.end, node.data))
+                if limit and len(found) >= limit:
+                    break
+            node = node.right
+        return found
+    
+    def overlaps(self, start, end, exclude=None):
+        """Lista (key, start, end, data) przedziałów nakładających się na [start, end)"""
+        return self._collect(start, end, exclude, None)
+    
+    def first_overlap(self, start, end, exclude=None):
+        """Pierwszy przedział nakładający się na [start, end) lub None"""
+        found = self._collect(start, end, exclude, 1)
+        return found[0] if found else None
+    
+    def conflicting_pairs(self, start, end):
+        """Wszystkie pary nakładających się przedziałów w oknie [start, end)
+        
+        Zamiatanie po posortowanych przedziałach: zakończone przedziały są
+        zdejmowane z kopca według końca, każdy pozostały aktywny koliduje
+        z bieżącym - O(n log n + k) po pobraniu przedziałów z drzewa.
+        """
+        pairs = []
+        # Aktywne przedziały w kolejności początku (numer -> przedział) i kopiec (koniec, numer)
+        active = {}
+        ends = []
+        for number, interval in enumerate(self._collect(start, end, None, None)):
+            interval_start = interval[1]
+            while ends and ends[0][0] <= interval_start:
+                del active[heapq.heappop(ends)[1]]
+            for other in active.values():
+                pairs.append((other, interval))
+            active[number] = interval
+            heapq.heappush(ends, (interval[2], number))
+        return pairs
@@ -5,39 +5,196 @@ Aplikacja kalendarza/planera do planowania dnia z bazą danych SQLite
 Wersja webowa z Flask
 """
 
-from flask import Flask, render_template, request, jsonify, redirect, url_for
-from flask_sqlalchemy import SQLAlchemy
+from flask import Flask, render_template, request, jsonify, redirect, url_for, Response, stream_with_context, abort, g
 from datetime import datetime, date, timedelta
 import calendar
 import json
+import base64
+import io
+import os
+import threading
+import time
+
+import click
+from werkzeug.exceptions import HTTPException
+
+from config import Config
+from storage import open_storage, month_range
+from event_record import EPOCH_DAY, EventRecord, record_json, records_json, records_by_date_json
+from interval_index import MINUTES_PER_DAY, IntervalIndex, batch_overlaps, event_interval
+from availability import build_availability, working_hours_mask, minutes_to_time
+from response_cache import MonthCache
+from change_feed import ChangeFeed
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, AppMetrics, InstrumentedStorage, RequestProfiler
+import bulk_io
+import recurrence
+import change_log
+import timezones
 
 app = Flask(__name__)
-app.config['SECRET_KEY'] = 'kalendarz-app-secret-key-2025'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///calendar.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-db = SQLAlchemy(app)
-
-# Model bazy danych
-class Event(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    date = db.Column(db.Date, nullable=False)
-    start_time = db.Column(db.String(5), nullable=False)  # HH:MM
-    end_time = db.Column(db.String(5))  # HH:MM 
-    title = db.Column(db.String(200), nullable=False)
-    description = db.Column(db.Text)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'date': self.date.strftime('%Y-%m-%d'),
-            'start_time': self.start_time,
-            'end_time': self.end_time,
-            'title': self.title,
-            'description': self.description
-        }
+# Klucz, baza danych i tryb debugowania ze zmiennych środowiskowych (config.py)
+app.config.from_object(Config)
+
+# Stronicowanie wyników wyszukiwania
+SEARCH_PAGE_SIZE = 50
+SEARCH_MAX_PAGE_SIZE = 500
+# Wielkość porcji przy strumieniowaniu wszystkich wyników (format=ndjson)
+SEARCH_STREAM_BATCH = 500
+
+# Maksymalny zakres wyszukiwania wolnego czasu (dni)
+AVAILABILITY_MAX_DAYS = 366
+
+# Maksymalna liczba miesięcy w jednym zapytaniu o wersje
+CALENDAR_VERSIONS_MAX_MONTHS = 24
+
+# Maksymalny zakres podsumowania dni dla widoku roku (10 lat z latami przestępnymi)
+SUMMARY_MAX_DAYS = 3653
+
+# Eksport bez daty końcowej rozwija serie bez końca tylko na tyle dni naprzód
+EXPORT_RECURRING_DAYS = 366
+
+# Strumień zmian (SSE): odstęp komentarzy podtrzymujących połączenie (s),
+# czas ponowienia połączenia przez przeglądarkę (ms) i największa partia
+# zmian wysyłanych pojedynczo - większa (np. import) to jeden komunikat 'reset'
+STREAM_HEARTBEAT_SECONDS = Config.STREAM_HEARTBEAT_SECONDS
+STREAM_RETRY_MS = 3000
+STREAM_MAX_BATCH = 200
+
+# Cache odpowiedzi widoku miesiąca - unieważniany przy każdej zmianie wydarzeń,
+# także zapisanej przez inny proces (dziennik zmian, _sync_changes)
+month_cache = MonthCache(max_size=256)
+
+# Powiadomienia o zmianach dla /api/stream (jeden bufor dla wszystkich subskrybentów)
+change_feed = ChangeFeed()
+_sync_lock = threading.Lock()
+_storage_lock = threading.Lock()
+
+# Metryki (/metrics) i profilowanie żądań - bez KALENDARZ_METRICS i KALENDARZ_PROFILING
+# hooki żądań nie są rejestrowane, a magazyn nie jest opakowywany (zob. metrics.py)
+app_metrics = AppMetrics() if app.config['METRICS'] else None
+request_profiler = RequestProfiler(os.path.join(app.instance_path, app.config['PROFILE_DIR'])) \
+    if app.config['PROFILING'] else None
+# Nagłówek żądania włączający profilowanie; w odpowiedzi - nazwa pliku .prof albo 'busy'
+PROFILE_HEADER = 'X-Kalendarz-Profile'
+
+def get_storage():
+    """Magazyn wydarzeń aplikacji (zob. storage.open_storage) otwierany przy pierwszym użyciu
+    
+    Adres bazy z DATABASE_URL; względna ścieżka pliku SQLite jest liczona
+    od katalogu instance/. Jeden obiekt na proces, współdzielony przez wątki.
+    """
+    storage = app.extensions.get('kalendarz_storage')
+    if storage is None:
+        with _storage_lock:
+            storage = app.extensions.get('kalendarz_storage')
+            if storage is None:
+                os.makedirs(app.instance_path, exist_ok=True)
+                storage = open_storage(app.config['DATABASE_URL'], base_dir=app.instance_path)
+                if app_metrics is not None:
+                    storage = InstrumentedStorage(storage, app_metrics)
+                app.extensions['kalendarz_storage'] = storage
+    return storage
+
+def _cache_counts():
+    """Trafienia i chybienia cache widoku miesiąca i rozwinięć serii cyklicznych"""
+    expansions = recurrence.expand.cache_info()
+    return {'month': (month_cache.hits, month_cache.misses),
+            'recurrence_expansions': (expansions.hits, expansions.misses)}
+
+def _route_label():
+    """Wzorzec trasy żądania (bez wartości parametrów - ograniczona liczba etykiet metryk)"""
+    return request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+
+if app_metrics is not None:
+    app_metrics.collect_caches(_cache_counts)
+
+if app_metrics is not None or request_profiler is not None:
+    @app.before_request
+    def _start_request_instrumentation():
+        g.request_start = time.perf_counter()
+        if app_metrics is not None:
+            app_metrics.request_started()
+        if request_profiler is not None and request.headers.get(PROFILE_HEADER):
+            g.profiler = request_profiler.start()
+            g.profile_busy = g.profiler is None
+    
+    @app.after_request
+    def _finish_request_instrumentation(response):
+        """Czas do zwrócenia odpowiedzi (strumienie - do pierwszego bajtu) i wynik profilowania"""
+        start = g.get('request_start')
+        if start is None:
+            return response
+        elapsed = time.perf_counter() - start
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            response.headers[PROFILE_HEADER] = request_profiler.stop(profiler, request.method, _route_label())
+            response.headers['Server-Timing'] = f'app;dur={elapsed * 1000:.1f}'
+        elif g.get('profile_busy'):
+            response.headers[PROFILE_HEADER] = 'busy'
+        if app_metrics is not None:
+            app_metrics.observe_request(request.method, _route_label(), response.status_code, elapsed)
+        return response
+    
+    @app.teardown_request
+    def _end_request_instrumentation(error=None):
+        # Po zakończeniu strumienia (stream_with_context) - żądania w toku obejmują otwarte strumienie SSE
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            # Wyjątek przed after_request - profiler musi zwolnić blokadę
+            request_profiler.stop(profiler, request.method, _route_label())
+        if app_metrics is not None and g.pop('request_start', None) is not None:
+            app_metrics.request_finished()
+
+def _series_to_dict(row):
+    """Seria (id, date, start_time, end_time, title, description, rrule, exdates) jako słownik API"""
+    recurrence_id, event_date, start_time, end_time, title, description, rule, exdates = row[:8]
+    last_date = recurrence.last_occurrence(event_date, rule)
+    return {
+        'id': recurrence.series_id(recurrence_id),
+        'recurrence_id': recurrence_id,
+        'date': event_date,
+        'start_time': start_time,
+        'end_time': end_time,
+        'title': title,
+        'description': description,
+        'rrule': rule,
+        'exdates': sorted(day.strftime('%Y-%m-%d') for day in recurrence.parse_exdates(exdates)),
+        'last_date': last_date.strftime('%Y-%m-%d') if last_date else None
+    }
+
+def _json_response(body, status=200):
+    """Odpowiedź z gotowym tekstem JSON (zbiory rekordów - event_record.records_json)"""
+    return Response(body, status=status, mimetype='application/json')
+
+def _json_object(fields):
+    """Obiekt JSON z pól, których wartości są już tekstem JSON (klucze posortowane jak w jsonify)"""
+    return '{' + ', '.join(f'{json.dumps(key)}: {value}' for key, value in sorted(fields.items())) + '}'
+
+def _event_or_404(event_id):
+    event = get_storage().get_event_by_id(event_id)
+    if event is None:
+        abort(404, description='Wydarzenie nie istnieje')
+    return event
+
+def _series_or_404(recurrence_id):
+    series = get_storage().get_recurring_event(recurrence_id)
+    if series is None:
+        abort(404, description='Seria wydarzeń nie istnieje')
+    return series
+
+def _request_data():
+    """Treść żądania jako obiekt JSON - inna (null, lista, liczba) to ValueError (400)"""
+    data = request.get_json()
+    if not isinstance(data, dict):
+        raise ValueError('Treść żądania musi być obiektem JSON')
+    return data
+
+@app.errorhandler(HTTPException)
+def handle_http_error(error):
+    """Błędy HTTP (404, 415, 500...) w API jako JSON {'error': ...} z właściwym statusem"""
+    if not request.path.startswith('/api/'):
+        return error
+    return jsonify({'error': error.description}), error.code
 
 @app.route('/')
 def index():
@@ -48,138 +205,948 @@ def index():
                          current_month=today.month,
                          today=today.strftime('%Y-%m-%d'))
 
+def _build_month_body(year, month):
+    """Buduje odpowiedź JSON kalendarza dla miesiąca (bez cache)
+    
+    Wydarzenia pogrupowane po datach są serializowane prosto z rekordów
+    i wstawiane do obiektu z pozostałymi polami - bez słownika na wydarzenie.
+    """
+    storage = get_storage()
+    # Zakres półotwarty [pierwszy dzień miesiąca, pierwszy dzień następnego)
+    start_date, end_date = month_range(year, month)
+    
+    # Wydarzenia pogrupowane po dniach - wielodniowe w każdym dniu, który zajmują
+    events_json = records_by_date_json(storage.get_events_by_day(start_date, end_date))
+    
+    # Liczba wydarzeń i zajęte minuty dla każdego dnia, razem z wystąpieniami
+    # serii (w SQLite jedno zapytanie obsłużone z indeksu pokrywającego)
+    summary = {
+        event_date: {'count': count, 'busy_minutes': minutes}
+        for event_date, (count, minutes) in storage.get_daily_summary(start_date, end_date).items()
+    }
+    
+    # Generuj kalendarz
+    cal = calendar.monthcalendar(year, month)
+    
+    return _json_object({
+        'calendar': app.json.dumps(cal),
+        'events': events_json,
+        'summary': app.json.dumps(summary),
+        'year': app.json.dumps(year),
+        'month': app.json.dumps(month),
+        'month_name': app.json.dumps(calendar.month_name[month])
+    })
+
+def _month_etag(key):
+    """ETag miesiąca - wersja ostatniej zmiany dziennika dotyczącej miesiąca
+    
+    Wersja pochodzi z bazy i nie przekracza wersji zsynchronizowanej przez
+    ten proces (odpowiedź z cache nie jest starsza niż jej ETag), więc
+    wszystkie workery dają ten sam ETag. Pamiętana do unieważnienia miesiąca.
+    """
+    etag = month_cache.etag(key)
+    if etag is None:
+        # Pod blokadą synchronizacji - zmiany nowsze niż change_feed.version
+        # unieważnią zapamiętaną wersję przy następnym _sync_changes
+        with _sync_lock:
+            etag = month_cache.etag(key) or month_cache.set_change_version(
+                key, get_storage().get_month_version(*month_range(*key), change_feed.version))
+    return etag
+
 @app.route('/api/calendar/<int:year>/<int:month>')
 def get_calendar_data(year, month):
-    """API: Pobiera dane kalendarza dla danego miesiąca"""
+    """API: Pobiera dane kalendarza dla danego miesiąca
+    
+    Odpowiedzi są trzymane w cache LRU i opatrzone ETagiem ostatniej zmiany
+    miesiąca (wspólnym dla workerów) - bez zmian w tym miesiącu klient
+    z If-None-Match dostaje 304.
+    """
     try:
-        # Pobierz wydarzenia dla miesiąca
-        start_date = date(year, month, 1)
-        if month == 12:
-            end_date = date(year + 1, 1, 1) - timedelta(days=1)
+        _sync_changes()
+        key = (year, month)
+        version = month_cache.version(key)
+        etag = _month_etag(key)
+        if request.if_none_match.contains(etag):
+            month_cache.record_not_modified()
+            response = Response(status=304)
         else:
-            end_date = date(year, month + 1, 1) - timedelta(days=1)
+            body = month_cache.get(key)
+            if body is None:
+                body = _build_month_body(year, month)
+                month_cache.put(key, body, version)
+            response = Response(body, mimetype='application/json')
         
-        events = Event.query.filter(
-            Event.date >= start_date,
-            Event.date <= end_date
-        ).all()
-        
-        # Grupuj wydarzenia po datach
-        events_by_date = {}
-        for event in events:
-            date_str = event.date.strftime('%Y-%m-%d')
-            if date_str not in events_by_date:
-                events_by_date[date_str] = []
-            events_by_date[date_str].append(event.to_dict())
-        
-        # Generuj kalendarz
-        cal = calendar.monthcalendar(year, month)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    except (ValueError, KeyError) as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/calendar/versions')
+def get_calendar_versions():
+    """API: Bieżące ETagi miesięcy (`months=RRRR-MM,RRRR-MM`)
+    
+    Tania kontrola aktualności kopii klienta - bez przesyłania danych
+    miesięcy; baza jest pytana tylko o miesiące zmienione od ostatniego odczytu.
+    """
+    try:
+        _sync_changes()
+        versions = {}
+        for key in request.args.get('months', '').split(',')[:CALENDAR_VERSIONS_MAX_MONTHS]:
+            if key:
+                year, month = (int(part) for part in key.split('-'))
+                versions[key] = _month_etag((year, month))
+        return jsonify(versions)
+    except (ValueError, KeyError) as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/summary')
+def get_summary():
+    """API: Liczba wydarzeń i zajęte minuty dla dni z zakresu `from`-`to` (włącznie)
+    
+    Dane widoku roku (mapa cieplna): `days` to {data: [liczba, minuty]}
+    tylko dla dni z wydarzeniami, do SUMMARY_MAX_DAYS dni naraz - odczyt
+    sum dziennych utrzymywanych przy zapisach, bez przeglądania wydarzeń.
+    ETag to wersja dziennika zmian, więc bez zmian klient dostaje 304.
+    """
+    try:
+        start_date = datetime.strptime(request.args['from'], '%Y-%m-%d').date()
+        end_date = datetime.strptime(request.args['to'], '%Y-%m-%d').date()
+        if end_date < start_date:
+            raise ValueError('Data końcowa jest wcześniejsza niż początkowa')
+        if (end_date - start_date).days >= SUMMARY_MAX_DAYS:
+            raise ValueError(f'Zakres nie może przekraczać {SUMMARY_MAX_DAYS} dni')
         
-        return jsonify({
-            'calendar': cal,
-            'events': events_by_date,
-            'year': year,
-            'month': month,
-            'month_name': calendar.month_name[month]
+        _sync_changes()
+        etag = f"summary-{change_feed.version}-{start_date.isoformat()}-{end_date.isoformat()}"
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            summary = get_storage().get_daily_summary(start_date.isoformat(),
+                                                      (end_date + timedelta(days=1)).isoformat())
+            response = jsonify({'from': start_date.isoformat(), 'to': end_date.isoformat(), 'days': summary})
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    except (ValueError, KeyError) as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/metrics')
+def get_metrics():
+    """Metryki w formacie tekstowym Prometheusa (tylko z KALENDARZ_METRICS=1)
+    
+    Czasy i liczby żądań według trasy, czasy, wiersze i instrukcje SQL
+    operacji magazynu, połączenia z bazą i trafienia cache - dla procesu,
+    który obsłużył pobranie.
+    """
+    if app_metrics is None:
+        abort(404)
+    get_storage()
+    return Response(app_metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
+@app.route('/api/cache/stats')
+def get_cache_stats():
+    """API: Statystyki cache widoku miesiąca i rozwinięć serii cyklicznych"""
+    expansions = recurrence.expand.cache_info()
+    return jsonify({
+        **month_cache.stats(),
+        'recurrence_expansions': {
+            'size': expansions.currsize,
+            'hits': expansions.hits,
+            'misses': expansions.misses
+        }
+    })
+
+def _changes_page(since, limit):
+    """Strona dziennika zmian z bieżącym stanem zmienionych wydarzeń i serii"""
+    storage = get_storage()
+    page = storage.get_changes_since(since, limit)
+    
+    # Bieżący stan zmienionych wierszy - wydarzenia jednym zapytaniem na stronę zmian
+    changed = {change_log.KIND_EVENT: set(), change_log.KIND_SERIES: set()}
+    for change in page['changes']:
+        if change['op'] != 'delete':
+            changed[change['kind']].add(change['event_id'])
+    current = {}
+    for event in storage.get_events_by_ids(changed[change_log.KIND_EVENT]):
+        current[(change_log.KIND_EVENT, event.id)] = event.to_dict()
+    for recurrence_id in changed[change_log.KIND_SERIES]:
+        row = storage.get_recurring_event(recurrence_id)
+        if row is not None:
+            current[(change_log.KIND_SERIES, recurrence_id)] = _series_to_dict(row)
+    
+    changes = []
+    for change in page['changes']:
+        kind, event_id = change['kind'], change['event_id']
+        event = current.get((kind, event_id))
+        op, event_date, old_date = change['op'], change['date'], change['old_date']
+        end_date, old_end_date = change['end_date'], change['old_end_date']
+        if event is None and op != 'delete':
+            # Wiersz usunięty w późniejszej wersji (poza tą stroną) - od razu nagrobek
+            op, event_date, old_date = 'delete', None, old_date or event_date
+            end_date, old_end_date = None, old_end_date or end_date
+        changes.append({
+            'version': change['version'],
+            'op': op,
+            'kind': kind,
+            'id': recurrence.series_id(event_id) if kind == change_log.KIND_SERIES else event_id,
+            'date': event_date,
+            'old_date': old_date,
+            'end_date': end_date,
+            'old_end_date': old_end_date,
+            'event': event
         })
-    except Exception as e:
+    page['changes'] = changes
+    return page
+
+@app.route('/api/changes')
+def get_changes():
+    """API: Zmiany wydarzeń i serii od wersji `since` (synchronizacja przyrostowa)
+    
+    Zamiast całych miesięcy zwraca tylko zmienione wydarzenia, a dla
+    usuniętych nagrobki (`event: null`). Przy `has_more` klient pyta
+    ponownie od zwróconej `version`; `reset` oznacza, że zmian od `since`
+    nie ma już w dzienniku i trzeba wczytać pełny stan.
+    """
+    try:
+        since = request.args.get('since', 0, type=int)
+        limit = request.args.get('limit', change_log.CHANGES_PAGE_SIZE, type=int)
+        limit = min(max(limit, 1), change_log.CHANGES_MAX_PAGE_SIZE)
+        return jsonify(_changes_page(since, limit))
+    except (ValueError, KeyError) as e:
         return jsonify({'error': str(e)}), 400
 
+def _sync_changes():
+    """Nanosi zmiany zapisane od ostatniego wywołania (dziennik zmian)
+    
+    Unieważnia miesiące w cache tego procesu i publikuje zmiany
+    subskrybentom /api/stream. Wywoływane po każdym zatwierdzeniu zmian
+    i przed odczytem z cache, więc zmiany innych procesów (workery serwera,
+    import z linii poleceń) też docierają; bez nowych zmian to jedno zapytanie.
+    """
+    with _sync_lock:
+        latest = get_storage().get_current_version()
+        if change_feed.version is None:
+            change_feed.start(latest)
+            return
+        if latest == change_feed.version:
+            return
+        
+        page = _changes_page(change_feed.version, STREAM_MAX_BATCH)
+        changes = page['changes']
+        if page['reset'] or page['has_more'] or any(change['kind'] == change_log.KIND_SERIES for change in changes):
+            month_cache.clear()
+        else:
+            month_cache.invalidate_spans(*(_date_span(first, last) for change in changes
+                                           for first, last in ((change['date'], change['end_date']),
+                                                               (change['old_date'], change['old_end_date']))
+                                           if first))
+        if page['reset'] or page['has_more']:
+            changes = [{'version': page['latest'], 'op': 'reset'}]
+        change_feed.publish(changes)
+
+def _date_span(event_date, end_date=None):
+    """Pierwszy i ostatni dzień wydarzenia jako daty (jednodniowe - ten sam dzień)"""
+    first = date.fromisoformat(event_date) if isinstance(event_date, str) else event_date
+    return first, date.fromisoformat(end_date) if end_date else first
+
+def _sse_message(change):
+    return f"id: {change['version']}\ndata: {json.dumps(change, ensure_ascii=False)}\n\n"
+
+@app.route('/api/stream')
+def stream_changes():
+    """API: Strumień zmian wydarzeń (Server-Sent Events)
+    
+    Każda zmiana (jak w /api/changes) jest wysyłana z id równym wersji
+    dziennika zmian, więc przeglądarka po zerwaniu połączenia wznawia od
+    Last-Event-ID, a zaległości spoza bufora są doczytywane z dziennika.
+    Zmiana z `op: reset` oznacza, że klient musi wczytać pełny stan.
+    """
+    since = request.headers.get('Last-Event-ID', type=int)
+    if since is None:
+        since = request.args.get('since', type=int)
+    _sync_changes()
+    if since is None:
+        since = change_feed.version
+    
+    def generate():
+        version = since
+        with change_feed.subscribe():
+            yield f"retry: {STREAM_RETRY_MS}\n\n"
+            while True:
+                changes = change_feed.wait(version, STREAM_HEARTBEAT_SECONDS)
+                if changes is None:
+                    # Klient został w tyle dalej niż sięga bufor - zaległości z dziennika
+                    page = _changes_page(version, STREAM_MAX_BATCH)
+                    if page['reset'] or page['has_more']:
+                        changes = [{'version': page['latest'], 'op': 'reset'}]
+                    else:
+                        changes = page['changes']
+                        version = page['version']
+                elif not changes:
+                    # Zmiany innych procesów i komentarz podtrzymujący połączenie
+                    _sync_changes()
+                    yield ": ping\n\n"
+                for change in changes:
+                    yield _sse_message(change)
+                if changes:
+                    version = changes[-1]['version']
+    
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+def _window_to_dicts(found, zone_name):
+    """Wyniki okna UTC (start_utc, end_utc, rekord) jako słowniki API w strefie widoku
+    
+    date/start_time/end_time są przeliczone na strefę zone_name (wszystkie
+    chwile jednym wywołaniem utc_to_local); tz to strefa samego wydarzenia,
+    a utc_start/utc_end - chwile w UTC.
+    """
+    moments = []
+    for start_utc, end_utc, _ in found:
+        moments.append(start_utc)
+        moments.append(start_utc if end_utc is None else end_utc)
+    local = timezones.utc_to_local(moments, zone_name)
+    events = []
+    for position, (start_utc, end_utc, record) in enumerate(found):
+        start_day, start = divmod(local[2 * position], MINUTES_PER_DAY)
+        end = local[2 * position + 1] % MINUTES_PER_DAY if end_utc is not None else None
+        event = EventRecord(record.id, start_day + EPOCH_DAY, start, end, record.title,
+                            record.description, record.tz or timezones.DEFAULT_TIMEZONE).to_dict()
+        event['utc_start'] = timezones.format_utc(start_utc)
+        event['utc_end'] = timezones.format_utc(end_utc) if end_utc is not None else None
+        events.append(event)
+    return events
+
 @app.route('/api/events/<date_str>')
 def get_events_for_date(date_str):
-    """API: Pobiera wydarzenia dla konkretnej daty"""
+    """API: Pobiera wydarzenia dla konkretnej daty
+    
+    Z parametrem tz (strefa widoku) - wydarzenia nakładające się na dobę
+    lokalną tej strefy, z godzinami przeliczonymi na nią.
+    """
     try:
         event_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-        events = Event.query.filter_by(date=event_date).order_by(Event.start_time).all()
-        return jsonify([event.to_dict() for event in events])
-    except Exception as e:
+        zone_name = request.args.get('tz')
+        if zone_name:
+            timezones.get_zone(zone_name)
+            found = get_storage().get_events_in_window(*timezones.local_day_window(event_date.isoformat(), zone_name))
+            return jsonify(_window_to_dicts(found, zone_name))
+        events = get_storage().get_events_between(event_date.isoformat(), (event_date + timedelta(days=1)).isoformat())
+        return _json_response(records_json(events))
+    except (ValueError, KeyError) as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/window')
+def get_events_in_window():
+    """API: Wydarzenia nakładające się na okno UTC
+    
+    Parametry: start, end (ISO 8601, bez offsetu - UTC) i tz - strefa, na
+    którą są przeliczane daty i godziny (domyślnie strefa kalendarza).
+    """
+    try:
+        window_start = timezones.parse_utc(request.args['start'])
+        window_end = timezones.parse_utc(request.args['end'])
+        if window_end <= window_start:
+            raise ValueError('Koniec okna musi być późniejszy niż początek')
+        zone_name = timezones.resolve_zone_name(request.args.get('tz'))
+        found = get_storage().get_events_in_window(window_start, window_end)
+        return jsonify(_window_to_dicts(found, zone_name))
+    except (ValueError, KeyError) as e:
         return jsonify({'error': str(e)}), 400
 
 @app.route('/api/events', methods=['POST'])
 def add_event():
     """API: Dodaje nowe wydarzenie"""
     try:
-        data = request.get_json()
+        data = _request_data()
+        # Te same reguły co partia i import (daty, godziny HH:MM, strefa)
+        event_date, start_time, end_time, title, description, tz, end_date, all_day = \
+            bulk_io.validate_record(data)
         
-        event = Event(
-            date=datetime.strptime(data['date'], '%Y-%m-%d').date(),
-            start_time=data['start_time'],
-            end_time=data.get('end_time'),
-            title=data['title'],
-            description=data.get('description', '')
-        )
+        if data.get('reject_conflicts'):
+            overlaps = _find_overlaps(event_date, start_time, end_time, end_date=end_date, all_day=all_day)
+            if overlaps:
+                return _conflict_response(overlaps)
         
-        db.session.add(event)
-        db.session.commit()
+        storage = get_storage()
+        event_id = storage.add_event(event_date, start_time, end_time, title, description, tz=tz,
+                                     end_date=end_date, all_day=all_day)
+        month_cache.invalidate_spans(_date_span(event_date, end_date))
+        _sync_changes()
         
-        return jsonify(event.to_dict()), 201
-    except Exception as e:
+        return jsonify(storage.get_event_by_id(event_id).to_dict()), 201
+    except (ValueError, KeyError) as e:
         return jsonify({'error': str(e)}), 400
 
 @app.route('/api/events/<int:event_id>', methods=['PUT'])
 def update_event(event_id):
     """API: Aktualizuje wydarzenie"""
     try:
-        event = Event.query.get_or_404(event_id)
-        data = request.get_json()
+        event = _event_or_404(event_id)
+        data = _request_data()
+        # Walidacja jak przy dodawaniu, z dniem wydarzenia (bez tz wydarzenie zostaje w swojej strefie)
+        event_date, start_time, end_time, title, description, _, end_date, all_day = \
+            bulk_io.validate_record({**data, 'date': event.date})
         
-        event.start_time = data['start_time']
-        event.end_time = data.get('end_time')
-        event.title = data['title']
-        event.description = data.get('description', '')
-        event.updated_at = datetime.utcnow()
+        if data.get('reject_conflicts'):
+            overlaps = _find_overlaps(event_date, start_time, end_time, exclude=event_id, end_date=end_date,
+                                      all_day=all_day)
+            if overlaps:
+                return _conflict_response(overlaps)
         
-        db.session.commit()
+        storage = get_storage()
+        storage.update_event(event_id, start_time, end_time, title, description,
+                             tz=data.get('tz') or None, end_date=end_date, all_day=all_day)
+        month_cache.invalidate_spans(_date_span(event_date, event.end_date), _date_span(event_date, end_date))
+        _sync_changes()
         
-        return jsonify(event.to_dict())
-    except Exception as e:
+        return jsonify(storage.get_event_by_id(event_id).to_dict())
+    except (ValueError, KeyError) as e:
         return jsonify({'error': str(e)}), 400
 
 @app.route('/api/events/<int:event_id>', methods=['DELETE'])
 def delete_event(event_id):
     """API: Usuwa wydarzenie"""
     try:
-        event = Event.query.get_or_404(event_id)
-        db.session.delete(event)
-        db.session.commit()
+        event = _event_or_404(event_id)
+        get_storage().delete_event(event_id)
+        month_cache.invalidate_spans(_date_span(event.date, event.end_date))
+        _sync_changes()
         return jsonify({'message': 'Wydarzenie zostało usunięte'})
-    except Exception as e:
+    except (ValueError, KeyError) as e:
         return jsonify({'error': str(e)}), 400
 
+def _series_fields(data, series=None):
+    """Waliduje pola serii z danych żądania (pominięte pola - z bieżącej serii)
+    
+    Zwraca (date, start_time, end_time, title, description, reguła, exdates).
+    """
+    fields = _series_to_dict(series) if series else {}
+    fields.update(data)
+    # Serie są jednodniowe i w strefie domyślnej kalendarza - end_date, all_day i tz są pomijane
+    fields.pop('end_date', None)
+    fields.pop('all_day', None)
+    event_date, start_time, end_time, title, description, *_ = bulk_io.validate_record(fields)
+    rule = recurrence.RecurrenceRule.parse(fields.get('rrule') or '')
+    exdates = series[7] if series else ''
+    if isinstance(fields.get('exdates'), list):
+        exdates = recurrence.format_exdates(fields['exdates'])
+    return event_date, start_time, end_time, title, description, rule, exdates
+
+@app.route('/api/recurring', methods=['POST'])
+def add_recurring_event():
+    """API: Dodaje serię wydarzeń cyklicznych
+    
+    Body jak dla /api/events oraz `rrule` (np. "FREQ=WEEKLY;BYDAY=MO,WE;UNTIL=20251231").
+    """
+    try:
+        storage = get_storage()
+        recurrence_id = storage.add_recurring_event(*_series_fields(_request_data()))
+        month_cache.clear()
+        _sync_changes()
+        return jsonify(_series_to_dict(storage.get_recurring_event(recurrence_id))), 201
+    except (ValueError, KeyError) as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/recurring/<int:recurrence_id>')
+def get_recurring_event(recurrence_id):
+    """API: Pobiera serię cykliczną"""
+    return jsonify(_series_to_dict(_series_or_404(recurrence_id)))
+
+@app.route('/api/recurring/<int:recurrence_id>', methods=['PUT'])
+def update_recurring_event(recurrence_id):
+    """API: Aktualizuje całą serię (pominięte pola pozostają bez zmian)"""
+    try:
+        storage = get_storage()
+        series = _series_or_404(recurrence_id)
+        storage.update_recurring_event(recurrence_id, *_series_fields(_request_data(), series))
+        month_cache.clear()
+        _sync_changes()
+        return jsonify(_series_to_dict(storage.get_recurring_event(recurrence_id)))
+    except (ValueError, KeyError) as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/recurring/<int:recurrence_id>', methods=['DELETE'])
+def delete_recurring_event(recurrence_id):
+    """API: Usuwa całą serię cykliczną"""
+    try:
+        _series_or_404(recurrence_id)
+        get_storage().delete_recurring_event(recurrence_id)
+        month_cache.clear()
+        _sync_changes()
+        return jsonify({'message': 'Seria wydarzeń została usunięta'})
+    except (ValueError, KeyError) as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/recurring/<int:recurrence_id>/occurrences/<date_str>', methods=['DELETE'])
+def skip_occurrence(recurrence_id, date_str):
+    """API: Usuwa jedno wystąpienie serii (dopisuje datę do wyjątków)"""
+    try:
+        storage = get_storage()
+        _series_or_404(recurrence_id)
+        occurrence_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+        storage.add_recurrence_exception(recurrence_id, occurrence_date)
+        month_cache.invalidate_dates(occurrence_date)
+        _sync_changes()
+        return jsonify(_series_to_dict(storage.get_recurring_event(recurrence_id)))
+    except (ValueError, KeyError) as e:
+        return jsonify({'error': str(e)}), 400
+
+def _is_event_id(value):
+    """Czy wartość z JSON-a może być identyfikatorem wydarzenia (liczba całkowita
+    w zakresie INTEGER bazy, nie true/false)"""
+    return isinstance(value, int) and not isinstance(value, bool) and -2 ** 63 <= value < 2 ** 63
+
+def _plan_batch_operation(operation, existing):
+    """Waliduje operację partii; zwraca (op, wydarzenie lub None, pola po zmianie lub None)"""
+    op = operation.get('op')
+    event = None
+    if op == 'create':
+        fields = operation
+    elif op in ('update', 'delete'):
+        if not _is_event_id(operation.get('id')):
+            raise ValueError('Nieprawidłowy identyfikator wydarzenia')
+        event = existing.get(operation['id'])
+        if event is None:
+            raise ValueError('Wydarzenie nie istnieje')
+        if op == 'delete':
+            return op, event, None
+        fields = event.to_dict()
+        fields.update(operation)
+        # Przesunięte wydarzenie wielodniowe zachowuje liczbę dni
+        if 'end_date' not in operation and fields.get('date') and fields['date'] != event.date:
+            fields['end_date'] = event.moved_end_date(fields.get('date'))
+    else:
+        raise ValueError(f'Nieznana operacja: {op}')
+    return op, event, bulk_io.validate_record(fields)
+
+def _batch_conflicts(planned):
+    """Kolizje zaplanowanych operacji partii - {pozycja w partii: [wydarzenia]}"""
+    spans = [_date_span(record[0], record[6]) for _, _, record in planned if record is not None]
+    if not spans:
+        return {}
+    
+    # Dzień przed i po - wydarzenia mogą trwać po północy (wielodniowe - do ostatniego dnia)
+    index = _build_interval_index(min(first for first, _ in spans) - timedelta(days=1),
+                                  max(last for _, last in spans) + timedelta(days=2))
+    removed = [event.id for op, event, _ in planned if op != 'create']
+    added = []
+    keys = {}
+    for position, (op, event, record) in enumerate(planned):
+        if record is None:
+            continue
+        key = event.id if op == 'update' else ('new', position)
+        keys[key] = position
+        planned_event = EventRecord.from_row(event.id if event is not None else None, *record)
+        added.append((key, *planned_event.interval(), planned_event))
+    return {keys[key]: [_conflict_to_dict(event) for event in found]
+            for key, found in batch_overlaps(index, removed, added).items()}
+
+@app.route('/api/events/batch', methods=['POST'])
+def apply_event_batch():
+    """API: Wykonuje partię operacji create/update/delete w jednej transakcji
+    
+    Body: {"operations": [{"op": "create"|"update"|"delete", "id": ..., pola...}],
+    "reject_conflicts": true}. Update zmienia tylko podane pola (także datę).
+    Kolizje są sprawdzane dla stanu po całej partii. Jeśli którakolwiek
+    operacja jest błędna (400) lub koliduje (409), nic nie jest zapisywane;
+    wynik jest zwracany dla każdej operacji.
+    """
+    try:
+        data = _request_data()
+        operations = data['operations']
+        if not isinstance(operations, list) or not all(isinstance(operation, dict) for operation in operations):
+            raise ValueError('operations musi być listą obiektów')
+        results = [{'index': position, 'op': operation.get('op'), 'ok': True}
+                   for position, operation in enumerate(operations)]
+        
+        # Wszystkie modyfikowane wydarzenia jednym zapytaniem
+        ids = [operation['id'] for operation in operations
+               if operation.get('op') in ('update', 'delete') and _is_event_id(operation.get('id'))]
+        storage = get_storage()
+        existing = {event.id: event for event in storage.get_events_by_ids(ids)}
+        
+        planned = []
+        seen_ids = set()
+        for result, operation in zip(results, operations):
+            try:
+                plan = _plan_batch_operation(operation, existing)
+                if plan[1] is not None:
+                    if plan[1].id in seen_ids:
+                        raise ValueError('Wydarzenie występuje w partii więcej niż raz')
+                    seen_ids.add(plan[1].id)
+                    result['id'] = plan[1].id
+                planned.append(plan)
+            except ValueError as e:
+                result['ok'] = False
+                result['error'] = str(e)
+        
+        if all(result['ok'] for result in results) and data.get('reject_conflicts', True):
+            for position, found in _batch_conflicts(planned).items():
+                results[position]['ok'] = False
+                results[position]['error'] = f"Konflikt z wydarzeniem: {found[0]['title']}"
+                results[position]['conflicts'] = found
+        
+        if not all(result['ok'] for result in results):
+            status = 409 if any('conflicts' in result for result in results) else 400
+            return jsonify({'applied': False, 'results': results}), status
+        
+        changed_spans = []
+        saved = []
+        # Jedna transakcja dla całej partii
+        with storage.transaction():
+            for op, event, record in planned:
+                if event is not None:
+                    changed_spans.append(_date_span(event.date, event.end_date))
+                if op == 'delete':
+                    storage.delete_event(event.id)
+                    saved.append(None)
+                    continue
+                if event is None:
+                    event_id = storage.add_event(*record)
+                else:
+                    event_id = event.id
+                    storage.update_event(event_id, *record[1:5], event_date=record[0], tz=record[5],
+                                         end_date=record[6], all_day=record[7])
+                changed_spans.append(_date_span(record[0], record[6]))
+                saved.append(EventRecord.from_row(event_id, *record))
+        
+        month_cache.invalidate_spans(*changed_spans)
+        _sync_changes()
+        
+        for result, event in zip(results, saved):
+            if event is not None:
+                result['id'] = event.id
+                result['event'] = event.to_dict()
+        return jsonify({'applied': True, 'results': results})
+    except (ValueError, KeyError) as e:
+        return jsonify({'error': str(e)}), 400
+
+def _build_interval_index(start_date, end_date):
+    """Buduje indeks przedziałów dla wydarzeń z zakresu dat [start_date, end_date)"""
+    index = IntervalIndex()
+    for event in get_storage().get_event_intervals(start_date.isoformat(), end_date.isoformat()):
+        index.add(event.id, *event.interval(), event)
+    return index
+
+def _conflict_to_dict(event):
+    """Wydarzenie z indeksu przedziałów jako słownik kolizji (bez opisu)"""
+    return {
+        'id': event.id,
+        'date': event.date,
+        'start_time': event.start_time,
+        'end_time': event.end_time,
+        'title': event.title
+    }
+
+def _find_overlaps(event_date, start_time, end_time, exclude=None, end_date=None, all_day=False):
+    """Wydarzenia nakładające się na podany termin"""
+    start, end = event_interval(event_date, start_time, end_time, end_date, all_day)
+    # Dzień wcześniej - wydarzenie może trwać po północy
+    first, last = _date_span(event_date, end_date)
+    index = _build_interval_index(first - timedelta(days=1), last + timedelta(days=2))
+    return [_conflict_to_dict(item[3]) for item in index.overlaps(start, end, exclude=exclude)]
+
+def _conflict_response(overlaps):
+    """Odpowiedź 409 dla wydarzenia kolidującego z istniejącymi"""
+    return jsonify({
+        'error': f"Konflikt z wydarzeniem: {overlaps[0]['title']}",
+        'conflicts': overlaps
+    }), 409
+
+@app.route('/api/conflicts')
+def get_conflicts():
+    """API: Wykrywa kolizje wydarzeń
+    
+    `from`/`to` (włącznie) - wszystkie pary kolidujących wydarzeń w zakresie dat;
+    `date`/`start_time`/`end_time` (opcjonalnie `exclude`) - wydarzenia nakładające się na termin.
+    """
+    try:
+        if 'date' in request.args:
+            event_date = datetime.strptime(request.args['date'], '%Y-%m-%d').date()
+            overlaps = _find_overlaps(event_date, request.args['start_time'],
+                                      request.args.get('end_time'),
+                                      exclude=request.args.get('exclude', type=int))
+            return jsonify({'conflict': bool(overlaps), 'events': overlaps})
+        
+        start_date = datetime.strptime(request.args['from'], '%Y-%m-%d').date()
+        end_date = datetime.strptime(request.args['to'], '%Y-%m-%d').date() + timedelta(days=1)
+        
+        index = _build_interval_index(start_date - timedelta(days=1), end_date)
+        window_start, _ = event_interval(start_date, '00:00')
+        window_end, _ = event_interval(end_date, '00:00')
+        pairs = index.conflicting_pairs(window_start, window_end)
+        return jsonify({
+            'conflicts': [{'first': _conflict_to_dict(first[3]), 'second': _conflict_to_dict(second[3])}
+                          for first, second in pairs]
+        })
+    except (ValueError, KeyError) as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/availability')
+def get_availability():
+    """API: Wyszukuje wolne okna czasowe w zakresie dat
+    
+    Parametry: `from`, `to` (włącznie), `duration` (minuty, 1-1440, domyślnie 60),
+    opcjonalnie `work_start`/`work_end` (HH:MM) i `weekdays` (np. 0,1,2,3,4).
+    """
+    try:
+        start_date = datetime.strptime(request.args['from'], '%Y-%m-%d').date()
+        end_date = datetime.strptime(request.args['to'], '%Y-%m-%d').date()
+        duration = request.args.get('duration', 60, type=int)
+        if end_date < start_date:
+            raise ValueError('Data końcowa jest wcześniejsza niż początkowa')
+        if (end_date - start_date).days >= AVAILABILITY_MAX_DAYS:
+            raise ValueError(f'Zakres nie może przekraczać {AVAILABILITY_MAX_DAYS} dni')
+        # Okna są wyznaczane w obrębie dnia - dłuższe nie istnieją
+        if not 1 <= duration <= MINUTES_PER_DAY:
+            raise ValueError(f'Długość okna musi mieć od 1 do {MINUTES_PER_DAY} minut')
+        
+        weekdays = None
+        if request.args.get('weekdays'):
+            weekdays = {int(day) for day in request.args['weekdays'].split(',')}
+        allowed = working_hours_mask(request.args.get('work_start', '00:00'),
+                                     request.args.get('work_end', '24:00'))
+        
+        # Cały zakres jednym zapytaniem (dzień wcześniej - wydarzenia po północy)
+        events = get_storage().get_events_between((start_date - timedelta(days=1)).isoformat(),
+                                                  (end_date + timedelta(days=1)).isoformat())
+        availability = build_availability(events, start_date, end_date)
+        
+        return jsonify([
+            {
+                'date': day.strftime('%Y-%m-%d'),
+                'start_time': minutes_to_time(start),
+                'end_time': minutes_to_time(end),
+                'duration': end - start
+            }
+            for day, start, end in availability.free_slots(duration, allowed, weekdays)
+        ])
+    except (ValueError, KeyError) as e:
+        return jsonify({'error': str(e)}), 400
+
+def _insert_events_batch(rows):
+    """Zapisuje porcję zwalidowanych wydarzeń - jedna transakcja"""
+    get_storage().add_events_bulk(rows)
+    month_cache.invalidate_spans(*{_date_span(row[0], row[6]) for row in rows})
+    _sync_changes()
+
+def _export_rows(start_date, end_date):
+    """Rekordy wydarzeń i wystąpień serii do eksportu
+    
+    Bez daty końcowej serie cykliczne są rozwijane EXPORT_RECURRING_DAYS dni naprzód.
+    """
+    recurring_end = None
+    if end_date == date.max:
+        recurring_end = (date.today() + timedelta(days=EXPORT_RECURRING_DAYS)).isoformat()
+    return get_storage().iter_events_between(start_date.isoformat(), end_date.isoformat(),
+                                             recurring_end=recurring_end)
+
+@app.route('/api/import', methods=['POST'])
+def import_events():
+    """API: Masowy import wydarzeń z treści żądania
+    
+    Format z parametru `format` (csv, ndjson, ics) lub z rozszerzenia `filename`.
+    Dane są czytane strumieniowo i zapisywane porcjami; błędne wiersze
+    trafiają do raportu i nie przerywają importu.
+    """
+    try:
+        fmt = request.args.get('format') or bulk_io.detect_format(request.args.get('filename', ''))
+        batch_size = request.args.get('batch_size', 1000, type=int)
+        lines = io.TextIOWrapper(request.stream, encoding='utf-8-sig', newline='')
+        report = bulk_io.import_stream(lines, fmt, _insert_events_batch, max(batch_size, 1))
+        return jsonify(report)
+    except (ValueError, KeyError) as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/export')
+def export_events():
+    """API: Strumieniowy eksport wydarzeń (csv, ndjson, ics), opcjonalnie `from`/`to`"""
+    try:
+        fmt = request.args.get('format', 'ndjson')
+        start_date = date.min
+        end_date = date.max
+        if request.args.get('from'):
+            start_date = datetime.strptime(request.args['from'], '%Y-%m-%d').date()
+        if request.args.get('to'):
+            end_date = datetime.strptime(request.args['to'], '%Y-%m-%d').date() + timedelta(days=1)
+        
+        chunks = bulk_io.export_stream(_export_rows(start_date, end_date), fmt)
+        return Response(stream_with_context(chunks), mimetype=bulk_io.MIMETYPES[fmt], headers={
+            'Content-Disposition': f'attachment; filename=kalendarz.{fmt}'
+        })
+    except (ValueError, KeyError) as e:
+        return jsonify({'error': str(e)}), 400
+
+def _search_series(query):
+    """Serie cykliczne pasujące do frazy - jeden wynik na serię
+    
+    Data wyniku to najbliższe wystąpienie (dla zakończonych serii - ostatnie).
+    """
+    results = []
+    for row in get_storage().search_recurring(query):
+        result = _series_to_dict(row)
+        shown_date = recurrence.next_occurrence(row[1], row[6], row[7])
+        if shown_date:
+            result['date'] = shown_date.strftime('%Y-%m-%d')
+        elif result['last_date']:
+            result['date'] = result['last_date']
+        results.append(result)
+    return results
+
+def _encode_cursor(event):
+    """Kursor stronicowania - pozycja (date, start_time, id) ostatniego wyniku"""
+    raw = json.dumps([event.date, event.start_time, event.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_cursor(cursor):
+    """Odczytuje pozycję zapisaną w kursorze (uszkodzony kursor - ValueError)"""
+    try:
+        date_str, start_time, event_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return date.fromisoformat(date_str).isoformat(), start_time, int(event_id)
+    except TypeError:
+        raise ValueError('Nieprawidłowy kursor')
+
+def _stream_search_results(query, cursor=None):
+    """Strumieniuje wyniki jako NDJSON - w pamięci jest tylko bieżąca porcja wierszy"""
+    after = _decode_cursor(cursor) if cursor else None
+    
+    def generate(after):
+        if not cursor:
+            for series in _search_series(query):
+                yield json.dumps(series, ensure_ascii=False) + '\n'
+        while True:
+            events = get_storage().search_events_page(query, after, SEARCH_STREAM_BATCH)
+            if events:
+                yield '\n'.join([record_json(event, ensure_ascii=False) for event in events]) + '\n'
+            if len(events) < SEARCH_STREAM_BATCH:
+                return
+            after = (events[-1].date, events[-1].start_time, events[-1].id)
+    
+    return Response(stream_with_context(generate(after)), mimetype='application/x-ndjson')
+
 @app.route('/api/search')
 def search_events():
-    """API: Wyszukuje wydarzenia"""
+    """API: Wyszukuje wydarzenia
+    
+    Parametry `limit`/`cursor` włączają stronicowanie po (date, start_time, id),
+    a `format=ndjson` strumieniuje wszystkie wyniki wiersz po wierszu. `offset`
+    pomija wyniki (skok do strony listy wirtualnej bez kursora), a `count=1`
+    dodaje `total` - liczbę pasujących wydarzeń bez serii.
+    """
     try:
         query = request.args.get('q', '')
+        cursor = request.args.get('cursor')
+        paginated = 'limit' in request.args or cursor is not None
+        
+        if request.args.get('format') == 'ndjson':
+            if not query:
+                return Response('', mimetype='application/x-ndjson')
+            return _stream_search_results(query, cursor)
+        
+        if paginated:
+            if not query:
+                return jsonify({'results': [], 'series': [], 'next_cursor': None})
+            limit = request.args.get('limit', SEARCH_PAGE_SIZE, type=int)
+            limit = min(max(limit, 1), SEARCH_MAX_PAGE_SIZE)
+            
+            offset = max(request.args.get('offset', 0, type=int), 0)
+            
+            # Pobierz jeden wiersz więcej, żeby wiedzieć czy jest następna strona
+            after = _decode_cursor(cursor) if cursor else None
+            events = get_storage().search_events_page(query, after, limit + 1, offset)
+            next_cursor = _encode_cursor(events[limit - 1]) if len(events) > limit else None
+            page = {
+                'results': records_json(events[:limit]),
+                # Serie cykliczne tylko na pierwszej stronie
+                'series': app.json.dumps([] if cursor or offset else _search_series(query)),
+                'next_cursor': app.json.dumps(next_cursor)
+            }
+            if request.args.get('count') == '1':
+                page['total'] = app.json.dumps(get_storage().count_search_results(query))
+            return _json_response(_json_object(page))
+        
         if not query:
             return jsonify([])
         
-        events = Event.query.filter(
-            db.or_(
-                Event.title.contains(query),
-                Event.description.contains(query)
-            )
-        ).order_by(Event.date, Event.start_time).all()
-        
-        return jsonify([event.to_dict() for event in events])
-    except Exception as e:
+        # FTS5: ranking bm25 i dopasowanie prefiksów, w przeciwnym razie LIKE
+        events = get_storage().search_single_events(query)
+        series = _search_series(query)
+        body = records_json(events)
+        if series:
+            body = body[:-1] + (',' if events else '') + app.json.dumps(series)[1:]
+        return _json_response(body)
+    except (ValueError, KeyError) as e:
         return jsonify({'error': str(e)}), 400
 
 def init_db():
-    """Inicjalizuje bazę danych"""
-    with app.app_context():
-        db.create_all()
-        print("Baza danych została zainicjalizowana")
+    """Inicjalizuje bazę danych
+        
+    Schemat, indeksy, FTS5 i dziennik zmian tworzy backend przy otwarciu;
+    dane z tabel poprzedniej wersji (event, recurring_event) są przenoszone.
+    """
+    get_storage()
+    print("Baza danych została zainicjalizowana")
+
+@app.cli.command('prune-changes')
+@click.option('--keep', default=10000, show_default=True, help='Liczba ostatnich wersji do zachowania')
+def prune_changes_command(keep):
+    """Przycina dziennik zmian używany przez /api/changes"""
+    init_db()
+    removed = get_storage().prune_changes(keep)
+    click.echo(f"Usunięto zmian: {removed}")
+
+@app.cli.command('migrate-db')
+def migrate_db_command():
+    """Wykonuje do końca oczekujące migracje schematu bazy (bez pracy w tle)"""
+    init_db()
+    storage = get_storage()
+    migrator = getattr(storage, 'migrator', None)
+    if migrator is None:
+        click.echo("Backend nie używa numerowanych migracji schematu")
+        return
+    migrator.stop()
+    storage.run_migrations(on_step=lambda migration: click.echo(f"  {migration.version}: {migration.description}"))
+    click.echo(f"Wersja schematu: {migrator.version()}")
+
+@app.cli.command('import-events')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(bulk_io.FORMATS), help='Format pliku (domyślnie z rozszerzenia)')
+@click.option('--batch-size', default=1000, show_default=True, help='Liczba wydarzeń na transakcję')
+def import_events_command(path, fmt, batch_size):
+    """Importuje wydarzenia z pliku CSV, NDJSON lub iCalendar"""
+    init_db()
+    with open(path, encoding='utf-8-sig', newline='') as source:
+        report = bulk_io.import_stream(source, fmt or bulk_io.detect_format(path),
+                                       _insert_events_batch, batch_size)
+    
+    click.echo(f"Zaimportowano: {report['imported']}, błędnych wierszy: {report['failed']}")
+    for error in report['errors']:
+        click.echo(f"  wiersz {error['row']}: {error['error']}", err=True)
+
+@app.cli.command('export-events')
+@click.argument('path', type=click.Path(dir_okay=False, writable=True))
+@click.option('--format', 'fmt', type=click.Choice(bulk_io.FORMATS), help='Format pliku (domyślnie z rozszerzenia)')
+def export_events_command(path, fmt):
+    """Eksportuje wszystkie wydarzenia do pliku CSV, NDJSON lub iCalendar"""
+    init_db()
+    with open(path, 'w', encoding='utf-8', newline='') as target:
+        for chunk in bulk_io.export_stream(_export_rows(date.min, date.max), fmt or bulk_io.detect_format(path)):
+            target.write(chunk)
+    click.echo(f"Wyeksportowano wydarzenia do {path}")
 
 if __name__ == "__main__":
     print("Uruchamianie Kalendarza-App (wersja web)...")
     print("Aplikacja kalendarza/planera w Flask")
     print("Dane są przechowywane lokalnie w bazie SQLite")
-    print("Dostępna na: http://localhost:5001")
+    print(f"Dostępna na: http://localhost:{Config.PORT}")
     print("=" * 50)
     
     # Inicjalizuj bazę danych
     init_db()
     
-    # Uruchom aplikację zmieni poort jezeli zajety 
-    app.run(debug=True, host='0.0.0.0', port=5001)
+    # Serwer deweloperski - w produkcji: gunicorn -c gunicorn.conf.py wsgi:application
+    app.run(debug=Config.DEBUG, host=Config.HOST, port=Config.PORT, threaded=True)
@@ -0,0 +1,345 @@
+"""
+Magazyn wydarzeń w pamięci procesu - backend Storage dla testów i benchmarków
+
+Wydarzenia są trzymane jako EventRecord w słowniku po id, a posortowane
+listy kluczy (date, start_time, id) i (start_utc, id) obsługują zapytania
+zakresowe i okna UTC wyszukiwaniem binarnym, a wydarzenia wielodniowe są
+dodatkowo w drzewie przedziałów. Sumy dni wydarzeń jednodniowych są
+poprawiane przy każdym zapisie (jak tabela daily_totals w SQLite).
+Dziennik zmian działa jak w SQLite (wersje, nagrobki, przycinanie),
+a transakcje wycofują zmiany z dziennika cofnięć.
+"""
+
+import bisect
+import threading
+from contextlib import contextmanager
+from itertools import count
+
+import change_log
+import recurrence
+import timezones
+from event_record import EventRecord, date_to_day
+from interval_index import MINUTES_PER_DAY, IntervalIndex
+from search_index import fold_text
+from storage import Storage, event_values, overlaps_window
+
+
+def _matches(search_term, *texts):
+    """Dopasowanie frazy jak LIKE '%fraza%' (bez względu na wielkość liter)"""
+    needle = fold_text(search_term).lower()
+    return any(needle in fold_text(text).lower() for text in texts)
+
+
+def _version(change):
+    return change[0]
+
+
+class MemoryStorage(Storage):
+    """Wydarzenia, serie i dziennik zmian w strukturach Pythona"""
+    
+    def __init__(self):
+        # Jedna blokada dla zapisu i odczytu - transakcja trzyma ją do końca
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._events = {}
+        self._keys = []
+        # id -> (start_utc, end_utc) i klucze (start_utc, id) okien UTC
+        self._utc = {}
+        self._utc_keys = []
+        # Wydarzenia wielodniowe w drzewie przedziałów (minuty bezwzględne)
+        self._multi_day = IntervalIndex()
+        # Sumy dni wydarzeń jednodniowych: data -> (liczba, minuty) i posortowane daty
+        self._daily = {}
+        self._daily_dates = []
+        self._series = {}
+        self._changes = []
+        self._event_ids = count(1)
+        self._series_ids = count(1)
+        self._version = 0
+    
+    def close(self):
+        pass
+    
+    @contextmanager
+    def transaction(self):
+        """Transakcja - przy wyjątku zmiany są cofane w odwrotnej kolejności"""
+        with self._lock:
+            undo = getattr(self._local, "undo", None)
+            if undo is not None:
+                yield self
+                return
+            self._local.undo = undo = []
+            try:
+                yield self
+            except BaseException:
+                for action in reversed(undo):
+                    action()
+                raise
+            finally:
+                self._local.undo = None
+    
+    def _on_rollback(self, action):
+        self._local.undo.append(action)
+    
+    def _log(self, kind, event_id, op, event_date=None, old_date=None, end_date=None, old_end_date=None):
+        """Dopisuje zmianę do dziennika (w trwającej transakcji)"""
+        self._version += 1
+        self._changes.append((self._version, kind, event_id, op, event_date, old_date, end_date, old_end_date))
+        
+        def undo():
+            self._changes.pop()
+            self._version -= 1
+        self._on_rollback(undo)
+    
+    # --- Wydarzenia ---
+    
+    def _put_event(self, event, utc):
+        self._events[event.id] = event
+        bisect.insort(self._keys, (event.date, event.start_time, event.id))
+        self._utc[event.id] = utc
+        bisect.insort(self._utc_keys, (utc[0], event.id))
+        if event.multi_day:
+            self._multi_day.add(event.id, *event.interval(), event)
+        else:
+            self._add_daily(event.date, 1, event.busy_minutes)
+    
+    def _pop_event(self, event_id):
+        """Usuwa wydarzenie; zwraca (EventRecord, (start_utc, end_utc))"""
+        event = self._events.pop(event_id)
+        del self._keys[bisect.bisect_left(self._keys, (event.date, event.start_time, event_id))]
+        utc = self._utc.pop(event_id)
+        del self._utc_keys[bisect.bisect_left(self._utc_keys, (utc[0], event_id))]
+        if event.multi_day:
+            self._multi_day.remove(event_id)
+        else:
+            self._add_daily(event.date, -1, -event.busy_minutes)
+        return event, utc
+    
+    def _add_daily(self, event_date, count, minutes):
+        """Zmienia sumę dnia o (count, minutes); dzień bez wydarzeń znika z sum"""
+        old_count, old_minutes = self._daily.get(event_date, (0, 0))
+        if old_count + count == 0:
+            del self._daily[event_date]
+            del self._daily_dates[bisect.bisect_left(self._daily_dates, event_date)]
+            return
+        if not old_count:
+            bisect.insort(self._daily_dates, event_date)
+        self._daily[event_date] = (old_count + count, old_minutes + minutes)
+    
+    def _store(self, event_id, values):
+        """Zapisuje wydarzenie z pól event_values"""
+        self._put_event(EventRecord.from_row(event_id, *values[:8]), values[8:10])
+    
+    def _insert_event(self, *event):
+        event_id = next(self._event_ids)
+        values = event_values(*event)
+        self._store(event_id, values)
+        self._log(change_log.KIND_EVENT, event_id, 'insert', values[0], end_date=values[6])
+        self._on_rollback(lambda: self._pop_event(event_id))
+        return event_id
+    
+    def add_event(self, event_date, start_time, end_time, title, description="", tz=None, end_date=None,
+                  all_day=False):
+        with self.transaction():
+            return self._insert_event(event_date, start_time, end_time, title, description, tz, end_date, all_day)
+    
+    def add_events_bulk(self, events):
+        with self.transaction():
+            for event in events:
+                self._insert_event(*event)
+        return len(events)
+    
+    def update_event(self, event_id, start_time, end_time, title, description, event_date=None, tz=None,
+                     end_date=None, all_day=False):
+        with self.transaction():
+            event = self._events.get(event_id)
+            if event is None:
+                return False
+            values = event_values(event_date or event.date, start_time, end_time, title, description,
+                                  tz or event.tz, end_date, all_day)
+            old = self._pop_event(event_id)
+            self._store(event_id, values)
+            self._log(change_log.KIND_EVENT, event_id, 'update', values[0], event.date, values[6], event.end_date)
+            
+            def undo():
+                self._pop_event(event_id)
+                self._put_event(*old)
+            self._on_rollback(undo)
+            return True
+    
+    def delete_event(self, event_id):
+        with self.transaction():
+            if event_id not in self._events:
+                return False
+            old = self._pop_event(event_id)
+            self._log(change_log.KIND_EVENT, event_id, 'delete', old_date=old[0].date, old_end_date=old[0].end_date)
+            self._on_rollback(lambda: self._put_event(*old))
+            return True
+    
+    def get_event_by_id(self, event_id):
+        with self._lock:
+            return self._events.get(event_id)
+    
+    def get_events_by_ids(self, event_ids):
+        with self._lock:
+            return [self._events[event_id] for event_id in set(event_ids) if event_id in self._events]
+    
+    def _iter_single_events(self, start_date, end_date, batch_size):
+        """Porcje wydarzeń z posortowanej listy kluczy (blokada tylko na czas porcji)"""
+        position = (start_date,)
+        while True:
+            with self._lock:
+                first = bisect.bisect_right(self._keys, position) if len(position) == 3 \
+                    else bisect.bisect_left(self._keys, position)
+                batch = []
+                for key in self._keys[first:first + batch_size]:
+                    if key[0] >= end_date:
+                        break
+                    batch.append(key)
+                events = [self._events[key[2]] for key in batch]
+            yield from events
+            if len(batch) < batch_size:
+                return
+            position = batch[-1]
+    
+    def _multi_day_events(self, start_date, end_date):
+        with self._lock:
+            found = self._multi_day.overlaps(date_to_day(start_date) * MINUTES_PER_DAY,
+                                             date_to_day(end_date) * MINUTES_PER_DAY)
+        return sorted((item[3] for item in found), key=lambda event: (event.day, event.start, event.id))
+    
+    def _single_day_totals(self, start_date, end_date):
+        with self._lock:
+            first = bisect.bisect_left(self._daily_dates, start_date)
+            last = bisect.bisect_left(self._daily_dates, end_date)
+            return {event_date: self._daily[event_date] for event_date in self._daily_dates[first:last]}
+    
+    def _single_events_in_window(self, window_start, window_end):
+        with self._lock:
+            first = bisect.bisect_left(self._utc_keys, (window_start - timezones.MAX_EVENT_MINUTES,))
+            last = bisect.bisect_left(self._utc_keys, (window_end,))
+            found = []
+            for start_utc, event_id in self._utc_keys[first:last]:
+                end_utc = self._utc[event_id][1]
+                if overlaps_window(start_utc, end_utc, window_start, window_end):
+                    found.append((start_utc, end_utc, self._events[event_id]))
+            return found
+    
+    def search_events_page(self, search_term, after=None, limit=None, offset=0):
+        with self._lock:
+            first = bisect.bisect_right(self._keys, tuple(after)) if after else 0
+            results = []
+            for _, _, event_id in self._keys[first:]:
+                if limit is not None and len(results) >= limit:
+                    break
+                event = self._events[event_id]
+                if _matches(search_term, event.title, event.description):
+                    if offset:
+                        offset -= 1
+                    else:
+                        results.append(event)
+            return results
+    
+    # --- Serie cykliczne ---
+    
+    def _put_series(self, recurrence_id, row):
+        """Zapisuje serię (date, start_time, end_time, title, description, rrule, exdates, last_date)"""
+        old = self._series.get(recurrence_id)
+        self._series[recurrence_id] = row
+        
+        def undo():
+            if old is None:
+                del self._series[recurrence_id]
+            else:
+                self._series[recurrence_id] = old
+        self._on_rollback(undo)
+        return old
+    
+    @staticmethod
+    def _series_row(event_date, start_time, end_time, title, description, rule, exdates):
+        last_date = recurrence.last_occurrence(event_date, rule)
+        return (event_date, start_time, end_time, title, description, str(rule), exdates,
+                last_date.strftime("%Y-%m-%d") if last_date else None)
+    
+    def add_recurring_event(self, event_date, start_time, end_time, title, description, rule, exdates=""):
+        with self.transaction():
+            recurrence_id = next(self._series_ids)
+            self._put_series(recurrence_id, self._series_row(event_date, start_time, end_time, title,
+                                                             description, rule, exdates))
+            self._log(change_log.KIND_SERIES, recurrence_id, 'insert', event_date)
+            return recurrence_id
+    
+    def update_recurring_event(self, recurrence_id, event_date, start_time, end_time, title,
+                               description, rule, exdates=""):
+        with self.transaction():
+            if recurrence_id not in self._series:
+                return False
+            old = self._put_series(recurrence_id, self._series_row(event_date, start_time, end_time, title,
+                                                                   description, rule, exdates))
+            self._log(change_log.KIND_SERIES, recurrence_id, 'update', event_date, old[0])
+            return True
+    
+    def delete_recurring_event(self, recurrence_id):
+        with self.transaction():
+            old = self._series.pop(recurrence_id, None)
+            if old is None:
+                return False
+            self._on_rollback(lambda: self._series.__setitem__(recurrence_id, old))
+            self._log(change_log.KIND_SERIES, recurrence_id, 'delete', old_date=old[0])
+            return True
+    
+    def get_recurring_event(self, recurrence_id):
+        with self._lock:
+            row = self._series.get(recurrence_id)
+            return (recurrence_id, *row[:7]) if row else None
+    
+    def add_recurrence_exception(self, recurrence_id, occurrence_date):
+        with self.transaction():
+            row = self._series.get(recurrence_id)
+            if row is None:
+                return False
+            exdates = recurrence.format_exdates(recurrence.parse_exdates(row[6]) | {occurrence_date})
+            self._put_series(recurrence_id, row[:6] + (exdates,) + row[7:])
+            self._log(change_log.KIND_SERIES, recurrence_id, 'update', row[0], row[0])
+            return True
+    
+    def get_recurring_between(self, start_date, end_date):
+        with self._lock:
+            return [(recurrence_id, *row[:7]) for recurrence_id, row in self._series.items()
+                    if row[0] < end_date and (row[7] is None or row[7] >= start_date)]
+    
+    def search_recurring(self, search_term):
+        with self._lock:
+            return sorted(((recurrence_id, *row) for recurrence_id, row in self._series.items()
+                           if _matches(search_term, row[3], row[4])),
+                          key=lambda row: (row[1], row[2]))
+    
+    # --- Dziennik zmian ---
+    
+    def get_changes_since(self, version, limit=change_log.CHANGES_PAGE_SIZE):
+        with self._lock:
+            oldest = self._changes[0][0] if self._changes else None
+            if change_log.needs_reset(version, self._version, oldest):
+                return change_log.reset_page(self._version)
+            first = bisect.bisect_right(self._changes, version, key=_version)
+            return change_log.build_page(self._changes[first:first + limit + 1], version, self._version, limit)
+    
+    def get_current_version(self):
+        return self._version
+    
+    def get_month_version(self, start_date, end_date, upto):
+        with self._lock:
+            last = bisect.bisect_right(self._changes, upto, key=_version)
+            changes = self._changes[:last]
+            touching = max((change[0] for change in changes if change[1] == change_log.KIND_EVENT
+                            and change_log.change_touches(change, start_date, end_date)), default=None)
+            series = max((change[0] for change in changes if change[1] == change_log.KIND_SERIES), default=None)
+            oldest = self._changes[0][0] if self._changes else None
+            return change_log.combine_month_version(touching, series, oldest, self._version, upto)
+    
+    def prune_changes(self, keep):
+        with self.transaction():
+            first = bisect.bisect_right(self._changes, self._version - keep, key=_version)
+            removed, self._changes = self._changes[:first], self._changes[first:]
+            self._on_rollback(lambda: self._changes.__setitem__(slice(0, 0), removed))
+            return len(removed)
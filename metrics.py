@@ -0,0 +1,339 @@
+"""
+Metryki aplikacji w formacie tekstowym Prometheusa i profilowanie żądań
+Używane przez main.py (/metrics), gdy KALENDARZ_METRICS=1 lub KALENDARZ_PROFILING=1
+
+Liczniki i histogramy są trzymane w pamięci procesu - przy kilku workerach
+gunicorna każdy ma własne, a Prometheus widzi proces, który obsłużył
+pobranie /metrics (etykieta instance/pid po stronie scrapera). Wartości
+zależne od stanu (połączenia, cache) są odczytywane dopiero przy pobraniu.
+
+Bez włączenia metryk nic z tego modułu nie działa na ścieżce żądania:
+main.py nie rejestruje hooków, a magazyn nie jest opakowywany.
+"""
+
+import cProfile
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Iterator
+
+# Progi histogramów (s) czasu żądań i operacji magazynu
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Progi histogramu liczby wierszy zwróconych przez operację magazynu
+ROW_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000)
+
+# Operacje magazynu, które nie są zapytaniami (kontekst transakcji, zamknięcie, metryki)
+UNTIMED_OPERATIONS = frozenset({"transaction", "close", "connection_stats", "trace_statements"})
+# Etykieta instrukcji SQL wykonanych poza wywołaniem operacji magazynu (migracje w tle, porcje wyników leniwych)
+OTHER_OPERATION = "other"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Operacja magazynu wykonywana w bieżącym wątku - etykieta instrukcji SQL
+_current = threading.local()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Licznik rosnący z etykietami (wartości etykiet jako krotka)"""
+    
+    kind = "counter"
+    
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values = {}
+        self._lock = threading.Lock()
+    
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+    
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.label_names, labels)} {_number(value)}" for labels, value in values]
+
+
+class Histogram:
+    """Histogram z progami skumulowanymi przy eksporcie (kubełki trzymane osobno)"""
+    
+    kind = "histogram"
+    
+    def __init__(self, name, help_text, label_names=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = tuple(buckets)
+        # Etykiety -> [liczności kubełków (ostatni +Inf), suma, liczba]
+        self._series = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, labels, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+    
+    def samples(self):
+        with self._lock:
+            series = sorted((labels, (list(counts), total, count))
+                            for labels, (counts, total, count) in self._series.items())
+        lines = []
+        for labels, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {count}")
+        return lines
+
+
+class Collected:
+    """Metryka liczona przy pobraniu /metrics - callback zwraca {krotka etykiet: wartość}"""
+    
+    def __init__(self, name, kind, help_text, label_names, callback):
+        self.name = name
+        self.kind = kind
+        self.help_text = help_text
+        self.label_names = label_names
+        self.callback = callback
+    
+    def samples(self):
+        return [f"{self.name}{_labels(self.label_names, labels)} {_number(value)}"
+                for labels, value in sorted(self.callback().items())]
+
+
+class Registry:
+    """Zbiór metryk eksportowany w formacie tekstowym Prometheusa"""
+    
+    def __init__(self):
+        self._metrics = []
+    
+    def counter(self, name, help_text, label_names=()):
+        return self._add(Counter(name, help_text, label_names))
+    
+    def histogram(self, name, help_text, label_names=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(name, help_text, label_names, buckets))
+    
+    def collect(self, name, kind, help_text, label_names, callback):
+        """Rejestruje metrykę (gauge/counter) odczytywaną z callbacku przy eksporcie"""
+        return self._add(Collected(name, kind, help_text, label_names, callback))
+    
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+    
+    def render(self):
+        """Wszystkie metryki jako tekst w formacie ekspozycji Prometheusa"""
+        lines = []
+        for metric in self._metrics:
+            samples = metric.samples()
+            if not samples:
+                continue
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+class AppMetrics:
+    """Metryki żądań HTTP, operacji magazynu i instrukcji SQL aplikacji webowej"""
+    
+    def __init__(self):
+        self.registry = Registry()
+        self.request_seconds = self.registry.histogram(
+            "kalendarz_http_request_duration_seconds", "Czas obsługi żądania HTTP", ("method", "route"))
+        self.requests = self.registry.counter(
+            "kalendarz_http_requests_total", "Żądania HTTP według trasy i kodu odpowiedzi",
+            ("method", "route", "status"))
+        self.in_progress = 0
+        self._in_progress_lock = threading.Lock()
+        self.registry.collect("kalendarz_http_requests_in_progress", "gauge",
+                              "Żądania w toku (także otwarte strumienie SSE)", (),
+                              lambda: {(): self.in_progress})
+        self.query_seconds = self.registry.histogram(
+            "kalendarz_storage_query_duration_seconds", "Czas operacji magazynu wydarzeń", ("operation",))
+        self.query_rows = self.registry.histogram(
+            "kalendarz_storage_query_rows", "Liczba wierszy zwróconych przez operację magazynu", ("operation",),
+            buckets=ROW_BUCKETS)
+        self.query_errors = self.registry.counter(
+            "kalendarz_storage_query_errors_total", "Operacje magazynu zakończone wyjątkiem", ("operation",))
+        self.sql_statements = self.registry.counter(
+            "kalendarz_sql_statements_total", "Instrukcje SQL wysłane do bazy według operacji magazynu",
+            ("operation",))
+    
+    def request_started(self):
+        with self._in_progress_lock:
+            self.in_progress += 1
+    
+    def request_finished(self):
+        with self._in_progress_lock:
+            self.in_progress -= 1
+    
+    def observe_request(self, method, route, status, seconds):
+        self.request_seconds.observe((method, route), seconds)
+        self.requests.inc((method, route, str(status)))
+    
+    def observe_query(self, operation, seconds, rows):
+        self.query_seconds.observe((operation,), seconds)
+        self.query_rows.observe((operation,), rows)
+    
+    def count_statement(self, sql):
+        """Callback instrukcji SQL (Storage.trace_statements) - instrukcje triggerów są pomijane"""
+        if not sql.startswith("--"):
+            self.sql_statements.inc((getattr(_current, "operation", None) or OTHER_OPERATION,))
+    
+    def collect_storage(self, storage):
+        """Połączenia z bazą magazynu odczytywane przy eksporcie"""
+        self.registry.collect(
+            "kalendarz_db_connections", "gauge", "Połączenia z bazą danych według stanu", ("state",),
+            lambda: {(state,): value for state, value in storage.connection_stats().items() if state != "opened"})
+        self.registry.collect(
+            "kalendarz_db_connections_opened_total", "counter", "Połączenia z bazą otwarte od startu procesu", (),
+            lambda: {(): stats["opened"]} if "opened" in (stats := storage.connection_stats()) else {})
+    
+    def collect_caches(self, callback):
+        """Trafienia i chybienia cache - callback zwraca {nazwa: (trafienia, chybienia)}"""
+        self.registry.collect(
+            "kalendarz_cache_requests_total", "counter", "Odwołania do cache według wyniku", ("cache", "result"),
+            lambda: {(name, result): value for name, counts in callback().items()
+                     for result, value in zip(("hit", "miss"), counts)})
+        self.registry.collect(
+            "kalendarz_cache_hit_ratio", "gauge", "Udział trafień w odwołaniach do cache od startu procesu",
+            ("cache",),
+            lambda: {(name,): hits / (hits + misses) for name, (hits, misses) in callback().items()
+                     if hits + misses})
+    
+    def render(self):
+        return self.registry.render()
+
+
+def _row_count(result):
+    """Liczba wierszy wyniku operacji magazynu (pojedynczy wiersz, id albo flaga - 1, brak - 0)"""
+    if result is None:
+        return 0
+    if isinstance(result, (list, dict, set, frozenset)):
+        return len(result)
+    return 1
+
+
+class InstrumentedStorage:
+    """Magazyn (storage.Storage) mierzący czas i liczbę wierszy każdej publicznej operacji
+    
+    Pośrednik przekazuje atrybuty do magazynu; metody są opakowywane przy
+    pierwszym użyciu. Wynik leniwy (generator) jest liczony przy odbieraniu,
+    a czas to czas do jego wyczerpania - razem z przetwarzaniem wierszy przez
+    wywołującego (pomiar każdego wiersza kosztowałby więcej niż samo
+    zapytanie). Instrukcje SQL wykonane w trakcie wywołania są liczone z nazwą
+    operacji, późniejsze porcje wyniku leniwego - jako 'other'.
+    """
+    
+    def __init__(self, storage, metrics):
+        self._storage = storage
+        self._metrics = metrics
+        self._wrapped = {}
+        storage.trace_statements(metrics.count_statement)
+        metrics.collect_storage(storage)
+    
+    def __getattr__(self, name):
+        attribute = getattr(self._storage, name)
+        if name.startswith("_") or name in UNTIMED_OPERATIONS or not callable(attribute):
+            return attribute
+        wrapped = self._wrapped.get(name)
+        if wrapped is None:
+            wrapped = self._wrapped[name] = self._timed(name, attribute)
+        return wrapped
+    
+    def _timed(self, name, method):
+        metrics = self._metrics
+        
+        def timed(*args, **kwargs):
+            previous = getattr(_current, "operation", None)
+            _current.operation = name
+            start = time.perf_counter()
+            try:
+                result = method(*args, **kwargs)
+            except Exception:
+                metrics.query_errors.inc((name,))
+                raise
+            finally:
+                _current.operation = previous
+            if isinstance(result, Iterator):
+                return self._counted(name, result, start)
+            metrics.observe_query(name, time.perf_counter() - start, _row_count(result))
+            return result
+        return timed
+    
+    def _counted(self, name, iterator, start):
+        """Przekazuje wiersze wyniku leniwego; pomiar od wywołania do wyczerpania lub zamknięcia"""
+        rows = 0
+        try:
+            for item in iterator:
+                rows += 1
+                yield item
+        finally:
+            self._metrics.observe_query(name, time.perf_counter() - start, rows)
+
+
+class RequestProfiler:
+    """Profilowanie pojedynczych żądań cProfile - zapis .prof do katalogu
+    
+    Naraz profilowane jest jedno żądanie: profiler Pythona 3.12+ jest jeden
+    na proces, więc równoległe żądanie z nagłówkiem dostaje tylko oznaczenie
+    'busy'. Plik można obejrzeć przez `python -m pstats` albo snakeviz.
+    """
+    
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+    
+    def start(self):
+        """Włącza profiler dla bieżącego żądania; None, gdy profilowane jest inne"""
+        if not self._lock.acquire(blocking=False):
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Inne narzędzie (np. debugger) używa już profilera
+            self._lock.release()
+            return None
+        return profiler
+    
+    def stop(self, profiler, method, route):
+        """Wyłącza profiler i zapisuje wynik; zwraca nazwę pliku"""
+        try:
+            profiler.disable()
+            os.makedirs(self.directory, exist_ok=True)
+            slug = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+            filename = f"{time.strftime('%Y%m%d-%H%M%S')}-{time.time_ns() % 1000000:06d}-{method}-{slug}.prof"
+            profiler.dump_stats(os.path.join(self.directory, filename))
+            return filename
+        finally:
+            self._lock.release()
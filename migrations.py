@@ -0,0 +1,138 @@
+"""
+Wersjonowane migracje schematu SQLite
+
+Numer wersji schematu jest trzymany w nagłówku bazy (PRAGMA user_version)
+i zmieniany w tej samej transakcji co krok migracji - przerwana migracja
+jest wznawiana od ostatniego zatwierdzonego kroku.
+
+Krok może mieć część wykonywaną porcjami (backfill): każda porcja to
+osobna, krótka transakcja, a między porcjami inne połączenia mogą
+zapisywać. Dzięki temu przebudowa danych dużej bazy działa w tle, bez
+zatrzymywania aplikacji; wersja jest podnoszona dopiero po ostatniej
+porcji (finish).
+"""
+
+import threading
+import time
+
+# Wiersze przetwarzane w jednej transakcji i najkrótsza przerwa między porcjami (s)
+CHUNK_SIZE = 1000
+CHUNK_PAUSE = 0.005
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def set_schema_version(conn, version):
+    conn.execute(f"PRAGMA user_version = {int(version)}")
+
+
+class Migration:
+    """Krok migracji do wersji version
+    
+    apply(conn) - zmiana schematu w jednej transakcji;
+    backfill(conn, position, limit) - jedna porcja danych od pozycji position
+    (None na początku), zwraca pozycję następnej porcji albo None na końcu;
+    finish(conn) - po ostatniej porcji, w transakcji podnoszącej wersję.
+    """
+    
+    def __init__(self, version, description, apply=None, backfill=None, finish=None):
+        self.version = version
+        self.description = description
+        self.apply = apply
+        self.backfill = backfill
+        self.finish = finish
+    
+    def __repr__(self):
+        return f"Migration({self.version}, {self.description!r})"
+
+
+class Migrator:
+    """Wykonuje oczekujące migracje na bazie obsługiwanej przez pulę połączeń"""
+    
+    def __init__(self, pool, migrations, chunk_size=CHUNK_SIZE, chunk_pause=CHUNK_PAUSE):
+        self.pool = pool
+        self.migrations = sorted(migrations, key=lambda migration: migration.version)
+        self.chunk_size = chunk_size
+        self.chunk_pause = chunk_pause
+        self._stop = threading.Event()
+        self._thread = None
+    
+    @property
+    def latest_version(self):
+        return self.migrations[-1].version if self.migrations else 0
+    
+    def version(self):
+        return schema_version(self.pool.get_connection())
+    
+    def pending(self):
+        version = self.version()
+        return [migration for migration in self.migrations if migration.version > version]
+    
+    def _step(self, migration, chunks=None):
+        """Wykonuje krok (najwyżej chunks porcji); zwraca True, jeśli krok zakończono"""
+        done = 0
+        position = None
+        elapsed = 0
+        while migration.backfill is not None:
+            if chunks is not None and done >= chunks or self._stop.is_set():
+                return False
+            if done:
+                # Przerwa nie krótsza niż porcja - zapisy aplikacji czekające
+                # na blokadę (busy_timeout) mają czas ją przejąć
+                time.sleep(max(self.chunk_pause, elapsed))
+            started = time.perf_counter()
+            with self.pool.transaction() as conn:
+                if schema_version(conn) >= migration.version:
+                    return True
+                position = migration.backfill(conn, position, self.chunk_size)
+            elapsed = time.perf_counter() - started
+            done += 1
+            if position is None:
+                break
+        
+        with self.pool.transaction() as conn:
+            # Inny proces mógł zakończyć ten krok w międzyczasie
+            if schema_version(conn) >= migration.version:
+                return True
+            if migration.apply is not None:
+                migration.apply(conn)
+            if migration.finish is not None:
+                migration.finish(conn)
+            set_schema_version(conn, migration.version)
+        return True
+    
+    def run(self, chunks=None, on_step=None):
+        """Wykonuje oczekujące kroki po kolei
+        
+        chunks ogranicza liczbę porcji w kroku z backfill - przy przekroczeniu
+        zwraca False (reszta do wykonania później, np. w tle).
+        """
+        for migration in self.pending():
+            if not self._step(migration, chunks):
+                return False
+            if on_step is not None:
+                on_step(migration)
+        return True
+    
+    def run_in_background(self, on_step=None):
+        """Dokańcza migracje w wątku w tle (porcjami, między zapisami aplikacji)"""
+        if self._thread is not None and self._thread.is_alive():
+            return self._thread
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, kwargs={"on_step": on_step},
+                                        name="schema-migration", daemon=True)
+        self._thread.start()
+        return self._thread
+    
+    def stop(self):
+        """Przerywa migrację w tle po bieżącej porcji (zostanie wznowiona przy następnym starcie)
+        
+        Po zatrzymaniu wątku run() znów wykonuje migracje - np. do końca, bez tła.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._stop.clear()
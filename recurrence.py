@@ -0,0 +1,227 @@
+"""
+Wydarzenia cykliczne - reguły powtarzania w stylu RRULE (RFC 5545)
+
+Reguła jest zapisywana raz (FREQ=DAILY|WEEKLY|MONTHLY, INTERVAL, UNTIL
+albo COUNT, dla tygodni także BYDAY) razem z listą dat wyjątków. Wystąpienia
+są rozwijane leniwie przez generator i tylko dla okna dat, o które pyta
+zapytanie; rozwinięcia są zapamiętywane dla pary (reguła, okno).
+"""
+
+import heapq
+from datetime import date, timedelta
+from functools import lru_cache
+
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY")
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+
+# Liczba zapamiętanych rozwinięć (reguła, okno)
+EXPANSION_CACHE_SIZE = 4096
+
+
+def _to_date(value):
+    """Przyjmuje date lub tekst 'YYYY-MM-DD' / 'YYYYMMDD'"""
+    if value is None or isinstance(value, date):
+        return value
+    value = value.strip()
+    if len(value) == 8 and value.isdigit():
+        value = f"{value[:4]}-{value[4:6]}-{value[6:]}"
+    return date.fromisoformat(value)
+
+
+class RecurrenceRule:
+    """Reguła powtarzania: częstotliwość, interwał i koniec (UNTIL lub COUNT)"""
+    
+    def __init__(self, freq, interval=1, until=None, count=None, byday=None):
+        freq = str(freq).upper()
+        if freq not in FREQUENCIES:
+            raise ValueError(f"Nieobsługiwana częstotliwość powtarzania: {freq}")
+        try:
+            interval = int(interval)
+            until = _to_date(until)
+            count = None if count is None else int(count)
+            byday = tuple(sorted({WEEKDAYS.index(day.upper()) for day in byday})) if byday else ()
+        except ValueError:
+            raise ValueError("Nieprawidłowa wartość INTERVAL, UNTIL, COUNT lub BYDAY")
+        if interval < 1:
+            raise ValueError("Interwał powtarzania musi być dodatni")
+        if until is not None and count is not None:
+            raise ValueError("Reguła może mieć UNTIL albo COUNT, nie oba")
+        if count is not None and count < 1:
+            raise ValueError("COUNT musi być dodatni")
+        if byday and freq != "WEEKLY":
+            raise ValueError("BYDAY jest obsługiwane tylko dla FREQ=WEEKLY")
+        
+        self.freq = freq
+        self.interval = interval
+        self.until = until
+        self.count = count
+        self.byday = byday
+    
+    @classmethod
+    def parse(cls, text):
+        """Odczytuje regułę z tekstu 'FREQ=WEEKLY;INTERVAL=2;UNTIL=20251231'"""
+        if isinstance(text, cls):
+            return text
+        parts = {}
+        for part in str(text).strip().removeprefix("RRULE:").split(";"):
+            if not part:
+                continue
+            name, separator, value = part.partition("=")
+            if not separator:
+                raise ValueError(f"Nieprawidłowa reguła powtarzania: {text}")
+            parts[name.strip().upper()] = value.strip()
+        if "FREQ" not in parts:
+            raise ValueError("Reguła powtarzania wymaga FREQ")
+        return cls(parts["FREQ"], parts.get("INTERVAL", 1), parts.get("UNTIL"), parts.get("COUNT"),
+                   [day for day in parts.get("BYDAY", "").split(",") if day])
+    
+    def __str__(self):
+        text = f"FREQ={self.freq}"
+        if self.interval != 1:
+            text += f";INTERVAL={self.interval}"
+        if self.byday:
+            text += ";BYDAY=" + ",".join(WEEKDAYS[day] for day in self.byday)
+        if self.until:
+            text += f";UNTIL={self.until.strftime('%Y%m%d')}"
+        if self.count:
+            text += f";COUNT={self.count}"
+        return text
+    
+    def _first_period(self, first_date, start):
+        """Numer pierwszego okresu, który może zawierać daty >= start"""
+        if start is None or start <= first_date:
+            return 0
+        if self.freq == "DAILY":
+            return (start - first_date).days // self.interval
+        if self.freq == "WEEKLY":
+            week_start = first_date - timedelta(days=first_date.weekday())
+            return (start - week_start).days // 7 // self.interval
+        months = (start.year - first_date.year) * 12 + start.month - first_date.month
+        return months // self.interval
+    
+    def _period(self, first_date, number):
+        """(początek okresu, daty kandydatów) dla okresu o danym numerze"""
+        if self.freq == "DAILY":
+            day = first_date + timedelta(days=number * self.interval)
+            return day, (day,)
+        if self.freq == "WEEKLY":
+            week_start = first_date - timedelta(days=first_date.weekday()) + timedelta(weeks=number * self.interval)
+            weekdays = self.byday or (first_date.weekday(),)
+            return week_start, tuple(week_start + timedelta(days=day) for day in weekdays)
+        month_index = first_date.month - 1 + number * self.interval
+        year, month = first_date.year + month_index // 12, month_index % 12 + 1
+        try:
+            # Miesiące bez tego dnia (np. 31.) są pomijane, jak w RFC 5545
+            return date(year, month, 1), (date(year, month, first_date.day),)
+        except ValueError:
+            return date(year, month, 1), ()
+
+
+def iter_occurrences(first_date, rule, start=None, end=None):
+    """Generator dat wystąpień reguły z okna [start, end) (bez wyjątków)
+    
+    Bez COUNT generator zaczyna od okresu zawierającego start, więc
+    koszt zależy od okna, a nie od tego, jak dawno zaczęła się seria.
+    Reguła bez końca i bez end daje generator nieskończony.
+    """
+    first_date = _to_date(first_date)
+    rule = RecurrenceRule.parse(rule)
+    start, end = _to_date(start), _to_date(end)
+    
+    # COUNT liczy wystąpienia od początku serii - wtedy nie można przeskoczyć
+    number = 0 if rule.count else rule._first_period(first_date, start)
+    produced = 0
+    while True:
+        period_start, candidates = rule._period(first_date, number)
+        if (end and period_start >= end) or (rule.until and period_start > rule.until):
+            return
+        for day in candidates:
+            if day < first_date:
+                continue
+            if (rule.until and day > rule.until) or (end and day >= end):
+                return
+            produced += 1
+            if start is None or day >= start:
+                yield day
+            if rule.count and produced >= rule.count:
+                return
+        number += 1
+
+
+def last_occurrence(first_date, rule):
+    """Data ostatniego możliwego wystąpienia lub None dla serii bez końca"""
+    rule = RecurrenceRule.parse(rule)
+    if rule.until:
+        return rule.until
+    if rule.count:
+        last = None
+        for last in iter_occurrences(first_date, rule):
+            pass
+        return last
+    return None
+
+
+def parse_exdates(text):
+    """Zbiór dat wyjątków z tekstu 'YYYY-MM-DD,YYYY-MM-DD'"""
+    return frozenset(_to_date(day) for day in (text or "").split(",") if day.strip())
+
+
+def format_exdates(dates):
+    return ",".join(sorted({_to_date(day).isoformat() for day in dates}))
+
+
+@lru_cache(maxsize=EXPANSION_CACHE_SIZE)
+def expand(first_date, rule_text, exdates_text, start, end):
+    """Daty wystąpień w oknie [start, end) z pominięciem wyjątków
+    
+    Wynik jest zapamiętywany dla (reguła, okno) - klucz zawiera treść
+    reguły i wyjątków, więc edycja serii nie wymaga unieważniania.
+    """
+    skipped = parse_exdates(exdates_text)
+    return tuple(day for day in iter_occurrences(first_date, rule_text, start, end) if day not in skipped)
+
+
+def series_id(recurrence_id):
+    """Identyfikator serii w odpowiedziach ('r<id>')"""
+    return f"r{recurrence_id}"
+
+
+def occurrence_id(recurrence_id, occurrence_date):
+    """Identyfikator pojedynczego wystąpienia ('r<id>:YYYY-MM-DD')"""
+    return f"r{recurrence_id}:{_to_date(occurrence_date).isoformat()}"
+
+
+def parse_occurrence_id(value):
+    """(id serii, data wystąpienia lub None) albo None dla zwykłego wydarzenia"""
+    if not isinstance(value, str) or not value.startswith("r"):
+        return None
+    recurrence_id, _, occurrence_date = value[1:].partition(":")
+    try:
+        return int(recurrence_id), _to_date(occurrence_date) if occurrence_date else None
+    except ValueError:
+        return None
+
+
+def occurrences(series, start, end):
+    """Wystąpienia serii z okna [start, end) w kolejności (data, godzina)
+    
+    series to wiersze (id, date, start_time, end_time, title, description,
+    rrule, exdates). Zwraca generator wierszy (date, id wystąpienia,
+    start_time, end_time, title, description) z datą jako obiektem date.
+    """
+    start, end = _to_date(start), _to_date(end)
+    
+    def expand_series(recurrence_id, first_date, start_time, end_time, title, description, rule_text, exdates):
+        for day in expand(_to_date(first_date), rule_text, exdates or "", start, end):
+            yield day, occurrence_id(recurrence_id, day), start_time, end_time, title, description
+    
+    return heapq.merge(*(expand_series(*row) for row in series), key=lambda row: (row[0], row[2]))
+
+
+def next_occurrence(first_date, rule_text, exdates_text="", after=None):
+    """Pierwsze wystąpienie w dniu after lub później (domyślnie od dziś)"""
+    skipped = parse_exdates(exdates_text)
+    for day in iter_occurrences(first_date, rule_text, after or date.today()):
+        if day not in skipped:
+            return day
+    return None
@@ -0,0 +1,127 @@
+"""
+Cache odpowiedzi widoku miesiąca (LRU) z wersjonowaniem miesięcy
+
+Każdy miesiąc ma licznik wersji zwiększany przy każdej zmianie wydarzeń
+w tym miesiącu - odpowiedź policzona przed zmianą nie trafia do cache.
+ETag miesiąca to wersja ostatniej zmiany dotyczącej tego miesiąca
+odczytana z dziennika zmian w bazie - taka sama we wszystkich procesach
+serwera i zmieniana tylko przez zapisy w tym miesiącu - więc klient
+z aktualną kopią dostaje 304 niezależnie od tego, który worker obsłuży
+żądanie. Cache pamięta ją do unieważnienia miesiąca.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class MonthCache:
+    """Cache LRU zserializowanych odpowiedzi kluczowany (rok, miesiąc)"""
+    
+    def __init__(self, max_size=128):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._versions = {}
+        # Wersje dziennika zmian miesięcy (ETagi) odczytane z bazy
+        self._change_versions = {}
+        self._lock = threading.Lock()
+        # Zwiększana przy clear() - unieważnia wszystkie miesiące naraz
+        self._epoch = 0
+        
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.invalidations = 0
+    
+    def version(self, key):
+        """Bieżąca wersja miesiąca"""
+        return (self._epoch, self._versions.get(key, 0))
+    
+    def etag(self, key):
+        """ETag miesiąca z zapamiętanej wersji dziennika zmian albo None (trzeba ją odczytać)"""
+        change_version = self._change_versions.get(key)
+        return None if change_version is None else self._format_etag(key, change_version)
+    
+    def set_change_version(self, key, change_version):
+        """Zapamiętuje wersję ostatniej zmiany miesiąca (do unieważnienia) i zwraca ETag"""
+        with self._lock:
+            self._change_versions[key] = change_version
+        return self._format_etag(key, change_version)
+    
+    @staticmethod
+    def _format_etag(key, change_version):
+        year, month = key
+        return f"{change_version}-{year:04d}-{month:02d}"
+    
+    def get(self, key):
+        """Zwraca zapisaną odpowiedź dla bieżącej wersji lub None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+    
+    def put(self, key, body, version):
+        """Zapisuje odpowiedź policzoną dla danej wersji
+        
+        Jeśli w międzyczasie miesiąc został unieważniony, odpowiedź jest
+        nieaktualna i nie trafia do cache.
+        """
+        with self._lock:
+            if (self._epoch, self._versions.get(key, 0)) != version:
+                return
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def record_not_modified(self):
+        with self._lock:
+            self.not_modified += 1
+    
+    def invalidate(self, *keys):
+        """Unieważnia podane miesiące (zapis przez cache)"""
+        with self._lock:
+            for key in set(keys):
+                self._versions[key] = self._versions.get(key, 0) + 1
+                self._entries.pop(key, None)
+                self._change_versions.pop(key, None)
+                self.invalidations += 1
+    
+    def invalidate_dates(self, *dates):
+        """Unieważnia miesiące, do których należą podane daty"""
+        self.invalidate(*((day.year, day.month) for day in dates))
+    
+    def invalidate_spans(self, *spans):
+        """Unieważnia miesiące przedziałów dat (pierwszy, ostatni dzień - włącznie)
+        
+        Wydarzenie wielodniowe zmienia widok każdego miesiąca, przez który trwa.
+        """
+        months = set()
+        for first, last in spans:
+            months.update(range(first.year * 12 + first.month - 1, last.year * 12 + last.month))
+        self.invalidate(*((month // 12, month % 12 + 1) for month in months))
+    
+    def clear(self):
+        """Unieważnia wszystkie miesiące"""
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+            self._change_versions.clear()
+            self.invalidations += 1
+    
+    def stats(self):
+        """Liczniki trafień i chybień"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'not_modified': self.not_modified,
+                'invalidations': self.invalidations,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,139 @@
+"""
+Indeks pełnotekstowy wydarzeń oparty o SQLite FTS5
+Używany przez DatabaseManager (tabele events i recurring_events)
+"""
+
+import re
+
+# unicode61 z remove_diacritics 2 sprowadza ą, ć, ę, ń, ó, ś, ź, ż do liter
+# bazowych i ignoruje wielkość liter. Litera ł nie ma rozkładu Unicode,
+# dlatego jest zamieniana na l jawnie - zarówno w indeksie, jak i w zapytaniu.
+FTS_TOKENIZER = "unicode61 remove_diacritics 2"
+
+# Wagi bm25 dla kolumn (title, description) - trafienie w tytule ważniejsze
+BM25_WEIGHTS = (5.0, 1.0)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _fold_sql(expr):
+    """Wyrażenie SQL zamieniające ł/Ł na l/L"""
+    return f"replace(replace(coalesce({expr}, ''), 'ł', 'l'), 'Ł', 'L')"
+
+
+def fold_text(text):
+    """Odpowiednik _fold_sql po stronie Pythona"""
+    return (text or "").replace("ł", "l").replace("Ł", "L")
+
+
+def fts_table_name(table):
+    """Nazwa tabeli FTS dla tabeli wydarzeń"""
+    return f"{table}_fts"
+
+
+def fts5_available(conn):
+    """Sprawdza czy SQLite został skompilowany z FTS5"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("CREATE VIRTUAL TABLE temp._fts5_probe USING fts5(x)")
+        cursor.execute("DROP TABLE temp._fts5_probe")
+        return True
+    except Exception:
+        return False
+
+
+def has_fts(conn, table):
+    """Czy tabela FTS dla tabeli wydarzeń już istnieje"""
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                        (fts_table_name(table),)).fetchone() is not None
+
+
+def install_fts(conn, table, fill=True):
+    """Tworzy tabelę FTS5 i triggery synchronizujące ją z tabelą wydarzeń
+    
+    Zwraca False, jeśli FTS5 jest niedostępne - wtedy wyszukiwanie
+    korzysta z LIKE. Przy pierwszym utworzeniu indeks jest wypełniany
+    istniejącymi wydarzeniami; z fill=False zostaje pusty (wypełnia go
+    porcjami fill_fts).
+    """
+    if not fts5_available(conn):
+        return False
+    
+    fts = fts_table_name(table)
+    cursor = conn.cursor()
+    exists = has_fts(conn, table)
+    
+    cursor.execute(f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS {fts}
+        USING fts5(title, description, tokenize = '{FTS_TOKENIZER}')
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts} (rowid, title, description)
+            VALUES (new.id, {_fold_sql("new.title")}, {_fold_sql("new.description")});
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN
+            DELETE FROM {fts} WHERE rowid = old.id;
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF title, description ON {table} BEGIN
+            DELETE FROM {fts} WHERE rowid = old.id;
+            INSERT INTO {fts} (rowid, title, description)
+            VALUES (new.id, {_fold_sql("new.title")}, {_fold_sql("new.description")});
+        END
+    ''')
+    
+    if not exists and fill:
+        cursor.execute(f'''
+            INSERT INTO {fts} (rowid, title, description)
+            SELECT id, {_fold_sql("title")}, {_fold_sql("description")} FROM {table}
+        ''')
+    return True
+
+
+def fill_fts(conn, table, first_id, last_id):
+    """Dopisuje do indeksu wiersze z zakresu id [first_id, last_id], których jeszcze w nim nie ma
+    
+    Wiersze zmienione po utworzeniu indeksu dopisały już triggery.
+    """
+    fts = fts_table_name(table)
+    conn.execute(f'''
+        INSERT INTO {fts} (rowid, title, description)
+        SELECT id, {_fold_sql("title")}, {_fold_sql("description")} FROM {table}
+        WHERE id BETWEEN ?1 AND ?2 AND id NOT IN (SELECT rowid FROM {fts} WHERE rowid BETWEEN ?1 AND ?2)
+    ''', (first_id, last_id))
+
+
+def build_match_query(search_term):
+    """Buduje zapytanie MATCH z prefiksami dla wyszukiwania w trakcie pisania
+    
+    "spotk zarz" -> '"spotk"* "zarz"*' (wszystkie słowa muszą wystąpić).
+    Zwraca None, jeśli fraza nie zawiera żadnego słowa.
+    """
+    tokens = _TOKEN_RE.findall(fold_text(search_term))
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def ranked_search_sql(table, columns, placeholder="?"):
+    """Zapytanie SELECT zwracające wydarzenia posortowane wg bm25"""
+    fts = fts_table_name(table)
+    select_list = ", ".join(f"e.{column}" for column in columns)
+    weights = ", ".join(str(weight) for weight in BM25_WEIGHTS)
+    return f'''
+        SELECT {select_list}
+        FROM {fts}
+        JOIN {table} e ON e.id = {fts}.rowid
+        WHERE {fts} MATCH {placeholder}
+        ORDER BY bm25({fts}, {weights}), e.date, e.start_time
+    '''
+
+
+def fts_filter_sql(table, placeholder="?"):
+    """Warunek WHERE ograniczający wiersze tabeli do trafień FTS5"""
+    fts = fts_table_name(table)
+    return f"{table}.id IN (SELECT rowid FROM {fts} WHERE {fts} MATCH {placeholder})"
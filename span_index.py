@@ -0,0 +1,85 @@
+"""
+Indeks przedziałów wydarzeń wielodniowych oparty o SQLite R*Tree
+Używany przez DatabaseManager (tabela events)
+
+Wydarzenia jednodniowe są wyszukiwane po dniu rozpoczęcia (indeksy B-drzewa
+start_ts), a R*Tree trzyma tylko wydarzenia trwające po północy dnia
+rozpoczęcia (z end_date) jako przedziały [start_ts, end_ts) w minutach od
+epoki. Pytanie "co trwa w tym dniu" to jedno przeszukanie drzewa zamiast
+skanu wszystkich wcześniejszych wydarzeń.
+"""
+
+SPAN_TABLE = "events_span"
+
+
+def rtree_available(conn):
+    """Sprawdza czy SQLite został skompilowany z R*Tree (wariant o współrzędnych całkowitych)"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("CREATE VIRTUAL TABLE temp._rtree_probe USING rtree_i32(id, low, high)")
+        cursor.execute("DROP TABLE temp._rtree_probe")
+        return True
+    except Exception:
+        return False
+
+
+def has_span_index(conn):
+    """Czy baza ma tabelę R*Tree wydarzeń wielodniowych"""
+    cursor = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (SPAN_TABLE,))
+    return cursor.fetchone() is not None
+
+
+def install_span_index(conn, table="events"):
+    """Tworzy tabelę R*Tree i triggery synchronizujące ją z wydarzeniami wielodniowymi
+    
+    Zwraca False, jeśli R*Tree jest niedostępne - wtedy wydarzenia
+    wielodniowe są wyszukiwane indeksem częściowym. Przy pierwszym
+    utworzeniu indeks jest wypełniany istniejącymi wydarzeniami z end_date.
+    Minuty od epoki mieszczą się w 32 bitach, więc rtree_i32 przechowuje
+    granice dokładnie (bez zaokrąglania jak we współrzędnych float).
+    """
+    if not rtree_available(conn):
+        return False
+    
+    exists = has_span_index(conn)
+    cursor = conn.cursor()
+    cursor.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {SPAN_TABLE} USING rtree_i32(id, start_ts, end_ts)")
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {SPAN_TABLE}_ai AFTER INSERT ON {table}
+        WHEN new.end_date IS NOT NULL BEGIN
+            INSERT INTO {SPAN_TABLE} (id, start_ts, end_ts) VALUES (new.id, new.start_ts, new.end_ts);
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {SPAN_TABLE}_ad AFTER DELETE ON {table}
+        WHEN old.end_date IS NOT NULL BEGIN
+            DELETE FROM {SPAN_TABLE} WHERE id = old.id;
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {SPAN_TABLE}_au AFTER UPDATE OF start_ts, end_ts, end_date ON {table} BEGIN
+            DELETE FROM {SPAN_TABLE} WHERE id = old.id;
+            INSERT INTO {SPAN_TABLE} (id, start_ts, end_ts)
+            SELECT new.id, new.start_ts, new.end_ts WHERE new.end_date IS NOT NULL;
+        END
+    ''')
+    
+    if not exists:
+        cursor.execute(f'''
+            INSERT INTO {SPAN_TABLE} (id, start_ts, end_ts)
+            SELECT id, start_ts, end_ts FROM {table} WHERE end_date IS NOT NULL
+        ''')
+    return True
+
+
+def drop_span_index(conn):
+    """Usuwa tabelę R*Tree i jej triggery"""
+    for suffix in ("ai", "ad", "au"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {SPAN_TABLE}_{suffix}")
+    conn.execute(f"DROP TABLE IF EXISTS {SPAN_TABLE}")
+
+
+def span_filter_sql(table, start_placeholder="?", end_placeholder="?"):
+    """Warunek WHERE ograniczający wiersze tabeli do przedziałów nakładających się na [start, end)"""
+    return (f"{table}.id IN (SELECT id FROM {SPAN_TABLE} "
+            f"WHERE start_ts < {end_placeholder} AND end_ts > {start_placeholder})")
@@ -0,0 +1,646 @@
+"""
+Backend Storage na SQLAlchemy Core - dla PostgreSQL i innych baz SQL
+
+Używa tylko przenośnych konstrukcji (bez triggerów, FTS5 i sqlite_sequence):
+dziennik zmian i sumy dzienne (daily_totals) są zapisywane jawnie w tej
+samej transakcji co zmiana wydarzenia, a wyszukiwanie korzysta z ILIKE. Lokalnie, bez serwera
+PostgreSQL, ten sam kod działa na pliku SQLite:
+    
+    sqlalchemy:sqlite:///calendar-pg.db
+
+Baza musi być osobna - tabele mają te same nazwy co w DatabaseManager,
+ale bez triggerów, więc zapisy DatabaseManager ominęłyby dziennik zmian.
+"""
+
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from itertools import starmap
+
+from sqlalchemy import (Column, DateTime, Index, Integer, MetaData, String, Table, Text,
+                        and_, create_engine, delete, event, func, inspect, insert, or_, select, text,
+                        tuple_, update)
+
+import change_log
+import recurrence
+import timezones
+from event_record import EventRecord, date_to_day, day_to_date, event_span
+from interval_index import MINUTES_PER_DAY
+from storage import Storage, event_values
+
+
+def _utc_now():
+    return datetime.now(timezone.utc)
+
+
+metadata = MetaData()
+
+events = Table(
+    "events", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("date", String(10), nullable=False),
+    Column("start_time", String(5), nullable=False),
+    Column("end_time", String(5)),
+    Column("title", String(200), nullable=False),
+    Column("description", Text),
+    Column("tz", String(64)),
+    Column("start_utc", Integer),
+    Column("end_utc", Integer),
+    Column("end_date", String(10)),
+    Column("all_day", Integer, nullable=False, default=0),
+    Column("created_at", DateTime(timezone=True), default=_utc_now),
+    Column("updated_at", DateTime(timezone=True), default=_utc_now),
+    Index("idx_events_date_start", "date", "start_time", "end_time"),
+    Index("idx_events_updated_at", "updated_at"),
+    Index("idx_events_utc", "start_utc", "id", "end_utc"),
+    sqlite_autoincrement=True,
+)
+
+# Wydarzenia wielodniowe: częściowy indeks po (end_date, date) - wydarzenia trwające
+# w zakresie to zakres end_date >= początek z warunkiem date < koniec
+Index("idx_events_multi_day", events.c.end_date, events.c.date,
+      sqlite_where=events.c.end_date.isnot(None), postgresql_where=events.c.end_date.isnot(None))
+
+recurring_events = Table(
+    "recurring_events", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("date", String(10), nullable=False),
+    Column("start_time", String(5), nullable=False),
+    Column("end_time", String(5)),
+    Column("title", String(200), nullable=False),
+    Column("description", Text),
+    Column("rrule", String(200), nullable=False),
+    Column("exdates", Text, nullable=False, default=""),
+    Column("last_date", String(10)),
+    Column("created_at", DateTime(timezone=True), default=_utc_now),
+    Column("updated_at", DateTime(timezone=True), default=_utc_now),
+    Index("idx_recurring_events_range", "date", "last_date"),
+    sqlite_autoincrement=True,
+)
+
+event_changes = Table(
+    change_log.CHANGES_TABLE, metadata,
+    Column("version", Integer, primary_key=True),
+    Column("kind", String(10), nullable=False),
+    Column("event_id", Integer, nullable=False),
+    Column("op", String(10), nullable=False),
+    Column("date", String(10)),
+    Column("old_date", String(10)),
+    Column("end_date", String(10)),
+    Column("old_end_date", String(10)),
+    Column("changed_at", DateTime(timezone=True), default=_utc_now),
+    sqlite_autoincrement=True,
+)
+
+# Indeksy dziennika po datach zmian - wersja miesiąca (get_month_version, jak change_log.install_date_indexes)
+Index("idx_event_changes_date", event_changes.c.date)
+Index("idx_event_changes_old_date", event_changes.c.old_date,
+      sqlite_where=event_changes.c.old_date.isnot(None), postgresql_where=event_changes.c.old_date.isnot(None))
+Index("idx_event_changes_end_date", event_changes.c.end_date,
+      sqlite_where=event_changes.c.end_date.isnot(None), postgresql_where=event_changes.c.end_date.isnot(None))
+Index("idx_event_changes_old_end_date", event_changes.c.old_end_date,
+      sqlite_where=event_changes.c.old_end_date.isnot(None),
+      postgresql_where=event_changes.c.old_end_date.isnot(None))
+Index("idx_event_changes_series", event_changes.c.kind, event_changes.c.version,
+      sqlite_where=event_changes.c.kind == change_log.KIND_SERIES,
+      postgresql_where=event_changes.c.kind == change_log.KIND_SERIES)
+
+# Sumy dni wydarzeń jednodniowych (jak daily_totals.py w SQLite) - poprawiane przy każdym zapisie
+daily_totals = Table(
+    "daily_totals", metadata,
+    Column("date", String(10), primary_key=True),
+    Column("event_count", Integer, nullable=False),
+    Column("busy_minutes", Integer, nullable=False),
+)
+
+EVENT_COLUMNS = (events.c.id, events.c.date, events.c.start_time, events.c.end_time,
+                 events.c.title, events.c.description, events.c.tz, events.c.end_date, events.c.all_day)
+
+# Kolumny dodane po pierwszej wersji schematu - istniejące bazy są uzupełniane przy otwarciu
+_ADDED_COLUMNS = {
+    "events": (("tz", "VARCHAR(64)"), ("start_utc", "INTEGER"), ("end_utc", "INTEGER"),
+               ("end_date", "VARCHAR(10)"), ("all_day", "INTEGER NOT NULL DEFAULT 0")),
+    change_log.CHANGES_TABLE: (("end_date", "VARCHAR(10)"), ("old_end_date", "VARCHAR(10)")),
+}
+_BACKFILL_CHUNK = 1000
+SERIES_COLUMNS = (recurring_events.c.id, recurring_events.c.date, recurring_events.c.start_time,
+                  recurring_events.c.end_time, recurring_events.c.title, recurring_events.c.description,
+                  recurring_events.c.rrule, recurring_events.c.exdates)
+CHANGE_COLUMNS = (event_changes.c.version, event_changes.c.kind, event_changes.c.event_id,
+                  event_changes.c.op, event_changes.c.date, event_changes.c.old_date,
+                  event_changes.c.end_date, event_changes.c.old_end_date)
+
+
+def _day_total(event_date, start_time, end_time, end_date, all_day):
+    """(data, zajęte minuty) wydarzenia do sum dziennych; None dla wielodniowego (liczone przy odczycie)
+    
+    Wiersz z nieczytelną godziną (dane sprzed walidacji) liczy się bez minut.
+    """
+    if end_date is not None:
+        return None
+    try:
+        start_ts, end_ts, _ = event_span(event_date, start_time, end_time, None, all_day)
+    except ValueError:
+        return event_date, 0
+    return event_date, 0 if end_ts is None else end_ts - start_ts
+
+
+def _configure_sqlite(engine):
+    """SQLite jako zastępnik: PRAGMA jak w ConnectionPool i BEGIN IMMEDIATE dla zapisów
+    
+    Bez BEGIN IMMEDIATE transakcja zaczynająca od odczytu (np. pobranie
+    starej daty przed UPDATE) może dostać SQLITE_BUSY bez czekania.
+    """
+    from database import ConnectionPool
+    
+    @event.listens_for(engine, "connect")
+    def connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+        for name, value in ConnectionPool.DEFAULT_PRAGMAS.items():
+            dbapi_connection.execute(f"PRAGMA {name} = {value}")
+    
+    @event.listens_for(engine, "begin")
+    def begin(conn):
+        conn.exec_driver_sql("BEGIN IMMEDIATE" if conn.get_execution_options().get("write") else "BEGIN")
+
+
+class SQLAlchemyStorage(Storage):
+    """Wydarzenia, serie i dziennik zmian w bazie obsługiwanej przez SQLAlchemy"""
+    
+    def __init__(self, url):
+        self.url = url
+        self.engine = create_engine(url)
+        if self.engine.dialect.name == "sqlite":
+            _configure_sqlite(self.engine)
+        self._local = threading.local()
+        self._trace_listener = None
+        metadata.create_all(self.engine, tables=[table for table in metadata.sorted_tables
+                                                 if table is not daily_totals])
+        self._upgrade_schema()
+        self._create_change_indexes()
+        self._create_daily_totals()
+    
+    def _upgrade_schema(self):
+        """Dodaje do istniejących tabel kolumny z późniejszych wersji schematu i wypełnia je porcjami
+        
+        Bez numerowanych migracji jak w DatabaseManager - brakujące kolumny
+        są wykrywane przez inspekcję schematu (ALTER TABLE jest przenośny).
+        """
+        inspector = inspect(self.engine)
+        missing = {}
+        for table, columns in _ADDED_COLUMNS.items():
+            existing = {column["name"] for column in inspector.get_columns(table)}
+            missing[table] = [(name, sql_type) for name, sql_type in columns if name not in existing]
+        if not any(missing.values()):
+            return
+        with self.transaction() as conn:
+            for table, columns in missing.items():
+                for name, sql_type in columns:
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {sql_type}"))
+            for index in events.indexes:
+                index.create(conn, checkfirst=True)
+        
+        self._backfill(self._backfill_utc_times)
+        if ("end_date", "VARCHAR(10)") in missing["events"]:
+            self._backfill(self._backfill_multi_day)
+    
+    def _create_change_indexes(self):
+        """Indeksy dziennika zmian po datach w bazie utworzonej przed ich dodaniem (create_all ich nie dodaje)"""
+        existing = {index["name"] for index in inspect(self.engine).get_indexes(event_changes.name)}
+        missing = [index for index in event_changes.indexes if index.name not in existing]
+        if not missing:
+            return
+        with self.transaction() as conn:
+            for index in missing:
+                index.create(conn)
+    
+    def _create_daily_totals(self):
+        """Tworzy tabelę sum dziennych i wypełnia ją istniejącymi wydarzeniami - w jednej transakcji
+        
+        Przerwane wypełnianie wycofuje też utworzenie tabeli, więc przy
+        następnym otwarciu zaczyna się od nowa.
+        """
+        if inspect(self.engine).has_table(daily_totals.name):
+            return
+        with self.transaction() as conn:
+            daily_totals.create(conn)
+            totals = {}
+            rows = conn.execute(select(events.c.date, events.c.start_time, events.c.end_time, events.c.all_day)
+                                .where(events.c.end_date.is_(None)))
+            for event_date, start_time, end_time, all_day in rows:
+                _, minutes = _day_total(event_date, start_time, end_time, None, all_day)
+                count, total = totals.get(event_date, (0, 0))
+                totals[event_date] = (count + 1, total + minutes)
+            if totals:
+                conn.execute(insert(daily_totals), [
+                    {'date': event_date, 'event_count': count, 'busy_minutes': minutes}
+                    for event_date, (count, minutes) in totals.items()
+                ])
+    
+    def _backfill(self, chunk):
+        """Wywołuje chunk(conn, after) w osobnych transakcjach, aż zwróci None"""
+        after = 0
+        while after is not None:
+            with self.transaction() as conn:
+                after = chunk(conn, after)
+    
+    @staticmethod
+    def _backfill_utc_times(conn, after):
+        """Porcja wierszy bez chwil UTC - strefa domyślna i start_utc/end_utc"""
+        rows = conn.execute(select(events.c.id, events.c.date, events.c.start_time, events.c.end_time,
+                                   events.c.tz)
+                            .where(events.c.id > after, events.c.start_utc.is_(None))
+                            .order_by(events.c.id).limit(_BACKFILL_CHUNK)).all()
+        for event_id, event_date, start_time, end_time, tz in rows:
+            tz = tz or timezones.DEFAULT_TIMEZONE
+            try:
+                start_utc, end_utc = timezones.event_utc_range(event_date, start_time, end_time, tz)
+            except ValueError:
+                continue
+            conn.execute(update(events).where(events.c.id == event_id)
+                         .values(tz=tz, start_utc=start_utc, end_utc=end_utc))
+        return rows[-1][0] if len(rows) == _BACKFILL_CHUNK else None
+    
+    @staticmethod
+    def _backfill_multi_day(conn, after):
+        """Porcja wydarzeń trwających po północy bez daty końca (godzina końcowa wcześniejsza niż
+        początkowa) - end_date następnego dnia"""
+        rows = conn.execute(select(events.c.id, events.c.date)
+                            .where(events.c.id > after, events.c.end_date.is_(None),
+                                   events.c.end_time < events.c.start_time, events.c.end_time > "00:00")
+                            .order_by(events.c.id).limit(_BACKFILL_CHUNK)).all()
+        for event_id, event_date in rows:
+            conn.execute(update(events).where(events.c.id == event_id)
+                         .values(end_date=day_to_date(date_to_day(event_date) + 1)))
+        return rows[-1][0] if len(rows) == _BACKFILL_CHUNK else None
+    
+    def close(self):
+        self.engine.dispose()
+    
+    def connection_stats(self):
+        """Połączenia puli silnika (pula bez liczników, np. SingletonThreadPool - pusty słownik)"""
+        pool = self.engine.pool
+        if not hasattr(pool, "checkedout"):
+            return {}
+        return {"open": pool.checkedin() + pool.checkedout(), "in_use": pool.checkedout()}
+    
+    def trace_statements(self, callback):
+        """Callback instrukcji SQL przez zdarzenie before_cursor_execute silnika"""
+        if self._trace_listener is not None:
+            event.remove(self.engine, "before_cursor_execute", self._trace_listener)
+            self._trace_listener = None
+        if callback is not None:
+            def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+                callback(statement)
+            self._trace_listener = before_cursor_execute
+            event.listen(self.engine, "before_cursor_execute", before_cursor_execute)
+    
+    @contextmanager
+    def transaction(self):
+        """Transakcja zapisu; zagnieżdżone korzystają z połączenia zewnętrznej"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            yield conn
+            return
+        with self.engine.connect().execution_options(write=True) as conn, conn.begin():
+            self._local.conn = conn
+            try:
+                yield conn
+            finally:
+                self._local.conn = None
+    
+    @contextmanager
+    def _reading(self):
+        """Połączenie do odczytu - w trwającej transakcji widzi jej niezatwierdzone zmiany"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            yield conn
+            return
+        with self.engine.connect() as conn:
+            yield conn
+    
+    @staticmethod
+    def _log(conn, kind, event_id, op, event_date=None, old_date=None, end_date=None, old_end_date=None):
+        conn.execute(insert(event_changes).values(kind=kind, event_id=event_id, op=op, date=event_date,
+                                                  old_date=old_date, end_date=end_date, old_end_date=old_end_date))
+    
+    @staticmethod
+    def _change_daily_totals(conn, added=(), removed=()):
+        """Dolicza wydarzenia added i odejmuje removed od sum dni - (data, minuty) z _day_total
+        
+        Upsert dialektu (SQLite, PostgreSQL), a w innych bazach UPDATE
+        i INSERT dla dni, których jeszcze nie ma; dni bez wydarzeń są usuwane.
+        """
+        changes = {}
+        for totals, sign in ((added, 1), (removed, -1)):
+            for total in totals:
+                if total is None:
+                    continue
+                count, minutes = changes.get(total[0], (0, 0))
+                changes[total[0]] = (count + sign, minutes + sign * total[1])
+        rows = [{'date': event_date, 'event_count': count, 'busy_minutes': minutes}
+                for event_date, (count, minutes) in changes.items() if count or minutes]
+        if not rows:
+            return
+        
+        dialect = conn.dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            if dialect == "sqlite":
+                from sqlalchemy.dialects.sqlite import insert as upsert
+            else:
+                from sqlalchemy.dialects.postgresql import insert as upsert
+            statement = upsert(daily_totals)
+            conn.execute(statement.on_conflict_do_update(index_elements=[daily_totals.c.date], set_={
+                'event_count': daily_totals.c.event_count + statement.excluded.event_count,
+                'busy_minutes': daily_totals.c.busy_minutes + statement.excluded.busy_minutes,
+            }), rows)
+        else:
+            for row in rows:
+                changed = conn.execute(update(daily_totals).where(daily_totals.c.date == row['date']).values(
+                    event_count=daily_totals.c.event_count + row['event_count'],
+                    busy_minutes=daily_totals.c.busy_minutes + row['busy_minutes'],
+                )).rowcount
+                if not changed:
+                    conn.execute(insert(daily_totals).values(**row))
+        
+        emptied = [row['date'] for row in rows if row['event_count'] < 0]
+        if emptied:
+            conn.execute(delete(daily_totals).where(daily_totals.c.date.in_(emptied),
+                                                    daily_totals.c.event_count <= 0))
+    
+    # --- Wydarzenia ---
+    
+    @staticmethod
+    def _event_values(*event):
+        """Słownik kolumn z pól event_values (bez start_ts/end_ts - przedziały liczy _multi_day_events)"""
+        (event_date, start_time, end_time, title, description, tz, end_date, all_day,
+         start_utc, end_utc, _, _) = event_values(*event)
+        return {'date': event_date, 'start_time': start_time, 'end_time': end_time, 'title': title,
+                'description': description, 'tz': tz, 'end_date': end_date, 'all_day': all_day,
+                'start_utc': start_utc, 'end_utc': end_utc}
+    
+    # Kolumny zapisanego wiersza potrzebne do sum dziennych (obok date i end_date)
+    _TOTAL_COLUMNS = (events.c.start_time, events.c.end_time, events.c.all_day)
+    
+    @staticmethod
+    def _values_total(values):
+        return _day_total(values['date'], values['start_time'], values['end_time'], values['end_date'],
+                          values['all_day'])
+    
+    @staticmethod
+    def _row_total(row):
+        return _day_total(row.date, row.start_time, row.end_time, row.end_date, row.all_day)
+    
+    def add_event(self, event_date, start_time, end_time, title, description="", tz=None, end_date=None,
+                  all_day=False):
+        values = self._event_values(event_date, start_time, end_time, title, description, tz, end_date, all_day)
+        with self.transaction() as conn:
+            event_id = conn.execute(insert(events).values(**values)).inserted_primary_key[0]
+            self._log(conn, change_log.KIND_EVENT, event_id, 'insert', event_date, end_date=values['end_date'])
+            self._change_daily_totals(conn, added=[self._values_total(values)])
+            return event_id
+    
+    def add_events_bulk(self, rows):
+        """Jedno wstawienie wielu wierszy z RETURNING i jedno do dziennika zmian"""
+        if not rows:
+            return 0
+        values = [self._event_values(*row) for row in rows]
+        with self.transaction() as conn:
+            inserted = conn.execute(
+                insert(events).returning(events.c.id, events.c.date, events.c.end_date,
+                                         sort_by_parameter_order=True),
+                values
+            ).all()
+            conn.execute(insert(event_changes), [
+                {'kind': change_log.KIND_EVENT, 'event_id': event_id, 'op': 'insert', 'date': event_date,
+                 'end_date': end_date}
+                for event_id, event_date, end_date in inserted
+            ])
+            self._change_daily_totals(conn, added=map(self._values_total, values))
+        return len(rows)
+    
+    def update_event(self, event_id, start_time, end_time, title, description, event_date=None, tz=None,
+                     end_date=None, all_day=False):
+        with self.transaction() as conn:
+            old = conn.execute(select(events.c.date, events.c.tz, events.c.end_date, *self._TOTAL_COLUMNS)
+                               .where(events.c.id == event_id)).first()
+            if old is None:
+                return False
+            values = self._event_values(event_date or old.date, start_time, end_time, title, description,
+                                        tz or old.tz, end_date, all_day)
+            conn.execute(update(events).where(events.c.id == event_id).values(updated_at=_utc_now(), **values))
+            self._log(conn, change_log.KIND_EVENT, event_id, 'update', values['date'], old.date,
+                      values['end_date'], old.end_date)
+            self._change_daily_totals(conn, added=[self._values_total(values)], removed=[self._row_total(old)])
+            return True
+    
+    def delete_event(self, event_id):
+        with self.transaction() as conn:
+            old = conn.execute(delete(events).where(events.c.id == event_id)
+                               .returning(events.c.date, events.c.end_date, *self._TOTAL_COLUMNS)).first()
+            if old is None:
+                return False
+            self._log(conn, change_log.KIND_EVENT, event_id, 'delete', old_date=old.date, old_end_date=old.end_date)
+            self._change_daily_totals(conn, removed=[self._row_total(old)])
+            return True
+    
+    def get_event_by_id(self, event_id):
+        with self._reading() as conn:
+            row = conn.execute(select(*EVENT_COLUMNS).where(events.c.id == event_id)).first()
+            return EventRecord.from_row(*row) if row else None
+    
+    def get_events_by_ids(self, event_ids):
+        event_ids = list(event_ids)
+        if not event_ids:
+            return []
+        with self._reading() as conn:
+            return list(starmap(EventRecord.from_row,
+                                conn.execute(select(*EVENT_COLUMNS).where(events.c.id.in_(event_ids)))))
+    
+    def _iter_single_events(self, start_date, end_date, batch_size):
+        """Porcje kontynuowane od klucza (date, start_time, id) - osobne zapytanie na porcję"""
+        order = (events.c.date, events.c.start_time, events.c.id)
+        condition = events.c.date >= start_date
+        while True:
+            with self._reading() as conn:
+                rows = list(starmap(EventRecord.from_row, conn.execute(
+                    select(*EVENT_COLUMNS).where(condition, events.c.date < end_date)
+                    .order_by(*order).limit(batch_size)
+                )))
+            yield from rows
+            if len(rows) < batch_size:
+                return
+            last = rows[-1]
+            condition = tuple_(*order) > tuple_(last.date, last.start_time, last.id)
+    
+    def _multi_day_events(self, start_date, end_date):
+        """Zakres indeksu częściowego (end_date, date), dokładne nakładanie się sprawdzane na rekordach
+        
+        W PostgreSQL właściwym indeksem byłby GiST na zakresie tsrange;
+        przenośna wersja przegląda wielodniowe kończące się od start_date.
+        """
+        query = select(*EVENT_COLUMNS).where(
+            events.c.end_date.isnot(None), events.c.end_date >= start_date, events.c.date < end_date
+        ).order_by(events.c.date, events.c.start_time, events.c.id)
+        range_start = date_to_day(start_date) * MINUTES_PER_DAY
+        with self._reading() as conn:
+            found = starmap(EventRecord.from_row, conn.execute(query))
+            return [event for event in found if event.interval()[1] > range_start]
+    
+    def _single_day_totals(self, start_date, end_date):
+        """Zakres klucza głównego tabeli sum dziennych"""
+        query = select(daily_totals).where(daily_totals.c.date >= start_date, daily_totals.c.date < end_date)
+        with self._reading() as conn:
+            return {row[0]: (row[1], row[2]) for row in conn.execute(query)}
+    
+    def _single_events_in_window(self, window_start, window_end):
+        """Jedno zapytanie zakresowe po indeksie (start_utc, id, end_utc)"""
+        query = select(events.c.start_utc, events.c.end_utc, *EVENT_COLUMNS).where(
+            events.c.start_utc >= window_start - timezones.MAX_EVENT_MINUTES,
+            events.c.start_utc < window_end,
+            or_(events.c.start_utc >= window_start, events.c.end_utc > window_start)
+        ).order_by(events.c.start_utc, events.c.id)
+        with self._reading() as conn:
+            return [(row[0], row[1], EventRecord.from_row(*row[2:])) for row in conn.execute(query)]
+    
+    @staticmethod
+    def _search_condition(table, search_term):
+        pattern = f"%{search_term}%"
+        return or_(table.c.title.ilike(pattern), table.c.description.ilike(pattern))
+    
+    def search_events_page(self, search_term, after=None, limit=None, offset=0):
+        query = select(*EVENT_COLUMNS).where(self._search_condition(events, search_term))
+        if after is not None:
+            query = query.where(tuple_(events.c.date, events.c.start_time, events.c.id) > tuple_(*after))
+        query = query.order_by(events.c.date, events.c.start_time, events.c.id)
+        if limit is not None:
+            query = query.limit(limit)
+        if offset:
+            query = query.offset(offset)
+        with self._reading() as conn:
+            return list(starmap(EventRecord.from_row, conn.execute(query)))
+    
+    def count_search_results(self, search_term):
+        query = select(func.count()).select_from(events).where(self._search_condition(events, search_term))
+        with self._reading() as conn:
+            return conn.execute(query).scalar()
+    
+    # --- Serie cykliczne ---
+    
+    @staticmethod
+    def _series_values(event_date, start_time, end_time, title, description, rule, exdates):
+        last_date = recurrence.last_occurrence(event_date, rule)
+        return {'date': event_date, 'start_time': start_time, 'end_time': end_time, 'title': title,
+                'description': description, 'rrule': str(rule), 'exdates': exdates,
+                'last_date': last_date.strftime("%Y-%m-%d") if last_date else None}
+    
+    def add_recurring_event(self, event_date, start_time, end_time, title, description, rule, exdates=""):
+        with self.transaction() as conn:
+            recurrence_id = conn.execute(insert(recurring_events).values(
+                **self._series_values(event_date, start_time, end_time, title, description, rule, exdates)
+            )).inserted_primary_key[0]
+            self._log(conn, change_log.KIND_SERIES, recurrence_id, 'insert', event_date)
+            return recurrence_id
+    
+    def update_recurring_event(self, recurrence_id, event_date, start_time, end_time, title,
+                               description, rule, exdates=""):
+        with self.transaction() as conn:
+            old_date = conn.execute(select(recurring_events.c.date)
+                                    .where(recurring_events.c.id == recurrence_id)).scalar()
+            if old_date is None:
+                return False
+            conn.execute(update(recurring_events).where(recurring_events.c.id == recurrence_id).values(
+                updated_at=_utc_now(),
+                **self._series_values(event_date, start_time, end_time, title, description, rule, exdates)
+            ))
+            self._log(conn, change_log.KIND_SERIES, recurrence_id, 'update', event_date, old_date)
+            return True
+    
+    def delete_recurring_event(self, recurrence_id):
+        with self.transaction() as conn:
+            old_date = conn.execute(delete(recurring_events).where(recurring_events.c.id == recurrence_id)
+                                    .returning(recurring_events.c.date)).scalar()
+            if old_date is None:
+                return False
+            self._log(conn, change_log.KIND_SERIES, recurrence_id, 'delete', old_date=old_date)
+            return True
+    
+    def get_recurring_event(self, recurrence_id):
+        with self._reading() as conn:
+            row = conn.execute(select(*SERIES_COLUMNS).where(recurring_events.c.id == recurrence_id)).first()
+            return tuple(row) if row else None
+    
+    def add_recurrence_exception(self, recurrence_id, occurrence_date):
+        with self.transaction() as conn:
+            row = conn.execute(select(recurring_events.c.date, recurring_events.c.exdates)
+                               .where(recurring_events.c.id == recurrence_id)).first()
+            if row is None:
+                return False
+            exdates = recurrence.format_exdates(recurrence.parse_exdates(row.exdates) | {occurrence_date})
+            conn.execute(update(recurring_events).where(recurring_events.c.id == recurrence_id)
+                         .values(exdates=exdates, updated_at=_utc_now()))
+            self._log(conn, change_log.KIND_SERIES, recurrence_id, 'update', row.date, row.date)
+            return True
+    
+    def get_recurring_between(self, start_date, end_date):
+        with self._reading() as conn:
+            return [tuple(row) for row in conn.execute(select(*SERIES_COLUMNS).where(
+                recurring_events.c.date < end_date,
+                or_(recurring_events.c.last_date.is_(None), recurring_events.c.last_date >= start_date)
+            ))]
+    
+    def search_recurring(self, search_term):
+        query = select(*SERIES_COLUMNS, recurring_events.c.last_date).where(
+            self._search_condition(recurring_events, search_term)
+        ).order_by(recurring_events.c.date, recurring_events.c.start_time)
+        with self._reading() as conn:
+            return [tuple(row) for row in conn.execute(query)]
+    
+    # --- Dziennik zmian ---
+    
+    def get_changes_since(self, version, limit=change_log.CHANGES_PAGE_SIZE):
+        with self._reading() as conn:
+            oldest, latest = conn.execute(select(func.min(event_changes.c.version),
+                                                 func.max(event_changes.c.version))).one()
+            latest = latest or 0
+            if change_log.needs_reset(version, latest, oldest):
+                return change_log.reset_page(latest)
+            rows = [tuple(row) for row in conn.execute(
+                select(*CHANGE_COLUMNS).where(event_changes.c.version > version)
+                .order_by(event_changes.c.version).limit(limit + 1)
+            )]
+        return change_log.build_page(rows, version, latest, limit)
+    
+    def get_current_version(self):
+        with self._reading() as conn:
+            return conn.execute(select(func.max(event_changes.c.version))).scalar() or 0
+    
+    def get_month_version(self, start_date, end_date, upto):
+        """Jak change_log.month_version - te same warunki w SQLAlchemy Core"""
+        changes = event_changes.c
+        touching = [
+            and_(changes.date >= start_date, changes.date < end_date),
+            and_(changes.old_date >= start_date, changes.old_date < end_date),
+            and_(changes.date < start_date, changes.end_date >= start_date),
+            and_(changes.old_date < start_date, changes.old_end_date >= start_date),
+        ]
+        with self._reading() as conn:
+            event_version = conn.execute(select(func.max(changes.version)).where(
+                changes.version <= upto, changes.kind == change_log.KIND_EVENT, or_(*touching)
+            )).scalar()
+            series_version = conn.execute(select(func.max(changes.version)).where(
+                changes.version <= upto, changes.kind == change_log.KIND_SERIES
+            )).scalar()
+            oldest, latest = conn.execute(select(func.min(changes.version), func.max(changes.version))).one()
+        return change_log.combine_month_version(event_version, series_version, oldest, latest or 0, upto)
+    
+    def prune_changes(self, keep):
+        """Przycina dziennik, ale zawsze zostawia najnowszą zmianę
+        
+        Bieżąca wersja to MAX(version) - pusty dziennik cofnąłby ją do zera.
+        """
+        with self.transaction() as conn:
+            latest = conn.execute(select(func.max(event_changes.c.version))).scalar() or 0
+            return conn.execute(delete(event_changes).where(
+                event_changes.c.version <= min(latest - keep, latest - 1)
+            )).rowcount
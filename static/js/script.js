@@ -3,6 +3,16 @@ let currentMonth = new Date().getMonth() + 1;
 let selectedDate = null;
 let todayString = new Date().toISOString().split('T')[0];
 let calendarData = {};
+// Czy edytowane wydarzenie było wielodniowe (zmiana dotyczy też innych dni)
+let editedSpansDays = false;
+
+// Magazyn danych miesięcy: 'RRRR-MM' -> { data, etag, checkedAt }
+// Widok dnia korzysta z danych miesiąca, a sąsiednie miesiące są pobierane
+// w tle. Kopia młodsza niż MONTH_STORE_TTL jest używana bez pytania serwera.
+const MONTH_STORE_TTL = 60000;
+const MONTH_STORE_SIZE = 24;
+const monthStore = new Map();
+const monthRequests = new Map();
 
 const monthNames = [
     'Styczeń', 'Luty', 'Marzec', 'Kwiecień', 'Maj', 'Czerwiec',
@@ -11,15 +21,22 @@ const monthNames = [
 
 const dayNames = ['Poniedziałek', 'Wtorek', 'Środa', 'Czwartek', 'Piątek', 'Sobota', 'Niedziela'];
 
+// Strefa czasowa przeglądarki - nowe wydarzenia są zapisywane w tej strefie
+const browserTimeZone = Intl.DateTimeFormat().resolvedOptions().timeZone;
+
 async function apiCall(url, options = {}) {
-    showLoading();
+    // background: true - bez nakładki ładowania (aktualizacje optymistyczne)
+    const { background, ...fetchOptions } = options;
+    if (!background) {
+        showLoading();
+    }
     try {
         const response = await fetch(url, {
             headers: {
                 'Content-Type': 'application/json',
-                ...options.headers
+                ...fetchOptions.headers
             },
-            ...options
+            ...fetchOptions
         });
         
         if (!response.ok) {
@@ -33,17 +50,254 @@ async function apiCall(url, options = {}) {
         showToast('Wystąpił błąd podczas łączenia z serwerem', 'error');
         throw error;
     } finally {
-        hideLoading();
+        if (!background) {
+            hideLoading();
+        }
     }
 }
 
 async function loadCalendar(year, month) {
     try {
-        calendarData = await apiCall(`/api/calendar/${year}/${month}`);
+        const data = await getMonthData(year, month);
+        
+        // Użytkownik przeszedł już do innego miesiąca
+        if (year !== currentYear || month !== currentMonth) {
+            return;
+        }
+        
+        calendarData = data;
         renderCalendar();
         updateMonthDisplay();
+        prefetchAdjacentMonths(year, month);
     } catch (error) {
         console.error('Failed to load calendar:', error);
+        showToast('Wystąpił błąd podczas łączenia z serwerem', 'error');
+    }
+}
+
+function monthKey(year, month) {
+    return `${year}-${String(month).padStart(2, '0')}`;
+}
+
+function shiftMonth(year, month, delta) {
+    const index = year * 12 + (month - 1) + delta;
+    return [Math.floor(index / 12), (index % 12) + 1];
+}
+
+function isFresh(entry) {
+    return Date.now() - entry.checkedAt < MONTH_STORE_TTL;
+}
+
+function storeMonth(key, data, etag) {
+    monthStore.delete(key);
+    monthStore.set(key, { data, etag, checkedAt: Date.now() });
+    
+    // Najdawniej używane miesiące wypadają z magazynu
+    while (monthStore.size > MONTH_STORE_SIZE) {
+        monthStore.delete(monthStore.keys().next().value);
+    }
+}
+
+async function getMonthData(year, month) {
+    const key = monthKey(year, month);
+    const entry = monthStore.get(key);
+    
+    if (entry && isFresh(entry)) {
+        monthStore.delete(key);
+        monthStore.set(key, entry);
+        return entry.data;
+    }
+    
+    // Brak kopii lub przeterminowana - zapytanie warunkowe (304 bez danych)
+    return requestMonth(year, month, false);
+}
+
+function requestMonth(year, month, background) {
+    const key = monthKey(year, month);
+    
+    // Ten sam miesiąc może być właśnie pobierany w tle
+    if (!monthRequests.has(key)) {
+        const request = fetchMonth(year, month, background).finally(() => monthRequests.delete(key));
+        monthRequests.set(key, request);
+    }
+    return monthRequests.get(key);
+}
+
+async function fetchMonth(year, month, background) {
+    const key = monthKey(year, month);
+    const cached = monthStore.get(key);
+    const headers = cached && cached.etag ? { 'If-None-Match': `"${cached.etag}"` } : {};
+    
+    if (!background) {
+        showLoading();
+    }
+    try {
+        const response = await fetch(`/api/calendar/${year}/${month}`, { headers });
+        
+        if (response.status === 304 && cached) {
+            cached.checkedAt = Date.now();
+            return cached.data;
+        }
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        
+        const data = await response.json();
+        storeMonth(key, data, (response.headers.get('ETag') || '').replace(/"/g, ''));
+        return data;
+    } finally {
+        if (!background) {
+            hideLoading();
+        }
+    }
+}
+
+function prefetchAdjacentMonths(year, month) {
+    const stale = [];
+    
+    [-1, 1].forEach(delta => {
+        const [adjacentYear, adjacentMonth] = shiftMonth(year, month, delta);
+        const entry = monthStore.get(monthKey(adjacentYear, adjacentMonth));
+        
+        if (!entry) {
+            requestMonth(adjacentYear, adjacentMonth, true).catch(error => {
+                console.error('Prefetch failed:', error);
+            });
+        } else if (!isFresh(entry)) {
+            stale.push(monthKey(adjacentYear, adjacentMonth));
+        }
+    });
+    
+    if (stale.length > 0) {
+        revalidateMonths(stale);
+    }
+}
+
+async function revalidateMonths(keys) {
+    // Jedno lekkie zapytanie o wersje zamiast pobierania całych miesięcy
+    try {
+        const response = await fetch(`/api/calendar/versions?months=${keys.join(',')}`);
+        if (!response.ok) {
+            return;
+        }
+        
+        const versions = await response.json();
+        keys.forEach(key => {
+            const entry = monthStore.get(key);
+            if (!entry) {
+                return;
+            }
+            
+            if (versions[key] === entry.etag) {
+                entry.checkedAt = Date.now();
+            } else {
+                const [year, month] = key.split('-').map(Number);
+                requestMonth(year, month, true).catch(error => {
+                    console.error('Prefetch failed:', error);
+                });
+            }
+        });
+    } catch (error) {
+        console.error('Version check failed:', error);
+    }
+}
+
+function timeToMinutes(time) {
+    const [hours, minutes] = time.split(':').map(Number);
+    return hours * 60 + minutes;
+}
+
+function spansDays(event) {
+    // Wydarzenie wielodniowe - zajmuje kilka dni (i być może miesięcy) widoku
+    return Boolean(event.end_date && event.end_date > event.date);
+}
+
+function eventMinutes(event) {
+    if (event.all_day) {
+        return 24 * 60;
+    }
+    return event.end_time ? timeToMinutes(event.end_time) - timeToMinutes(event.start_time) : 0;
+}
+
+function applyLocalChange(dateString, change) {
+    // Aktualizacja optymistyczna - zmienia kopię miesiąca przed odpowiedzią serwera
+    const entry = monthStore.get(dateString.slice(0, 7));
+    if (!entry) {
+        return;
+    }
+    
+    const { events, summary } = entry.data;
+    const dayEvents = change((events[dateString] || []).slice());
+    dayEvents.sort((a, b) => a.start_time.localeCompare(b.start_time));
+    
+    if (dayEvents.length > 0) {
+        events[dateString] = dayEvents;
+        summary[dateString] = {
+            count: dayEvents.length,
+            busy_minutes: dayEvents.reduce((total, event) => total + eventMinutes(event), 0)
+        };
+    } else {
+        delete events[dateString];
+        delete summary[dateString];
+    }
+    refreshViews();
+}
+
+function refreshViews() {
+    const entry = monthStore.get(monthKey(currentYear, currentMonth));
+    if (entry) {
+        calendarData = entry.data;
+        renderCalendar();
+    }
+    if (selectedDate) {
+        loadEventsForDate(selectedDate);
+    }
+}
+
+async function syncMonth(dateString) {
+    // Po zapisie (lub błędzie) kopia miesiąca jest uzgadniana z serwerem w tle
+    const [year, month] = dateString.slice(0, 7).split('-').map(Number);
+    try {
+        await requestMonth(year, month, true);
+        refreshViews();
+    } catch (error) {
+        console.error('Failed to sync month:', error);
+    }
+}
+
+function invalidateMonthStore() {
+    // Zmiany serii cyklicznych i wydarzeń wielodniowych dotyczą wielu dni i miesięcy naraz
+    monthStore.clear();
+}
+
+function connectChangeStream() {
+    // Zmiany z innych przeglądarek są nanoszone na magazyn miesięcy bez
+    // ponownego pobierania; po zerwaniu połączenia EventSource wznawia je
+    // sam od ostatniej wersji (Last-Event-ID)
+    if (!window.EventSource) {
+        return;
+    }
+    const stream = new EventSource('/api/stream');
+    stream.onmessage = message => applyRemoteChange(JSON.parse(message.data));
+}
+
+function applyRemoteChange(change) {
+    if (change.op === 'reset' || change.kind === 'series' || change.end_date || change.old_end_date) {
+        // Pełny stan (np. po imporcie) albo seria lub wydarzenie wielodniowe obejmujące wiele dni
+        invalidateMonthStore();
+        syncMonth(monthKey(currentYear, currentMonth));
+        return;
+    }
+    
+    const id = String(change.id);
+    const withoutEvent = events => events.filter(event => String(event.id) !== id);
+    if (change.old_date && change.old_date !== change.date) {
+        applyLocalChange(change.old_date, withoutEvent);
+    }
+    if (change.date) {
+        applyLocalChange(change.date, events => change.event
+            ? withoutEvent(events).concat([change.event])
+            : withoutEvent(events));
     }
 }
 
@@ -95,7 +349,7 @@ function createDayElement(day, events) {
         const eventDot = document.createElement('div');
         eventDot.className = `event-dot event-${(index % 5) + 1}`;
         eventDot.textContent = event.title;
-        eventDot.title = `${event.start_time} - ${event.title}`;
+        eventDot.title = `${event.all_day ? 'Cały dzień' : event.start_time} - ${event.title}`;
         dayEventsContainer.appendChild(eventDot);
     });
     
@@ -126,9 +380,18 @@ async function selectDate(dateString) {
     await loadEventsForDate(dateString);
 }
 
+async function getDayEvents(dateString) {
+    // Dzień z wczytanego miesiąca - bez zapytania do serwera
+    const entry = monthStore.get(dateString.slice(0, 7));
+    if (entry) {
+        return entry.data.events[dateString] || [];
+    }
+    return apiCall(`/api/events/${dateString}`);
+}
+
 async function loadEventsForDate(dateString) {
     try {
-        const events = await apiCall(`/api/events/${dateString}`);
+        const events = await getDayEvents(dateString);
         renderDailyEvents(events);
     } catch (error) {
         console.error('Failed to load events:', error);
@@ -164,21 +427,37 @@ function createEventElement(event) {
     eventDiv.className = 'event-item';
     
     let timeDisplay = event.start_time;
-    if (event.end_time && event.end_time !== event.start_time) {
+    if (event.all_day) {
+        timeDisplay = spansDays(event) ? `Cały dzień, ${formatDate(event.date)} - ${formatDate(event.end_date)}`
+            : 'Cały dzień';
+    } else if (spansDays(event)) {
+        timeDisplay = `${formatDate(event.date)} ${event.start_time} - ${formatDate(event.end_date)} ${event.end_time}`;
+    } else if (event.end_time && event.end_time !== event.start_time) {
         timeDisplay += ` - ${event.end_time}`;
     }
     
+    // Wystąpienie serii cyklicznej: edycja dotyczy całej serii,
+    // a usunięcie - tylko tego dnia lub całej serii
+    const recurring = event.recurrence_id !== undefined;
+    const deleteButtons = recurring ? `
+            <button class="event-btn delete" onclick="deleteOccurrence(${event.recurrence_id}, '${event.date}', '${event.title}')">
+                <i class="fas fa-trash"></i> Usuń ten dzień
+            </button>
+            <button class="event-btn delete" onclick="deleteSeries(${event.recurrence_id}, '${event.title}')">
+                <i class="fas fa-trash"></i> Usuń serię
+            </button>` : `
+            <button class="event-btn delete" onclick="deleteEvent('${event.id}', '${event.title}', ${spansDays(event)})">
+                <i class="fas fa-trash"></i> Usuń
+            </button>`;
+    
     eventDiv.innerHTML = `
         <div class="event-time">${timeDisplay}</div>
-        <div class="event-title">${event.title}</div>
+        <div class="event-title">${recurring ? '<i class="fas fa-redo" title="Wydarzenie cykliczne"></i> ' : ''}${event.title}</div>
         ${event.description ? `<div class="event-description">${event.description}</div>` : ''}
         <div class="event-actions">
-            <button class="event-btn edit" onclick="editEvent(${event.id})">
-                <i class="fas fa-edit"></i> Edytuj
-            </button>
-            <button class="event-btn delete" onclick="deleteEvent(${event.id}, '${event.title}')">
-                <i class="fas fa-trash"></i> Usuń
-            </button>
+            <button class="event-btn edit" onclick="editEvent('${event.id}')">
+                <i class="fas fa-edit"></i> Edytuj${recurring ? ' serię' : ''}
+            </button>${deleteButtons}
         </div>
     `;
     
@@ -217,9 +496,13 @@ function showAddEventModal(date = null) {
     
     form.reset();
     document.getElementById('event-id').value = '';
+    document.getElementById('event-recurrence-id').value = '';
+    document.getElementById('repeat-group').style.display = '';
     const targetDate = date || selectedDate || todayString;
     document.getElementById('event-date').value = targetDate;
     document.getElementById('modal-title').textContent = 'Dodaj wydarzenie';
+    editedSpansDays = false;
+    toggleAllDay();
     
     modal.style.display = 'block';
     document.getElementById('event-title').focus();
@@ -231,21 +514,29 @@ function closeEventModal() {
 
 async function editEvent(eventId) {
     try {
-        const events = await apiCall(`/api/events/${selectedDate}`);
-        const event = events.find(e => e.id === eventId);
+        const events = await getDayEvents(selectedDate);
+        const event = events.find(e => String(e.id) === String(eventId));
         
         if (!event) {
             showToast('Nie znaleziono wydarzenia', 'error');
             return;
         }
         
-        document.getElementById('event-id').value = event.id;
+        // Seria cykliczna jest edytowana w całości, bez zmiany reguły
+        const recurring = event.recurrence_id !== undefined;
+        document.getElementById('event-id').value = recurring ? '' : event.id;
+        document.getElementById('event-recurrence-id').value = recurring ? event.recurrence_id : '';
+        document.getElementById('repeat-group').style.display = 'none';
         document.getElementById('event-date').value = event.date;
         document.getElementById('start-time').value = event.start_time;
         document.getElementById('end-time').value = event.end_time || '';
+        document.getElementById('event-end-date').value = event.end_date || '';
+        document.getElementById('event-all-day').checked = Boolean(event.all_day);
+        editedSpansDays = spansDays(event);
+        toggleAllDay();
         document.getElementById('event-title').value = event.title;
         document.getElementById('event-description').value = event.description || '';
-        document.getElementById('modal-title').textContent = 'Edytuj wydarzenie';
+        document.getElementById('modal-title').textContent = recurring ? 'Edytuj serię wydarzeń' : 'Edytuj wydarzenie';
         
         document.getElementById('event-modal').style.display = 'block';
     } catch (error) {
@@ -253,36 +544,137 @@ async function editEvent(eventId) {
     }
 }
 
-async function deleteEvent(eventId, eventTitle) {
+async function deleteEvent(eventId, eventTitle, multiDay = false) {
     if (!confirm(`Czy na pewno chcesz usunąć wydarzenie "${eventTitle}"?`)) {
         return;
     }
     
+    const dateString = selectedDate;
+    applyLocalChange(dateString, events => events.filter(event => String(event.id) !== String(eventId)));
+    
+    try {
+        await apiCall(`/api/events/${eventId}`, { method: 'DELETE', background: true });
+        showToast('Wydarzenie zostało usunięte', 'success');
+    } catch (error) {
+        console.error('Failed to delete event:', error);
+    } finally {
+        syncAfterChange(dateString, multiDay);
+    }
+}
+
+function syncAfterChange(dateString, multiDay) {
+    // Wydarzenie wielodniowe jest w kopiach kilku dni i miesięcy - pełne uzgodnienie z serwerem
+    if (multiDay) {
+        invalidateMonthStore();
+        syncMonth(monthKey(currentYear, currentMonth));
+    } else {
+        syncMonth(dateString);
+    }
+}
+
+function toggleAllDay() {
+    // Wydarzenie całodniowe nie ma godzin
+    const allDay = document.getElementById('event-all-day').checked;
+    for (const id of ['start-time', 'end-time']) {
+        const input = document.getElementById(id);
+        input.disabled = allDay;
+        input.required = id === 'start-time' && !allDay;
+    }
+}
+
+async function deleteOccurrence(recurrenceId, date, eventTitle) {
+    if (!confirm(`Czy na pewno chcesz usunąć wydarzenie "${eventTitle}" z dnia ${date}?`)) {
+        return;
+    }
+    
+    applyLocalChange(date, events => events.filter(event => event.id !== `r${recurrenceId}:${date}`));
+    
     try {
-        await apiCall(`/api/events/${eventId}`, { method: 'DELETE' });
+        await apiCall(`/api/recurring/${recurrenceId}/occurrences/${date}`, { method: 'DELETE', background: true });
         showToast('Wydarzenie zostało usunięte', 'success');
+    } catch (error) {
+        console.error('Failed to delete occurrence:', error);
+    } finally {
+        syncMonth(date);
+    }
+}
+
+async function deleteSeries(recurrenceId, eventTitle) {
+    if (!confirm(`Czy na pewno chcesz usunąć wszystkie wystąpienia "${eventTitle}"?`)) {
+        return;
+    }
+    
+    try {
+        await apiCall(`/api/recurring/${recurrenceId}`, { method: 'DELETE' });
+        showToast('Seria wydarzeń została usunięta', 'success');
         
+        invalidateMonthStore();
         await loadCalendar(currentYear, currentMonth);
         if (selectedDate) {
             await loadEventsForDate(selectedDate);
         }
     } catch (error) {
-        console.error('Failed to delete event:', error);
+        console.error('Failed to delete series:', error);
     }
 }
 
+function buildRepeatRule() {
+    const frequency = document.getElementById('event-repeat').value;
+    if (!frequency) {
+        return null;
+    }
+    
+    const until = document.getElementById('event-repeat-until').value;
+    return until ? `FREQ=${frequency};UNTIL=${until.replace(/-/g, '')}` : `FREQ=${frequency}`;
+}
+
 function showSearchModal() {
     document.getElementById('search-modal').style.display = 'block';
     document.getElementById('search-input').focus();
 }
 
 function closeSearchModal() {
+    resetSearch();
     document.getElementById('search-modal').style.display = 'none';
     document.getElementById('search-input').value = '';
-    document.getElementById('search-results').innerHTML = '<p class="search-placeholder">Wpisz frazę, aby wyszukać wydarzenia</p>';
+    showSearchMessage('Wpisz frazę, aby wyszukać wydarzenia');
 }
 
+// Lista wyników jest wirtualna: w DOM jest tylko stała pula wierszy widocznych w oknie,
+// a wyniki są pobierane stronami na żądanie (kursor strony albo offset przy skoku paskiem
+// przewijania) i trzymane w ograniczonej liczbie stron - pamięć nie zależy od liczby trafień.
 let searchTimeout;
+const SEARCH_PAGE_SIZE = 50;
+const SEARCH_ROW_HEIGHT = 80;
+const SEARCH_CACHED_PAGES = 8;
+// Największa wysokość obszaru przewijania (przeglądarki ograniczają wysokość elementu);
+// dłuższa lista jest skalowana do niej
+const SEARCH_MAX_SCROLL_HEIGHT = 1000000;
+let searchQuery = '';
+let searchGeneration = 0;
+// Wszystkie wiersze listy: serie cykliczne (z pierwszej strony), potem wydarzenia
+let searchTotal = 0;
+let searchSeries = [];
+let searchPages = new Map();
+let searchCursors = new Map();
+let searchRequested = new Set();
+let searchFrame = null;
+
+function resetSearch() {
+    searchGeneration++;
+    searchTotal = 0;
+    searchSeries = [];
+    searchPages.clear();
+    searchCursors.clear();
+    searchRequested.clear();
+}
+
+function showSearchMessage(message) {
+    const container = document.getElementById('search-results');
+    container.classList.remove('virtual');
+    container.innerHTML = `<p class="search-placeholder">${message}</p>`;
+}
+
 async function performSearch() {
     const query = document.getElementById('search-input').value.trim();
     
@@ -291,48 +683,172 @@ async function performSearch() {
     }
     
     if (query.length < 2) {
-        document.getElementById('search-results').innerHTML = '<p class="search-placeholder">Wpisz co najmniej 2 znaki</p>';
+        resetSearch();
+        showSearchMessage('Wpisz co najmniej 2 znaki');
         return;
     }
     
     searchTimeout = setTimeout(async () => {
-        try {
-            const results = await apiCall(`/api/search?q=${encodeURIComponent(query)}`);
-            renderSearchResults(results);
-        } catch (error) {
-            console.error('Search failed:', error);
+        resetSearch();
+        searchQuery = query;
+        await fetchSearchPage(0);
+    }, 150);
+}
+
+async function fetchSearchPage(page) {
+    if (searchRequested.has(page)) {
+        return;
+    }
+    searchRequested.add(page);
+    const generation = searchGeneration;
+    
+    try {
+        let url = `/api/search?q=${encodeURIComponent(searchQuery)}&limit=${SEARCH_PAGE_SIZE}`;
+        if (page === 0) {
+            url += '&count=1';
+        } else if (searchCursors.has(page)) {
+            url += `&cursor=${encodeURIComponent(searchCursors.get(page))}`;
+        } else {
+            url += `&offset=${page * SEARCH_PAGE_SIZE}`;
+        }
+        // Kolejne strony w tle - w ich miejscu lista pokazuje wiersze "Wczytywanie..."
+        const result = await apiCall(url, { background: page > 0 });
+        
+        // Odpowiedź na wcześniejsze zapytanie - użytkownik pisze dalej
+        if (generation !== searchGeneration) {
+            return;
+        }
+        
+        if (page === 0) {
+            searchSeries = result.series;
+            searchTotal = searchSeries.length + result.total;
+            if (searchTotal === 0) {
+                showSearchMessage('Nie znaleziono żadnych wydarzeń');
+                return;
+            }
+            setupSearchList();
+        }
+        searchPages.set(page, result.results);
+        if (result.next_cursor) {
+            searchCursors.set(page + 1, result.next_cursor);
         }
-    }, 300);
+        evictSearchPages(page);
+        renderSearchResults();
+    } catch (error) {
+        console.error('Search failed:', error);
+    } finally {
+        if (generation === searchGeneration) {
+            searchRequested.delete(page);
+        }
+    }
 }
 
-function renderSearchResults(results) {
+function evictSearchPages(currentPage) {
+    // Zostają strony najbliższe ostatnio wczytanej
+    const pages = [...searchPages.keys()].sort((a, b) => Math.abs(b - currentPage) - Math.abs(a - currentPage));
+    while (searchPages.size > SEARCH_CACHED_PAGES) {
+        searchPages.delete(pages.shift());
+    }
+}
+
+function setupSearchList() {
     const container = document.getElementById('search-results');
+    container.classList.add('virtual');
+    container.innerHTML = '<div class="search-spacer"></div><div class="search-rows"></div>';
+    container.scrollTop = 0;
+    container.querySelector('.search-spacer').style.height =
+        `${Math.min(searchTotal * SEARCH_ROW_HEIGHT, SEARCH_MAX_SCROLL_HEIGHT)}px`;
     
-    if (results.length === 0) {
-        container.innerHTML = '<p class="search-placeholder">Nie znaleziono żadnych wydarzeń</p>';
+    // Pula wierszy na wysokość okna (+1 na częściowo widoczny)
+    const rows = container.querySelector('.search-rows');
+    const count = Math.ceil(container.clientHeight / SEARCH_ROW_HEIGHT) + 1;
+    for (let i = 0; i < count; i++) {
+        const row = document.createElement('div');
+        row.className = 'search-result';
+        row.innerHTML = `
+            <div class="search-result-date"></div>
+            <div class="search-result-title"></div>
+            <div class="search-result-description"></div>
+        `;
+        rows.appendChild(row);
+    }
+}
+
+function searchRowAt(index) {
+    // Wiersz listy albo null, jeśli jego strona nie jest jeszcze wczytana (wtedy jest pobierana)
+    if (index < searchSeries.length) {
+        return searchSeries[index];
+    }
+    const position = index - searchSeries.length;
+    const page = Math.floor(position / SEARCH_PAGE_SIZE);
+    const results = searchPages.get(page);
+    if (!results) {
+        fetchSearchPage(page);
+        return null;
+    }
+    return results[position % SEARCH_PAGE_SIZE] || null;
+}
+
+function scheduleSearchRender() {
+    if (!searchFrame) {
+        searchFrame = requestAnimationFrame(() => {
+            searchFrame = null;
+            renderSearchResults();
+        });
+    }
+}
+
+function renderSearchResults() {
+    const container = document.getElementById('search-results');
+    const rows = container.querySelector('.search-rows');
+    if (!rows) {
         return;
     }
     
-    container.innerHTML = '';
+    // Powyżej SEARCH_MAX_SCROLL_HEIGHT pozycja paska jest przeliczana na pozycję w całej liście
+    const fullHeight = searchTotal * SEARCH_ROW_HEIGHT;
+    let position = container.scrollTop;
+    if (fullHeight > SEARCH_MAX_SCROLL_HEIGHT) {
+        const scrollable = Math.max(container.scrollHeight - container.clientHeight, 1);
+        position = container.scrollTop / scrollable * Math.max(fullHeight - container.clientHeight, 0);
+    }
+    const first = Math.floor(position / SEARCH_ROW_HEIGHT);
+    rows.style.transform = `translateY(${container.scrollTop - position % SEARCH_ROW_HEIGHT}px)`;
     
-    results.forEach(event => {
-        const resultDiv = document.createElement('div');
-        resultDiv.className = 'search-result';
-        resultDiv.innerHTML = `
-            <div class="search-result-date">${formatDate(event.date)} o ${event.start_time}</div>
-            <div class="search-result-title">${event.title}</div>
-            ${event.description ? `<div class="search-result-description">${event.description}</div>` : ''}
-        `;
-        
-        resultDiv.addEventListener('click', () => {
-            closeSearchModal();
-            goToEvent(event);
-        });
+    Array.from(rows.children).forEach((row, i) => {
+        const index = first + i;
+        row.dataset.index = index;
+        row.style.visibility = index < searchTotal ? 'visible' : 'hidden';
+        if (index >= searchTotal) {
+            return;
+        }
         
-        container.appendChild(resultDiv);
+        const event = searchRowAt(index);
+        const [dateLine, titleLine, descriptionLine] = row.children;
+        if (!event) {
+            dateLine.textContent = '';
+            titleLine.textContent = 'Wczytywanie...';
+            descriptionLine.textContent = '';
+            return;
+        }
+        dateLine.textContent = `${formatDate(event.date)} o ${event.start_time}`;
+        titleLine.textContent = event.recurrence_id !== undefined ? `↻ ${event.title}` : event.title;
+        descriptionLine.textContent = event.description || '';
     });
 }
 
+function openSearchResult(e) {
+    const row = e.target.closest('.search-result');
+    if (!row || row.dataset.index === undefined) {
+        return;
+    }
+    const event = searchRowAt(Number(row.dataset.index));
+    if (event) {
+        closeSearchModal();
+        goToEvent(event);
+    }
+}
+
 function formatDate(dateString) {
     const date = new Date(dateString);
     const dayName = dayNames[date.getDay() === 0 ? 6 : date.getDay() - 1];
@@ -340,22 +856,161 @@ function formatDate(dateString) {
 }
 
 async function goToEvent(event) {
-    const eventDate = new Date(event.date);
-    currentYear = eventDate.getFullYear();
-    currentMonth = eventDate.getMonth() + 1;
+    await goToDate(event.date);
+}
+
+async function goToDate(dateString) {
+    const date = new Date(dateString);
+    currentYear = date.getFullYear();
+    currentMonth = date.getMonth() + 1;
     
     await loadCalendar(currentYear, currentMonth);
-    await selectDate(event.date);
+    await selectDate(dateString);
+}
+
+// Widok roku: mapa cieplna dni (kolumna - tydzień, wiersz - dzień tygodnia). Liczba
+// wydarzeń i zajęte minuty całego zakresu (do 10 lat) to jedno zapytanie /api/summary
+// o sumy dzienne; ostatnie zakresy są trzymane z ETagiem i sprawdzane zapytaniem warunkowym.
+const HEATMAP_LEVELS = 4;
+const SUMMARY_STORE_SIZE = 8;
+const DAY_MS = 24 * 60 * 60 * 1000;
+const summaryStore = new Map();
+let heatmapLastYear = null;
+let heatmapSpan = 1;
+let heatmapGeneration = 0;
+
+function showYearView() {
+    heatmapLastYear = currentYear;
+    document.getElementById('year-modal').style.display = 'block';
+    loadHeatmap();
+}
+
+function closeYearView() {
+    heatmapGeneration++;
+    document.getElementById('year-modal').style.display = 'none';
+}
+
+function changeHeatmapYears(delta) {
+    heatmapLastYear += delta * heatmapSpan;
+    loadHeatmap();
+}
+
+function changeHeatmapSpan() {
+    heatmapSpan = Number(document.getElementById('year-span').value);
+    loadHeatmap();
+}
+
+async function fetchSummary(from, to) {
+    const key = `${from}/${to}`;
+    const cached = summaryStore.get(key);
+    const headers = cached ? { 'If-None-Match': `"${cached.etag}"` } : {};
+    const response = await fetch(`/api/summary?from=${from}&to=${to}`, { headers });
+    
+    if (response.status === 304 && cached) {
+        return cached.days;
+    }
+    if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+    }
+    
+    const data = await response.json();
+    summaryStore.delete(key);
+    summaryStore.set(key, { days: data.days, etag: (response.headers.get('ETag') || '').replace(/"/g, '') });
+    while (summaryStore.size > SUMMARY_STORE_SIZE) {
+        summaryStore.delete(summaryStore.keys().next().value);
+    }
+    return data.days;
+}
+
+async function loadHeatmap() {
+    const firstYear = heatmapLastYear - heatmapSpan + 1;
+    const lastYear = heatmapLastYear;
+    const generation = ++heatmapGeneration;
+    document.getElementById('year-title').textContent = heatmapSpan === 1 ? `${lastYear}` : `${firstYear} - ${lastYear}`;
+    
+    try {
+        const days = await fetchSummary(`${firstYear}-01-01`, `${lastYear}-12-31`);
+        // Użytkownik przeszedł już do innego zakresu albo zamknął widok
+        if (generation !== heatmapGeneration) {
+            return;
+        }
+        renderHeatmap(firstYear, lastYear, days);
+    } catch (error) {
+        console.error('Failed to load summary:', error);
+        showToast('Wystąpił błąd podczas łączenia z serwerem', 'error');
+    }
+}
+
+function heatLevel(count, minutes, maxMinutes) {
+    // Poziom koloru według zajętego czasu względem najbardziej zajętego dnia zakresu
+    if (!count) {
+        return 0;
+    }
+    return maxMinutes ? Math.max(1, Math.ceil(minutes / maxMinutes * HEATMAP_LEVELS)) : 1;
+}
+
+function eventCountLabel(count) {
+    if (count === 1) {
+        return '1 wydarzenie';
+    }
+    const few = count % 10 >= 2 && count % 10 <= 4 && (count % 100 < 12 || count % 100 > 14);
+    return `${count} ${few ? 'wydarzenia' : 'wydarzeń'}`;
+}
+
+function renderHeatmap(firstYear, lastYear, days) {
+    // Cały zakres jako jeden tekst HTML - kilka tysięcy komórek bez osobnych wstawień do DOM
+    const maxMinutes = Object.values(days).reduce((max, [, minutes]) => Math.max(max, minutes), 0);
+    const parts = [];
+    
+    for (let year = firstYear; year <= lastYear; year++) {
+        const first = Date.UTC(year, 0, 1);
+        // Kolumna pierwszego dnia tygodnia; tydzień zaczyna się w poniedziałek
+        const offset = (new Date(first).getUTCDay() + 6) % 7;
+        
+        parts.push(`<div class="heatmap-year"><div class="heatmap-year-label">${year}</div><div class="heatmap-months">`);
+        for (let month = 0; month < 12; month++) {
+            const column = Math.floor((offset + (Date.UTC(year, month, 1) - first) / DAY_MS) / 7) + 1;
+            parts.push(`<span style="grid-column: ${column}">${monthNames[month].slice(0, 3)}</span>`);
+        }
+        parts.push('</div><div class="heatmap-grid">');
+        
+        for (let i = 0; i < offset; i++) {
+            parts.push('<span class="heat-cell empty"></span>');
+        }
+        for (let time = first; new Date(time).getUTCFullYear() === year; time += DAY_MS) {
+            const dateString = new Date(time).toISOString().slice(0, 10);
+            const [count, minutes] = days[dateString] || [0, 0];
+            const busy = minutes >= 60 ? `${Math.floor(minutes / 60)} h ${minutes % 60} min` : `${minutes} min`;
+            const description = count ? `${eventCountLabel(count)}, ${busy}` : 'brak wydarzeń';
+            parts.push(`<span class="heat-cell heat-${heatLevel(count, minutes, maxMinutes)}" data-date="${dateString}" ` +
+                       `title="${formatDate(dateString)} ${year}: ${description}"></span>`);
+        }
+        parts.push('</div></div>');
+    }
+    
+    document.getElementById('heatmap').innerHTML = parts.join('');
+}
+
+function openHeatmapDay(e) {
+    const cell = e.target.closest('.heat-cell[data-date]');
+    if (!cell) {
+        return;
+    }
+    closeYearView();
+    goToDate(cell.dataset.date);
 }
 
 document.getElementById('event-form').addEventListener('submit', async function(e) {
     e.preventDefault();
     
     const eventId = document.getElementById('event-id').value;
+    const allDay = document.getElementById('event-all-day').checked;
     const eventData = {
         date: document.getElementById('event-date').value,
-        start_time: document.getElementById('start-time').value,
-        end_time: document.getElementById('end-time').value || null,
+        start_time: allDay ? '00:00' : document.getElementById('start-time').value,
+        end_time: allDay ? null : document.getElementById('end-time').value || null,
+        end_date: document.getElementById('event-end-date').value || null,
+        all_day: allDay,
         title: document.getElementById('event-title').value.trim(),
         description: document.getElementById('event-description').value.trim()
     };
@@ -365,32 +1020,79 @@ document.getElementById('event-form').addEventListener('submit', async function(
         return;
     }
     
+    const recurrenceId = document.getElementById('event-recurrence-id').value;
+    const rrule = eventId ? null : buildRepeatRule();
+    
+    if (recurrenceId || rrule) {
+        await saveSeries(recurrenceId, eventData, rrule);
+        return;
+    }
+    
+    // Zwykłe wydarzenie - zmiana widoczna od razu, serwer potwierdza w tle
+    closeEventModal();
+    const dateString = eventData.date;
+    const multiDay = spansDays(eventData) || editedSpansDays;
+    const localId = eventId ? Number(eventId) : `tmp-${Date.now()}`;
+    applyLocalChange(dateString, events => events
+        .filter(event => event.id !== localId)
+        .concat([{ ...eventData, id: localId }]));
+    
     try {
         if (eventId) {
             await apiCall(`/api/events/${eventId}`, {
                 method: 'PUT',
-                body: JSON.stringify(eventData)
+                body: JSON.stringify(eventData),
+                background: true
             });
             showToast('Wydarzenie zostało zaktualizowane', 'success');
         } else {
-            await apiCall('/api/events', {
+            const saved = await apiCall('/api/events', {
                 method: 'POST',
-                body: JSON.stringify(eventData)
+                body: JSON.stringify({ ...eventData, tz: browserTimeZone }),
+                background: true
             });
+            // Strumień zmian mógł już dostarczyć zapisane wydarzenie
+            applyLocalChange(dateString, events => events
+                .filter(event => event.id !== saved.id)
+                .map(event => event.id === localId ? saved : event));
             showToast('Wydarzenie zostało dodane', 'success');
         }
+    } catch (error) {
+        console.error('Failed to save event:', error);
+    } finally {
+        syncAfterChange(dateString, multiDay);
+    }
+});
+
+async function saveSeries(recurrenceId, eventData, rrule) {
+    try {
+        if (recurrenceId) {
+            // Data pierwszego wystąpienia serii pozostaje bez zmian
+            delete eventData.date;
+            await apiCall(`/api/recurring/${recurrenceId}`, {
+                method: 'PUT',
+                body: JSON.stringify(eventData)
+            });
+            showToast('Seria wydarzeń została zaktualizowana', 'success');
+        } else {
+            await apiCall('/api/recurring', {
+                method: 'POST',
+                body: JSON.stringify({ ...eventData, rrule })
+            });
+            showToast('Wydarzenie cykliczne zostało dodane', 'success');
+        }
         
         closeEventModal();
+        invalidateMonthStore();
         
         await loadCalendar(currentYear, currentMonth);
         if (selectedDate) {
             await loadEventsForDate(selectedDate);
         }
-        
     } catch (error) {
-        console.error('Failed to save event:', error);
+        console.error('Failed to save series:', error);
     }
-});
+}
 
 function showLoading() {
     document.getElementById('loading').style.display = 'flex';
@@ -411,9 +1113,14 @@ function showToast(message, type = 'success') {
 }
 
 document.addEventListener('DOMContentLoaded', function() {
+    document.getElementById('search-results').addEventListener('scroll', scheduleSearchRender);
+    document.getElementById('search-results').addEventListener('click', openSearchResult);
+    document.getElementById('heatmap').addEventListener('click', openHeatmapDay);
+    
     window.addEventListener('click', function(e) {
         const eventModal = document.getElementById('event-modal');
         const searchModal = document.getElementById('search-modal');
+        const yearModal = document.getElementById('year-modal');
         
         if (e.target === eventModal) {
             closeEventModal();
@@ -421,12 +1128,16 @@ document.addEventListener('DOMContentLoaded', function() {
         if (e.target === searchModal) {
             closeSearchModal();
         }
+        if (e.target === yearModal) {
+            closeYearView();
+        }
     });
     
     document.addEventListener('keydown', function(e) {
         if (e.key === 'Escape') {
             closeEventModal();
             closeSearchModal();
+            closeYearView();
         }
         
         if (e.key === 'n' && e.ctrlKey) {
@@ -457,4 +1168,5 @@ function initializeFromHTML() {
 document.addEventListener('DOMContentLoaded', function() {
     initializeFromHTML();
     loadCalendar(currentYear, currentMonth);
+    connectChangeStream();
 });
\ No newline at end of file
@@ -0,0 +1,425 @@
+"""
+Wspólny interfejs przechowywania wydarzeń z wymiennymi backendami
+
+Aplikacja webowa (main.py) i wersja desktopowa (event_manager.py) używają
+tego samego interfejsu Storage. Backend wybiera adres bazy danych:
+    
+    calendar.db, sqlite:///calendar.db      - SQLite (DatabaseManager, strojony ręcznie)
+    memory://                               - w pamięci procesu (testy, benchmarki)
+    sqlalchemy:sqlite:///calendar.db        - SQLAlchemy Core (zastępnik PostgreSQL)
+    postgresql://user@host/kalendarz        - SQLAlchemy Core z właściwym sterownikiem
+
+Backend implementuje zapisy, odczyty po kluczu, stronicowanie i dziennik
+zmian; zapytania złożone (widok dnia i miesiąca, podsumowania, przedziały
+do wykrywania kolizji, wyszukiwanie z seriami) mają tu wspólną implementację
+opartą o get_events_between, którą backend może zastąpić szybszym zapytaniem.
+
+Argumenty dat to tekst 'YYYY-MM-DD', godziny 'HH:MM', zakresy dat są
+półotwarte [start_date, end_date). Wydarzenia i wystąpienia serii są
+zwracane jako EventRecord (event_record.py), serie jako krotki
+(id, date, start_time, end_time, title, description, rrule, exdates).
+
+Data i godziny wydarzenia są w jego strefie czasowej (tz, nazwa IANA);
+backend zapisuje też chwile początku i końca w UTC (timezones.py), po
+których get_events_in_window wybiera wydarzenia z okna UTC.
+
+Wydarzenia wielodniowe (z datą końca, także całodniowe na kilka dni) są
+w zakresie dat, jeśli go dotykają - również te zaczęte wcześniej. Backend
+znajduje je osobnym zapytaniem o nakładanie się przedziałów
+(_multi_day_events), a podsumowania dni liczą je w każdym dniu, który zajmują.
+"""
+
+import heapq
+import os
+from datetime import datetime, timedelta
+from itertools import chain
+
+import recurrence
+import timezones
+from change_log import CHANGES_PAGE_SIZE
+from event_record import EPOCH_DAY, EventRecord, date_to_day, day_to_date, event_span
+from interval_index import MINUTES_PER_DAY
+
+MEMORY_URL = "memory://"
+SQLALCHEMY_PREFIX = "sqlalchemy:"
+SQLITE_PREFIX = "sqlite:///"
+
+
+def month_range(year, month):
+    """Zakres dat miesiąca jako para [pierwszy dzień, pierwszy dzień następnego)"""
+    next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return f"{year:04d}-{month:02d}-01", f"{next_year:04d}-{next_month:02d}-01"
+
+
+def _next_day(event_date):
+    return (datetime.strptime(event_date, "%Y-%m-%d").date() + timedelta(days=1)).strftime("%Y-%m-%d")
+
+
+def _range_key(record):
+    """Klucz łączenia wyników zakresu: (dzień, godzina rozpoczęcia)"""
+    return record.day, record.start
+
+
+def _window_key(item):
+    """Klucz łączenia wyników okna UTC: (start_utc, end_utc, rekord) -> start_utc"""
+    return item[0]
+
+
+def overlaps_window(start_utc, end_utc, window_start, window_end):
+    """Czy wydarzenie [start_utc, end_utc) nakłada się na okno (bez końca - chwila start_utc)"""
+    if start_utc >= window_end:
+        return False
+    return start_utc >= window_start if end_utc is None else end_utc > window_start
+
+
+def window_dates(window_start, window_end):
+    """Zakres dat lokalnych [od, do) obejmujący okno UTC w każdej strefie
+    
+    Offsety stref mieszczą się w ±14 h, a wydarzenie zaczęte wcześniej
+    może trwać do MAX_EVENT_MINUTES.
+    """
+    first = (window_start - timezones.MAX_EVENT_MINUTES - 14 * 60) // MINUTES_PER_DAY + EPOCH_DAY
+    last = (window_end + 14 * 60) // MINUTES_PER_DAY + EPOCH_DAY + 1
+    return day_to_date(first), day_to_date(last)
+
+
+def event_values(event_date, start_time, end_time, title, description="", tz=None, end_date=None, all_day=False):
+    """Pola zapisywanego wydarzenia z jego strefą, zakresem dni i chwilami UTC
+    
+    (date, start_time, end_time, title, description, tz, end_date, all_day,
+    start_utc, end_utc, start_ts, end_ts); tz=None - strefa domyślna
+    kalendarza, nieznana strefa zgłasza ValueError. end_date zostaje tylko
+    dla wydarzeń wielodniowych (event_record.event_span), całodniowe
+    zaczynają się o 00:00 bez godziny końcowej.
+    """
+    tz = timezones.resolve_zone_name(tz)
+    if all_day:
+        start_time, end_time = "00:00", None
+    start_ts, end_ts, end_date = event_span(event_date, start_time, end_time, end_date, all_day)
+    return (event_date, start_time, end_time, title, description, tz, end_date, int(bool(all_day)),
+            timezones.local_to_utc(start_ts, tz), None if end_ts is None else timezones.local_to_utc(end_ts, tz),
+            start_ts, end_ts)
+
+
+def day_totals(event, first_day, end_day):
+    """(dzień, zajęte minuty) dla dni zakresu [first_day, end_day), w których trwa wydarzenie
+    
+    Jednodniowe liczy się w dniu rozpoczęcia, wielodniowe w każdym dniu
+    z częścią przedziału przypadającą na ten dzień.
+    """
+    if not event.multi_day:
+        return [(event.day, event.busy_minutes)]
+    return [(day, event.day_minutes(day))
+            for day in range(max(event.day, first_day), min(event.last_day + 1, end_day))]
+
+
+class Storage:
+    """Interfejs magazynu wydarzeń i serii cyklicznych"""
+    
+    # Czy wyszukiwanie korzysta z indeksu pełnotekstowego (ranking trafności)
+    fts_enabled = False
+    
+    # --- Operacje zależne od backendu ---
+    
+    def transaction(self):
+        """Kontekst transakcji; zagnieżdżone transakcje są częścią zewnętrznej"""
+        raise NotImplementedError
+    
+    def close(self):
+        """Zwalnia połączenia z bazą danych"""
+        raise NotImplementedError
+    
+    def add_event(self, event_date, start_time, end_time, title, description="", tz=None, end_date=None,
+                  all_day=False):
+        """Dodaje wydarzenie i zwraca jego id (tz=None - strefa domyślna kalendarza)"""
+        raise NotImplementedError
+    
+    def add_events_bulk(self, events):
+        """Dodaje wiele wydarzeń (date, start_time, end_time, title, description[, tz, end_date, all_day])
+        w jednej transakcji"""
+        raise NotImplementedError
+    
+    def update_event(self, event_id, start_time, end_time, title, description, event_date=None, tz=None,
+                     end_date=None, all_day=False):
+        """Aktualizuje wydarzenie (z event_date także przenosi je na inny dzień, z tz - do innej strefy)
+        
+        end_date i all_day są zastępowane jak pozostałe pola (None - wydarzenie jednodniowe).
+        """
+        raise NotImplementedError
+    
+    def delete_event(self, event_id):
+        raise NotImplementedError
+    
+    def get_event_by_id(self, event_id):
+        """EventRecord wydarzenia albo None"""
+        raise NotImplementedError
+    
+    def get_events_by_ids(self, event_ids):
+        """Wydarzenia o podanych id (kolejność dowolna, nieistniejące pominięte)"""
+        raise NotImplementedError
+    
+    def _iter_single_events(self, start_date, end_date, batch_size):
+        """Zwykłe (niecykliczne) wydarzenia z zakresu jako EventRecord
+        
+        Wydarzenia zaczynające się w zakresie (także wielodniowe), posortowane
+        po (date, start_time, id); backend pobiera je porcjami po batch_size wierszy.
+        """
+        raise NotImplementedError
+    
+    def _multi_day_events(self, start_date, end_date):
+        """Wydarzenia wielodniowe nakładające się na zakres [start_date, end_date)
+        
+        Lista EventRecord posortowana po (date, start_time, id) - z indeksu
+        przedziałów backendu, bez przeglądania wydarzeń jednodniowych.
+        """
+        raise NotImplementedError
+    
+    def _single_day_totals(self, start_date, end_date):
+        """Sumy dni zakresu utrzymywane przez backend przy zapisach - tylko zwykłe wydarzenia jednodniowe
+        
+        Słownik {data: (liczba_wydarzeń, zajęte_minuty)} albo None, jeśli
+        backend ich nie ma (get_daily_summary liczy wtedy z wydarzeń).
+        """
+        return None
+    
+    def _continuing_events(self, start_date, end_date):
+        """Wydarzenia wielodniowe zaczęte przed start_date, które trwają jeszcze w zakresie"""
+        return [event for event in self._multi_day_events(start_date, end_date) if event.date < start_date]
+    
+    def _single_events_in_window(self, window_start, window_end):
+        """Zwykłe wydarzenia nakładające się na okno UTC jako (start_utc, end_utc, EventRecord)
+        
+        Tylko wydarzenia z start_utc >= window_start - MAX_EVENT_MINUTES
+        (dłuższe dodaje get_events_in_window), posortowane po start_utc.
+        Ta wersja przelicza każdy wiersz z dat lokalnych - backend zastępuje
+        ją skanem indeksu chwil UTC.
+        """
+        found = []
+        for event in self._iter_single_events(*window_dates(window_start, window_end), 1000):
+            start_utc, end_utc = self._event_utc_range(event)
+            if start_utc >= window_start - timezones.MAX_EVENT_MINUTES and \
+                    overlaps_window(start_utc, end_utc, window_start, window_end):
+                found.append((start_utc, end_utc, event))
+        found.sort(key=_window_key)
+        return found
+    
+    @staticmethod
+    def _event_utc_range(event):
+        return timezones.event_utc_range(event.date, event.start_time, event.end_time,
+                                         event.tz or timezones.DEFAULT_TIMEZONE, event.end_date, event.all_day)
+    
+    def search_events_page(self, search_term, after=None, limit=None, offset=0):
+        """Wydarzenia pasujące do frazy w kolejności (date, start_time, id)
+        
+        after to pozycja (date, start_time, id) ostatniego wyniku poprzedniej
+        strony; offset pomija tyle wyników (skok do dowolnej strony bez
+        kursora); limit=None zwraca wszystkie pozostałe wyniki.
+        """
+        raise NotImplementedError
+    
+    def count_search_results(self, search_term):
+        """Liczba wydarzeń (bez serii) pasujących do frazy"""
+        return sum(1 for _ in self.search_events_page(search_term))
+    
+    def search_recurring(self, search_term):
+        """Serie pasujące do frazy (id, date, start_time, end_time, title,
+        description, rrule, exdates, last_date)"""
+        raise NotImplementedError
+    
+    def add_recurring_event(self, event_date, start_time, end_time, title, description, rule, exdates=""):
+        raise NotImplementedError
+    
+    def update_recurring_event(self, recurrence_id, event_date, start_time, end_time, title,
+                               description, rule, exdates=""):
+        raise NotImplementedError
+    
+    def delete_recurring_event(self, recurrence_id):
+        raise NotImplementedError
+    
+    def get_recurring_event(self, recurrence_id):
+        """Pobiera serię (id, date, start_time, end_time, title, description, rrule, exdates)"""
+        raise NotImplementedError
+    
+    def add_recurrence_exception(self, recurrence_id, occurrence_date):
+        """Pomija jedno wystąpienie serii (dopisuje datę do wyjątków)"""
+        raise NotImplementedError
+    
+    def get_recurring_between(self, start_date, end_date):
+        """Serie, które mogą mieć wystąpienia w zakresie [start_date, end_date)"""
+        raise NotImplementedError
+    
+    def get_changes_since(self, version, limit=CHANGES_PAGE_SIZE):
+        """Zmiany wydarzeń i serii zapisane po podanej wersji dziennika (jak change_log.read_changes)"""
+        raise NotImplementedError
+    
+    def get_current_version(self):
+        raise NotImplementedError
+    
+    def get_month_version(self, start_date, end_date, upto):
+        """Wersja ostatniej zmiany (najwyżej upto) dotyczącej dni [start_date, end_date)
+        
+        Zmiany serii dotyczą każdego zakresu (jak change_log.month_version).
+        """
+        raise NotImplementedError
+    
+    def prune_changes(self, keep):
+        """Przycina dziennik zmian do ostatnich keep wersji; zwraca liczbę usuniętych"""
+        raise NotImplementedError
+    
+    def connection_stats(self):
+        """Połączenia z bazą do metryk, np. {'open': 3, 'opened': 10} (backend bez połączeń - pusty)"""
+        return {}
+    
+    def trace_statements(self, callback):
+        """Wywołuje callback(sql) przed każdą instrukcją SQL wysłaną do bazy (None - wyłącza)"""
+    
+    # --- Operacje wspólne ---
+    
+    def get_occurrences_between(self, start_date, end_date):
+        """Zwraca leniwie wystąpienia serii cyklicznych z zakresu [start_date, end_date)
+        
+        Rekordy z identyfikatorem wystąpienia 'r<id>:YYYY-MM-DD'.
+        """
+        for event_date, *occurrence in recurrence.occurrences(self.get_recurring_between(start_date, end_date),
+                                                              start_date, end_date):
+            yield EventRecord.from_row(occurrence[0], event_date, *occurrence[1:])
+    
+    def get_events_in_window(self, window_start, window_end):
+        """Wydarzenia i wystąpienia serii nakładające się na okno UTC [window_start, window_end)
+        
+        Okno i wyniki w minutach UTC; lista (start_utc, end_utc, EventRecord)
+        posortowana po start_utc. Serie są w strefie domyślnej kalendarza.
+        """
+        dates = window_dates(window_start, window_end)
+        others = []
+        for occurrence in self.get_occurrences_between(*dates):
+            start_utc, end_utc = self._event_utc_range(occurrence)
+            if overlaps_window(start_utc, end_utc, window_start, window_end):
+                others.append((start_utc, end_utc, occurrence))
+        # Wielodniowe zaczęte wcześniej, niż sięga skan _single_events_in_window
+        for event in self._multi_day_events(*dates):
+            start_utc, end_utc = self._event_utc_range(event)
+            if start_utc < window_start - timezones.MAX_EVENT_MINUTES and end_utc > window_start:
+                others.append((start_utc, end_utc, event))
+        others.sort(key=_window_key)
+        return list(heapq.merge(self._single_events_in_window(window_start, window_end), others,
+                                key=_window_key))
+    
+    def get_events_between(self, start_date, end_date):
+        """Zwraca leniwie wydarzenia i wystąpienia serii z zakresu [start_date, end_date)"""
+        return self.iter_events_between(start_date, end_date)
+    
+    def iter_events_between(self, start_date, end_date, batch_size=1000, recurring_end=None):
+        """Strumieniuje wydarzenia z bardzo dużego zakresu porcjami
+        
+        Wydarzenia wielodniowe zaczęte przed zakresem są na początku, każde
+        wydarzenie występuje raz. Serie cykliczne są rozwijane tylko do
+        recurring_end, jeśli podano (zakres bez końca przy eksporcie).
+        """
+        occurrences_end = min(end_date, recurring_end) if recurring_end else end_date
+        return heapq.merge(chain(self._continuing_events(start_date, end_date),
+                                 self._iter_single_events(start_date, end_date, batch_size)),
+                           self.get_occurrences_between(start_date, occurrences_end),
+                           key=_range_key)
+    
+    def get_events_for_date(self, event_date):
+        """Wydarzenia dnia posortowane po godzinie"""
+        return list(self.get_events_between(event_date, _next_day(event_date)))
+    
+    def get_events_by_day(self, start_date, end_date):
+        """Wydarzenia zakresu pogrupowane po dniach: lista (dzień, [EventRecord]) posortowana po dniu
+        
+        Wydarzenie wielodniowe jest w każdym dniu zakresu, który zajmuje
+        (na pierwszym miejscu - zaczęło się wcześniej niż pozostałe).
+        """
+        first_day, end_day = date_to_day(start_date), date_to_day(end_date)
+        by_day = {}
+        for event in self.get_events_between(start_date, end_date):
+            if event.multi_day:
+                for day in range(max(event.day, first_day), min(event.last_day + 1, end_day)):
+                    by_day.setdefault(day, []).append(event)
+            else:
+                by_day.setdefault(event.day, []).append(event)
+        return sorted(by_day.items())
+    
+    def get_daily_summary(self, start_date, end_date):
+        """Liczba wydarzeń i zajęte minuty dla dni z zakresu [start_date, end_date)
+        
+        Zwraca słownik {data: (liczba_wydarzeń, zajęte_minuty)} - tylko dni z wydarzeniami.
+        Z sumami dziennymi backendu (_single_day_totals) przegląda tylko
+        wystąpienia serii i wydarzenia wielodniowe.
+        """
+        summary = self._single_day_totals(start_date, end_date)
+        if summary is None:
+            summary, events = {}, self.get_events_between(start_date, end_date)
+        else:
+            events = chain(self.get_occurrences_between(start_date, end_date),
+                           self._multi_day_events(start_date, end_date))
+        first_day, end_day = date_to_day(start_date), date_to_day(end_date)
+        for event in events:
+            for day, busy in day_totals(event, first_day, end_day):
+                event_date = day_to_date(day)
+                count, minutes = summary.get(event_date, (0, 0))
+                summary[event_date] = (count + 1, minutes + busy)
+        return summary
+    
+    def get_month_summary(self, year, month):
+        """Liczba wydarzeń i zajęte minuty dla dni miesiąca"""
+        return self.get_daily_summary(*month_range(year, month))
+    
+    def get_events_for_month(self, year, month):
+        """Liczba wydarzeń dla każdego dnia miesiąca, który je ma"""
+        return {event_date: count for event_date, (count, _) in self.get_month_summary(year, month).items()}
+    
+    def get_event_intervals(self, start_date, end_date):
+        """Wydarzenia z zakresu [start_date, end_date) do indeksu kolizji (opis może być pominięty)"""
+        return list(self.get_events_between(start_date, end_date))
+    
+    def search_single_events(self, search_term):
+        """Zwykłe wydarzenia pasujące do frazy, najtrafniejsze najpierw"""
+        return self.search_events_page(search_term)
+    
+    def search_events(self, search_term):
+        """Wyszukuje wydarzenia po tytule lub opisie, a po nich pasujące serie cykliczne"""
+        return list(self.search_single_events(search_term)) + self.search_recurring_events(search_term)
+    
+    def search_recurring_events(self, search_term):
+        """Wyszukuje serie cykliczne - jeden wynik na serię
+        
+        Rekordy z id serii 'r<id>' i datą najbliższego wystąpienia; zakończone
+        serie mają datę ostatniego.
+        """
+        results = []
+        for recurrence_id, first_date, start_time, end_time, title, description, rule, exdates, last_date \
+                in self.search_recurring(search_term):
+            shown_date = recurrence.next_occurrence(first_date, rule, exdates)
+            results.append(EventRecord.from_row(recurrence.series_id(recurrence_id),
+                                                shown_date or last_date or first_date,
+                                                start_time, end_time, title, description))
+        return results
+
+
+def open_storage(url="calendar.db", base_dir=None):
+    """Otwiera magazyn wskazany adresem (zob. opis modułu)
+    
+    Względne ścieżki plików SQLite są liczone od base_dir, jeśli podano.
+    """
+    def resolve(path):
+        if base_dir and path != ":memory:" and not os.path.isabs(path):
+            return os.path.join(base_dir, path)
+        return path
+    
+    if url == MEMORY_URL:
+        from memory_storage import MemoryStorage
+        return MemoryStorage()
+    if url.startswith(SQLALCHEMY_PREFIX) or "://" in url and not url.startswith(SQLITE_PREFIX):
+        from sqlalchemy_storage import SQLAlchemyStorage
+        url = url[len(SQLALCHEMY_PREFIX):] if url.startswith(SQLALCHEMY_PREFIX) else url
+        if url.startswith(SQLITE_PREFIX):
+            url = SQLITE_PREFIX + resolve(url[len(SQLITE_PREFIX):])
+        return SQLAlchemyStorage(url)
+    
+    from database import DatabaseManager
+    if url.startswith(SQLITE_PREFIX):
+        url = url[len(SQLITE_PREFIX):]
+    return DatabaseManager(resolve(url))
@@ -0,0 +1,162 @@
+"""
+Strefy czasowe wydarzeń i przeliczanie na UTC
+
+Wydarzenie ma datę i godziny w swojej strefie (IANA, np. 'Europe/Warsaw').
+Chwile początku i końca w UTC (minuty od 1970-01-01 00:00 UTC) są liczone
+raz przy zapisie i indeksowane - zapytanie o okno UTC to jeden skan zakresu.
+
+Godzina lokalna nieistniejąca (przestawienie zegara do przodu) jest
+przesuwana o długość przerwy, a powtarzająca się (cofnięcie zegara)
+oznacza pierwsze wystąpienie - jak datetime z fold=0.
+
+Widok w dowolnej strefie powstaje z chwil UTC przez tablicę przesunięć
+strefy (chwile zmian offsetu liczone raz dla danego zakresu lat), bez
+tworzenia obiektów datetime dla każdego wiersza.
+"""
+
+import bisect
+import threading
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from config import Config
+from event_record import EPOCH_DAY, date_to_timestamp, event_span
+from interval_index import MINUTES_PER_DAY
+
+DEFAULT_TIMEZONE = Config.TIMEZONE
+
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_UTC = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Najdłuższe wydarzenie bez daty końca w minutach UTC: doba lokalna plus
+# zmiana czasu (wielodniowe są wyszukiwane osobno)
+MAX_EVENT_MINUTES = MINUTES_PER_DAY + 180
+
+
+@lru_cache(maxsize=None)
+def get_zone(name):
+    """ZoneInfo dla nazwy IANA; nieznana strefa zgłasza ValueError"""
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Nieznana strefa czasowa: {name}") from None
+
+
+def resolve_zone_name(name=None):
+    """Nazwa strefy wydarzenia - podana (sprawdzona) albo domyślna kalendarza"""
+    name = name or DEFAULT_TIMEZONE
+    get_zone(name)
+    return name
+
+
+def local_to_utc(local_minutes, zone_name):
+    """Minuty czasu lokalnego strefy (od 1970-01-01 00:00) -> minuty UTC"""
+    moment = (_EPOCH + timedelta(minutes=local_minutes)).replace(tzinfo=get_zone(zone_name))
+    return local_minutes - int(moment.utcoffset().total_seconds()) // 60
+
+
+def event_utc_range(event_date, start_time, end_time, zone_name, end_date=None, all_day=False):
+    """Chwile (start, end) wydarzenia w minutach UTC; end None bez godziny końcowej
+    
+    Koniec jak w event_record.event_span - godzina końcowa wcześniejsza niż
+    początkowa (bez end_date) oznacza następny dzień.
+    """
+    start, end, _ = event_span(event_date, start_time, end_time, end_date, all_day)
+    return local_to_utc(start, zone_name), None if end is None else local_to_utc(end, zone_name)
+
+
+def local_day_window(event_date, zone_name):
+    """Doba lokalna strefy jako okno [start, end) minut UTC (23 lub 25 godzin w dni zmiany czasu)"""
+    day_start = date_to_timestamp(event_date)
+    return local_to_utc(day_start, zone_name), local_to_utc(day_start + MINUTES_PER_DAY, zone_name)
+
+
+def parse_utc(text):
+    """Chwila ISO 8601 ('2025-03-30T01:00Z', z offsetem albo bez - wtedy UTC) -> minuty UTC"""
+    moment = datetime.fromisoformat(text)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int((moment - _EPOCH_UTC).total_seconds()) // 60
+
+
+def format_utc(minutes):
+    """Minuty UTC -> 'YYYY-MM-DDTHH:MMZ'"""
+    day, minute = divmod(minutes, MINUTES_PER_DAY)
+    return f"{date.fromordinal(day + EPOCH_DAY).isoformat()}T{minute // 60:02d}:{minute % 60:02d}Z"
+
+
+def _utc_offset(zone, utc_minutes):
+    """Offset strefy w minutach w chwili UTC"""
+    moment = (_EPOCH_UTC + timedelta(minutes=utc_minutes)).astimezone(zone)
+    return int(moment.utcoffset().total_seconds()) // 60
+
+
+class OffsetTable:
+    """Offsety strefy od chwil UTC - lista zmian offsetu (przejść) w pokrytym zakresie
+    
+    Przejścia są szukane raz: offset jest próbkowany co dobę, a dokładna
+    minuta zmiany - wyszukiwaniem binarnym w dobie, w której się zmienił.
+    Zakres rozszerza się całymi latami, gdy przeliczane chwile wychodzą poza niego.
+    """
+    
+    def __init__(self, zone):
+        self.zone = zone
+        self._lock = threading.Lock()
+        # (pierwsza chwila, koniec zakresu, chwile przejść, offsety) - podmieniane w całości
+        self._table = None
+    
+    def _transitions(self, start, end):
+        """Przejścia [(chwila, offset)] w [start, end), pierwsze to offset w chwili start"""
+        previous = _utc_offset(self.zone, start)
+        result = [(start, previous)]
+        moment = start
+        while moment < end:
+            following = moment + MINUTES_PER_DAY
+            if _utc_offset(self.zone, following) != previous:
+                low, high = moment, following
+                while high - low > 1:
+                    middle = (low + high) // 2
+                    if _utc_offset(self.zone, middle) == previous:
+                        low = middle
+                    else:
+                        high = middle
+                previous = _utc_offset(self.zone, high)
+                result.append((high, previous))
+            moment = following
+        return result
+    
+    def _cover(self, low, high):
+        """Rozszerza tablicę, aby obejmowała chwile [low, high]"""
+        first = date_to_timestamp(f"{date.fromordinal(low // MINUTES_PER_DAY + EPOCH_DAY).year:04d}-01-01")
+        last = date_to_timestamp(f"{date.fromordinal(high // MINUTES_PER_DAY + EPOCH_DAY).year + 1:04d}-01-01")
+        with self._lock:
+            if self._table is not None:
+                first, last = min(first, self._table[0]), max(last, self._table[1])
+            transitions = self._transitions(first, last)
+            self._table = (first, last, [moment for moment, _ in transitions],
+                           [offset for _, offset in transitions])
+        return self._table
+    
+    def offsets(self, utc_values):
+        """Offsety (minuty) dla ciągu chwil UTC - jedno wyszukiwanie binarne na chwilę"""
+        if not utc_values:
+            return []
+        low, high = min(utc_values), max(utc_values)
+        table = self._table
+        if table is None or low < table[0] or high >= table[1]:
+            table = self._cover(low, high)
+        _, _, starts, offsets = table
+        find = bisect.bisect_right
+        return [offsets[find(starts, moment) - 1] for moment in utc_values]
+
+
+@lru_cache(maxsize=None)
+def offset_table(zone_name):
+    return OffsetTable(get_zone(zone_name))
+
+
+def utc_to_local(utc_values, zone_name):
+    """Chwile UTC (minuty) -> minuty czasu lokalnego strefy, całym ciągiem naraz"""
+    utc_values = list(utc_values)
+    return [moment + offset for moment, offset in zip(utc_values, offset_table(zone_name).offsets(utc_values))]
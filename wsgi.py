@@ -0,0 +1,24 @@
+"""
+Punkt wejścia WSGI dla serwera produkcyjnego
+    
+    gunicorn -c gunicorn.conf.py wsgi:application
+
+Ustawienia (baza danych, liczba workerów i wątków) są czytane ze
+zmiennych środowiskowych - zob. config.py.
+"""
+
+from main import app, get_storage, init_db
+
+# Schemat, indeksy i triggery są tworzone raz, przed uruchomieniem workerów
+init_db()
+# Migracje w tle są przerywane przez close() i workery ich nie wznawiają - starą
+# bazę proces nadrzędny uzupełnia do końca przed ich uruchomieniem (jak migrate-db)
+storage = get_storage()
+migrator = getattr(storage, 'migrator', None)
+if migrator is not None:
+    migrator.stop()
+    storage.run_migrations()
+# Połączenia otwarte w procesie nadrzędnym nie mogą przejść do workerów
+storage.close()
+
+application = app